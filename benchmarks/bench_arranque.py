@@ -0,0 +1,105 @@
+"""
+Tiempo de arranque de la aplicación hasta el primer pintado de la ventana principal.
+
+Lanza main.py en un proceso nuevo con la plataforma Qt 'offscreen', sobre una copia
+de data/ en una carpeta temporal (el arranque crea la base y el índice), y mide:
+  - tiempo hasta el primer QEvent.Paint de la ventana (desde el inicio del proceso),
+  - total de `python -X importtime` hasta ese momento y los módulos más costosos,
+  - qué módulos pesados (impresión, reportlab, tkinter) ya estaban cargados.
+Uso:
+    python -m benchmarks.bench_arranque [repeticiones]
+"""
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ('utils.print_manager', 'reportlab', 'tkinter', 'win32print', 'gui.admin_panel', 'gui.historial_window')
+
+# Se ejecuta en el proceso hijo: igual que main.py, pero termina en el primer pintado
+PROGRAMA = """
+import time
+inicio = time.perf_counter()
+import json, os, sys
+from PyQt5.QtCore import QObject, QEvent
+from PyQt5.QtWidgets import QApplication
+from gui.main_windows import BasculaApp
+
+class PrimerPintado(QObject):
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Paint:
+            print(json.dumps({
+                'primer_pintado_ms': (time.perf_counter() - inicio) * 1000,
+                'cargados': [m for m in %r if m in sys.modules],
+            }), flush=True)
+            os._exit(0)
+        return False
+
+app = QApplication(sys.argv)
+app.setStyle('Fusion')
+ventana = BasculaApp()
+filtro = PrimerPintado()
+ventana.installEventFilter(filtro)
+ventana.showMaximized()
+app.exec_()
+""" % (PESADOS,)
+
+_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def ejecutar(carpeta, importtime=False):
+    entorno = dict(os.environ, QT_QPA_PLATFORM='offscreen', PYTHONPATH=RAIZ)
+    comando = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROGRAMA]
+    inicio = time.perf_counter()
+    proceso = subprocess.run(comando, cwd=carpeta, env=entorno, capture_output=True, text=True, timeout=60)
+    total_ms = (time.perf_counter() - inicio) * 1000
+    lineas = [l for l in proceso.stdout.splitlines() if l.startswith('{')]
+    if not lineas:
+        raise RuntimeError(f"El arranque falló:\n{proceso.stderr[-2000:]}")
+    resultado = json.loads(lineas[-1])
+    resultado['proceso_ms'] = total_ms
+    resultado['stderr'] = proceso.stderr
+    return resultado
+
+
+def resumir_importtime(stderr, top=10):
+    propios = 0
+    nivel_superior = []
+    for linea in stderr.splitlines():
+        m = _IMPORTTIME.match(linea)
+        if not m:
+            continue
+        propio, acumulado, sangria, modulo = int(m.group(1)), int(m.group(2)), len(m.group(3)), m.group(4)
+        propios += propio
+        if sangria <= 1:
+            nivel_superior.append((acumulado, modulo))
+    nivel_superior.sort(reverse=True)
+    return propios / 1000, nivel_superior[:top]
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as carpeta:
+        shutil.copytree(os.path.join(RAIZ, 'data'), os.path.join(carpeta, 'data'))
+        ejecutar(carpeta)  # Calienta la caché del sistema de archivos y crea la base/índice
+        corridas = [ejecutar(carpeta) for _ in range(repeticiones)]
+        con_importtime = ejecutar(carpeta, importtime=True)
+
+    pintado = statistics.median(c['primer_pintado_ms'] for c in corridas)
+    proceso = statistics.median(c['proceso_ms'] for c in corridas)
+    total_imports, costosos = resumir_importtime(con_importtime['stderr'])
+    print(f"Primer pintado: mediana {pintado:.0f} ms (proceso completo {proceso:.0f} ms, {repeticiones} corridas)")
+    print(f"-X importtime hasta el primer pintado: {total_imports:.0f} ms")
+    for acumulado, modulo in costosos:
+        print(f"  {acumulado / 1000:8.1f} ms  {modulo}")
+    print(f"Módulos pesados cargados antes del primer pintado: {corridas[-1]['cargados'] or 'ninguno'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Búsqueda de productos por tecla sobre un catálogo sintético.
+
+Simula a un operario escribiendo, letra por letra, el inicio de descripciones y
+códigos reales del catálogo (con y sin tildes, y con errores de tipeo) y mide el
+tiempo de IndiceProductos.buscar() en cada tecla.
+Uso:
+    python -m benchmarks.bench_busqueda_productos [productos]
+"""
+import random
+import sys
+import time
+from core.core_main_windows.services.product_search_service import IndiceProductos
+
+PALABRAS = [
+    'Jabón', 'líquido', 'detergente', 'bolsa', 'polietileno', 'caja', 'cartón', 'película',
+    'stretch', 'rollo', 'etiqueta', 'adhesiva', 'tapa', 'botella', 'envase', 'bandeja',
+    'térmica', 'laminado', 'impresión', 'servicio', 'transporte', 'aceite', 'azúcar',
+    'harina', 'café', 'leche', 'algodón', 'papel', 'vinipel', 'cinta', 'canastilla',
+]
+
+
+def generar_catalogo(cantidad, semilla=7):
+    azar = random.Random(semilla)
+    productos = []
+    for i in range(cantidad):
+        palabras = azar.sample(PALABRAS, azar.randint(2, 4))
+        descripcion = ' '.join(palabras) + f" {azar.choice(['x', ''])}{azar.randint(1, 999)}"
+        productos.append((f"{i:06d}", descripcion.capitalize()))
+    return productos
+
+
+def con_error(texto, azar):
+    if len(texto) < 4:
+        return texto
+    i = azar.randrange(1, len(texto) - 1)
+    return texto[:i] + texto[i + 1] + texto[i] + texto[i + 2:]  # Letras intercambiadas
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    productos = generar_catalogo(cantidad)
+    inicio = time.perf_counter()
+    indice = IndiceProductos(productos)
+    construir = time.perf_counter() - inicio
+
+    azar = random.Random(1)
+    consultas = []
+    for _ in range(300):
+        codigo, descripcion = azar.choice(productos)
+        texto = azar.choice([descripcion[:18], descripcion[:18].lower(), codigo,
+                             con_error(descripcion[:12], azar)])
+        consultas.extend(texto[:n] for n in range(1, len(texto) + 1))
+
+    tiempos = []
+    for consulta in consultas:
+        t0 = time.perf_counter()
+        indice.buscar(consulta, 20)
+        tiempos.append(time.perf_counter() - t0)
+    tiempos.sort()
+    p = lambda q: tiempos[min(len(tiempos) - 1, int(q * len(tiempos)))] * 1e3
+
+    print(f"{cantidad:,} productos: construir índice {construir:.2f} s | {len(consultas)} teclas | "
+          f"p50 {p(0.50):.3f} ms | p95 {p(0.95):.3f} ms | p99 {p(0.99):.3f} ms | máx {tiempos[-1] * 1e3:.3f} ms")
+    for consulta in ['jab', 'Jabón líq', 'jabon liquido', 'detregente', '000123']:
+        print(f"  {consulta!r:>16} -> {indice.buscar(consulta, 3)}")
+
+
+if __name__ == '__main__':
+    main()
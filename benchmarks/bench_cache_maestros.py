@@ -0,0 +1,58 @@
+"""
+Carga de un catálogo de productos con y sin el snapshot de CSVService.
+
+Compara, sobre un productos.csv sintético con BOM:
+  - csv.reader directo (lo que hacía la aplicación antes),
+  - arranque en frío: CSV + normalización + escritura del snapshot,
+  - arranque en caliente: snapshot vigente, una sola lectura.
+Uso:
+    python -m benchmarks.bench_cache_maestros [productos]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+from core.core_panel_admin.worker.csv_service import CSVService, SnapshotCSV
+from benchmarks.bench_busqueda_productos import generar_catalogo
+
+
+def cronometrar(funcion, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    with tempfile.TemporaryDirectory() as carpeta:
+        SnapshotCSV.DIRECTORIO = os.path.join(carpeta, 'cache')
+        ruta = os.path.join(carpeta, 'productos.csv')
+        with open(ruta, 'w', newline='', encoding='utf-8-sig') as f:
+            csv.writer(f).writerows(generar_catalogo(cantidad))
+
+        def directo():
+            with open(ruta, newline='', encoding='utf-8') as f:
+                return list(csv.reader(f))
+
+        def frio():
+            if os.path.exists(SnapshotCSV.ruta_snapshot(ruta)):
+                os.remove(SnapshotCSV.ruta_snapshot(ruta))
+            return CSVService.leer_csv(ruta)
+
+        t_directo = cronometrar(directo)
+        t_frio = cronometrar(frio)
+        t_caliente = cronometrar(lambda: CSVService.leer_csv(ruta))
+        assert CSVService.leer_csv(ruta) == CSVService.leer_csv(ruta, usar_cache=False)
+
+        print(f"{cantidad:,} productos ({os.path.getsize(ruta) / 1e6:.1f} MB, snapshot "
+              f"{os.path.getsize(SnapshotCSV.ruta_snapshot(ruta)) / 1e6:.1f} MB): "
+              f"csv.reader {t_directo * 1e3:.0f} ms | frío {t_frio * 1e3:.0f} ms | "
+              f"caliente {t_caliente * 1e3:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Cola de impresión contra impresoras de prueba (archivo y socket TCP), sin Windows.
+
+  1. Latencia de encolar() en el hilo que llama (lo que espera la interfaz) y
+     tickets por segundo hacia una impresora de archivo.
+  2. Impresora de red apagada: los trabajos se reintentan con espera exponencial y
+     salen todos cuando el socket empieza a escuchar.
+  3. Reinicio: trabajos encolados sin hilo activo se guardan, una cola nueva los
+     recupera del disco y los imprime.
+Uso:
+    python -m benchmarks.bench_cola_impresion [tickets]
+"""
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from PyQt5.QtCore import Qt
+from utils.print_queue import ColaImpresion, leer_diario, ImpresoraTransporte, ENVIADO, FALLIDO, REINTENTANDO
+from utils.printer_transport import TransporteArchivo, TransporteTCP
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRO = {'fecha_hora': '2025-03-01 08:15:00', 'operario': 'María Peña', 'cedula': '1020304050',
+            'producto': '03', 'nombre_pro': 'Servicios administrativos', 'cantidad': '12', 'peso': '25.40'}
+
+
+def cargar_config():
+    with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def contar_estados(cola):
+    conteo = {}
+    listo = threading.Event()
+
+    def registrar(id_trabajo, estado, detalle):
+        conteo[estado] = conteo.get(estado, 0) + 1
+        if not cola.pendientes():
+            listo.set()
+    # DirectConnection: el conteo corre en el hilo de la cola, sin bucle de eventos de Qt
+    cola.estado_trabajo.connect(registrar, Qt.DirectConnection)
+    return conteo, listo
+
+
+def esperar(listo, cola, limite=60):
+    fin = time.monotonic() + limite
+    while cola.pendientes() and time.monotonic() < fin:
+        listo.wait(0.05)
+
+
+class ServidorImpresora(threading.Thread):
+    """Impresora TCP de prueba: acepta conexiones y acumula los bytes recibidos."""
+
+    def __init__(self, puerto):
+        super().__init__(daemon=True)
+        self.servidor = socket.create_server(('127.0.0.1', puerto))
+        self.recibido = bytearray()
+
+    def run(self):
+        while True:
+            conexion, _ = self.servidor.accept()
+            with conexion:
+                while True:
+                    datos = conexion.recv(65536)
+                    if not datos:
+                        break
+                    self.recibido += datos
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    config = cargar_config()
+    with tempfile.TemporaryDirectory() as carpeta:
+        # 1. Latencia de encolar y rendimiento
+        salida = os.path.join(carpeta, 'impresora.prn')
+        cola = ColaImpresion(ImpresoraTransporte(TransporteArchivo(salida), config),
+                             os.path.join(carpeta, 'cola1.jsonl'))
+        conteo, listo = contar_estados(cola)
+        cola.start()
+        latencias = []
+        inicio = time.perf_counter()
+        for _ in range(tickets):
+            t0 = time.perf_counter()
+            cola.encolar(REGISTRO)
+            latencias.append(time.perf_counter() - t0)
+        esperar(listo, cola)
+        total = time.perf_counter() - inicio
+        cola.detener()
+        latencias.sort()
+        with open(salida, 'rb') as f:
+            impresos = f.read().count(b'PRINT 1,1')
+        print(f"{tickets} tickets a archivo: encolar p50 {latencias[len(latencias) // 2] * 1e6:.0f} µs, "
+              f"máx {latencias[-1] * 1e3:.2f} ms | {tickets / total:,.0f} tickets/s | "
+              f"impresos {impresos} | estados {conteo}")
+
+        # 2. Impresora de red apagada que se enciende después
+        puerto = puerto_libre()
+        cola = ColaImpresion(ImpresoraTransporte(TransporteTCP('127.0.0.1', puerto, timeout=1.0), config),
+                             os.path.join(carpeta, 'cola2.jsonl'), max_intentos=8, espera_base=0.05)
+        conteo, listo = contar_estados(cola)
+        cola.start()
+        for _ in range(20):
+            cola.encolar(REGISTRO)
+        time.sleep(0.4)
+        servidor = ServidorImpresora(puerto)
+        servidor.start()
+        esperar(listo, cola)
+        cola.detener()
+        print(f"Impresora TCP encendida a los 0.4 s: recibidos {servidor.recibido.count(b'PRINT 1,1')}/20 | "
+              f"reintentos {conteo.get(REINTENTANDO, 0)} | fallidos {conteo.get(FALLIDO, 0)}")
+
+        # 3. Persistencia entre reinicios
+        persistencia = os.path.join(carpeta, 'cola3.jsonl')
+        salida = os.path.join(carpeta, 'impresora3.prn')
+        cola = ColaImpresion(ImpresoraTransporte(TransporteArchivo(salida), config), persistencia)
+        for _ in range(50):
+            cola.encolar(REGISTRO)  # Sin start(): simula un cierre con trabajos pendientes
+        del cola
+        cola = ColaImpresion(ImpresoraTransporte(TransporteArchivo(salida), config), persistencia)
+        recuperados = cola.pendientes()
+        conteo, listo = contar_estados(cola)
+        cola.start()
+        esperar(listo, cola)
+        cola.detener()
+        with open(salida, 'rb') as f:
+            impresos = f.read().count(b'PRINT 1,1')
+        print(f"Reinicio: recuperados {recuperados}/50 | impresos {impresos} | enviados {conteo.get(ENVIADO, 0)} | "
+              f"pendientes en disco {len(leer_diario(persistencia))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Exportación de registros: copia completa con shutil.copy2 (camino anterior) contra
+la exportación diferencial y la completa comprimidas, y restauración verificada.
+
+Sobre un CSV con N registros (por defecto 1.000.000):
+  1. Noche 1: copy2 contra una exportación completa (gzip y xz).
+  2. Noches siguientes: se agregan `nuevos` registros por noche; copy2 vuelve a
+     copiar todo, la diferencial escribe solo lo nuevo.
+  3. Restaurar la cadena y comparar con el CSV original; corromper un byte de un
+     archivo y comprobar que la restauración lo rechaza.
+Uso:
+    python -m benchmarks.bench_exportacion [registros] [nuevos_por_noche] [noches]
+"""
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from utils.backup_export import ExportadorRegistros, BackupInvalido, COMPLETO, DIFERENCIAL, restaurar
+
+OPERARIOS = [('María Peña', '1020304050'), ('José Núñez', '80706050'), ('Luis Alberto Suaza', '15511073'),
+             ('Ana Gómez', '43210987'), ('Andrés Muñoz', '1098765432'), ('Lucía Ramírez', '52123456')]
+PRODUCTOS = [f'COK{70000 + i}' for i in range(300)]
+INICIO = datetime(2024, 1, 1, 6, 0, 0)
+
+
+def escribir_filas(ruta, desde, cantidad):
+    nuevo = not os.path.exists(ruta)
+    with open(ruta, 'a', newline='', encoding='utf-8') as f:
+        if nuevo:
+            f.write('FechaHora,Operario,Cédula,Producto,Cantidad,Peso\r\n')
+        for i in range(desde, desde + cantidad):
+            operario, cedula = OPERARIOS[i % len(OPERARIOS)]
+            f.write(f"{(INICIO + timedelta(seconds=40 * i)).strftime('%Y-%m-%d %H:%M:%S')},{operario},{cedula},"
+                    f"{PRODUCTOS[(i * 7) % len(PRODUCTOS)]},{1 + i % 50},{(i * 37) % 9000 / 100:.2f}\r\n")
+
+
+def sha256(ruta):
+    suma = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            suma.update(bloque)
+    return suma.hexdigest()
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    registros = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    nuevos = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    noches = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_csv = os.path.join(carpeta, 'Datos_bascula.csv')
+        escribir_filas(ruta_csv, 0, registros)
+        tamano = os.path.getsize(ruta_csv)
+        print(f"CSV con {registros:,} registros: {tamano / 2 ** 20:.1f} MiB")
+
+        # 1. Primera exportación
+        _, t_copia = medir(lambda: shutil.copy2(ruta_csv, os.path.join(carpeta, 'copia.csv')))
+        print(f"copy2: {t_copia:.2f} s, {tamano / 2 ** 20:.1f} MiB escritos")
+        for compresion in ('gz', 'xz'):
+            exportador = ExportadorRegistros(ruta_csv, os.path.join(carpeta, f'usb_{compresion}'))
+            manifiesto, t = medir(lambda: exportador.exportar(COMPLETO, compresion))
+            print(f"Completa {compresion}: {t:.2f} s, {manifiesto['bytes_comprimidos'] / 2 ** 20:.1f} MiB escritos "
+                  f"({tamano / manifiesto['bytes_comprimidos']:.1f}x), {manifiesto['filas']:,} filas")
+
+        # 2. Noches siguientes
+        exportador = ExportadorRegistros(ruta_csv, os.path.join(carpeta, 'usb_gz'))
+        t_copias = t_diferenciales = escritos_copia = escritos_diferencial = 0
+        for noche in range(noches):
+            escribir_filas(ruta_csv, registros + noche * nuevos, nuevos)
+            _, t = medir(lambda: shutil.copy2(ruta_csv, os.path.join(carpeta, 'copia.csv')))
+            t_copias += t
+            escritos_copia += os.path.getsize(ruta_csv)
+            manifiesto, t = medir(lambda: exportador.exportar(DIFERENCIAL, 'gz'))
+            t_diferenciales += t
+            escritos_diferencial += manifiesto['bytes_comprimidos']
+        print(f"{noches} noches con {nuevos:,} registros nuevos cada una: copy2 {t_copias / noches * 1e3:.0f} ms y "
+              f"{escritos_copia / noches / 2 ** 20:.1f} MiB por noche | diferencial "
+              f"{t_diferenciales / noches * 1e3:.1f} ms y {escritos_diferencial / noches / 2 ** 10:.1f} KiB por noche")
+        _, t = medir(lambda: exportador.exportar(DIFERENCIAL, 'gz'))
+        print(f"  Sin registros nuevos: {t * 1e3:.2f} ms, ningún archivo escrito")
+
+        # Fila a medio escribir: queda para la próxima exportación
+        completo = os.path.getsize(ruta_csv)
+        with open(ruta_csv, 'ab') as f:
+            f.write(b'2030-01-01 00:00:00,Interrumpid')
+        print(f"  Con una fila incompleta al final: exportación = {exportador.exportar(DIFERENCIAL, 'gz')}")
+        with open(ruta_csv, 'r+b') as f:
+            f.truncate(completo)
+
+        # 3. Restauración
+        restaurado = os.path.join(carpeta, 'restaurado.csv')
+        filas, t = medir(lambda: restaurar(exportador.carpeta, restaurado))
+        print(f"Restaurar completa + {noches} diferenciales: {t:.2f} s, {filas:,} filas, "
+              f"idéntico al original: {sha256(restaurado) == sha256(ruta_csv)}")
+        ultimo = exportador.punto_control()['archivo']
+        with open(os.path.join(exportador.carpeta, ultimo), 'r+b') as f:
+            f.seek(20)
+            byte = f.read(1)
+            f.seek(20)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        try:
+            restaurar(exportador.carpeta, restaurado)
+            print("Archivo corrompido: NO detectado")
+        except BackupInvalido as e:
+            print(f"Archivo corrompido detectado: {e}")
+
+        # CSV reemplazado (rotación): la diferencial se convierte en completa
+        os.remove(ruta_csv)
+        escribir_filas(ruta_csv, 5 * registros, 1000)
+        manifiesto = exportador.exportar(DIFERENCIAL, 'gz')
+        print(f"CSV reemplazado: exportación {manifiesto['tipo']} con {manifiesto['filas']} filas, "
+              f"anterior={manifiesto['anterior']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Tiempo de apertura de HistorialWindow y memoria usada según el tamaño del historial.
+
+Genera un Datos_bascula.csv sintético en una carpeta temporal, lo migra a la base
+SQLite y mide la apertura de la ventana (plataforma Qt offscreen).
+Uso:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_historial [filas ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from PyQt5.QtWidgets import QApplication
+from core.core_main_windows.models.record_model import RepositorioRegistros
+from gui.historial_window import HistorialWindow
+
+ENCABEZADOS = 'FechaHora,Operario,Cédula,Producto,Cantidad,Peso\r\n'
+
+
+def generar_csv(ruta, filas):
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        f.write(ENCABEZADOS)
+        for i in range(filas):
+            f.write(f"2025-{i // 2_000_000 % 12 + 1:02d}-{i // 80_000 % 28 + 1:02d} "
+                    f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d},"
+                    f"Operario Año {i % 40},{1000000 + i % 40},COK{70000 + i % 3390},{i % 5000},{i % 997 / 10:.2f}\r\n")
+
+
+def main():
+    tamanos = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    app = QApplication(sys.argv)
+    original = os.getcwd()
+    for filas in tamanos:
+        with tempfile.TemporaryDirectory() as carpeta:
+            os.chdir(carpeta)
+            os.makedirs('data')
+            generar_csv('data/Datos_bascula.csv', filas)
+            repositorio = RepositorioRegistros('data/bascula.db')
+            repositorio.sincronizar_csv('data/Datos_bascula.csv')
+            repositorio.cerrar()
+
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            ventana = HistorialWindow()
+            ventana.show()
+            app.processEvents()
+            transcurrido = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{filas:>10,} filas: apertura {transcurrido * 1000:7.1f} ms, "
+                  f"filas cargadas {ventana.modelo.rowCount():>5}, memoria pico {pico / 1e6:6.2f} MB")
+            ventana.close()
+            os.chdir(original)
+
+
+if __name__ == '__main__':
+    main()
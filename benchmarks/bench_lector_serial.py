@@ -0,0 +1,81 @@
+"""
+Mide la latencia entre la llegada de una trama de la báscula y la actualización
+de la etiqueta de peso, usando una báscula simulada sobre un pseudo-terminal (pty).
+
+Solo funciona en Linux/macOS. Uso:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_lector_serial [tramas] [intervalo_ms]
+"""
+import os
+import sys
+import threading
+import time
+import serial
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication, QLabel
+from core.core_main_windows.utils.serial_utils import LectorSerial
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def bascula_falsa(fd, tramas, intervalo, envios):
+    """Escribe tramas tipo 'ST,GS,+0012.34kg' en el lado maestro del pty."""
+    for i in range(tramas):
+        peso = f"{i % 10000 + 0.25:.2f}"
+        envios[peso] = time.perf_counter()
+        trama = f"ST,GS,+{peso:>7}kg\r\n".encode('ascii')
+        os.write(fd, trama)
+        time.sleep(intervalo)
+
+
+def main():
+    tramas = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    intervalo = (float(sys.argv[2]) if len(sys.argv) > 2 else 10) / 1000
+
+    app = QApplication(sys.argv)
+    etiqueta = QLabel()
+    maestro, esclavo = os.openpty()
+    puerto = serial.Serial(os.ttyname(esclavo), 9600, timeout=1)
+
+    lector = LectorSerial(puerto)
+    latencias_llegada = []
+    latencias_envio = []
+    envios = {}
+
+    def actualizar():
+        ultimo = lector.tomar_ultimo()
+        if ultimo is None:
+            return
+        lectura, t_llegada = ultimo
+        peso = lectura.texto
+        etiqueta.setText(f"{peso} Kg")
+        ahora = time.perf_counter()
+        latencias_llegada.append((ahora - t_llegada) * 1000)
+        if peso in envios:
+            latencias_envio.append((ahora - envios[peso]) * 1000)
+
+    lector.nuevo_peso.connect(actualizar)
+    lector.start()
+
+    hilo = threading.Thread(target=bascula_falsa, args=(maestro, tramas, intervalo, envios), daemon=True)
+    hilo.start()
+    QTimer.singleShot(int(tramas * intervalo * 1000) + 500, app.quit)
+    app.exec_()
+
+    lector.detener()
+    puerto.close()
+    os.close(maestro)
+    os.close(esclavo)
+
+    print(f"Tramas enviadas: {tramas}, actualizaciones de etiqueta: {len(latencias_llegada)}, "
+          f"lecturas descartadas: {lector.lecturas_descartadas}")
+    for nombre, valores in (("llegada -> etiqueta", latencias_llegada), ("envío -> etiqueta", latencias_envio)):
+        if valores:
+            print(f"{nombre}: p50={percentil(valores, 50):.3f} ms  p95={percentil(valores, 95):.3f} ms  "
+                  f"max={max(valores):.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
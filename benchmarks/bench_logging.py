@@ -0,0 +1,140 @@
+"""
+Logging encolado (QueueHandler + QueueListener) contra FileHandler y StreamHandler
+escribiendo en el hilo que registra (configuración anterior de setup_logger).
+
+  1. Tiempo por llamada a logger.info() en el hilo que registra, con un disco normal
+     y con un disco lento (cada escritura tarda `demora_ms`, como una memoria USB o
+     un antivirus revisando el archivo).
+  2. Traza serial en DEBUG desactivada: costo de isEnabledFor por trama.
+  3. Rotación por tamaño y por día, compresión de las partes y retención.
+Uso:
+    python -m benchmarks.bench_logging [mensajes] [demora_ms]
+"""
+import gzip
+import io
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from logging.handlers import QueueListener
+from utils.logger_config import ManejadorCola, ManejadorRotativo
+
+FORMATO = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%Y-%m-%d %H:%M:%S')
+
+
+class ArchivoLento(logging.FileHandler):
+    """FileHandler cuyo disco tarda `demora` segundos en cada escritura."""
+
+    def __init__(self, ruta, demora):
+        super().__init__(ruta, encoding='utf-8')
+        self.demora = demora
+
+    def emit(self, record):
+        time.sleep(self.demora)
+        super().emit(record)
+
+
+def crear_logger(nombre, *manejadores):
+    logger = logging.getLogger(nombre)
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for manejador in manejadores:
+        manejador.setFormatter(FORMATO)
+        logger.addHandler(manejador)
+    return logger
+
+
+def medir_llamadas(logger, mensajes):
+    """Promedio y máximo por llamada a logger.info(), en µs, en el hilo que registra."""
+    peor = 0.0
+    inicio = time.perf_counter()
+    for i in range(mensajes):
+        antes = time.perf_counter()
+        logger.info(f"Peso guardado: {i % 9000 / 100:.2f} kg, operario 1020304050, producto COK70001")
+        peor = max(peor, time.perf_counter() - antes)
+    return (time.perf_counter() - inicio) / mensajes * 1e6, peor * 1e6
+
+
+def comparar(carpeta, mensajes, demora, etiqueta):
+    def archivo(nombre):
+        ruta = os.path.join(carpeta, nombre)
+        return ArchivoLento(ruta, demora) if demora else logging.FileHandler(ruta, encoding='utf-8')
+
+    directo = crear_logger(f'directo_{etiqueta}', archivo('directo.log'), logging.StreamHandler(io.StringIO()))
+    promedio, peor = medir_llamadas(directo, mensajes)
+    print(f"  Directo (anterior): {promedio:.1f} µs por llamada, peor {peor:.0f} µs")
+
+    cola = queue.SimpleQueue()
+    consola = logging.StreamHandler(io.StringIO())
+    consola.setFormatter(FORMATO)
+    destino = archivo('encolado.log')
+    destino.setFormatter(FORMATO)
+    listener = QueueListener(cola, destino, consola, respect_handler_level=True)
+    listener.start()
+    encolado = crear_logger(f'encolado_{etiqueta}')
+    encolado.addHandler(ManejadorCola(cola))
+    inicio = time.perf_counter()
+    promedio, peor = medir_llamadas(encolado, mensajes)
+    listener.stop()
+    total = time.perf_counter() - inicio
+    print(f"  Encolado: {promedio:.1f} µs por llamada, peor {peor:.0f} µs "
+          f"(el hilo de logging terminó de escribir en {total:.2f} s)")
+    for manejador in (destino, consola, *directo.handlers):
+        manejador.close()
+
+
+def main():
+    mensajes = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    demora = (float(sys.argv[2]) if len(sys.argv) > 2 else 0.5) / 1000
+    with tempfile.TemporaryDirectory() as carpeta:
+        # 1. Costo en el hilo que registra
+        print(f"{mensajes:,} mensajes con disco normal:")
+        comparar(carpeta, mensajes, 0, 'normal')
+        lentos = max(mensajes // 20, 100)
+        print(f"{lentos:,} mensajes con un disco que tarda {demora * 1e3:.1f} ms por escritura:")
+        comparar(carpeta, lentos, demora, 'lento')
+
+        # 2. Traza serial desactivada
+        serial = logging.getLogger('bascula_bench.serial')
+        serial.setLevel(logging.INFO)
+        inicio = time.perf_counter()
+        for _ in range(1_000_000):
+            if serial.isEnabledFor(logging.DEBUG):
+                serial.debug("nunca")
+        print(f"Traza serial en INFO: {(time.perf_counter() - inicio) * 1e3:.0f} ns por trama (isEnabledFor)")
+
+        # 3. Rotación, compresión y retención
+        logs = os.path.join(carpeta, 'logs')
+        os.makedirs(logs)
+        viejo = date.today() - timedelta(days=45)
+        ayer = date.today() - timedelta(days=1)
+        for dia in (viejo, ayer):
+            with open(os.path.join(logs, f"bascula_{dia.strftime('%Y%m%d')}.log"), 'w') as f:
+                f.write("registro de otro día\n" * 1000)
+        manejador = ManejadorRotativo(logs, 'bascula', max_bytes=256 * 1024, dias_retencion=30)
+        manejador.setFormatter(FORMATO)
+        logger = crear_logger('rotacion')
+        logger.addHandler(manejador)
+        for i in range(30_000):
+            logger.info(f"Trama b'ST,GS,+0025.40kg' -> LecturaPeso(valor={i % 9000 / 100:.2f})")
+        manana = logging.LogRecord('rotacion', logging.INFO, __file__, 0, "primer registro del día siguiente",
+                                   None, None)
+        manana.created += 86400
+        manejador.handle(manana)
+        manejador.close()
+        archivos = sorted(os.listdir(logs))
+        partes = [n for n in archivos if n.endswith('.log.gz')]
+        with gzip.open(os.path.join(logs, partes[0]), 'rt', encoding='utf-8') as f:
+            lineas = sum(1 for _ in f)
+        print(f"Rotación a 256 KiB: {len(partes)} partes comprimidas ({lineas} líneas en la primera), "
+              f"activo {[n for n in archivos if n.endswith('.log')]}")
+        print(f"  Log de ayer archivado: {any(n.startswith('bascula_' + ayer.strftime('%Y%m%d')) for n in partes)} | "
+              f"log de hace 45 días borrado: {not any(viejo.strftime('%Y%m%d') in n for n in archivos)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Costo de instrumentar los caminos calientes con utils.metrics.
+
+  1. Sobrecosto por observación: observar(), `with medir()`, @cronometrado,
+     incrementar() y establecer(), descontando el mismo bucle sin métrica.
+     Objetivo: menos de 1 µs.
+  2. Memoria: un millón de observaciones no agrega memoria (cubetas fijas).
+  3. Precisión: percentiles estimados por cubetas contra los exactos, con
+     latencias log-normales como las de guardar_registro.
+  4. Volcado: tamaño de cada línea y tiempo de escribirla.
+Uso:
+    python -m benchmarks.bench_metricas [observaciones]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from utils.metrics import RegistroMetricas, Histograma, Contador, Indicador, cronometrado
+
+
+def por_operacion(funcion, n):
+    inicio = time.perf_counter()
+    funcion(n)
+    return (time.perf_counter() - inicio) / n * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    histograma = Histograma('bench')
+    contador = Contador('bench')
+    indicador = Indicador('bench')
+
+    def vacio(n):
+        for _ in range(n):
+            pass
+
+    def observar(n):
+        observar = histograma.observar
+        for _ in range(n):
+            observar(1234)
+
+    def medir(n):
+        for _ in range(n):
+            with histograma.medir():
+                pass
+
+    def funcion():
+        pass
+
+    decorada = cronometrado('bench_decorador')(funcion)
+
+    def llamar_decorada(n):
+        for _ in range(n):
+            decorada()
+
+    def llamar_sin_decorar(n):
+        for _ in range(n):
+            funcion()
+
+    def incrementar(n):
+        for _ in range(n):
+            contador.incrementar()
+
+    def establecer(n):
+        for i in range(n):
+            indicador.establecer(i)
+
+    # 1. Sobrecosto
+    base = min(por_operacion(vacio, n) for _ in range(3))
+    llamada = min(por_operacion(llamar_sin_decorar, n) for _ in range(3))
+    costos = {
+        'Histograma.observar()': min(por_operacion(observar, n) for _ in range(3)) - base,
+        'with medir() (dos lecturas del reloj)': min(por_operacion(medir, n) for _ in range(3)) - base,
+        '@cronometrado (dos lecturas del reloj)': min(por_operacion(llamar_decorada, n) for _ in range(3)) - llamada,
+        'Contador.incrementar()': min(por_operacion(incrementar, n) for _ in range(3)) - base,
+        'Indicador.establecer()': min(por_operacion(establecer, n) for _ in range(3)) - base,
+    }
+    for nombre, costo in costos.items():
+        print(f"{nombre:40s} {costo:6.0f} ns por observación {'(< 1 µs)' if costo < 1000 else '(SUPERA 1 µs)'}")
+
+    # 2. Memoria
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    observar(n)
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"Memoria tras {n:,} observaciones más: {despues - antes} bytes")
+
+    # 3. Precisión de los percentiles
+    generador = random.Random(7)
+    muestras = [int(generador.lognormvariate(14.5, 0.6)) for _ in range(200_000)]  # mediana ~2 ms
+    estimado = Histograma('guardar_registro')
+    for muestra in muestras:
+        estimado.observar(muestra)
+    ordenadas = sorted(muestras)
+    for p in (50, 95, 99):
+        exacto = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+        aproximado = estimado.percentil(p)
+        print(f"  p{p}: exacto {exacto / 1e6:.3f} ms | por cubetas {aproximado / 1e6:.3f} ms "
+              f"({(aproximado - exacto) / exacto * 100:+.1f} %)")
+
+    # 4. Volcado
+    registro = RegistroMetricas(estacion='bench')
+    for nombre in ('leer_peso', 'latencia_peso', 'guardar_registro', 'cargar_registros', 'print_ticket'):
+        histograma = registro.histograma(nombre)
+        for muestra in muestras[:10_000]:
+            histograma.observar(muestra)
+    registro.contador('registros_guardados').incrementar(10_000)
+    registro.indicador('lecturas_descartadas').establecer(12)
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'metricas_bench.jsonl')
+        registro.volcar(ruta)
+        primera = os.path.getsize(ruta)
+        registro.contador('registros_guardados').incrementar()
+        inicio = time.perf_counter()
+        registro.volcar(ruta)
+        t = time.perf_counter() - inicio
+        tamano = os.path.getsize(ruta) - primera
+        repetido = registro.volcar(ruta)
+        print(f"Volcado: {tamano} bytes por línea con 5 histogramas ({primera} la primera, con los límites), "
+              f"{t * 1e3:.2f} ms | sin cambios no escribe: {not repetido} | "
+              f"{tamano * 288 / 1024:.0f} KiB por día cada 5 minutos")
+
+
+if __name__ == '__main__':
+    main()
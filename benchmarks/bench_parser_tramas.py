@@ -0,0 +1,75 @@
+"""
+Rendimiento del parser de tramas de la báscula, en tramas por segundo.
+
+Compara ParserTramas.alimentar() (bytes en trozos de tamaño variable, como llegan
+del puerto) contra la extracción anterior: decode + filtrar carácter por carácter.
+Uso:
+    python -m benchmarks.bench_parser_tramas [tramas]
+"""
+import random
+import sys
+import time
+from core.core_main_windows.services.weight_service import ParserTramas
+
+
+def generar_flujo(tramas):
+    random.seed(1)
+    estados = (b'ST', b'US')
+    modos = (b'GS', b'NT')
+    return b''.join(
+        b'%s,%s,%+08.2fkg\r\n' % (random.choice(estados), random.choice(modos), random.uniform(-50, 9999))
+        for _ in range(tramas)
+    )
+
+
+def trocear(flujo, minimo=1, maximo=64):
+    random.seed(2)
+    trozos = []
+    i = 0
+    while i < len(flujo):
+        n = random.randint(minimo, maximo)
+        trozos.append(flujo[i:i + n])
+        i += n
+    return trozos
+
+
+def extraccion_anterior(flujo):
+    lecturas = 0
+    for linea in flujo.splitlines():
+        datos = linea.decode('utf-8').strip()
+        peso_limpio = ''.join(c for c in datos if c.isdigit() or c == '.')
+        if peso_limpio:
+            lecturas += 1
+    return lecturas
+
+
+def main():
+    tramas = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    flujo = generar_flujo(tramas)
+    trozos = trocear(flujo)
+
+    parser = ParserTramas()
+    inicio = time.perf_counter()
+    total = 0
+    for trozo in trozos:
+        total += len(parser.alimentar(trozo))
+    t_parser = time.perf_counter() - inicio
+    assert total == tramas, total
+
+    parser = ParserTramas(capacidad=len(flujo))
+    inicio = time.perf_counter()
+    parser.alimentar(flujo)
+    t_bloque = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    extraccion_anterior(flujo)
+    t_anterior = time.perf_counter() - inicio
+
+    print(f"Tramas: {tramas} en {len(trozos)} trozos")
+    print(f"ParserTramas.alimentar (trozos de 1-64 bytes): {tramas / t_parser:,.0f} tramas/s")
+    print(f"ParserTramas.alimentar (un solo bloque): {tramas / t_bloque:,.0f} tramas/s")
+    print(f"Extracción anterior (sin signo ni estado): {tramas / t_anterior:,.0f} tramas/s")
+
+
+if __name__ == '__main__':
+    main()
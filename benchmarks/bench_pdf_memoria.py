@@ -0,0 +1,109 @@
+"""
+PDF del ticket en memoria contra el archivo temporal compartido.
+
+Antes: canvas sobre "configuracion_impresa.pdf" en la carpeta actual, save(), copia
+con shutil al destino y borrado del temporal. Ahora: PlantillaTicket.pdf() arma el
+PDF en un BytesIO y los bytes se escriben una sola vez en el destino.
+Además genera tickets distintos desde varios hilos a la vez: con el nombre de
+archivo compartido los trabajos se pisan; en memoria cada uno sale con sus datos.
+Uso:
+    python -m benchmarks.bench_pdf_memoria [tickets]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+from utils.ticket_template import compilar_plantilla, valores_ticket
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATOS = ('2025-03-01 08:15:00', 'María Peña', '1020304050', '03', 'Servicios administrativos', '12', '25.40')
+TEMPORAL = "configuracion_impresa.pdf"
+
+
+def ticket_antes(plantilla, valores, destino):
+    lienzo = canvas.Canvas(TEMPORAL, pagesize=(plantilla.ancho_pdf, plantilla.alto_pdf))
+    plantilla.dibujar_pdf(lienzo, valores)
+    lienzo.save()
+    if not os.path.exists(TEMPORAL):
+        return False
+    shutil.copy2(TEMPORAL, destino)
+    os.remove(TEMPORAL)
+    return True
+
+
+def ticket_ahora(plantilla, valores, destino):
+    contenido = plantilla.pdf([valores])
+    with open(destino, 'wb') as f:
+        f.write(contenido)
+    return True
+
+
+def concurrente(funcion, plantilla, carpeta, hilos=4, por_hilo=50):
+    """Tickets con la fecha como marca; cuenta los PDF que no tienen la marca que les toca."""
+    errores = []
+
+    def trabajar(h):
+        for i in range(por_hilo):
+            marca = f'H{h}-{i:04d}'
+            destino = os.path.join(carpeta, f'{marca}.pdf')
+            try:
+                if not funcion(plantilla, valores_ticket(marca, *DATOS[1:]), destino):
+                    errores.append(marca)
+                    continue
+                with open(destino, 'rb') as f:
+                    if f'Fecha: {marca}'.encode() not in f.read():
+                        errores.append(marca)
+            except OSError:
+                errores.append(marca)
+
+    trabajadores = [threading.Thread(target=trabajar, args=(h,)) for h in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return len(errores), hilos * por_hilo
+
+
+def medir(funcion, plantilla, carpeta, tickets):
+    valores = valores_ticket(*DATOS)
+    inicio = time.perf_counter()
+    for i in range(tickets):
+        funcion(plantilla, valores, os.path.join(carpeta, f'ticket_{i}.pdf'))
+    return time.perf_counter() - inicio
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+        plantilla = compilar_plantilla(json.load(f))
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        os.chdir(carpeta)  # El temporal de antes se crea en la carpeta actual
+        try:
+            plantilla.pdf([valores_ticket(*DATOS)])  # Importa reportlab y carga las fuentes
+            antes = medir(ticket_antes, plantilla, carpeta, tickets)
+            ahora = medir(ticket_ahora, plantilla, carpeta, tickets)
+            print(f"{tickets} tickets PDF: antes {antes * 1e3:.0f} ms ({tickets / antes:,.0f} tickets/s) | "
+                  f"en memoria {ahora * 1e3:.0f} ms ({tickets / ahora:,.0f} tickets/s) | {antes / ahora:.2f}x")
+
+            inicio = time.perf_counter()
+            lote = plantilla.pdf([valores_ticket(*DATOS)] * tickets)
+            print(f"Lote de {tickets} páginas en un PDF: {(time.perf_counter() - inicio) * 1e3:.0f} ms, "
+                  f"{len(lote) / 1024:,.0f} KiB")
+
+            rl_config.pageCompression = 0  # Texto sin comprimir para buscar la marca de cada ticket
+            malos, total = concurrente(ticket_antes, plantilla, carpeta)
+            print(f"4 hilos con archivo compartido: {malos}/{total} tickets perdidos o con datos de otro")
+            malos, total = concurrente(ticket_ahora, plantilla, carpeta)
+            print(f"4 hilos en memoria: {malos}/{total} tickets perdidos o con datos de otro")
+        finally:
+            os.chdir(directorio_original)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Tickets por segundo: plantilla compilada contra el camino anterior.
+
+Antes, cada ticket volvía a leer printer_config.json, validarlo, armar los
+diccionarios de campos y formatear/codificar cada comando TSPL (y para el PDF,
+recalcular cada coordenada). Con la plantilla compilada, por ticket solo quedan
+el os.stat del archivo (para notar cambios) y la sustitución de los valores.
+Se mide el TSPL y el dibujo del PDF sobre un canvas de reportlab en memoria, y se
+verifica que el TSPL generado sea idéntico byte a byte.
+Por último compara 20 copias y un lote de 100 registros distintos como trabajos
+sueltos (un WritePrinter por comando) contra un único bloque TSPL.
+Uso:
+    python -m benchmarks.bench_plantilla_ticket [tickets]
+"""
+import io
+import json
+import os
+import sys
+import time
+from utils.ticket_template import (CODIFICACION, compilar_plantilla, validar_config, valores_ticket,
+                                   tsc_dots_to_pdf_points)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG = os.path.join(RAIZ, 'printer_config.json')
+DATOS = ('2025-03-01 08:15:00', 'María Peña', '1020304050', '03', 'Servicios administrativos', '12', '25.40')
+
+
+def cargar_config():
+    with open(CONFIG, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def tspl_antes(*datos):
+    """Camino anterior de PrintManager._print_tsc: config y comandos desde cero en cada ticket."""
+    config = cargar_config()
+    validar_config(config)
+    fecha_hora, operario, cedula, producto, nombre_pro, cantidad, peso = datos
+    size_general = config.get("SizeG_Fuentes", 10)
+    size_titulo = str(size_general / 8)
+    size_normal = str(size_general / 10)
+    comandos = ["CLS\n", f"SIZE {float(config['Ancho_Hoja']):.1f} mm, {float(config['Alto_Hoja']):.1f} mm",
+                "GAP 3 mm, 0", "DIRECTION 1", "REFERENCE 0,0", "OFFSET 0 mm", "SET TEAR ON",
+                "CODEPAGE 850", "DENSITY 8", "SPEED 4", "BAR 50,55,798,2"]
+    field_values = {
+        "titulo": {"text": config.get("Titulo", ""), "size": size_titulo},
+        "fecha": {"text": f"Fecha: {fecha_hora}", "size": size_normal},
+        "operario": {"text": f"Operario: {operario}", "size": size_normal},
+        "codigo_producto": {"text": f"Codigo: {producto}", "size": size_normal},
+        "nombre_producto": {"text": f"Producto: {nombre_pro}", "size": size_normal},
+        "cantidad": {"text": f"Cantidad: {cantidad}", "size": size_normal},
+        "peso": {"text": f"Peso: {peso} Kg", "size": size_normal},
+    }
+    campos = config["campos"]
+    for nombre, valor in field_values.items():
+        if nombre in campos:
+            texto = valor["text"].replace('"', '\\"')
+            fuente = "4" if nombre == "titulo" else "3"
+            comandos.append(f'TEXT {campos[nombre]["x"]},{campos[nombre]["y"]},"{fuente}",0,'
+                            f'{valor["size"]},{valor["size"]},"{texto}"')
+    comandos.append("PRINT 1,1")
+    # Un WritePrinter por comando
+    return [f"{c}\n".encode(CODIFICACION) for c in comandos]
+
+
+def pdf_antes(lienzo, *datos):
+    """Camino anterior de PrintManager.print_ticket para el dibujo del PDF."""
+    config = cargar_config()
+    validar_config(config)
+    fecha_hora, operario, cedula, producto, nombre_pro, cantidad, peso = datos
+    alto_hoja = int(config["Alto_Hoja"]) * 2.83465
+    size_general = config.get("SizeG_Fuentes", 10)
+    etiquetas = {"titulo": "", "fecha": "Fecha", "operario": "Operario", "codigo_producto": "Código Producto",
+                 "nombre_producto": "Nombre Producto", "cantidad": "Cantidad", "peso": "Peso"}
+    valores = {"titulo": config.get("Titulo"), "fecha": fecha_hora, "operario": operario,
+               "codigo_producto": producto, "nombre_producto": nombre_pro, "cantidad": cantidad,
+               "peso": f"{peso} Kg"}
+    for campo, etiqueta in etiquetas.items():
+        x = tsc_dots_to_pdf_points(config["campos"][campo]["x"])
+        y = tsc_dots_to_pdf_points(alto_hoja - config["campos"][campo]["y"])
+        if campo == "titulo":
+            lienzo.setFont("Helvetica-Bold", 14)
+            lienzo.drawString(x, y, valores[campo])
+            lienzo.setFont("Helvetica", size_general)
+        else:
+            lienzo.drawString(x, y, f"{etiqueta}: {valores[campo]}")
+
+
+class CachePlantilla:
+    """Misma validación por mtime que PrintManager.obtener_plantilla (sin win32)."""
+
+    def __init__(self):
+        self.clave = None
+        self.plantilla = None
+
+    def obtener(self):
+        estado = os.stat(CONFIG)
+        clave = (estado.st_mtime_ns, estado.st_size)
+        if clave != self.clave:
+            self.plantilla = compilar_plantilla(cargar_config())
+            self.clave = clave
+        return self.plantilla
+
+
+def tickets_por_segundo(funcion, tickets):
+    inicio = time.perf_counter()
+    for _ in range(tickets):
+        funcion()
+    return tickets / (time.perf_counter() - inicio)
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    cache = CachePlantilla()
+    assert b''.join(tspl_antes(*DATOS)) == cache.obtener().tspl(valores_ticket(*DATOS))
+
+    antes = tickets_por_segundo(lambda: tspl_antes(*DATOS), tickets)
+    despues = tickets_por_segundo(lambda: cache.obtener().tspl(valores_ticket(*DATOS)), tickets)
+    print(f"TSPL: antes {antes:,.0f} tickets/s | plantilla compilada {despues:,.0f} tickets/s "
+          f"({despues / antes:.1f}x)")
+
+    from reportlab.pdfgen import canvas
+    plantilla = cache.obtener()
+    lienzo = canvas.Canvas(io.BytesIO(), pagesize=(plantilla.ancho_pdf, plantilla.alto_pdf))
+    antes = tickets_por_segundo(lambda: pdf_antes(lienzo, *DATOS), tickets)
+    despues = tickets_por_segundo(lambda: cache.obtener().dibujar_pdf(lienzo, valores_ticket(*DATOS)), tickets)
+    print(f"PDF (dibujo): antes {antes:,.0f} tickets/s | plantilla compilada {despues:,.0f} tickets/s "
+          f"({despues / antes:.1f}x)")
+
+    # Copias y lotes: escrituras y tiempo de armado del trabajo
+    plantilla = cache.obtener()
+    lote = [valores_ticket(f'2025-03-01 08:{i // 60:02d}:{i % 60:02d}', *DATOS[1:]) for i in range(100)]
+    for nombre, cantidad, unico in (("20 copias", 20, lambda: plantilla.tspl(valores_ticket(*DATOS), 20)),
+                                    ("Lote de 100 registros", 100, lambda: plantilla.tspl_lote(lote))):
+        inicio = time.perf_counter()
+        escrituras = sum(len(tspl_antes(*DATOS)) for _ in range(cantidad))
+        t_antes = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        trabajo = unico()
+        t_despues = time.perf_counter() - inicio
+        etiquetas = sum(int(linea.split(b',')[1]) for linea in trabajo.splitlines() if linea.startswith(b'PRINT'))
+        print(f"{nombre}: antes {cantidad} trabajos y {escrituras} escrituras en {t_antes * 1e3:.2f} ms | "
+              f"ahora 1 trabajo y 1 escritura de {len(trabajo):,} bytes en {t_despues * 1e3:.2f} ms "
+              f"({etiquetas} etiquetas)")
+
+    inicio = time.perf_counter()
+    compilar_plantilla(cargar_config())
+    print(f"Recompilar tras cambiar printer_config.json: {(time.perf_counter() - inicio) * 1e6:.0f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Registro de impresoras con el backend falso (sin Windows ni impresoras reales).
+
+El backend simula una enumeración que tarda `demora` segundos, como EnumPrinters
+con impresoras de red. Compara:
+  1. Verificar el estado antes de cada ticket enumerando las impresoras (camino
+     anterior) contra consultar el registro.
+  2. Muchos hilos pidiendo el estado a la vez con el registro vacío: una sola enumeración.
+  3. Refresco en segundo plano: un cambio de estado en el sistema llega al registro
+     sin que el camino de impresión consulte al sistema.
+Uso:
+    python -m benchmarks.bench_registro_impresoras [tickets] [demora_ms]
+"""
+import sys
+import threading
+import time
+from utils.printer_registry import BackendFalso, InfoImpresora, RegistroImpresoras
+
+IMPRESORA = 'TSC TTP-244 Pro'
+
+
+def crear_backend(demora):
+    impresoras = [InfoImpresora(f'Impresora {i}', 'Generic / Text Only', f'USB{i:03d}') for i in range(20)]
+    impresoras.append(InfoImpresora(IMPRESORA, 'TSC TTP-244 Pro', 'USB020'))
+    return BackendFalso(impresoras, predeterminada=IMPRESORA, demora=demora)
+
+
+def estado_antes(backend, nombre):
+    """Camino anterior: enumerar las impresoras instaladas para validar cada ticket."""
+    for info in backend.enumerar():
+        if info.nombre == nombre:
+            return (info.lista, info.mensaje)
+    return (False, f"La impresora '{nombre}' no está instalada")
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    demora = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+
+    # 1. Estado por ticket
+    backend = crear_backend(demora)
+    inicio = time.perf_counter()
+    for _ in range(tickets):
+        estado_antes(backend, IMPRESORA)
+    antes = (time.perf_counter() - inicio) / tickets
+    enumeraciones_antes = backend.enumeraciones
+
+    backend = crear_backend(demora)
+    registro = RegistroImpresoras(backend, vigencia=30.0)
+    inicio = time.perf_counter()
+    for _ in range(tickets):
+        registro.estado(IMPRESORA)
+    ahora = (time.perf_counter() - inicio) / tickets
+    print(f"Estado por ticket ({tickets} tickets, enumeración de {demora * 1e3:.0f} ms): "
+          f"antes {antes * 1e3:.2f} ms y {enumeraciones_antes} enumeraciones | "
+          f"registro {ahora * 1e6:.1f} µs y {backend.enumeraciones} enumeración ({antes / ahora:,.0f}x)")
+    print(f"  Predeterminada: {registro.predeterminada()} | TSC por controlador: "
+          f"{registro.es_tsc(IMPRESORA)} | impresoras: {len(registro.nombres())}")
+
+    # 2. Arranque en frío con varios hilos
+    backend = crear_backend(demora)
+    registro = RegistroImpresoras(backend)
+    hilos = [threading.Thread(target=registro.estado, args=(IMPRESORA,)) for _ in range(16)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    print(f"16 hilos a la vez con el registro vacío: {backend.enumeraciones} enumeración")
+
+    # 3. Refresco en segundo plano
+    backend = crear_backend(demora)
+    registro = RegistroImpresoras(backend)
+    registro.iniciar(intervalo=0.1)
+    registro.estado(IMPRESORA)
+    backend.cambiar_estado(IMPRESORA, False, "Estado de la impresora: Papel agotado")
+    cambio = time.monotonic()
+    while registro.estado(IMPRESORA)[0] and time.monotonic() - cambio < 2:
+        time.sleep(0.005)
+    visto = time.monotonic() - cambio
+    consultas = 0
+    fin = time.monotonic() + 0.5
+    while time.monotonic() < fin:
+        registro.estado(IMPRESORA)
+        consultas += 1
+    registro.detener()
+    print(f"Refresco cada 100 ms: cambio visto en {visto * 1e3:.0f} ms ({registro.estado(IMPRESORA)[1]}) | "
+          f"{consultas:,} consultas en 0.5 s con {backend.enumeraciones} enumeraciones")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Registro de operarios (nombre <-> cédula) con 100k operarios.
+
+Mide la carga, las búsquedas en ambos sentidos, la detección de conflictos y
+agregar/quitar, y compara la detección de "cédula ya registrada con otro operario"
+con el recorrido lineal que haría falta sobre un dict nombre -> cédula.
+Además verifica que ambos índices queden consistentes.
+Uso:
+    python -m benchmarks.bench_registro_operarios [operarios]
+"""
+import random
+import sys
+import time
+from core.core_panel_admin.logic_operarios import (RegistroOperarios, LogicOperarios,
+                                                   CONFLICTO_NOMBRE, CONFLICTO_CEDULA)
+
+NOMBRES = ['María', 'José', 'Luis', 'Ana', 'Carlos', 'Sofía', 'Andrés', 'Lucía', 'Jhonny', 'Valentina']
+APELLIDOS = ['Gómez', 'Rodríguez', 'Martínez', 'Peña', 'Muñoz', 'Castaño', 'Moreno', 'Ríos', 'Zuluaga', 'Ospina']
+
+
+def generar_operarios(cantidad, semilla=3):
+    azar = random.Random(semilla)
+    cedulas = azar.sample(range(10_000_000, 1_999_999_999), cantidad)
+    return [[f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {i}", str(c)] for i, c in enumerate(cedulas)]
+
+
+def por_operacion(funcion, argumentos):
+    inicio = time.perf_counter()
+    for a in argumentos:
+        funcion(*a)
+    return (time.perf_counter() - inicio) / len(argumentos)
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    filas = generar_operarios(cantidad)
+    azar = random.Random(5)
+
+    inicio = time.perf_counter()
+    registro = RegistroOperarios(filas)
+    cargar = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    LogicOperarios.validar_cedulas_unicas(filas)
+    validar = time.perf_counter() - inicio
+
+    muestra = [tuple(azar.choice(filas)) for _ in range(10_000)]
+    otro = [(f"Nuevo {i}", cedula) for i, (_, cedula) in enumerate(muestra)]
+    t_cedula = por_operacion(lambda n, c: registro.cedula_de(n), muestra)
+    t_nombre = por_operacion(lambda n, c: registro.nombre_de(c), muestra)
+    t_conflicto = por_operacion(registro.conflicto, otro)
+
+    # Antes: con solo nombre -> cédula, encontrar al dueño de una cédula es lineal
+    dict_nombres = dict(map(tuple, filas))
+    lineal = por_operacion(lambda n, c: next((k for k, v in dict_nombres.items() if v == c and k != n), None),
+                           otro[:50])
+
+    # Consistencia: conflictos en ambos sentidos, quitar y volver a agregar
+    assert all(registro.conflicto(n, c) == CONFLICTO_CEDULA for n, c in otro[:1000])
+    assert all(registro.conflicto(n, c + '0') == CONFLICTO_NOMBRE for n, c in muestra[:1000])
+    inicio = time.perf_counter()
+    for nombre, cedula in muestra:
+        registro.quitar(nombre)
+    for nombre, cedula in muestra:
+        registro.agregar(nombre, cedula)
+    quitar_agregar = (time.perf_counter() - inicio) / (2 * len(muestra))
+    assert len(registro) == len(registro._por_cedula) == cantidad
+    assert all(registro.nombre_de(registro.cedula_de(n)) == n for n, _ in filas)
+
+    print(f"{cantidad:,} operarios: cargar {cargar * 1e3:.0f} ms | validar {validar * 1e3:.0f} ms | "
+          f"cédula de {t_cedula * 1e9:.0f} ns | nombre de {t_nombre * 1e9:.0f} ns | "
+          f"conflicto {t_conflicto * 1e9:.0f} ns (lineal {lineal * 1e6:.0f} µs) | "
+          f"quitar/agregar {quitar_agregar * 1e9:.0f} ns")
+
+
+if __name__ == '__main__':
+    main()
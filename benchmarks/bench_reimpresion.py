@@ -0,0 +1,111 @@
+"""
+Reimpresión por lotes: 10.000 registros del historial en un PDF o un trabajo TSPL.
+
+  1. PDF en streaming (EscritorPDF) contra reportlab, que guarda todas las páginas
+     hasta save(): tiempo, tamaño y pico de memoria (tracemalloc), y verificación de
+     la tabla xref del PDF generado.
+  2. Un único trabajo TSPL hacia una impresora TCP local y hacia un archivo de spool:
+     etiquetas recibidas y pico de memoria.
+Uso:
+    python -m benchmarks.bench_reimpresion [registros]
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from core.core_main_windows.models.record_model import RepositorioRegistros
+from utils.batch_print import escribir_pdf_lote, enviar_tspl_lote, lotes_de_registros
+from utils.printer_transport import TransporteTCP, TransporteArchivo
+from utils.ticket_template import compilar_plantilla
+from benchmarks.bench_transportes import ServidorImpresora
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRODUCTOS = {'01': 'Aseo general', '02': 'Cafetería', '03': 'Servicios administrativos'}
+
+
+def poblar(repositorio, registros):
+    filas = [(f'2025-03-{1 + i // 2000:02d} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}',
+              'María Peña' if i % 2 else 'José Núñez', '1020304050' if i % 2 else '80706050',
+              f'0{1 + i % 3}', str(1 + i % 20), f'{(i % 500) / 10:.2f}') for i in range(registros)]
+    repositorio.insertar_lote(filas)
+
+
+def medir(funcion):
+    """(resultado, segundos, pico de memoria en MiB) de funcion()."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    tiempo = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return resultado, tiempo, pico
+
+
+def verificar_pdf(ruta):
+    """Comprueba que cada entrada de la xref apunte a su objeto y cuenta las páginas con contenido."""
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    inicio_xref = int(datos.rsplit(b'startxref\n', 1)[1].split(b'\n', 1)[0])
+    lineas = datos[inicio_xref:].split(b'\n')
+    cantidad = int(lineas[1].split()[1])
+    malos = sum(not datos.startswith(b'%d 0 obj' % n, int(lineas[2 + n][:10])) for n in range(1, cantidad))
+    flujos = re.findall(rb'stream\n(.*?)\nendstream', datos, re.S)
+    ultimo = zlib.decompress(flujos[-1]).decode('cp1252')
+    return malos, datos.count(b'/Type /Page '), ultimo
+
+
+def main():
+    registros = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+        plantilla = compilar_plantilla(json.load(f))
+    with tempfile.TemporaryDirectory() as carpeta:
+        repositorio = RepositorioRegistros(os.path.join(carpeta, 'bascula.db'))
+        poblar(repositorio, registros)
+        filtros = {'desde': '2025-03-01 00:00:00', 'hasta': '2025-03-31 23:59:59', 'producto': None, 'cedula': None}
+
+        # 1. PDF
+        destino = os.path.join(carpeta, 'reimpresion.pdf')
+        paginas, tiempo, pico = medir(lambda: escribir_pdf_lote(
+            plantilla, lotes_de_registros(repositorio, filtros, PRODUCTOS), destino))
+        malos, con_pagina, ultimo = verificar_pdf(destino)
+        print(f"PDF en streaming: {paginas} páginas en {tiempo:.2f} s ({paginas / tiempo:,.0f} páginas/s) | "
+              f"{os.path.getsize(destino) / 2 ** 20:.1f} MiB | pico {pico:.1f} MiB | "
+              f"xref con errores {malos} | páginas {con_pagina}")
+        print(f"  Última página: {ultimo.splitlines()[1]}")
+
+        valores = [v for lote in lotes_de_registros(repositorio, filtros, PRODUCTOS) for v in lote]
+        plantilla.pdf(valores[:1])  # Importa reportlab y carga las fuentes
+        contenido, tiempo, pico = medir(lambda: plantilla.pdf(valores))
+        print(f"reportlab en memoria: {len(valores)} páginas en {tiempo:.2f} s | "
+              f"{len(contenido) / 2 ** 20:.1f} MiB | pico {pico:.1f} MiB (sin contar la lista de valores)")
+        del valores, contenido
+
+        # 2. TSPL
+        servidor = ServidorImpresora()
+        servidor.start()
+        transporte = TransporteTCP('127.0.0.1', servidor.puerto)
+        etiquetas, tiempo, pico = medir(lambda: enviar_tspl_lote(
+            plantilla, lotes_de_registros(repositorio, filtros, PRODUCTOS), transporte, copias=2))
+        transporte.cerrar()
+        fin = time.monotonic() + 10
+        while servidor.recibido.count(b'PRINT ') < registros and time.monotonic() < fin:
+            time.sleep(0.01)
+        impresas = sum(int(n) for n in re.findall(rb'PRINT 1,(\d+)', servidor.recibido))
+        print(f"TSPL por TCP: {etiquetas} etiquetas en {tiempo:.2f} s | recibidas {impresas} en "
+              f"{servidor.conexiones} conexión | {len(servidor.recibido) / 2 ** 20:.1f} MiB | "
+              f"SIZE enviado {servidor.recibido.count(b'SIZE ')} vez | pico {pico:.1f} MiB")
+
+        spool = TransporteArchivo(os.path.join(carpeta, 'spool') + os.sep)
+        etiquetas, tiempo, pico = medir(lambda: enviar_tspl_lote(
+            plantilla, lotes_de_registros(repositorio, filtros, PRODUCTOS), spool))
+        archivos = os.listdir(spool.ruta)
+        print(f"TSPL a spool: {etiquetas} etiquetas en {tiempo:.2f} s | {len(archivos)} archivo | pico {pico:.1f} MiB")
+        repositorio.cerrar()
+
+
+if __name__ == '__main__':
+    main()
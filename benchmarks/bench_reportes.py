@@ -0,0 +1,126 @@
+"""
+Motor de reportes (NumPy) contra un groupby en Python puro, sobre registros sintéticos.
+
+Los registros se generan por lotes de filas de texto, como llegan del repositorio, y
+ambos caminos los consumen igual. Se mide la carga en columnas y cada reporte
+(totales, conteo, promedio y percentiles 50/90 del peso) por día operativo y turno, por
+operario y por producto, y se verifica que los dos caminos den los mismos números.
+Uso:
+    python -m benchmarks.bench_reportes [registros]
+"""
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+from core.core_main_windows.services.report_service import TablaRegistros, TURNOS
+
+OPERARIOS = [('María Peña', '1020304050'), ('José Núñez', '80706050'), ('Luis Alberto Suaza', '15511073'),
+             ('Ana Gómez', '43210987'), ('Andrés Muñoz', '1098765432'), ('Lucía Ramírez', '52123456')]
+PRODUCTOS = [f'COK{70000 + i}' for i in range(300)]
+LOTE = 100_000
+
+
+def generar_lotes(registros, semilla=7):
+    """Lotes de filas (fecha_hora, operario, cedula, producto, cantidad, peso) en texto, ~90 días."""
+    generador = np.random.default_rng(semilla)
+    inicio = np.datetime64('2025-01-01T00:00:00')
+    for desde in range(0, registros, LOTE):
+        n = min(LOTE, registros - desde)
+        segundos = np.sort(generador.integers(0, 90 * 86400, n))
+        fechas = np.datetime_as_string(inicio + segundos.astype('timedelta64[s]')).tolist()
+        operarios = generador.integers(0, len(OPERARIOS), n).tolist()
+        productos = generador.integers(0, len(PRODUCTOS), n).tolist()
+        cantidades = generador.integers(1, 2000, n).astype(str).tolist()
+        pesos = np.char.mod('%.2f', generador.gamma(2.0, 40.0, n)).tolist()
+        yield [(f[:10] + ' ' + f[11:], OPERARIOS[o][0], OPERARIOS[o][1], PRODUCTOS[p], c, w)
+               for f, o, p, c, w in zip(fechas, operarios, productos, cantidades, pesos)]
+
+
+def percentil(ordenados, p):
+    posicion = (len(ordenados) - 1) * p / 100
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+def reportes_python(lotes):
+    """Camino de referencia: diccionarios de listas y sorted() por grupo."""
+    inicios = [hora for _, hora in TURNOS]
+    nombres_turno = [turno for turno, _ in TURNOS]
+    desfase = timedelta(hours=inicios[0])
+    grupos = {'dia_turno': defaultdict(list), 'operario': defaultdict(list), 'producto': defaultdict(list)}
+    for lote in lotes:
+        for fecha_hora, operario, cedula, producto, cantidad, peso in lote:
+            fecha = datetime.fromisoformat(fecha_hora)
+            hora = fecha.hour
+            turno = len(inicios) - 1
+            for i, inicio in enumerate(inicios):
+                if hora >= inicio:
+                    turno = i
+            valor = float(peso)
+            grupos['dia_turno'][((fecha - desfase).date().isoformat(), nombres_turno[turno])].append(valor)
+            grupos['operario'][f"{operario} ({cedula})"].append(valor)
+            grupos['producto'][producto].append(valor)
+    resultado = {}
+    for nombre, por_grupo in grupos.items():
+        filas = []
+        for clave in sorted(por_grupo):
+            valores = sorted(por_grupo[clave])
+            filas.append((clave, len(valores), sum(valores), sum(valores) / len(valores),
+                          percentil(valores, 50), percentil(valores, 90)))
+        resultado[nombre] = filas
+    return resultado
+
+
+def main():
+    registros = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+
+    inicio = time.perf_counter()
+    tabla = TablaRegistros()
+    tabla.agregar(generar_lotes(registros))
+    carga = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    generados = sum(len(lote) for lote in generar_lotes(registros))
+    generacion = time.perf_counter() - inicio
+    memoria = sum(c.nbytes for c in (tabla.fecha, tabla.operario, tabla.producto, tabla.cantidad, tabla.peso))
+    print(f"{generados:,} registros | carga en columnas {carga - generacion:.2f} s "
+          f"(sin contar {generacion:.2f} s de generar el texto) | {memoria / 2 ** 20:.0f} MiB")
+
+    reportes = {}
+    inicio_total = time.perf_counter()
+    for nombre, por in (('dia_turno', ('dia_operativo', 'turno')), ('operario', ('operario',)), ('producto', ('producto',))):
+        inicio = time.perf_counter()
+        reportes[nombre] = tabla.agrupar(por)
+        print(f"  Reporte por {' y '.join(por)}: {len(reportes[nombre])} grupos en "
+              f"{(time.perf_counter() - inicio) * 1e3:.0f} ms")
+    numpy_total = time.perf_counter() - inicio_total
+    inicio = time.perf_counter()
+    tabla.agrupar(('dia_operativo', 'turno'))
+    print(f"  Repetir el reporte por día operativo y turno: {(time.perf_counter() - inicio) * 1e3:.0f} ms "
+          f"(el orden por peso se calcula en el primer reporte y se reutiliza)")
+
+    inicio = time.perf_counter()
+    referencia = reportes_python(generar_lotes(registros))
+    python_total = time.perf_counter() - inicio - generacion
+    print(f"3 reportes: NumPy {numpy_total:.2f} s (+ {carga - generacion:.2f} s de carga) | "
+          f"Python puro {python_total:.2f} s ({python_total / numpy_total:.0f}x, "
+          f"{python_total / (numpy_total + carga - generacion):.1f}x contando la carga)")
+
+    diferencias = 0
+    for nombre, reporte in reportes.items():
+        filas = reporte.ordenar_por(reporte.columnas[0]).filas(decimales=6)
+        if nombre == 'dia_turno':
+            filas = sorted(filas, key=lambda f: (f[0], f[1]))
+            filas = [((f[0], f[1]),) + f[2:] for f in filas]
+        esperadas = referencia[nombre]
+        for fila, esperada in zip(filas, esperadas):
+            obtenida = (fila[0], fila[1], fila[3], fila[4], fila[7], fila[8])
+            if obtenida[:2] != esperada[:2] or not np.allclose(obtenida[2:], esperada[2:], rtol=1e-9, atol=1e-5):
+                diferencias += 1
+        diferencias += abs(len(filas) - len(esperadas))
+    print(f"Grupos con diferencias entre NumPy y Python: {diferencias}")
+
+
+if __name__ == '__main__':
+    main()
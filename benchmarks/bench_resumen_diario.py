@@ -0,0 +1,120 @@
+"""
+Resúmenes diarios: costo por registro guardado y consultas de "hoy" y "este mes".
+
+Sobre una base con N registros (por defecto 1.000.000, ~2 años):
+  1. Guardar: un registro por transacción, solo el INSERT contra INSERT + resumen.
+  2. Hoy y este mes: recorrer Datos_bascula.csv completo (camino anterior), agregar
+     sobre la tabla de registros con el índice de fecha, y leer los resúmenes.
+  3. Reconstrucción completa y detección de desfase con verificar_resumen().
+Uso:
+    python -m benchmarks.bench_resumen_diario [registros]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from core.core_main_windows.models.record_model import RepositorioRegistros, _INSERTAR
+
+OPERARIOS = [('María Peña', '1020304050'), ('José Núñez', '80706050'), ('Luis Alberto Suaza', '15511073'),
+             ('Ana Gómez', '43210987'), ('Andrés Muñoz', '1098765432'), ('Lucía Ramírez', '52123456')]
+PRODUCTOS = [f'COK{70000 + i}' for i in range(40)]
+INICIO = datetime(2024, 1, 1, 6, 0, 0)
+
+
+def filas(cantidad, total, desde=0):
+    """`cantidad` filas a partir de la número `desde`, repartiendo `total` filas en ~2 años."""
+    paso = timedelta(seconds=730 * 86400 // max(total, 1))
+    for i in range(desde, desde + cantidad):
+        operario, cedula = OPERARIOS[i % len(OPERARIOS)]
+        yield ((INICIO + paso * i).strftime('%Y-%m-%d %H:%M:%S'), operario, cedula,
+               PRODUCTOS[(i * 7) % len(PRODUCTOS)], str(1 + i % 50), f'{(i * 37) % 9000 / 100:.2f}')
+
+
+def resumen_csv(ruta, dia):
+    """Camino anterior: leer todo el CSV y sumar las filas del día."""
+    registros, peso = 0, 0.0
+    with open(ruta, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for fila in reader:
+            if fila[0].startswith(dia):
+                registros += 1
+                peso += float(fila[5])
+    return registros, peso
+
+
+def medir(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return resultado, (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    registros = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as carpeta:
+        repositorio = RepositorioRegistros(os.path.join(carpeta, 'bascula.db'))
+        inicio = time.perf_counter()
+        lote = []
+        for fila in filas(registros, registros):
+            lote.append(fila)
+            if len(lote) == 50_000:
+                repositorio.insertar_lote(lote)
+                lote = []
+        repositorio.insertar_lote(lote)
+        print(f"Carga de {registros:,} registros con resúmenes: {time.perf_counter() - inicio:.1f} s | "
+              f"{repositorio.conexion.execute('SELECT COUNT(*) FROM resumen_diario').fetchone()[0]:,} filas de resumen")
+
+        # 1. Costo por registro guardado (una transacción por registro, como guardar_registro)
+        nuevos = list(filas(2000, registros, registros))
+        conexion = repositorio.conexion
+
+        def solo_insertar():
+            for fila in nuevos[:1000]:
+                with conexion:
+                    conexion.execute(_INSERTAR, fila)
+
+        def con_resumen():
+            for fila in nuevos[1000:]:
+                repositorio.insertar_lote([fila])
+
+        _, antes = medir(solo_insertar)
+        _, ahora = medir(con_resumen)
+        print(f"Guardar un registro: solo INSERT {antes * 1e3:.3f} ms | con resumen {ahora * 1e3:.3f} ms "
+              f"(por 1000 registros; +{(ahora - antes) / 1000 * 1e6:.0f} µs por registro)")
+        print(f"  Desfase tras insertar por fuera del repositorio: reconstruido={repositorio.verificar_resumen()}")
+
+        # 2. Hoy y este mes
+        ultimo = repositorio.ultimo()[0]
+        dia, mes = ultimo[:10], ultimo[:7]
+        ruta_csv = os.path.join(carpeta, 'Datos_bascula.csv')
+        repositorio.exportar_csv(ruta_csv)
+        (registros_csv, peso_csv), t_csv = medir(lambda: resumen_csv(ruta_csv, dia))
+        sql = ("SELECT COUNT(*), SUM(CAST(peso AS REAL)) FROM registros "
+               "WHERE fecha_hora >= ? AND fecha_hora < ?")
+        _, t_tabla = medir(lambda: conexion.execute(sql, (dia, dia + '~')).fetchone(), 20)
+        (registros_hoy, peso_hoy, *_), t_hoy = medir(lambda: repositorio.totales_dia(dia), 200)
+        _, t_tabla_mes = medir(lambda: conexion.execute(sql, (mes, mes + '~')).fetchone(), 5)
+        _, t_totales_mes = medir(lambda: repositorio.totales_mes(mes), 20)
+        filas_mes, t_mes = medir(lambda: repositorio.resumen_mes(mes), 20)
+        print(f"Hoy ({dia}): CSV completo {t_csv * 1e3:.0f} ms | tabla de registros {t_tabla * 1e3:.2f} ms | "
+              f"resumen {t_hoy * 1e3:.3f} ms | iguales: "
+              f"{registros_csv == registros_hoy and abs(peso_csv - peso_hoy) < 1e-6}")
+        print(f"Este mes ({mes}): tabla de registros {t_tabla_mes * 1e3:.1f} ms | resumen {t_totales_mes * 1e3:.2f} ms"
+              f" | por operario y producto {t_mes * 1e3:.2f} ms ({len(filas_mes)} filas)")
+
+        # 3. Reconstrucción
+        _, t_reconstruir = medir(repositorio.reconstruir_resumen)
+        conexion.execute("UPDATE resumen_diario SET registros = registros + 1 WHERE dia = ?", (dia,))
+        conexion.commit()
+        reconstruido, t_verificar = medir(lambda: repositorio.verificar_resumen(completo=True))
+        print(f"Reconstruir todo: {t_reconstruir:.1f} s | verificar_resumen(completo=True) con un "
+              f"resumen alterado: reconstruido={reconstruido} en {t_verificar:.1f} s | "
+              f"verificación rápida {medir(repositorio.verificar_resumen, 100)[1] * 1e6:.0f} µs")
+        repositorio.cerrar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Transportes de impresión contra impresoras de prueba locales (sin Windows).
+
+  1. TCP 9100: trabajos por segundo con la conexión persistente contra abrir una
+     conexión por trabajo, hacia un socket local que hace de impresora.
+  2. La impresora cierra la conexión (inactividad o reinicio): el siguiente envío lo
+     detecta sin esperar y reconecta, sin perder trabajos.
+  3. Carpeta de spool: un archivo completo por trabajo.
+  4. Costo de estado(): guardado contra consultado cada vez.
+Uso:
+    python -m benchmarks.bench_transportes [trabajos]
+"""
+import json
+import os
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import time
+from utils.printer_transport import TransporteTCP, TransporteArchivo
+from utils.ticket_template import compilar_plantilla, valores_ticket
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATOS = ('2025-03-01 08:15:00', 'María Peña', '1020304050', '03', 'Servicios administrativos', '12', '25.40')
+
+
+class ServidorImpresora(threading.Thread):
+    """
+    Impresora TCP de prueba en un solo hilo (selectors): acumula lo recibido y puede
+    cortar las conexiones abiertas, como una impresora que se reinicia.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.servidor = socket.create_server(('127.0.0.1', 0), backlog=4096)
+        self.servidor.setblocking(False)
+        self.puerto = self.servidor.getsockname()[1]
+        self.recibido = bytearray()
+        self.conexiones = 0
+        self.candado = threading.Lock()
+        self.corte = threading.Event()
+        self.cortado = threading.Event()
+
+    def run(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.servidor, selectors.EVENT_READ)
+        abiertas = set()
+        while True:
+            if self.corte.is_set():
+                for conexion in abiertas:
+                    selector.unregister(conexion)
+                    conexion.close()
+                abiertas.clear()
+                self.corte.clear()
+                self.cortado.set()
+            for clave, _ in selector.select(0.01):
+                if clave.fileobj is self.servidor:
+                    conexion, _ = self.servidor.accept()
+                    self.conexiones += 1
+                    abiertas.add(conexion)
+                    selector.register(conexion, selectors.EVENT_READ)
+                    continue
+                conexion = clave.fileobj
+                datos = conexion.recv(65536)
+                if datos:
+                    with self.candado:
+                        self.recibido += datos
+                else:
+                    selector.unregister(conexion)
+                    abiertas.discard(conexion)
+                    conexion.close()
+
+    def cortar(self):
+        self.cortado.clear()
+        self.corte.set()
+        self.cortado.wait(1)
+
+    def esperar_etiquetas(self, cantidad, limite=10):
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            with self.candado:
+                if self.recibido.count(b'PRINT 1,1') >= cantidad:
+                    return cantidad
+            time.sleep(0.01)
+        return self.recibido.count(b'PRINT 1,1')
+
+
+def main():
+    trabajos = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+        plantilla = compilar_plantilla(json.load(f))
+    trabajo = plantilla.tspl(valores_ticket(*DATOS))
+
+    # 1. Conexión persistente contra una conexión por trabajo
+    servidor = ServidorImpresora()
+    servidor.start()
+    transporte = TransporteTCP('127.0.0.1', servidor.puerto)
+    inicio = time.perf_counter()
+    for _ in range(trabajos):
+        transporte.enviar(trabajo)
+    persistente = trabajos / (time.perf_counter() - inicio)
+    recibidos = servidor.esperar_etiquetas(trabajos)
+    conexiones = servidor.conexiones
+    transporte.cerrar()
+
+    servidor = ServidorImpresora()
+    servidor.start()
+    inicio = time.perf_counter()
+    for _ in range(trabajos):
+        with socket.create_connection(('127.0.0.1', servidor.puerto)) as conexion:
+            conexion.sendall(trabajo)
+    por_trabajo = trabajos / (time.perf_counter() - inicio)
+    print(f"TCP {trabajos} trabajos: persistente {persistente:,.0f} trabajos/s ({conexiones} conexión, "
+          f"recibidos {recibidos}) | conexión por trabajo {por_trabajo:,.0f} trabajos/s "
+          f"({persistente / por_trabajo:.1f}x)")
+
+    # 2. La impresora corta la conexión entre trabajos
+    servidor = ServidorImpresora()
+    servidor.start()
+    transporte = TransporteTCP('127.0.0.1', servidor.puerto)
+    for i in range(100):
+        if i % 25 == 24:
+            servidor.esperar_etiquetas(i)  # La impresora imprime lo recibido y cierra la conexión
+            servidor.cortar()
+        transporte.enviar(trabajo)
+    recibidos = servidor.esperar_etiquetas(100)
+    transporte.cerrar()
+    print(f"Cortes de conexión: recibidos {recibidos}/100 en {servidor.conexiones} conexiones")
+
+    # 3. Carpeta de spool
+    with tempfile.TemporaryDirectory() as carpeta:
+        spool = TransporteArchivo(carpeta + os.sep)
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            spool.enviar(trabajo)
+        tiempo = time.perf_counter() - inicio
+        archivos = [n for n in os.listdir(carpeta) if n.endswith('.prn')]
+        completos = sum(os.path.getsize(os.path.join(carpeta, n)) == len(trabajo) for n in archivos)
+        print(f"Spool en carpeta: {1000 / tiempo:,.0f} trabajos/s | archivos {len(archivos)} | completos {completos}")
+
+        # 4. Estado guardado contra consultado
+        n = 10_000
+        inicio = time.perf_counter()
+        for _ in range(n):
+            spool.estado()
+        guardado = (time.perf_counter() - inicio) / n
+        inicio = time.perf_counter()
+        for _ in range(n):
+            spool.estado(forzar=True)
+        consultado = (time.perf_counter() - inicio) / n
+        print(f"estado(): guardado {guardado * 1e9:.0f} ns | consultado {consultado * 1e6:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
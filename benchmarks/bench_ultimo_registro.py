@@ -0,0 +1,74 @@
+"""
+Tiempo de "último registro" al arrancar según el tamaño de Datos_bascula.csv.
+
+Compara la lectura anterior (list(csv.reader(f)) de todo el archivo) con
+leer_ultima_linea(), que solo lee el final del archivo.
+Uso:
+    python -m benchmarks.bench_ultimo_registro [filas ...] [--anterior-hasta N]
+Por defecto mide 10k, 1M y 10M filas; la lectura anterior solo se mide hasta 1M
+filas porque con 10M necesita varios GB de memoria.
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+from core.core_main_windows.utils.file_utils import leer_ultima_linea
+
+ENCABEZADOS = 'FechaHora,Operario,Cédula,Producto,Cantidad,Peso\r\n'
+FILA = '2025-06-05 14:54:17,Amaris Díaz Jairo Daniel,1133774215,CMG70021,1000,7.25\r\n'
+
+
+def generar_archivo(ruta, filas):
+    bloque = FILA * 10000
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        f.write(ENCABEZADOS)
+        for _ in range(filas // 10000):
+            f.write(bloque)
+        f.write(FILA * (filas % 10000))
+
+
+def lectura_anterior(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        registros = list(csv.reader(f))
+        return registros[-1]
+
+
+def lectura_nueva(ruta):
+    linea, _ = leer_ultima_linea(ruta)
+    return next(csv.reader([linea]))
+
+
+def medir(funcion, ruta, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(ruta)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    argumentos = sys.argv[1:]
+    anterior_hasta = 1_000_000
+    if '--anterior-hasta' in argumentos:
+        i = argumentos.index('--anterior-hasta')
+        anterior_hasta = int(argumentos[i + 1])
+        del argumentos[i:i + 2]
+    tamanos = [int(a) for a in argumentos] or [10_000, 1_000_000, 10_000_000]
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'Datos_bascula.csv')
+        for filas in tamanos:
+            generar_archivo(ruta, filas)
+            megas = os.path.getsize(ruta) / 1e6
+            nueva = medir(lectura_nueva, ruta, 50)
+            texto = f"{filas:>11,} filas ({megas:8.1f} MB): leer_ultima_linea {nueva * 1e6:8.1f} µs"
+            if filas <= anterior_hasta:
+                anterior = medir(lectura_anterior, ruta, 1)
+                texto += f" | lectura completa {anterior * 1e3:10.1f} ms"
+            print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Generador de datos sintéticos para los benchmarks: Datos_bascula.csv, operarios.csv
+y productos.csv con el formato de los archivos reales de la estación.
+
+  - Nombres y apellidos en español con tildes y eñes; algunos en mayúsculas y
+    algunos con las tildes descompuestas (NFD), como llegan al copiar desde Excel u
+    otros sistemas.
+  - operarios.csv y productos.csv sin encabezado y con BOM (como los exporta Excel);
+    Datos_bascula.csv con encabezado, CRLF y sin BOM (como lo escribe la aplicación).
+  - Registros en orden cronológico repartidos en ~3 años, con los operarios y
+    productos activos de un turno repitiéndose como en la planta.
+
+La salida es determinista para una semilla dada. Uso:
+    python -m benchmarks.datos_sinteticos <carpeta> <registros> [operarios] [productos]
+"""
+import json
+import os
+import random
+import sys
+import unicodedata
+from datetime import datetime, timedelta
+
+VERSION = 1
+BOM = '﻿'
+ENCABEZADOS = 'FechaHora,Operario,Cédula,Producto,Cantidad,Peso'
+
+NOMBRES = ['María', 'José', 'Andrés', 'Lucía', 'Sebastián', 'Ramón', 'Íngrid', 'Óscar', 'Ángela', 'Nicolás',
+           'Martín', 'Tomás', 'Verónica', 'Mónica', 'Raúl', 'Iván', 'Julián', 'Joaquín', 'Germán', 'Inés',
+           'Belén', 'Jesús', 'Álvaro', 'Sofía', 'Valentina', 'Camila', 'Daniela', 'Yesenia', 'Dayana', 'Kevin',
+           'Luis', 'Carlos', 'Jorge', 'Ana', 'Paula', 'Natalia', 'Alejandro', 'Juan', 'Yimy', 'Deison',
+           'Estefanía', 'Marisol', 'Rocío', 'Fabián', 'Hernán', 'Édgar', 'Efraín', 'Nelly', 'Gloria', 'Wílmar',
+           'Cristian', 'Stiven', 'Yuliana', 'Leidy', 'Jhon', 'Arley', 'Dubán', 'Yésica', 'Maryluz', 'Ruth']
+SEGUNDOS_NOMBRES = [''] + NOMBRES
+APELLIDOS = ['Peña', 'Núñez', 'Muñoz', 'Ibáñez', 'Gómez', 'Rodríguez', 'Martínez', 'López', 'García', 'Hernández',
+             'Pérez', 'Sánchez', 'Ramírez', 'Díaz', 'Álvarez', 'Jiménez', 'Gutiérrez', 'Ospina', 'Zuluaga',
+             'Restrepo', 'Londoño', 'Cárdenas', 'Quiñónez', 'Benítez', 'Velásquez', 'Montaño', 'Córdoba',
+             'Castaño', 'Agudelo', 'Echeverri', 'Suaza', 'Foronda', 'Múnera', 'Ruiz', 'Angulo', 'Barrios',
+             'Chaverra', 'Espinosa', 'Mosquera', 'Palacios', 'Rentería', 'Valencia', 'Cuesta', 'Durán', 'Arboleda',
+             'Giraldo', 'Hincapié', 'Marín', 'Osorio', 'Tabares', 'Úsuga', 'Bedoya', 'Cañas', 'Gaviria', 'Toro',
+             'Yepes', 'Zapata', 'Muñetón', 'Góez', 'Bermúdez']
+ARTICULOS = ['Caja corrugada', 'Bolsa de polietileno', 'Etiqueta adhesiva', 'Cinta de embalaje',
+             'Lámina termoencogible', 'Estiba de madera', 'Separador de cartón', 'Bandeja de icopor',
+             'Película strech', 'Esquinero de cartón', 'Zuncho plástico', 'Tapa de aluminio', 'Envase PET',
+             'Garrafa', 'Saco de fique', 'Malla tubular', 'Papel kraft', 'Cartón plegadizo', 'Sobre de manila',
+             'Bobina de papel']
+DETALLES = ['doble pared', 'pared sencilla', 'calibre 2', 'calibre 3', 'impresión a 2 tintas', 'con asas',
+            'reforzada', 'biodegradable', 'línea exportación', 'para congelación', 'con logotipo', 'año 2024',
+            'diseño niño', 'tamaño único', 'color café', 'transparente', 'corte especial', 'alta densidad']
+MEDIDAS = ['40x30 cm', '60x40 cm', '25x25 cm', '1 m', '50 µm', '2 L', '500 ml', '120x100 cm', '1,5 kg', '20 kg']
+PREFIJOS = ['COK', 'COG', 'CMG', 'G', 'CPK', 'EMB']
+TURNOS = ['ST', 'US']
+
+
+def nombre_operario(i):
+    """Nombre único para el operario `i` (más de 80 millones de combinaciones)."""
+    i, primero = divmod(i, len(NOMBRES))
+    i, segundo = divmod(i, len(SEGUNDOS_NOMBRES))
+    i, apellido1 = divmod(i, len(APELLIDOS))
+    i, apellido2 = divmod(i, len(APELLIDOS))
+    # "María María" no existe; ese caso pasa a "María de Jesús", que no está en la lista
+    segundo_nombre = 'de Jesús' if segundo == primero + 1 else SEGUNDOS_NOMBRES[segundo]
+    partes = [NOMBRES[primero], segundo_nombre, APELLIDOS[apellido1], APELLIDOS[apellido2]]
+    nombre = ' '.join(p for p in partes if p)
+    return f"{nombre} {i + 1}" if i else nombre
+
+
+def codigo_producto(i):
+    return f"{PREFIJOS[i % len(PREFIJOS)]}{70000 + i // len(PREFIJOS)}"
+
+
+def descripcion_producto(i, generador):
+    return (f"{generador.choice(ARTICULOS)} {generador.choice(DETALLES)} {generador.choice(MEDIDAS)}"
+            f" - Ref. {i}")
+
+
+def _variar(texto, generador):
+    """Mayúsculas o tildes descompuestas en una parte de los nombres, como en los archivos reales."""
+    azar = generador.random()
+    if azar < 0.10:
+        return texto.upper()
+    if azar < 0.15:
+        return unicodedata.normalize('NFD', texto)
+    return texto
+
+
+def _escribir_por_bloques(ruta, lineas, encabezado=None, bom=False):
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        if bom:
+            f.write(BOM)
+        if encabezado:
+            f.write(encabezado + '\r\n')
+        bloque = []
+        for linea in lineas:
+            bloque.append(linea)
+            if len(bloque) == 50_000:
+                f.write('\r\n'.join(bloque) + '\r\n')
+                bloque = []
+        if bloque:
+            f.write('\r\n'.join(bloque) + '\r\n')
+
+
+def generar_operarios(ruta, cantidad, semilla=1, bom=True):
+    """operarios.csv: nombre,cédula. Devuelve la lista de (nombre, cedula) escrita."""
+    generador = random.Random(semilla)
+    operarios = [(_variar(nombre_operario(i), generador), str(1_000_000 + i * 7919 % 1_000_000_000))
+                 for i in range(cantidad)]
+    _escribir_por_bloques(ruta, (f"{nombre},{cedula}" for nombre, cedula in operarios), bom=bom)
+    return operarios
+
+
+def generar_productos(ruta, cantidad, semilla=2, bom=True):
+    """productos.csv: código,descripción. Devuelve la lista de códigos escrita."""
+    generador = random.Random(semilla)
+    codigos = [codigo_producto(i) for i in range(cantidad)]
+    # Las descripciones llevan coma: van entre comillas, como las deja el módulo csv
+    _escribir_por_bloques(ruta, (f'{codigo},"{descripcion_producto(i, generador)}"'
+                                 for i, codigo in enumerate(codigos)), bom=bom)
+    return codigos
+
+
+def filas_registros(cantidad, operarios, codigos, semilla=3, desde=datetime(2023, 1, 2, 6, 0, 0), dias=3 * 365):
+    """Líneas de Datos_bascula.csv en orden cronológico, sin el salto final."""
+    generador = random.Random(semilla)
+    paso = dias * 86400 / max(cantidad, 1)
+    activos_operarios = min(len(operarios), 12)
+    activos_productos = min(len(codigos), 40)
+    turno_operarios, turno_productos = [], []
+    segundos = 0.0
+    for i in range(cantidad):
+        if i % 400 == 0:
+            # Cambio de turno: otro grupo de operarios y de productos en la línea
+            turno_operarios = generador.sample(operarios, activos_operarios)
+            turno_productos = generador.sample(codigos, activos_productos)
+        nombre, cedula = turno_operarios[generador.randrange(activos_operarios)]
+        fecha = desde + timedelta(seconds=int(segundos))
+        segundos += paso * (0.5 + generador.random())
+        yield (f"{fecha:%Y-%m-%d %H:%M:%S},{nombre},{cedula},{turno_productos[generador.randrange(activos_productos)]},"
+               f"{generador.choice((1, 12, 24, 50, 100, 500, 1000, 2000, 3000))},"
+               f"{generador.gammavariate(2.0, 15.0):.2f}")
+
+
+def generar_registros(ruta, cantidad, operarios, codigos, semilla=3, bom=False):
+    _escribir_por_bloques(ruta, filas_registros(cantidad, operarios, codigos, semilla), ENCABEZADOS, bom)
+
+
+def generar_conjunto(carpeta, registros, operarios=300, productos=3000, semilla=7):
+    """
+    Escribe los tres archivos en `carpeta`. Si ya hay un conjunto generado con los
+    mismos parámetros (generado.json) se reutiliza. Devuelve las rutas.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = {nombre: os.path.join(carpeta, f"{nombre}.csv") for nombre in ('Datos_bascula', 'operarios', 'productos')}
+    parametros = {'version': VERSION, 'registros': registros, 'operarios': operarios,
+                  'productos': productos, 'semilla': semilla}
+    marca = os.path.join(carpeta, 'generado.json')
+    if os.path.exists(marca) and all(os.path.exists(r) for r in rutas.values()):
+        with open(marca, encoding='utf-8') as f:
+            if json.load(f) == parametros:
+                return rutas
+    lista_operarios = generar_operarios(rutas['operarios'], operarios, semilla)
+    codigos = generar_productos(rutas['productos'], productos, semilla + 1)
+    generar_registros(rutas['Datos_bascula'], registros, lista_operarios, codigos, semilla + 2)
+    with open(marca, 'w', encoding='utf-8') as f:
+        json.dump(parametros, f)
+    return rutas
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python -m benchmarks.datos_sinteticos <carpeta> <registros> [operarios] [productos]")
+        return 2
+    carpeta, registros = sys.argv[1], int(sys.argv[2])
+    operarios = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    productos = int(sys.argv[4]) if len(sys.argv) > 4 else 3000
+    rutas = generar_conjunto(carpeta, registros, operarios, productos)
+    for ruta in rutas.values():
+        print(f"{ruta}: {os.path.getsize(ruta) / 2 ** 20:.1f} MiB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Suite de benchmarks sobre datos sintéticos (benchmarks/datos_sinteticos.py), con
+resultados en JSON para comparar corridas entre versiones o entre estaciones.
+
+Por cada tamaño (por defecto 10k, 1M y 10M filas):
+  - CSVService.leer_csv sobre operarios.csv y productos.csv de ese tamaño, leyendo
+    el CSV (usar_cache=False) y desde el snapshot vigente.
+  - BasculaApp.cargar_ultimo_registro sobre Datos_bascula.csv.
+  - HistorialWindow (Qt offscreen): apertura en frío, que incluye importar el CSV a
+    la base SQLite, y cargar_registros() con la base ya sincronizada. Los maestros
+    de esta prueba tienen el tamaño de una planta (300 operarios, 3000 productos),
+    porque la ventana llena con ellos los combos de filtros.
+Una sola vez:
+  - PDF del ticket con la plantilla de printer_config.json: un ticket y un lote de
+    1000 páginas.
+  - ParserTramas.alimentar con tramas genéricas y MT-SICS partidas en trozos.
+
+Uso:
+    python -m benchmarks.suite [--tamanos 10000 1000000 ...] [--datos CARPETA]
+                               [--maestros-hasta N] [--salida ARCHIVO] [--comparar ANTERIOR.json]
+--datos guarda los archivos generados en CARPETA y los reutiliza en la próxima
+corrida (generar 10M filas toma un par de minutos). --maestros-hasta limita las
+filas de los maestros de leer_csv (por defecto 1M: con 10M la lista en memoria
+pasa de 3 GB). Los resultados quedan en benchmarks/resultados/.
+"""
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from benchmarks.datos_sinteticos import generar_conjunto
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARPETA_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+TAMANOS = [10_000, 1_000_000, 10_000_000]
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """Tiempos en segundos de `repeticiones` llamadas; `preparar` corre antes de cada una sin medirse."""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+class Suite:
+    def __init__(self):
+        self.resultados = []
+
+    def registrar(self, prueba, filas, tiempos, **extra):
+        resultado = {'prueba': prueba, 'filas': filas, 'mejor_s': min(tiempos),
+                     'mediana_s': statistics.median(tiempos), 'repeticiones': len(tiempos), 'extra': extra}
+        self.resultados.append(resultado)
+        detalle = ' '.join(f"{clave}={valor}" for clave, valor in extra.items())
+        print(f"  {prueba:32s} {filas:>11,} filas  mejor {_formatear(resultado['mejor_s']):>10}  "
+              f"mediana {_formatear(resultado['mediana_s']):>10}  {detalle}")
+        return resultado
+
+
+def _formatear(segundos):
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:.1f} µs"
+    if segundos < 1:
+        return f"{segundos * 1e3:.1f} ms"
+    return f"{segundos:.2f} s"
+
+
+def _repeticiones(filas, pocas=1, muchas=5):
+    return muchas if filas <= 1_000_000 else pocas
+
+
+# --- PRUEBAS POR TAMAÑO ---
+def medir_leer_csv(suite, carpeta, filas, maestros_hasta):
+    from core.core_panel_admin.worker.csv_service import CSVService, SnapshotCSV
+
+    maestros = min(filas, maestros_hasta)
+    rutas = generar_conjunto(os.path.join(carpeta, f"maestros_{maestros}"), 0, maestros, maestros)
+    repeticiones = _repeticiones(maestros, 1, 3)
+    for nombre in ('operarios', 'productos'):
+        ruta = rutas[nombre]
+        # Snapshot en la carpeta de los datos, no en data/cache del repositorio
+        SnapshotCSV.DIRECTORIO = os.path.join(os.path.dirname(ruta), 'cache')
+        tiempos = medir(lambda: CSVService.leer_csv(ruta, usar_cache=False), repeticiones)
+        suite.registrar(f"leer_csv.{nombre}.csv", maestros, tiempos,
+                        mb=round(os.path.getsize(ruta) / 1e6, 1))
+        filas_leidas = len(CSVService.leer_csv(ruta))  # deja el snapshot vigente
+        tiempos = medir(lambda: CSVService.leer_csv(ruta), repeticiones)
+        suite.registrar(f"leer_csv.{nombre}.snapshot", maestros, tiempos, filas_leidas=filas_leidas)
+
+
+def medir_ultimo_registro(suite, rutas, filas):
+    from PyQt5.QtWidgets import QLabel
+    from gui.main_windows import BasculaApp
+    from utils.logger_config import setup_logger
+
+    # Solo los atributos que usa el método; la ventana completa abre el puerto serial
+    ventana = SimpleNamespace(csv_file=rutas['Datos_bascula'], logger=setup_logger(), lbl_ultimo=QLabel())
+    tiempos = medir(lambda: BasculaApp.cargar_ultimo_registro(ventana), 50)
+    suite.registrar('cargar_ultimo_registro', filas, tiempos, texto=ventana.lbl_ultimo.text()[:40])
+
+
+def medir_historial(suite, app, carpeta, filas):
+    from gui.historial_window import HistorialWindow
+
+    trabajo = os.path.join(carpeta, f"historial_{filas}")
+    rutas = generar_conjunto(os.path.join(trabajo, 'data'), filas)
+    shutil.copy2(os.path.join(RAIZ, 'printer_config.json'), trabajo)
+    original = os.getcwd()
+    os.chdir(trabajo)  # HistorialWindow usa rutas relativas a data/
+    try:
+        def borrar_base():
+            for nombre in os.listdir('data'):
+                if nombre.startswith('bascula.db'):
+                    os.remove(os.path.join('data', nombre))
+
+        ventanas = []
+
+        def abrir():
+            ventana = HistorialWindow()
+            ventana.show()
+            app.processEvents()
+            ventanas.append(ventana)
+
+        tiempos = medir(abrir, 1, borrar_base)
+        ventana = ventanas[0]
+        suite.registrar('HistorialWindow.apertura_en_frio', filas, tiempos,
+                        mb=round(os.path.getsize(rutas['Datos_bascula']) / 1e6, 1))
+
+        def cargar():
+            ventana.cargar_registros()
+            app.processEvents()
+
+        tiempos = medir(cargar, 5)
+        suite.registrar('HistorialWindow.cargar_registros', filas, tiempos,
+                        filas_visibles=ventana.modelo.rowCount())
+        ventana.close()
+        ventana.deleteLater()
+        app.processEvents()
+        if ventana.repositorio is not None:
+            ventana.repositorio.cerrar()
+    finally:
+        os.chdir(original)
+
+
+# --- PRUEBAS ÚNICAS ---
+def medir_pdf(suite):
+    from utils.ticket_template import compilar_plantilla, valores_ticket
+
+    ruta_config = os.path.join(RAIZ, 'printer_config.json')
+    try:
+        from utils.print_manager import PrintManager
+        PrintManager.CONFIG_PATH = ruta_config
+        _, plantilla = PrintManager(interactivo=False).obtener_plantilla()
+        origen = 'PrintManager.obtener_plantilla'
+    except ImportError:
+        # Sin pywin32 (fuera de Windows) PrintManager no se puede importar; la
+        # plantilla es la misma que compila obtener_plantilla()
+        with open(ruta_config, encoding='utf-8') as f:
+            plantilla = compilar_plantilla(json.load(f))
+        origen = 'compilar_plantilla'
+
+    generador = random.Random(11)
+    lote = [valores_ticket(f"2025-06-05 14:{i // 60 % 60:02d}:{i % 60:02d}", 'Íngrid Muñoz Peña', '1020304050',
+                           f"COK{70000 + i}", f"Caja corrugada doble pared año {2020 + i % 6}",
+                           generador.choice((12, 24, 500)), f"{generador.uniform(1, 90):.2f}")
+            for i in range(1000)]
+    tiempos = medir(lambda: plantilla.pdf(lote[:1]), 20)
+    suite.registrar('PlantillaTicket.pdf.1_ticket', 1, tiempos, plantilla=origen)
+    tamano = []
+    tiempos = medir(lambda: tamano.append(len(plantilla.pdf(lote))), 3)
+    suite.registrar('PlantillaTicket.pdf.lote', len(lote), tiempos, plantilla=origen, kib=tamano[-1] // 1024)
+
+
+def medir_parser(suite, tramas=200_000):
+    from core.core_main_windows.services.weight_service import ParserTramas
+
+    generador = random.Random(5)
+    flujos = {
+        'generico': b''.join(b'%s,%s,%+08.2fkg\r\n' % (generador.choice((b'ST', b'US')), generador.choice((b'GS', b'NT')),
+                                                       generador.uniform(-50, 9999)) for _ in range(tramas)),
+        'sics': b''.join(b'S %s %10.2f kg\r\n' % (generador.choice((b'S', b'D')), generador.uniform(0, 9999))
+                         for _ in range(tramas)),
+    }
+    for dialecto, flujo in flujos.items():
+        # Trozos de 1 a 64 bytes, como los entrega el puerto serial
+        trozos = []
+        i = 0
+        while i < len(flujo):
+            n = generador.randint(1, 64)
+            trozos.append(flujo[i:i + n])
+            i += n
+        lecturas = []
+
+        def alimentar():
+            parser = ParserTramas(dialecto)
+            lecturas.append(sum(len(parser.alimentar(trozo)) for trozo in trozos))
+
+        tiempos = medir(alimentar, 3)
+        suite.registrar(f"ParserTramas.alimentar.{dialecto}", tramas, tiempos, lecturas=lecturas[-1],
+                        tramas_por_s=int(tramas / min(tiempos)))
+
+
+# --- RESULTADOS ---
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def guardar(resultados, ruta=None):
+    estacion = socket.gethostname()
+    if ruta is None:
+        os.makedirs(CARPETA_RESULTADOS, exist_ok=True)
+        ruta = os.path.join(CARPETA_RESULTADOS, f"suite_{datetime.now():%Y%m%d_%H%M%S}_{estacion}.json")
+    datos = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'estacion': estacion,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': _commit(),
+        'resultados': resultados,
+    }
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+    return ruta
+
+
+def comparar(resultados, ruta_anterior):
+    """Imprime la razón actual/anterior del mejor tiempo de cada prueba presente en ambas corridas."""
+    with open(ruta_anterior, encoding='utf-8') as f:
+        anterior = json.load(f)
+    previos = {(r['prueba'], r['filas']): r for r in anterior['resultados']}
+    print(f"\nComparación con {os.path.basename(ruta_anterior)} (commit {anterior.get('commit')}):")
+    for r in resultados:
+        previo = previos.get((r['prueba'], r['filas']))
+        if previo is None:
+            continue
+        razon = r['mejor_s'] / previo['mejor_s'] if previo['mejor_s'] else float('inf')
+        marca = 'más lento' if razon > 1.10 else 'más rápido' if razon < 0.90 else 'igual'
+        print(f"  {r['prueba']:32s} {r['filas']:>11,} filas  {_formatear(previo['mejor_s']):>10} -> "
+              f"{_formatear(r['mejor_s']):>10}  x{razon:.2f} ({marca})")
+
+
+def _opcion(argumentos, nombre, varios=False):
+    if nombre not in argumentos:
+        return None
+    i = argumentos.index(nombre)
+    valores = []
+    for valor in argumentos[i + 1:]:
+        if valor.startswith('--'):
+            break
+        valores.append(valor)
+        if not varios:
+            break
+    del argumentos[i:i + 1 + len(valores)]
+    return valores if varios else (valores[0] if valores else None)
+
+
+def main():
+    argumentos = sys.argv[1:]
+    tamanos = [int(t) for t in _opcion(argumentos, '--tamanos', varios=True) or []] or TAMANOS
+    datos = _opcion(argumentos, '--datos')
+    maestros_hasta = int(_opcion(argumentos, '--maestros-hasta') or 1_000_000)
+    salida = _opcion(argumentos, '--salida')
+    anterior = _opcion(argumentos, '--comparar')
+
+    from PyQt5.QtWidgets import QApplication
+    from utils.logger_config import setup_logger, establecer_nivel
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    setup_logger()
+    establecer_nivel(None, 'WARNING')  # "Historial cargado" en cada repetición no deja leer la tabla
+
+    carpeta = os.path.abspath(datos) if datos else tempfile.mkdtemp(prefix='bench_suite_')
+    os.makedirs(carpeta, exist_ok=True)
+    suite = Suite()
+    try:
+        for filas in tamanos:
+            print(f"{filas:,} filas:")
+            inicio = time.perf_counter()
+            rutas = generar_conjunto(os.path.join(carpeta, f"historial_{filas}", 'data'), filas)
+            print(f"  (datos listos en {time.perf_counter() - inicio:.1f} s)")
+            medir_leer_csv(suite, carpeta, filas, maestros_hasta)
+            medir_ultimo_registro(suite, rutas, filas)
+            medir_historial(suite, app, carpeta, filas)
+        print("Ticket PDF y tramas:")
+        medir_pdf(suite)
+        medir_parser(suite)
+    finally:
+        if not datos:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    ruta = guardar(suite.resultados, salida)
+    print(f"\nResultados en {ruta}")
+    if anterior:
+        comparar(suite.resultados, anterior)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,357 @@
-# Estructura de datos de pesaje
\ No newline at end of file
+import calendar
+import csv
+import hashlib
+import os
+import sqlite3
+
+COLUMNAS = ['FechaHora', 'Operario', 'Cédula', 'Producto', 'Cantidad', 'Peso']
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    id         INTEGER PRIMARY KEY,
+    fecha_hora TEXT NOT NULL,
+    operario   TEXT NOT NULL,
+    cedula     TEXT NOT NULL,
+    producto   TEXT NOT NULL,
+    cantidad   TEXT NOT NULL,
+    peso       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_registros_fecha_hora ON registros(fecha_hora);
+CREATE INDEX IF NOT EXISTS idx_registros_cedula ON registros(cedula);
+CREATE INDEX IF NOT EXISTS idx_registros_producto ON registros(producto);
+CREATE TABLE IF NOT EXISTS resumen_diario (
+    dia            TEXT NOT NULL,
+    cedula         TEXT NOT NULL,
+    producto       TEXT NOT NULL,
+    operario       TEXT NOT NULL,
+    registros      INTEGER NOT NULL,
+    peso_total     REAL NOT NULL,
+    cantidad_total REAL NOT NULL,
+    peso_min       REAL NOT NULL,
+    peso_max       REAL NOT NULL,
+    PRIMARY KEY (dia, cedula, producto)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+_INSERTAR = ("INSERT INTO registros (fecha_hora, operario, cedula, producto, cantidad, peso) "
+             "VALUES (?, ?, ?, ?, ?, ?)")
+# Suma una fila (fecha_hora, operario, cedula, producto, cantidad, peso) a su resumen diario
+_ACUMULAR = """
+INSERT INTO resumen_diario (dia, cedula, producto, operario, registros, peso_total, cantidad_total, peso_min, peso_max)
+VALUES (substr(?1, 1, 10), ?3, ?4, ?2, 1, CAST(?6 AS REAL), CAST(?5 AS REAL), CAST(?6 AS REAL), CAST(?6 AS REAL))
+ON CONFLICT(dia, cedula, producto) DO UPDATE SET
+    operario = excluded.operario,
+    registros = registros + 1,
+    peso_total = peso_total + excluded.peso_total,
+    cantidad_total = cantidad_total + excluded.cantidad_total,
+    peso_min = MIN(peso_min, excluded.peso_min),
+    peso_max = MAX(peso_max, excluded.peso_max)
+"""
+# Recalcula todos los resúmenes desde los registros; el nombre del operario es el de su
+# registro más reciente en cada grupo, como al acumular
+_RECONSTRUIR_RESUMEN = """
+INSERT INTO resumen_diario (dia, cedula, producto, operario, registros, peso_total, cantidad_total, peso_min, peso_max)
+SELECT g.dia, g.cedula, g.producto, r.operario, g.registros, g.peso_total, g.cantidad_total, g.peso_min, g.peso_max
+FROM (
+    SELECT substr(fecha_hora, 1, 10) AS dia, cedula, producto, MAX(id) AS ultimo,
+           COUNT(*) AS registros, SUM(CAST(peso AS REAL)) AS peso_total,
+           SUM(CAST(cantidad AS REAL)) AS cantidad_total,
+           MIN(CAST(peso AS REAL)) AS peso_min, MAX(CAST(peso AS REAL)) AS peso_max
+    FROM registros GROUP BY dia, cedula, producto
+) AS g JOIN registros AS r ON r.id = g.ultimo
+"""
+_SELECT = "SELECT fecha_hora, operario, cedula, producto, cantidad, peso FROM registros"
+_SELECT_CON_ID = "SELECT id, fecha_hora, operario, cedula, producto, cantidad, peso FROM registros"
+_BYTES_HUELLA = 1024  # Bytes iniciales del CSV con los que se detecta si el archivo fue reemplazado
+
+
+def rango_mes(mes):
+    """Primer y último día ('YYYY-MM-DD') del mes `mes` ('YYYY-MM')."""
+    anio, numero = int(mes[:4]), int(mes[5:7])
+    return f"{mes}-01", f"{mes}-{calendar.monthrange(anio, numero)[1]:02d}"
+
+
+def _huella(ruta, longitud):
+    with open(ruta, 'rb') as f:
+        return hashlib.sha1(f.read(longitud)).hexdigest()
+
+
+class RepositorioRegistros:
+    """
+    Repositorio de pesadas sobre SQLite (modo WAL) con índices por fecha, cédula y producto.
+
+    Datos_bascula.csv sigue siendo el registro original: el repositorio se mantiene
+    al día importando solo los bytes agregados al CSV desde la última sincronización
+    (el desplazamiento consumido se guarda en la tabla `meta`). La primera
+    sincronización es la migración completa del archivo, hecha en streaming y por lotes.
+
+    Si el CSV se trunca o se reemplaza por otro (rotación), la tabla se reconstruye y
+    se incrementa `generacion()`, para que quien muestre los datos sepa que debe recargar.
+    """
+
+    def __init__(self, ruta_db='data/bascula.db'):
+        self.ruta_db = ruta_db
+        directorio = os.path.dirname(ruta_db)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+        self.conexion = sqlite3.connect(ruta_db)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(_ESQUEMA)
+
+    def cerrar(self):
+        self.conexion.close()
+
+    # --- META ---
+    def _leer_meta(self, clave, defecto=None):
+        fila = self.conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else defecto
+
+    def _escribir_meta(self, clave, valor):
+        self.conexion.execute(
+            "INSERT INTO meta (clave, valor) VALUES (?, ?) "
+            "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor",
+            (clave, str(valor))
+        )
+
+    # --- ESCRITURA ---
+    def insertar_lote(self, registros):
+        """Inserta varias filas [fecha_hora, operario, cedula, producto, cantidad, peso] en una transacción."""
+        with self.conexion:
+            self._insertar(registros)
+
+    def _insertar(self, filas):
+        """Inserta las filas y las suma a sus resúmenes diarios (dentro de la transacción abierta)."""
+        # Si los resúmenes ya estaban desfasados, el último id resumido no se adelanta:
+        # así verificar_resumen() lo sigue detectando
+        al_dia = int(self._leer_meta('resumen_id', 0)) == self.max_id()
+        self.conexion.executemany(_INSERTAR, filas)
+        self.conexion.executemany(_ACUMULAR, filas)
+        if al_dia:
+            self._escribir_meta('resumen_id', self.max_id())
+
+    def sincronizar_csv(self, ruta_csv, tamano_lote=5000):
+        """
+        Importa las filas agregadas a `ruta_csv` desde la última sincronización.
+        Una línea final sin salto de línea se importa si ya tiene sus 6 campos (archivo
+        sin salto final, como el que deja Excel); si no, es una escritura en curso y se
+        deja para la próxima vez.
+        Si el archivo es más corto que lo ya consumido o sus primeros bytes cambiaron
+        (truncado o reemplazado) se reconstruye la tabla desde cero.
+        Devuelve la cantidad de filas importadas.
+        """
+        if not os.path.exists(ruta_csv):
+            return 0
+        tamano = os.path.getsize(ruta_csv)
+        desplazamiento = int(self._leer_meta('csv_desplazamiento', 0))
+        if desplazamiento and (tamano < desplazamiento or self._archivo_reemplazado(ruta_csv)):
+            with self.conexion:
+                self.conexion.execute("DELETE FROM registros")
+                self.conexion.execute("DELETE FROM resumen_diario")
+                self._escribir_meta('resumen_id', 0)
+                self._escribir_meta('csv_desplazamiento', 0)
+                self._escribir_meta('generacion', self.generacion() + 1)
+            desplazamiento = 0
+        if tamano == desplazamiento:
+            return 0
+
+        importadas = 0
+        lote = []
+        with open(ruta_csv, 'rb') as f:
+            f.seek(desplazamiento)
+            for linea in f:
+                if desplazamiento == 0 and linea.startswith(b'\xef\xbb\xbf'):
+                    linea = linea[3:]
+                    desplazamiento = 3
+                fila = next(csv.reader([linea.decode('utf-8', errors='replace')]), [])
+                if not linea.endswith(b'\n') and len(fila) != 6:
+                    break  # Línea incompleta: escritura en curso
+                desplazamiento += len(linea)
+                if len(fila) < 6 or fila[0] == 'FechaHora':
+                    continue  # Encabezado o línea vacía/dañada
+                lote.append(fila[:6])
+                if len(lote) >= tamano_lote:
+                    importadas += self._guardar_lote(lote, desplazamiento, ruta_csv)
+                    lote = []
+        importadas += self._guardar_lote(lote, desplazamiento, ruta_csv)
+        return importadas
+
+    def _guardar_lote(self, lote, desplazamiento, ruta_csv):
+        # El lote, el desplazamiento consumido y la huella del archivo se confirman juntos
+        longitud = min(desplazamiento, _BYTES_HUELLA)
+        with self.conexion:
+            self._insertar(lote)
+            self._escribir_meta('csv_desplazamiento', desplazamiento)
+            self._escribir_meta('csv_huella', f"{longitud}:{_huella(ruta_csv, longitud)}")
+        return len(lote)
+
+    def _archivo_reemplazado(self, ruta_csv):
+        guardada = self._leer_meta('csv_huella')
+        if not guardada:
+            return False
+        longitud, huella = guardada.split(':', 1)
+        return _huella(ruta_csv, int(longitud)) != huella
+
+    def generacion(self):
+        """Número que aumenta cada vez que la tabla se reconstruye por truncado o rotación del CSV."""
+        return int(self._leer_meta('generacion', 0))
+
+    # --- CONSULTAS ---
+    def _filtros(self, desde, hasta, cedula, producto):
+        condiciones = []
+        parametros = []
+        if desde:
+            condiciones.append("fecha_hora >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("fecha_hora <= ?")
+            parametros.append(hasta)
+        if cedula:
+            condiciones.append("cedula = ?")
+            parametros.append(cedula)
+        if producto:
+            condiciones.append("producto = ?")
+            parametros.append(producto)
+        where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return where, parametros
+
+    def consultar(self, desde=None, hasta=None, cedula=None, producto=None, limite=None, desplazamiento=0):
+        """Devuelve las filas que cumplen los filtros, de la más reciente a la más antigua."""
+        where, parametros = self._filtros(desde, hasta, cedula, producto)
+        sql = f"{_SELECT}{where} ORDER BY fecha_hora DESC, id DESC"
+        if limite is not None:
+            sql += " LIMIT ? OFFSET ?"
+            parametros += [limite, desplazamiento]
+        return self.conexion.execute(sql, parametros).fetchall()
+
+    def consultar_pagina(self, limite, antes_de=None):
+        """
+        Página de registros (con su id al inicio) del más reciente al más antiguo.
+        `antes_de` es la clave (fecha_hora, id) de la última fila de la página anterior;
+        la paginación por clave usa el índice de fecha y no se degrada con OFFSET.
+        """
+        sql = _SELECT_CON_ID
+        parametros = []
+        if antes_de is not None:
+            sql += " WHERE (fecha_hora, id) < (?, ?)"
+            parametros = [antes_de[0], antes_de[1]]
+        sql += " ORDER BY fecha_hora DESC, id DESC LIMIT ?"
+        parametros.append(limite)
+        return self.conexion.execute(sql, parametros).fetchall()
+
+    def consultar_nuevos(self, despues_de_id):
+        """Registros (con su id al inicio) con id mayor a `despues_de_id`, del más reciente al más antiguo."""
+        return self.conexion.execute(
+            f"{_SELECT_CON_ID} WHERE id > ? ORDER BY fecha_hora DESC, id DESC", (despues_de_id,)
+        ).fetchall()
+
+    def iterar(self, desde=None, hasta=None, cedula=None, producto=None, tamano_lote=1000):
+        """
+        Recorre los registros que cumplen los filtros del más antiguo al más reciente,
+        de a `tamano_lote` filas, sin cargarlos todos en memoria.
+        """
+        where, parametros = self._filtros(desde, hasta, cedula, producto)
+        cursor = self.conexion.execute(f"{_SELECT}{where} ORDER BY fecha_hora, id", parametros)
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                return
+            yield lote
+
+    def max_id(self):
+        return self.conexion.execute("SELECT COALESCE(MAX(id), 0) FROM registros").fetchone()[0]
+
+    def contar(self, desde=None, hasta=None, cedula=None, producto=None):
+        where, parametros = self._filtros(desde, hasta, cedula, producto)
+        return self.conexion.execute(f"SELECT COUNT(*) FROM registros{where}", parametros).fetchone()[0]
+
+    def ultimo(self):
+        """Último registro guardado, o None si no hay registros."""
+        return self.conexion.execute(f"{_SELECT} ORDER BY id DESC LIMIT 1").fetchone()
+
+    def exportar_csv(self, destino, desde=None, hasta=None, cedula=None, producto=None):
+        """Escribe los registros en un CSV fila por fila, sin cargarlos todos en memoria."""
+        where, parametros = self._filtros(desde, hasta, cedula, producto)
+        cursor = self.conexion.execute(f"{_SELECT}{where} ORDER BY id", parametros)
+        with open(destino, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNAS)
+            writer.writerows(cursor)
+
+    # --- RESÚMENES DIARIOS ---
+    # resumen_diario guarda por (día, cédula, producto) la cantidad de registros, los
+    # totales de peso y cantidad y el peso mínimo y máximo. Cada inserción lo actualiza
+    # en la misma transacción, así las consultas de un día o un mes leen unas pocas
+    # filas de resumen y no dependen del tamaño del historial.
+    def reconstruir_resumen(self):
+        """Recalcula los resúmenes desde los registros (una pasada por la tabla)."""
+        with self.conexion:
+            self.conexion.execute("DELETE FROM resumen_diario")
+            self.conexion.execute(_RECONSTRUIR_RESUMEN)
+            self._escribir_meta('resumen_id', self.max_id())
+
+    def verificar_resumen(self, completo=False):
+        """
+        Reconstruye los resúmenes si no están al día con los registros: el último id
+        resumido no es el último id de la tabla (base anterior a los resúmenes o filas
+        insertadas por fuera del repositorio) o, con `completo`, la cantidad de
+        registros resumidos no coincide con la de la tabla. Devuelve True si reconstruyó.
+        """
+        desfasado = int(self._leer_meta('resumen_id', -1)) != self.max_id()
+        if not desfasado and completo:
+            resumidos = self.conexion.execute("SELECT COALESCE(SUM(registros), 0) FROM resumen_diario").fetchone()[0]
+            desfasado = resumidos != self.conexion.execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+        if desfasado:
+            self.reconstruir_resumen()
+        return desfasado
+
+    def resumen(self, desde, hasta=None, cedula=None, producto=None):
+        """
+        Totales por operario y producto entre los días `desde` y `hasta` ('YYYY-MM-DD',
+        inclusive; sin `hasta`, solo `desde`). Filas: (cedula, operario, producto,
+        registros, peso_total, cantidad_total, peso_min, peso_max), de mayor a menor peso.
+        El nombre del operario es el del resumen del día más reciente del grupo.
+        """
+        where, parametros = self._filtros_resumen(desde, hasta, cedula, producto)
+        return self.conexion.execute(
+            "SELECT g.cedula, r.operario, g.producto, g.registros, g.peso_total, g.cantidad_total, "
+            "g.peso_min, g.peso_max FROM ("
+            "SELECT cedula, producto, MAX(dia) AS ultimo_dia, SUM(registros) AS registros, "
+            "SUM(peso_total) AS peso_total, SUM(cantidad_total) AS cantidad_total, "
+            f"MIN(peso_min) AS peso_min, MAX(peso_max) AS peso_max FROM resumen_diario{where} "
+            "GROUP BY cedula, producto"
+            ") AS g JOIN resumen_diario AS r "
+            "ON r.dia = g.ultimo_dia AND r.cedula = g.cedula AND r.producto = g.producto "
+            "ORDER BY g.peso_total DESC", parametros
+        ).fetchall()
+
+    def _filtros_resumen(self, desde, hasta, cedula, producto):
+        condiciones = ["dia BETWEEN ? AND ?"]
+        parametros = [desde, hasta or desde]
+        if cedula:
+            condiciones.append("cedula = ?")
+            parametros.append(cedula)
+        if producto:
+            condiciones.append("producto = ?")
+            parametros.append(producto)
+        return f" WHERE {' AND '.join(condiciones)}", parametros
+
+    def resumen_mes(self, mes, cedula=None, producto=None):
+        """Totales por operario y producto del mes `mes` ('YYYY-MM')."""
+        return self.resumen(*rango_mes(mes), cedula, producto)
+
+    def totales_dia(self, desde, hasta=None, cedula=None, producto=None):
+        """(registros, peso_total, cantidad_total, peso_min, peso_max) entre `desde` y `hasta`."""
+        where, parametros = self._filtros_resumen(desde, hasta, cedula, producto)
+        return self.conexion.execute(
+            "SELECT COALESCE(SUM(registros), 0), COALESCE(SUM(peso_total), 0.0), COALESCE(SUM(cantidad_total), 0.0), "
+            f"MIN(peso_min), MAX(peso_max) FROM resumen_diario{where}", parametros
+        ).fetchone()
+
+    def totales_mes(self, mes, cedula=None, producto=None):
+        """Totales del mes `mes` ('YYYY-MM'), como `totales_dia`."""
+        return self.totales_dia(*rango_mes(mes), cedula, producto)
@@ -0,0 +1,152 @@
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import compress
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Jabón Líquido' -> 'jabon liquido'."""
+    descompuesto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).strip()
+
+
+def trigramas(texto):
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceProductos:
+    """
+    Índice de búsqueda del catálogo de productos (código y descripción).
+
+    - Prefijos: lista ordenada de claves normalizadas (el código y cada palabra de la
+      descripción) en la que se busca con bisect.
+    - Difusa: índice invertido de trigramas sobre el vocabulario (las palabras
+      distintas del catálogo, no los productos). Una palabra mal escrita se corrige a
+      las palabras más parecidas y luego se buscan por prefijo; así el costo depende
+      del tamaño del vocabulario y no del catálogo.
+    """
+
+    def __init__(self, productos=(), similitud_minima=0.4, max_correcciones=5):
+        self.similitud_minima = similitud_minima
+        self.max_correcciones = max_correcciones
+        self.codigos = []
+        self.descripciones = []
+        self._textos = []          # 'codigo descripcion' normalizado, por producto
+        self._claves = []          # Claves de prefijo ordenadas (código y palabras)
+        self._ids = []             # id de producto de cada clave, en paralelo a _claves
+        self._por_codigo = {}
+        self._vocabulario = []     # Palabras distintas con al menos una letra
+        self._id_palabra = {}
+        self._trigramas = defaultdict(list)  # trigrama -> ids de palabras del vocabulario
+        self.cargar(productos)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def cargar(self, productos):
+        """Construye (o amplía) el índice desde pares (codigo, descripcion)."""
+        pares = list(zip(self._claves, self._ids))
+        for codigo, descripcion in productos:
+            if codigo in self._por_codigo:
+                continue
+            id_producto = self._registrar(codigo, descripcion)
+            pares.extend((clave, id_producto) for clave in self._claves_de(id_producto))
+        pares.sort()
+        self._claves = [clave for clave, _ in pares]
+        self._ids = [id_producto for _, id_producto in pares]
+
+    def agregar(self, codigo, descripcion):
+        """Agrega un producto a un índice ya construido."""
+        if codigo in self._por_codigo:
+            return
+        id_producto = self._registrar(codigo, descripcion)
+        for clave in self._claves_de(id_producto):
+            i = bisect_right(self._claves, clave)
+            self._claves.insert(i, clave)
+            self._ids.insert(i, id_producto)
+
+    def _registrar(self, codigo, descripcion):
+        id_producto = len(self.codigos)
+        self.codigos.append(codigo)
+        self.descripciones.append(descripcion)
+        self._textos.append(f"{normalizar(codigo)} {normalizar(descripcion)}")
+        self._por_codigo[codigo] = id_producto
+        return id_producto
+
+    def _claves_de(self, id_producto):
+        palabras = set(self._textos[id_producto].split())
+        for palabra in palabras:
+            if palabra not in self._id_palabra and not palabra.isdigit():
+                id_palabra = len(self._vocabulario)
+                self._vocabulario.append(palabra)
+                self._id_palabra[palabra] = id_palabra
+                for trigrama in trigramas(palabra):
+                    self._trigramas[trigrama].append(id_palabra)
+        return palabras
+
+    # --- BÚSQUEDA ---
+    def _rango(self, prefijo):
+        """Posiciones [i, j) de las claves que empiezan con `prefijo`."""
+        return (bisect_left(self._claves, prefijo),
+                bisect_left(self._claves, prefijo + '\uffff'))
+
+    def _cantidad(self, prefijo):
+        i, j = self._rango(prefijo)
+        return j - i
+
+    def _por_prefijo(self, prefijo, encontrados, limite, resto):
+        i, j = self._rango(prefijo)
+        ids = self._ids[i:j]
+        if resto:
+            # Las demás palabras se verifican con una sola expresión regular y el
+            # filtrado corre en C (compress/map) hasta reunir el límite
+            patron = re.compile(''.join(f"(?=.*{re.escape(p)})" for p in resto))
+            ids = compress(ids, map(patron.match, map(self._textos.__getitem__, ids)))
+        for id_producto in ids:
+            if len(encontrados) >= limite:
+                break
+            encontrados[id_producto] = None
+
+    def _corregir(self, palabra):
+        """Palabras del vocabulario más parecidas a `palabra`, de la más a la menos parecida."""
+        buscados = trigramas(palabra)
+        comunes = defaultdict(int)
+        for trigrama in buscados:
+            for id_palabra in self._trigramas.get(trigrama, ()):
+                comunes[id_palabra] += 1
+        minimo = self.similitud_minima * len(buscados)
+        parecidas = sorted(
+            (-n, abs(len(self._vocabulario[i]) - len(palabra)), self._vocabulario[i])
+            for i, n in comunes.items() if n >= minimo
+        )
+        return [p for _, _, p in parecidas[:self.max_correcciones]]
+
+    def buscar(self, texto, limite=20):
+        """
+        Devuelve hasta `limite` pares (codigo, descripcion): primero el código exacto,
+        luego coincidencias por prefijo de código o palabra y al final las difusas.
+        Con varias palabras, todas deben aparecer en el producto.
+        """
+        consulta = normalizar(texto)
+        if not consulta:
+            return []
+        encontrados = {}  # dict ordenado usado como conjunto
+        id_exacto = self._por_codigo.get(texto.strip())
+        if id_exacto is not None:
+            encontrados[id_exacto] = None
+
+        # Se recorre la palabra con menos coincidencias y las demás se verifican en el texto
+        palabras = consulta.split()
+        principal = min(palabras, key=self._cantidad)
+        resto = [p for p in palabras if p is not principal]
+        self._por_prefijo(principal, encontrados, limite, resto)
+
+        if len(encontrados) < limite and not principal.isdigit():
+            for corregida in self._corregir(principal):
+                if corregida != principal:
+                    self._por_prefijo(corregida, encontrados, limite, resto)
+                if len(encontrados) >= limite:
+                    break
+        return [(self.codigos[i], self.descripciones[i]) for i in encontrados]
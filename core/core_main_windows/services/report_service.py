@@ -1 +1,353 @@
-# Exportación, logs, CSV, etc.
\ No newline at end of file
+"""
+Motor de reportes sobre el historial de pesadas.
+
+Los registros se cargan en columnas de NumPy: la fecha como datetime64[s], cantidad y
+peso como float64, y operario (por cédula) y producto codificados por diccionario: un
+entero por fila y la lista de valores distintos. Los totales, conteos, promedios,
+mínimos, máximos y percentiles por día, día operativo, mes, turno, operario y producto se calculan
+con operaciones vectorizadas (bincount sobre una clave de grupo y un único
+ordenamiento para los percentiles), sin recorrer las filas en Python.
+
+Los resultados son TablaReporte: nombres de columnas y filas con valores de Python,
+listas para un QAbstractTableModel o para exportar a CSV.
+
+`dia` y `mes` son de calendario, como los resúmenes diarios de RepositorioRegistros,
+así un reporte por día coincide con totales_dia() para los mismos registros.
+`dia_operativo` es el día en que empezó el turno del registro.
+"""
+import csv
+from typing import NamedTuple
+import numpy as np
+from core.core_main_windows.models.record_model import RepositorioRegistros
+
+# Turnos: (nombre, hora de inicio), en orden. Cada turno dura hasta el inicio del
+# siguiente; el último sigue hasta el inicio del primero al día siguiente.
+TURNOS = (('Mañana', 6), ('Tarde', 14), ('Noche', 22))
+
+DIMENSIONES = ('dia', 'dia_operativo', 'mes', 'turno', 'operario', 'producto')
+MEDIDAS = ('peso', 'cantidad')
+
+# Con menos grupos posibles que esto la clave se cuenta directo con bincount;
+# si no, se compacta antes con np.unique
+_MAX_GRUPOS_DIRECTOS = 1 << 24
+
+
+def _a_fechas(valores):
+    try:
+        return np.array(valores, dtype='datetime64[s]')
+    except ValueError:
+        fechas = np.empty(len(valores), dtype='datetime64[s]')
+        for i, valor in enumerate(valores):
+            try:
+                fechas[i] = np.datetime64(valor, 's')
+            except ValueError:
+                fechas[i] = np.datetime64('NaT')
+        return fechas
+
+
+def _a_numeros(valores):
+    try:
+        return np.fromiter(map(float, valores), np.float64, len(valores))
+    except (ValueError, TypeError):
+        numeros = np.empty(len(valores), dtype=np.float64)
+        for i, valor in enumerate(valores):
+            try:
+                numeros[i] = float(valor.replace(',', '.'))
+            except (ValueError, AttributeError):
+                numeros[i] = np.nan
+        return numeros
+
+
+class _Diccionario:
+    """
+    Codificación por diccionario que crece lote a lote: valor -> código entero. Operarios
+    y productos tienen pocos valores distintos, así que casi todo es una búsqueda en el
+    dict; solo las filas con valores nuevos pasan por el camino lento.
+    """
+
+    def __init__(self):
+        self.codigos = {}
+        self.valores = []
+        self.primeras = []  # Posición (en el último lote) de la primera aparición de cada valor nuevo
+
+    def codificar(self, columna):
+        buscar = self.codigos.get
+        codigos = np.fromiter((buscar(valor, -1) for valor in columna), np.int32, len(columna))
+        self.primeras = []
+        for i in np.flatnonzero(codigos < 0).tolist():
+            valor = columna[i]
+            codigo = self.codigos.get(valor)
+            if codigo is None:
+                codigo = self.codigos[valor] = len(self.valores)
+                self.valores.append(valor)
+                self.primeras.append(i)
+            codigos[i] = codigo
+        return codigos
+
+
+class TablaReporte(NamedTuple):
+    """Resultado de un reporte: una columna de NumPy por nombre en `columnas`."""
+    columnas: tuple
+    datos: tuple
+
+    def __len__(self):
+        return len(self.datos[0]) if self.datos else 0
+
+    def filas(self, decimales=2):
+        """Filas como tuplas de valores de Python, con los decimales redondeados."""
+        columnas = [np.round(c, decimales) if c.dtype.kind == 'f' else c for c in self.datos]
+        return list(zip(*(c.tolist() for c in columnas)))
+
+    def ordenar_por(self, columna, descendente=False):
+        orden = np.argsort(self.datos[self.columnas.index(columna)], kind='stable')
+        if descendente:
+            orden = orden[::-1]
+        return TablaReporte(self.columnas, tuple(c[orden] for c in self.datos))
+
+    def escribir_csv(self, destino, decimales=2):
+        with open(destino, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columnas)
+            writer.writerows(self.filas(decimales))
+
+
+class TablaRegistros:
+    """
+    Registros en columnas. `agregar()` convierte lotes de filas (fecha_hora, operario,
+    cedula, producto, cantidad, peso) como las de RepositorioRegistros.iterar(); las
+    filas con fecha o peso ilegibles se descartan y se cuentan en `descartadas`.
+    """
+
+    def __init__(self, turnos=TURNOS):
+        self.turnos = tuple(turnos)
+        self.fecha = np.empty(0, dtype='datetime64[s]')
+        self.operario = np.empty(0, dtype=np.int32)   # Código de la cédula
+        self.producto = np.empty(0, dtype=np.int32)
+        self.cantidad = np.empty(0, dtype=np.float64)
+        self.peso = np.empty(0, dtype=np.float64)
+        self._cedulas = _Diccionario()
+        self._productos = _Diccionario()
+        self.nombres_operario = []  # Nombre con que apareció por primera vez cada cédula
+        self.descartadas = 0
+        self._ordenados = {}  # medida -> (orden de las filas por valor, valores ordenados)
+
+    def __len__(self):
+        return len(self.fecha)
+
+    @property
+    def cedulas(self):
+        return self._cedulas.valores
+
+    @property
+    def productos(self):
+        return self._productos.valores
+
+    @classmethod
+    def desde_repositorio(cls, repositorio, turnos=TURNOS, tamano_lote=100_000, **filtros):
+        tabla = cls(turnos)
+        tabla.agregar(repositorio.iterar(tamano_lote=tamano_lote, **filtros))
+        return tabla
+
+    @classmethod
+    def desde_csv(cls, ruta, turnos=TURNOS, tamano_lote=100_000):
+        """Carga un CSV con las columnas de Datos_bascula.csv (la primera fila es el encabezado)."""
+        tabla = cls(turnos)
+        with open(ruta, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            lote = []
+            for fila in reader:
+                if len(fila) == 6:
+                    lote.append(fila)
+                if len(lote) >= tamano_lote:
+                    tabla.agregar([lote])
+                    lote = []
+            if lote:
+                tabla.agregar([lote])
+        return tabla
+
+    def agregar(self, lotes):
+        partes = [[self.fecha], [self.operario], [self.producto], [self.cantidad], [self.peso]]
+        for lote in lotes:
+            if not lote:
+                continue
+            fechas, operarios, cedulas, productos, cantidades, pesos = zip(*lote)
+            fecha = _a_fechas(fechas)
+            peso = _a_numeros(pesos)
+            validas = ~np.isnat(fecha) & np.isfinite(peso)
+            if not validas.all():
+                self.descartadas += int(len(validas) - validas.sum())
+                if not validas.any():
+                    continue
+                indices = np.flatnonzero(validas).tolist()
+                operarios = [operarios[i] for i in indices]
+                cedulas = [cedulas[i] for i in indices]
+                productos = [productos[i] for i in indices]
+                cantidades = [cantidades[i] for i in indices]
+                fecha = fecha[validas]
+                peso = peso[validas]
+            codigos = self._cedulas.codificar(cedulas)
+            self.nombres_operario.extend(operarios[i] for i in self._cedulas.primeras)
+            cantidad = _a_numeros(cantidades)
+            for columna, valores in zip(partes, (fecha, codigos, self._productos.codificar(productos),
+                                                 np.nan_to_num(cantidad), peso)):
+                columna.append(valores)
+        self.fecha, self.operario, self.producto, self.cantidad, self.peso = (np.concatenate(p) for p in partes)
+        self._ordenados = {}
+
+    def filtrar(self, desde=None, hasta=None, cedula=None, producto=None):
+        """Nueva tabla (con los mismos diccionarios) con las filas que cumplen los filtros."""
+        mascara = np.ones(len(self), dtype=bool)
+        if desde:
+            mascara &= self.fecha >= np.datetime64(desde, 's')
+        if hasta:
+            mascara &= self.fecha <= np.datetime64(hasta, 's')
+        if cedula:
+            mascara &= self.operario == self._cedulas.codigos.get(cedula, -1)
+        if producto:
+            mascara &= self.producto == self._productos.codigos.get(producto, -1)
+        tabla = TablaRegistros(self.turnos)
+        tabla._cedulas = self._cedulas
+        tabla._productos = self._productos
+        tabla.nombres_operario = self.nombres_operario
+        tabla.fecha, tabla.operario, tabla.producto, tabla.cantidad, tabla.peso = (
+            self.fecha[mascara], self.operario[mascara], self.producto[mascara],
+            self.cantidad[mascara], self.peso[mascara])
+        return tabla
+
+    # --- DIMENSIONES ---
+    def _dias_operativos(self):
+        """
+        Día operativo: el día en que empezó el turno del registro (con el turno Noche de
+        22 a 6, una pesada a las 02:00 cuenta en el día anterior).
+        """
+        inicio = np.timedelta64(self.turnos[0][1], 'h')
+        return (self.fecha - inicio).astype('datetime64[D]')
+
+    def _dimension(self, nombre):
+        """(código por fila, etiqueta de cada código) de una dimensión."""
+        if nombre == 'operario':
+            etiquetas = np.array([f"{n} ({c})" for n, c in zip(self.nombres_operario, self.cedulas)], dtype=object)
+            return self.operario, etiquetas
+        if nombre == 'producto':
+            return self.producto, np.array(self.productos, dtype=object)
+        if nombre == 'turno':
+            horas = self.fecha.astype(np.int64) // 3600 % 24
+            inicios = np.array([hora for _, hora in self.turnos])
+            codigos = np.searchsorted(inicios, horas, side='right') - 1
+            codigos[codigos < 0] = len(inicios) - 1  # Antes del primer turno: sigue el último del día anterior
+            return codigos, np.array([turno for turno, _ in self.turnos], dtype=object)
+        if nombre in ('dia', 'dia_operativo', 'mes'):
+            unidad = 'M' if nombre == 'mes' else 'D'
+            fechas = self._dias_operativos() if nombre == 'dia_operativo' else self.fecha
+            periodos = fechas.astype(f'datetime64[{unidad}]').astype(np.int64)
+            if not len(periodos):
+                return periodos, np.empty(0, dtype=object)
+            base = periodos.min()
+            etiquetas = np.arange(base, periodos.max() + 1).astype(f'datetime64[{unidad}]').astype(str)
+            return periodos - base, etiquetas.astype(object)
+        raise ValueError(f"Dimensión desconocida: '{nombre}' (opciones: {', '.join(DIMENSIONES)})")
+
+    # --- AGREGACIONES ---
+    def _ordenar(self, medida):
+        if medida not in self._ordenados:
+            valores = getattr(self, medida)
+            orden = np.argsort(valores, kind='stable')
+            self._ordenados[medida] = (orden, valores[orden])
+        return self._ordenados[medida]
+
+    def agrupar(self, por=('dia',), valor='peso', percentiles=(50, 90)):
+        """
+        Reporte agrupado por las dimensiones de `por` (vacío: una fila con el total).
+        Columnas: las dimensiones, registros, cantidad_total, peso_total y, de `valor`,
+        promedio, mínimo, máximo y los percentiles pedidos (interpolación lineal).
+        """
+        if valor not in MEDIDAS:
+            raise ValueError(f"Medida desconocida: '{valor}' (opciones: {', '.join(MEDIDAS)})")
+        dimensiones = [self._dimension(nombre) for nombre in por]
+        forma = tuple(len(etiquetas) for _, etiquetas in dimensiones)
+        clave = np.zeros(len(self), dtype=np.int64)
+        for codigos, etiquetas in dimensiones:
+            clave = clave * len(etiquetas) + codigos
+
+        # Clave de grupo compacta (0..grupos-1) y la clave original de cada grupo
+        espacio = int(np.prod(forma, dtype=np.int64))
+        if espacio <= _MAX_GRUPOS_DIRECTOS:
+            presentes = np.bincount(clave, minlength=espacio) > 0
+            claves_grupo = np.flatnonzero(presentes)
+            compacta = np.cumsum(presentes) - 1
+            grupo = compacta[clave]
+        else:
+            claves_grupo, grupo = np.unique(clave, return_inverse=True)
+        grupos = len(claves_grupo)
+
+        registros = np.bincount(grupo, minlength=grupos)
+        columnas = list(por) + ['registros', 'cantidad_total', 'peso_total']
+        datos = [etiquetas[indices] for (_, etiquetas), indices in
+                 zip(dimensiones, np.unravel_index(claves_grupo, forma) if forma else ())]
+        datos += [registros, np.bincount(grupo, self.cantidad, grupos), np.bincount(grupo, self.peso, grupos)]
+
+        columnas.append(f'{valor}_promedio')
+        datos.append(datos[columnas.index(f'{valor}_total')] / np.maximum(registros, 1))
+
+        # Filas ordenadas por (grupo, valor) para mínimo, máximo y percentiles por posición.
+        # El orden por valor se calcula una vez por tabla; por reporte queda un
+        # ordenamiento estable por grupo, que con menos de 2^15 grupos es un radix sort
+        orden, por_valor = self._ordenar(valor)
+        grupo_ordenado = grupo[orden].astype(np.int16 if grupos < (1 << 15) else np.int64)
+        ordenados = por_valor[np.argsort(grupo_ordenado, kind='stable')]
+        inicios = np.cumsum(registros) - registros
+        ultimos = inicios + registros - 1
+        columnas += [f'{valor}_min', f'{valor}_max']
+        datos += [ordenados[inicios], ordenados[ultimos]]
+        for p in percentiles:
+            posicion = inicios + (registros - 1) * (p / 100)
+            abajo = np.floor(posicion).astype(np.int64)
+            arriba = np.minimum(abajo + 1, ultimos)
+            columnas.append(f'{valor}_p{p:g}')
+            datos.append(ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo))
+        return TablaReporte(tuple(columnas), tuple(datos))
+
+
+class ServicioReportes:
+    """
+    Reportes sobre el repositorio de registros. Las columnas se cargan una vez y en
+    cada reporte solo se agregan los registros nuevos (id mayor al último cargado);
+    si la tabla se reconstruyó (cambia la generación), se vuelven a cargar completas.
+    """
+
+    def __init__(self, ruta_db='data/bascula.db', turnos=TURNOS):
+        self.repositorio = RepositorioRegistros(ruta_db)
+        self.turnos = turnos
+        self._tabla = None
+        self._generacion = None
+        self._ultimo_id = 0
+
+    def tabla(self):
+        conexion = self.repositorio.conexion
+        # Una transacción de lectura: el último id y las filas cargadas salen de la misma
+        # instantánea aunque otra conexión esté guardando registros
+        conexion.execute("BEGIN")
+        try:
+            generacion = self.repositorio.generacion()
+            if self._tabla is None or generacion != self._generacion:
+                self._ultimo_id = self.repositorio.max_id()
+                self._tabla = TablaRegistros.desde_repositorio(self.repositorio, self.turnos)
+                self._generacion = generacion
+            elif self.repositorio.max_id() > self._ultimo_id:
+                nuevos = self.repositorio.consultar_nuevos(self._ultimo_id)
+                self._ultimo_id = max(fila[0] for fila in nuevos)
+                self._tabla.agregar([[fila[1:] for fila in nuevos]])
+        finally:
+            conexion.commit()
+        return self._tabla
+
+    def reporte(self, por=('dia',), valor='peso', percentiles=(50, 90), **filtros):
+        """Reporte agrupado; `filtros` son desde, hasta, cedula y producto."""
+        tabla = self.tabla()
+        if any(filtros.values()):
+            tabla = tabla.filtrar(**filtros)
+        return tabla.agrupar(por, valor, percentiles)
+
+    def cerrar(self):
+        self.repositorio.cerrar()
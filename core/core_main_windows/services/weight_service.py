@@ -1 +1,266 @@
-# Lectura de báscula (serial)
\ No newline at end of file
+import re
+from collections import deque
+from typing import NamedTuple
+
+
+class LecturaPeso(NamedTuple):
+    """Lectura ya interpretada de una trama de la báscula."""
+    valor: float        # Peso con signo
+    signo: int          # +1 o -1
+    unidad: str         # 'kg', 'g', 'lb'...
+    estable: object     # True/False, o None si el formato no lo informa
+    neto: bool          # True = peso neto (NT), False = bruto (GS)
+    decimales: int      # Decimales con que la báscula envía el valor
+
+    @property
+    def texto(self):
+        """Valor formateado con los decimales de la báscula (ej. '-12.34')."""
+        return f"{self.valor:.{self.decimales}f}"
+
+
+_FIN_TRAMA = re.compile(rb'[\r\n]')
+# [+-] [espacios] dígitos[.dígitos] [espacios] unidad
+_NUMERO = rb'[ \t]*([+-]?)[ \t]*(\d+(?:\.(\d*))?|\.(\d+))[ \t]*([A-Za-z]*)'
+_TRAMA_GENERICA = re.compile(rb'[ \t\x00\x02\x03]*((?:[A-Z]{2}[, ]*)*)' + _NUMERO)
+_TRAMA_SICS = re.compile(rb'[ \t\x00\x02\x03]*S ([SD])' + _NUMERO)
+
+
+_UNIDADES = {b'': 'kg', b'kg': 'kg', b'KG': 'kg', b'g': 'g', b'G': 'g', b'lb': 'lb', b'LB': 'lb'}
+
+
+def _armar_lectura(signo_txt, numero, decimales, solo_decimales, unidad, estable, neto):
+    signo = -1 if signo_txt == b'-' else 1
+    return LecturaPeso(
+        (signo * float(numero)) or 0.0,  # Evita '-0.00'
+        signo,
+        _UNIDADES.get(unidad) or unidad.decode('ascii').lower(),
+        estable,
+        neto,
+        len(decimales or solo_decimales or b''),
+    )
+
+
+class DialectoGenerico:
+    """
+    Formato de la mayoría de indicadores (A&D, CAS, Excell, genéricos chinos):
+        ST,GS,+0012.34kg   US,NT,-  12.3 kg   +0012.34   12.34 kg
+    Los códigos de estado (ST/US/OL) y de modo (GS/NT) son opcionales y pueden ir
+    separados por coma o por espacio.
+    """
+    nombre = 'generico'
+
+    def analizar(self, buf, inicio, fin):
+        m = _TRAMA_GENERICA.match(buf, inicio, fin)
+        if m is None:
+            return None
+        codigos, signo, numero, decimales, solo_decimales, unidad = m.groups()
+        if b'OL' in codigos:
+            return None  # Sobrecarga: no hay un peso válido
+        estable = True if b'ST' in codigos else False if b'US' in codigos else None
+        return _armar_lectura(signo, numero, decimales, solo_decimales, unidad, estable, b'NT' in codigos)
+
+
+class DialectoSics:
+    """
+    Mettler Toledo MT-SICS (respuestas a 'SI'/'S' o envío continuo):
+        S S      12.34 kg   (estable)     S D      12.30 kg   (dinámico)
+    Las respuestas 'S I', 'S +' y 'S -' (sobrecarga/subcarga) no traen peso.
+    """
+    nombre = 'sics'
+
+    def analizar(self, buf, inicio, fin):
+        m = _TRAMA_SICS.match(buf, inicio, fin)
+        if m is None:
+            return None
+        estado, signo, numero, decimales, solo_decimales, unidad = m.groups()
+        return _armar_lectura(signo, numero, decimales, solo_decimales, unidad, estado == b'S', False)
+
+
+DIALECTOS = {
+    DialectoGenerico.nombre: DialectoGenerico,
+    DialectoSics.nombre: DialectoSics,
+}
+
+
+def registrar_dialecto(clase):
+    """Registra un formato de indicador adicional. La clase debe tener `nombre` y `analizar(buf, inicio, fin)`."""
+    DIALECTOS[clase.nombre] = clase
+    return clase
+
+
+class ParserTramas:
+    """
+    Parser incremental de tramas de la báscula.
+
+    `alimentar()` recibe bytes tal como llegan del puerto (tramas partidas o varias
+    juntas) y los copia a un bytearray reutilizable; cada trama completa se interpreta
+    directamente sobre ese buffer, por índices, sin decodificar a texto.
+    Si llega basura sin fin de trama, se descartan los bytes más antiguos.
+    """
+
+    def __init__(self, dialecto='generico', capacidad=1024):
+        if dialecto not in DIALECTOS:
+            raise ValueError(f"Dialecto de báscula desconocido: {dialecto}")
+        self.dialecto = DIALECTOS[dialecto]()
+        self._capacidad = capacidad
+        self._buffer = bytearray(capacidad)
+        self._vista = memoryview(self._buffer)
+        self._fin = 0
+        self.descartados = 0
+
+    def analizar(self, trama):
+        """Interpreta una trama completa (bytes, sin importar el fin de línea)."""
+        return self.dialecto.analizar(trama, 0, len(trama))
+
+    def alimentar(self, datos):
+        """Agrega bytes recibidos y devuelve la lista de lecturas completas encontradas."""
+        n = len(datos)
+        cap = self._capacidad
+        if n >= cap:
+            self.descartados += self._fin + n - cap
+            self._vista[:] = datos[n - cap:]
+            self._fin = cap
+        else:
+            exceso = self._fin + n - cap
+            if exceso > 0:
+                self._vista[:self._fin - exceso] = self._vista[exceso:self._fin]
+                self._fin -= exceso
+                self.descartados += exceso
+            self._vista[self._fin:self._fin + n] = datos
+            self._fin += n
+
+        lecturas = []
+        buf = self._buffer
+        inicio = 0
+        fin_trama = _FIN_TRAMA.search(buf, 0, self._fin)
+        while fin_trama is not None:
+            pos = fin_trama.start()
+            if pos > inicio:
+                lectura = self.dialecto.analizar(buf, inicio, pos)
+                if lectura is not None:
+                    lecturas.append(lectura)
+            inicio = pos + 1
+            fin_trama = _FIN_TRAMA.search(buf, inicio, self._fin)
+
+        if inicio:
+            resto = self._fin - inicio
+            self._vista[:resto] = self._vista[inicio:self._fin]
+            self._fin = resto
+        return lecturas
+
+
+ESTABLE = 'estable'
+INESTABLE = 'inestable'
+PESO_MINIMO = 0.05  # kg; por debajo la báscula se considera vacía (valor por omisión de bascula_config.json)
+
+
+class DetectorEstabilidad:
+    """
+    Detecta cuándo el peso se asentó sobre una ventana deslizante de las últimas
+    `ventana` muestras.
+
+    Media y varianza se actualizan en O(1) por muestra (Welford con ventana
+    deslizante) y el mínimo/máximo con colas monótonas (O(1) amortizado).
+    El peso se considera estable cuando la ventana está llena, la diferencia entre
+    máximo y mínimo no supera `tolerancia` y eso se mantiene durante
+    `tiempo_asentamiento` segundos. Pesos con |media| <= `peso_minimo` (báscula
+    vacía) nunca se reportan como estables.
+    """
+
+    def __init__(self, ventana=10, tolerancia=0.02, tiempo_asentamiento=0.8, peso_minimo=0.0):
+        if ventana < 2:
+            raise ValueError("La ventana de estabilidad debe tener al menos 2 muestras")
+        self.ventana = ventana
+        self.tolerancia = tolerancia
+        self.tiempo_asentamiento = tiempo_asentamiento
+        self.peso_minimo = peso_minimo
+        self.reiniciar()
+
+    def reiniciar(self):
+        self._muestras = [0.0] * self.ventana
+        self._cantidad = 0
+        self._secuencia = 0          # Número de muestras vistas (posición en el anillo = secuencia % ventana)
+        self._media = 0.0
+        self._m2 = 0.0               # Suma de cuadrados de las desviaciones
+        self._maximos = deque()      # (secuencia, valor) con valores decrecientes
+        self._minimos = deque()      # (secuencia, valor) con valores crecientes
+        self._estable_desde = None
+        self.estable = False
+        self.valor_estable = None
+
+    @property
+    def media(self):
+        return self._media
+
+    @property
+    def varianza(self):
+        return self._m2 / self._cantidad if self._cantidad else 0.0
+
+    @property
+    def minimo(self):
+        return self._minimos[0][1] if self._minimos else 0.0
+
+    @property
+    def maximo(self):
+        return self._maximos[0][1] if self._maximos else 0.0
+
+    def agregar(self, valor, t, estable_indicador=True):
+        """
+        Agrega una muestra tomada en el instante `t` (segundos, reloj monotónico).
+        `estable_indicador` en False (trama 'US' de la báscula) reinicia el conteo de asentamiento.
+        Devuelve ESTABLE cuando el peso se acaba de asentar (ver `valor_estable`),
+        INESTABLE cuando un peso que estaba estable cambia, o None.
+        """
+        n = self.ventana
+        secuencia = self._secuencia
+        posicion = secuencia % n
+        if self._cantidad < n:
+            self._cantidad += 1
+            delta = valor - self._media
+            self._media += delta / self._cantidad
+            self._m2 += delta * (valor - self._media)
+        else:
+            anterior = self._muestras[posicion]
+            media_anterior = self._media
+            self._media += (valor - anterior) / n
+            self._m2 += (valor - anterior) * (valor - self._media + anterior - media_anterior)
+            if self._m2 < 0.0:
+                self._m2 = 0.0  # Error de redondeo
+        self._muestras[posicion] = valor
+        self._secuencia = secuencia + 1
+
+        # Colas monótonas: se descartan los valores que ya no pueden ser máximo/mínimo
+        maximos = self._maximos
+        while maximos and maximos[-1][1] <= valor:
+            maximos.pop()
+        maximos.append((secuencia, valor))
+        if maximos[0][0] <= secuencia - n:
+            maximos.popleft()
+        minimos = self._minimos
+        while minimos and minimos[-1][1] >= valor:
+            minimos.pop()
+        minimos.append((secuencia, valor))
+        if minimos[0][0] <= secuencia - n:
+            minimos.popleft()
+
+        asentado = (
+            estable_indicador
+            and self._cantidad == n
+            and maximos[0][1] - minimos[0][1] <= self.tolerancia
+            and abs(self._media) > self.peso_minimo
+        )
+        if not asentado:
+            self._estable_desde = None
+            if self.estable:
+                self.estable = False
+                self.valor_estable = None
+                return INESTABLE
+            return None
+
+        if self._estable_desde is None:
+            self._estable_desde = t
+        if not self.estable and t - self._estable_desde >= self.tiempo_asentamiento:
+            self.estable = True
+            self.valor_estable = self._media
+            return ESTABLE
+        return None
@@ -1 +1,67 @@
-# Funciones genéricas de lectura/escritura
\ No newline at end of file
+import os
+
+
+def leer_ultima_linea(ruta, bloque=4096, encoding='utf-8'):
+    """
+    Lee la última línea completa de un archivo de texto recorriéndolo hacia atrás
+    desde el final, sin importar el tamaño del archivo.
+
+    Devuelve (ultima_linea, fragmento):
+      - ultima_linea: última línea terminada en salto de línea (sin '\\r\\n'), o None.
+      - fragmento: texto final que no termina en salto de línea (escritura
+        interrumpida o archivo sin salto final), o None si el archivo termina bien.
+    """
+    with open(ruta, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        posicion = f.tell()
+        if posicion == 0:
+            return None, None
+
+        cola = b''        # Bytes leídos desde `posicion` hasta el final
+        fin_completas = None  # Índice en `cola` donde terminan las líneas completas
+        while True:
+            leer = min(bloque, posicion)
+            posicion -= leer
+            f.seek(posicion)
+            cola = f.read(leer) + cola
+
+            if fin_completas is None:
+                if cola.endswith(b'\n'):
+                    fin_completas = len(cola)
+                else:
+                    salto = cola.rfind(b'\n')
+                    if salto >= 0:
+                        fin_completas = salto + 1
+                    elif posicion == 0:
+                        # Ninguna línea completa: todo el archivo es un fragmento
+                        return None, cola.decode(encoding, errors='replace')
+                    else:
+                        continue
+            else:
+                # Se agregaron bytes al inicio: desplazar el índice
+                fin_completas += leer
+
+            inicio = cola.rfind(b'\n', 0, fin_completas - 1)
+            if inicio >= 0 or posicion == 0:
+                linea = cola[inicio + 1:fin_completas].rstrip(b'\r\n')
+                fragmento = cola[fin_completas:]
+                return (
+                    linea.decode(encoding, errors='replace'),
+                    fragmento.decode(encoding, errors='replace') if fragmento else None,
+                )
+
+
+def terminar_linea_incompleta(ruta):
+    """
+    Agrega un salto de línea si el archivo no termina en uno, para que el siguiente
+    registro no quede pegado a una línea interrumpida. Devuelve True si lo agregó.
+    """
+    if not os.path.exists(ruta) or os.path.getsize(ruta) == 0:
+        return False
+    with open(ruta, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b'\n':
+            return False
+        f.write(b'\r\n')
+        return True
+
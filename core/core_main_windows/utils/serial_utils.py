@@ -1 +1,100 @@
-# Configuración del puerto serial
\ No newline at end of file
+import logging
+import threading
+import time
+import serial
+from PyQt5.QtCore import QThread, pyqtSignal
+from utils.logger_config import setup_logger
+from core.core_main_windows.services.weight_service import ParserTramas, ESTABLE, INESTABLE
+
+
+class LectorSerial(QThread):
+    """
+    Lee la báscula en un hilo propio para no bloquear la interfaz.
+
+    Los bytes recibidos van directo a ParserTramas.alimentar(), que los acumula en su
+    propio buffer de tamaño fijo (descarta los más antiguos si llega basura sin fin de
+    trama) e interpreta cada trama completa sin copiarla. Solo se conserva la lectura
+    más reciente: si la interfaz aún no consumió la anterior, se reemplaza
+    (drop-oldest) y no se emite otra señal, así la cola de eventos de Qt nunca se
+    satura con una báscula que transmite rápido.
+
+    Si se pasa un DetectorEstabilidad, cada lectura (no solo la última) pasa por él
+    y se emite `peso_estable` con el valor asentado o `peso_inestable` cuando cambia.
+
+    Con el logger 'serial' en DEBUG (logging_config.json o establecer_nivel) se traza
+    cada bloque recibido y las lecturas que produjo; en INFO la traza no cuesta nada.
+    """
+    nuevo_peso = pyqtSignal()
+    peso_estable = pyqtSignal(object)  # LecturaPeso con el valor asentado
+    peso_inestable = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, puerto_serial, dialecto='generico', detector=None, capacidad_buffer=4096, timeout_lectura=0.05):
+        super().__init__()
+        self.serial = puerto_serial
+        self.parser = ParserTramas(dialecto, capacidad_buffer)
+        self.detector = detector
+        self.timeout_lectura = timeout_lectura
+        self.logger = setup_logger('serial')
+        self.lecturas_descartadas = 0
+        self._activo = False
+        self._lock = threading.Lock()
+        self._ultimo = None
+
+    def run(self):
+        self._activo = True
+        try:
+            # Timeout corto: read() regresa apenas llega un byte y nunca bloquea más de timeout_lectura
+            self.serial.timeout = self.timeout_lectura
+            while self._activo:
+                datos = self.serial.read(self.serial.in_waiting or 1)
+                if not datos:
+                    continue
+                t_llegada = time.perf_counter()
+                descartados = self.parser.descartados
+                lecturas = self.parser.alimentar(datos)
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    descartados = self.parser.descartados - descartados
+                    if descartados:
+                        self.logger.debug(f"Buffer serial lleno: {descartados} bytes antiguos descartados")
+                    self.logger.debug(f"Recibido {datos!r} -> {lecturas}")
+                if not lecturas:
+                    continue
+                if self.detector is not None:
+                    for lectura in lecturas:
+                        self._evaluar_estabilidad(lectura, t_llegada)
+                self._publicar(lecturas[-1], t_llegada)
+        except (serial.SerialException, OSError, TypeError) as e:
+            # TypeError: pyserial lo lanza si el puerto se cierra durante read()
+            if self._activo:
+                self.error.emit(str(e))
+        finally:
+            self._activo = False
+
+    def _evaluar_estabilidad(self, lectura, t_llegada):
+        evento = self.detector.agregar(lectura.valor, t_llegada, lectura.estable is not False)
+        if evento == ESTABLE:
+            valor = round(self.detector.valor_estable, lectura.decimales) or 0.0
+            self.peso_estable.emit(lectura._replace(valor=valor, estable=True))
+        elif evento == INESTABLE:
+            self.peso_inestable.emit()
+
+    def _publicar(self, lectura, t_llegada):
+        with self._lock:
+            pendiente = self._ultimo is not None
+            if pendiente:
+                self.lecturas_descartadas += 1
+            self._ultimo = (lectura, t_llegada)
+        if not pendiente:
+            self.nuevo_peso.emit()
+
+    def tomar_ultimo(self):
+        """Devuelve (LecturaPeso, t_llegada) con la lectura más reciente, o None si no hay una nueva."""
+        with self._lock:
+            ultimo, self._ultimo = self._ultimo, None
+        return ultimo
+
+    def detener(self, espera_ms=1000):
+        """Detiene el hilo; el puerto debe cerrarse después de llamar a este método."""
+        self._activo = False
+        self.wait(espera_ms)
@@ -1,15 +1,110 @@
 from core.core_panel_admin.worker.csv_service import CSVService
 
+CONFLICTO_NOMBRE = 'nombre'    # El operario ya está registrado con otra cédula
+CONFLICTO_CEDULA = 'cedula'    # La cédula ya está registrada con otro operario
+
+
+class RegistroOperarios:
+    """
+    Registro de operarios con dos índices hash (nombre -> cédula y cédula -> nombre)
+    que se mantienen consistentes al agregar y quitar, de modo que buscar en
+    cualquier sentido y detectar conflictos es O(1).
+    La misma instancia la comparten la ventana principal y el panel de administración.
+    """
+
+    def __init__(self, filas=()):
+        self._por_nombre = {}
+        self._por_cedula = {}
+        if filas:
+            self.cargar(filas)
+
+    def __len__(self):
+        return len(self._por_nombre)
+
+    def __contains__(self, nombre):
+        return nombre in self._por_nombre
+
+    def cedula_de(self, nombre):
+        return self._por_nombre.get(nombre)
+
+    def nombre_de(self, cedula):
+        return self._por_cedula.get(cedula)
+
+    def nombres(self):
+        return list(self._por_nombre)
+
+    def filas(self):
+        return [[nombre, cedula] for nombre, cedula in self._por_nombre.items()]
+
+    def conflicto(self, nombre, cedula):
+        """
+        Devuelve CONFLICTO_NOMBRE si `nombre` ya tiene otra cédula, CONFLICTO_CEDULA si
+        `cedula` ya pertenece a otro operario, o None si el par es nuevo o ya existe igual.
+        """
+        registrada = self._por_nombre.get(nombre)
+        if registrada is not None and registrada != cedula:
+            return CONFLICTO_NOMBRE
+        dueno = self._por_cedula.get(cedula)
+        if dueno is not None and dueno != nombre:
+            return CONFLICTO_CEDULA
+        return None
+
+    def agregar(self, nombre, cedula):
+        """Agrega el par. Devuelve False si ya existía igual; lanza ValueError si hay conflicto."""
+        conflicto = self.conflicto(nombre, cedula)
+        if conflicto == CONFLICTO_NOMBRE:
+            raise ValueError(f"El operario '{nombre}' ya está registrado con la cédula '{self._por_nombre[nombre]}'.")
+        if conflicto == CONFLICTO_CEDULA:
+            raise ValueError(f"La cédula '{cedula}' ya está registrada con el operario '{self._por_cedula[cedula]}'.")
+        if nombre in self._por_nombre:
+            return False
+        self._por_nombre[nombre] = cedula
+        self._por_cedula[cedula] = nombre
+        return True
+
+    def quitar(self, nombre):
+        """Quita el operario de ambos índices. Devuelve su cédula o None si no existía."""
+        cedula = self._por_nombre.pop(nombre, None)
+        if cedula is not None:
+            del self._por_cedula[cedula]
+        return cedula
+
+    def cargar(self, filas, estricto=False):
+        """
+        Reemplaza el contenido con filas [nombre, cédula]. Las filas con otro número de
+        columnas se ignoran. Con `estricto` un conflicto lanza ValueError; si no, la fila
+        en conflicto se omite. Devuelve la lista de filas omitidas.
+        """
+        self._por_nombre = {}
+        self._por_cedula = {}
+        omitidas = []
+        for fila in filas:
+            if len(fila) != 2:
+                continue
+            nombre, cedula = fila
+            if self.conflicto(nombre, cedula) is None:
+                self.agregar(nombre, cedula)
+            elif estricto:
+                self.agregar(nombre, cedula)  # Lanza el ValueError con el detalle
+            else:
+                omitidas.append(fila)
+        return omitidas
+
+
 class LogicOperarios:
     @staticmethod
     def validar_cedulas_unicas(datos):
-        cedulas = set()
-        for _, cedula in datos:
+        """Valida que las cédulas sean numéricas y que cada nombre y cada cédula aparezcan una sola vez."""
+        registro = RegistroOperarios()
+        for nombre, cedula in datos:
             if not cedula.isdigit():
                 raise ValueError(f"La cédula '{cedula}' debe contener solo números.")
-            if cedula in cedulas:
+            if registro.nombre_de(cedula) is not None:
                 raise ValueError(f"La cédula '{cedula}' está duplicada.")
-            cedulas.add(cedula)
+            if nombre in registro:
+                raise ValueError(f"El operario '{nombre}' está duplicado.")
+            registro.agregar(nombre, cedula)
+        return registro
 
     @staticmethod
     def cargar_operarios(ruta):
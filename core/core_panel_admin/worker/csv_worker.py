@@ -1,5 +1,6 @@
 from PyQt5.QtCore import QThread, pyqtSignal
-import csv, os
+import os
+from core.core_panel_admin.worker.csv_service import CSVService
 
 class CSVWorker(QThread):
     progress = pyqtSignal(int)
@@ -27,11 +28,8 @@ class CSVWorker(QThread):
         if not os.path.exists(self.ruta):
             self.error.emit(f"El archivo {self.ruta} no existe")
             return
-        with open(self.ruta, newline='', encoding='utf-8') as f:
-            datos = list(csv.reader(f))
-        self.finished.emit(datos)
+        self.finished.emit(CSVService.leer_csv(self.ruta))
 
     def _escribir_csv(self):
-        with open(self.ruta, mode='w', newline='', encoding='utf-8') as f:
-            csv.writer(f).writerows(self.datos)
+        CSVService.escribir_csv(self.ruta, self.datos)
         self.finished.emit([])
@@ -3,11 +3,13 @@ from PyQt5.QtWidgets import (
     QFileDialog, QTableWidget, QTableWidgetItem, QHBoxLayout,
     QMessageBox, QProgressBar
 )
+from PyQt5.QtCore import pyqtSignal
 from utils.logger_config import setup_logger
 from gui.admin_window_printer_config import PrinterConfig
-from core.core_panel_admin.logic_operarios import LogicOperarios
+from gui.admin_window_metrics import PanelMetricas
+from core.core_panel_admin.logic_operarios import LogicOperarios, RegistroOperarios
 from core.core_panel_admin.logic_productos import LogicProductos
-from core.core_panel_admin.worker.csv_service import CSVService
+from core.core_panel_admin.worker.csv_service import CSVService, SnapshotCSV
 from core.core_panel_admin.worker.csv_worker import CSVWorker
 
 import os
@@ -17,12 +19,15 @@ class AdminPanel(QDialog):
     Panel de administración que permite gestionar operarios y productos.
     Proporciona una interfaz gráfica para cargar, editar y guardar datos en archivos CSV.
     """
-    
-    def __init__(self):
+    operarios_guardados = pyqtSignal()  # El registro compartido cambió: la ventana principal rehace su combo
+
+    def __init__(self, registro_operarios=None):
         super().__init__()
         self.setWindowTitle("Panel Administrador")
         self.setMinimumSize(1000, 700)
         self.logger = setup_logger()
+        # Registro compartido con la ventana principal: al guardar se actualiza en ambos lados
+        self.registro_operarios = registro_operarios if registro_operarios is not None else RegistroOperarios()
         self.init_ui()
 
     def init_ui(self):
@@ -32,6 +37,7 @@ class AdminPanel(QDialog):
         self.tab_operarios = QWidget()
         self.tab_productos = QWidget()
         self.tab_impresoras = QWidget()
+        self.tab_metricas = PanelMetricas()
 
         try:
             self.config_impresora = PrinterConfig()
@@ -48,6 +54,7 @@ class AdminPanel(QDialog):
         self.tabs.addTab(self.tab_operarios, "Operarios")
         self.tabs.addTab(self.tab_productos, "Productos")
         self.tabs.addTab(self.tab_impresoras, "Administración de Impresoras")
+        self.tabs.addTab(self.tab_metricas, "Métricas")
 
         layout.addWidget(self.tabs)
         self.setLayout(layout)
@@ -103,9 +110,14 @@ class AdminPanel(QDialog):
             for i in range(self.tabla_operarios.rowCount())
             if self.tabla_operarios.item(i, 0) and self.tabla_operarios.item(i, 1)
         ]
+        # Mismo texto que al leer el CSV (sin espacios sobrantes y en NFC): así "María " y
+        # "María" no quedan como dos operarios y las búsquedas por nombre coinciden
+        datos = SnapshotCSV.normalizar_filas(datos)
         try:
             LogicOperarios.validar_cedulas_unicas(datos)
             LogicOperarios.guardar_operarios("data/operarios.csv", datos)
+            self.registro_operarios.cargar(datos)
+            self.operarios_guardados.emit()
             QMessageBox.information(self, "Éxito", "Datos guardados correctamente.")
         except Exception as e:
             QMessageBox.warning(self, "Error", str(e))
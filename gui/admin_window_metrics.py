@@ -0,0 +1,84 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox)
+from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtGui import QFont
+from utils.logger_config import setup_logger
+from utils.metrics import metricas
+
+COLUMNAS = ['Métrica', 'Tipo', 'Conteo / Valor', 'Media (ms)', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Máx (ms)']
+
+
+class PanelMetricas(QWidget):
+    """
+    Métricas de esta estación desde el arranque: latencias (p50/p95/p99) de los
+    caminos calientes, contadores e indicadores. Se refresca cada 2 s mientras está visible.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.logger = setup_logger()
+        self.metricas = metricas()
+        self.initUI()
+        self.temporizador = QTimer(self)
+        self.temporizador.setInterval(2000)
+        self.temporizador.timeout.connect(self.actualizar)
+
+    def initUI(self):
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Métricas de la Estación", font=QFont("Arial", 16, QFont.Bold)))
+        self.lbl_estacion = QLabel(f"Estación: {self.metricas.estacion} | desde {self.metricas.inicio} | "
+                                   f"volcado en {self.metricas.ruta_volcado()}")
+        layout.addWidget(self.lbl_estacion)
+
+        self.tabla = QTableWidget(0, len(COLUMNAS))
+        self.tabla.setHorizontalHeaderLabels(COLUMNAS)
+        self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.tabla)
+
+        botones = QHBoxLayout()
+        btn_actualizar = QPushButton("Actualizar")
+        btn_actualizar.clicked.connect(self.actualizar)
+        btn_volcar = QPushButton("Guardar ahora")
+        btn_volcar.clicked.connect(self.volcar)
+        botones.addWidget(btn_actualizar)
+        botones.addWidget(btn_volcar)
+        botones.addStretch()
+        layout.addLayout(botones)
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.actualizar()
+        self.temporizador.start()
+
+    def hideEvent(self, event):
+        self.temporizador.stop()
+        super().hideEvent(event)
+
+    def actualizar(self):
+        instantanea = self.metricas.instantanea()
+        filas = []
+        for nombre, resumen in instantanea['histogramas'].items():
+            filas.append([nombre, 'Latencia', str(resumen['n'])] +
+                         [f"{resumen[clave] / 1000:.3f}" for clave in ('media_us', 'p50_us', 'p95_us', 'p99_us', 'max_us')])
+        for nombre, valor in instantanea['contadores'].items():
+            filas.append([nombre, 'Contador', str(valor)] + [''] * 5)
+        for nombre, valor in instantanea['indicadores'].items():
+            filas.append([nombre, 'Indicador', str(valor)] + [''] * 5)
+
+        self.tabla.setRowCount(len(filas))
+        for i, fila in enumerate(filas):
+            for j, texto in enumerate(fila):
+                item = QTableWidgetItem(texto)
+                if j >= 2:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.tabla.setItem(i, j, item)
+
+    def volcar(self):
+        try:
+            self.metricas.volcar()
+            QMessageBox.information(self, "Métricas", f"Métricas guardadas en:\n{self.metricas.ruta_volcado()}")
+        except Exception as e:
+            self.logger.error(f"Error al volcar las métricas: {str(e)}")
+            QMessageBox.critical(self, "Error", f"No se pudieron guardar las métricas: {str(e)}")
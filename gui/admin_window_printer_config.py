@@ -1,13 +1,13 @@
 import json
 import os
-from tkinter import messagebox
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
+import threading
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                              QComboBox, QLineEdit, QSlider, QGridLayout,
-                             QSpinBox, QSizePolicy, QApplication, QMessageBox)
+                             QSpinBox, QSizePolicy, QMessageBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
-import win32print
 from utils.print_manager import PrintManager # Importar PrintManager
+from utils.printer_registry import registro_impresoras
 from datetime import datetime
 from utils.logger_config import setup_logger
 
@@ -18,8 +18,12 @@ class PrinterConfig(QWidget):
         super().__init__()
         self.logger = setup_logger()
         self.print_manager = PrintManager()
+        self.transporte = None  # Clave "transporte" del JSON (TCP, CUPS, spool); se conserva al guardar
+        self.registro = registro_impresoras()
         self.initUI()
         self.load_config()
+        # El registro se refresca en segundo plano; la lista se actualiza sola
+        self.registro.actualizado.connect(self.populate_printers)
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -28,8 +32,16 @@ class PrinterConfig(QWidget):
         grid = QGridLayout()
         grid.addWidget(QLabel("Impresora:", font=QFont("Arial", 14)), 0, 0)
         self.printer_combo = QComboBox()
+        self.printer_combo.currentTextChanged.connect(self.actualizar_estado_impresora)
+        self.estado_impresora = QLabel()
+        refresh_button = QPushButton("Actualizar")
+        refresh_button.clicked.connect(self.refrescar_impresoras)
+        printer_layout = QHBoxLayout()
+        printer_layout.addWidget(self.printer_combo, 1)
+        printer_layout.addWidget(refresh_button)
+        printer_layout.addWidget(self.estado_impresora)
         self.populate_printers()
-        grid.addWidget(self.printer_combo, 0, 1)
+        grid.addLayout(printer_layout, 0, 1)
         
         grid.addWidget(QLabel("Titulo:", font=QFont("Arial", 14)), 1, 0)
         self.Titulo = QLineEdit()
@@ -160,26 +172,32 @@ class PrinterConfig(QWidget):
         self.setLayout(layout)
 
     def populate_printers(self):
+        """Llena la lista con las impresoras del registro (enumeradas una vez, no en cada apertura)."""
         try:
-            printers = win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL)
-           # print(f"Impresoras encontradas: {printers}")
-            for printer_tuple in printers:
-                try:
-                    if isinstance(printer_tuple, tuple) and len(printer_tuple) >= 3:
-                        printer = printer_tuple[2]
-                        if isinstance(printer, dict):
-                            self.printer_combo.addItem(str(printer.get("pDisplayName", "N/A")))
-                            QApplication.processEvents()
-                        elif isinstance(printer, str):
-                            self.printer_combo.addItem(printer)
-                            QApplication.processEvents()
-                    else:
-                        print(f"Elemento inesperado en la lista de impresoras (no es tupla): {printer_tuple}")
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error al agregar impresora a la lista: {e}")
-
+            printers = self.registro.nombres()
         except Exception as e:
-            messagebox.showerror("Error", f"Error al obtener la lista de impresoras: {e}")
+            QMessageBox.critical(self, "Error", f"Error al obtener la lista de impresoras: {e}")
+            return
+        actual = self.printer_combo.currentText()
+        self.printer_combo.blockSignals(True)
+        self.printer_combo.clear()
+        self.printer_combo.addItems(printers)
+        if actual:
+            self.printer_combo.setCurrentText(actual)
+        self.printer_combo.blockSignals(False)
+        self.actualizar_estado_impresora(self.printer_combo.currentText())
+
+    def refrescar_impresoras(self):
+        # En segundo plano: la lista se actualiza con la señal `actualizado`
+        threading.Thread(target=self.registro.refrescar, name="refresco_impresoras", daemon=True).start()
+
+    def actualizar_estado_impresora(self, printer_name):
+        if not printer_name:
+            self.estado_impresora.setText("")
+            return
+        lista, mensaje = self.registro.estado(printer_name)
+        self.estado_impresora.setText(mensaje)
+        self.estado_impresora.setStyleSheet("color: green;" if lista else "color: red;")
     
     def load_config(self):
         try:
@@ -189,6 +207,7 @@ class PrinterConfig(QWidget):
                     # Asigna la impresora
                     self.printer_combo.setCurrentText(config.get("printer", ""))
                     self.Titulo.setText(config.get("Titulo", ""))
+                    self.transporte = config.get("transporte")
                     self.size_g_fuentes.setValue(int(config.get("SizeG_Fuentes", 0)))
                     # Tamaño del papel
                     self.alto_hoja.setValue(int(config.get("Alto_Hoja", 0)))
@@ -256,6 +275,9 @@ class PrinterConfig(QWidget):
                     }
             }
             
+            if self.transporte:
+                config["transporte"] = self.transporte
+
             with open(CONFIG_FILE, 'w') as f:
                 json.dump(config, f, indent=2)
             
@@ -286,4 +308,4 @@ class PrinterConfig(QWidget):
 
             self.preview_label.setText(preview_text)
         except Exception as e:
-            messagebox.showerror("Error", f"Error al generar la vista previa: {e}")
\ No newline at end of file
+            QMessageBox.critical(self, "Error", f"Error al generar la vista previa: {e}")
\ No newline at end of file
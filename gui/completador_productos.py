@@ -0,0 +1,65 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtWidgets import QCompleter
+
+
+class ModeloSugerencias(QAbstractListModel):
+    """Sugerencias del buscador: muestra 'código - descripción' y completa con el código."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._productos = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._productos)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        codigo, descripcion = self._productos[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{codigo} - {descripcion}"
+        if role == Qt.EditRole:
+            return codigo
+        return None
+
+    def actualizar(self, productos):
+        self.beginResetModel()
+        self._productos = productos
+        self.endResetModel()
+
+
+class CompletadorProductos(QCompleter):
+    """
+    Ventana emergente de búsqueda para el combo de productos.
+
+    En cada tecla consulta el IndiceProductos (prefijo, sin tildes ni mayúsculas, y
+    tolerante a errores de tipeo) y muestra los primeros `limite` resultados; el
+    filtrado de Qt se desactiva porque el índice ya entrega la lista final.
+    """
+
+    def __init__(self, indice, combo, limite=20):
+        super().__init__(combo)
+        self.indice = indice
+        self.combo = combo
+        self.limite = limite
+        self.modelo = ModeloSugerencias(self)
+        self.setModel(self.modelo)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setMaxVisibleItems(12)
+
+        # El completador propio del combo compite con este: se quita y este se
+        # conecta a la línea de edición para decidir qué texto se inserta
+        combo.setCompleter(None)
+        self.setWidget(combo.lineEdit())
+        combo.lineEdit().textEdited.connect(self.buscar)
+        self.activated[QModelIndex].connect(self.seleccionar)
+
+    def buscar(self, texto):
+        self.modelo.actualizar(self.indice.buscar(texto, self.limite))
+        if self.modelo.rowCount():
+            self.complete()
+        else:
+            self.popup().hide()
+
+    def seleccionar(self, index):
+        self.combo.setCurrentText(index.data(Qt.EditRole))
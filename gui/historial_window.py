@@ -1,9 +1,116 @@
-from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-                             QTableWidgetItem, QPushButton, QLabel, QMessageBox)
-from PyQt5.QtCore import Qt
-import csv
+from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                             QHeaderView, QPushButton, QLabel, QMessageBox, QCheckBox, QDateEdit,
+                             QComboBox, QSpinBox, QFileDialog, QProgressDialog, QApplication)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QFileSystemWatcher, QTimer, QDate
+import json
 import os
+from datetime import datetime
 from utils.logger_config import setup_logger
+from utils.metrics import cronometrado
+from core.core_main_windows.models.record_model import RepositorioRegistros
+from core.core_panel_admin.worker.csv_service import CSVService
+
+SEPARADOR = '\x1f'  # Separador de campos dentro de cada fila guardada en el modelo
+# Reportes que se pueden exportar desde el historial: (texto del combo, dimensiones)
+REPORTES = (("Por día", ('dia',)), ("Por día operativo y turno", ('dia_operativo', 'turno')),
+            ("Por mes", ('mes',)), ("Por operario", ('operario',)), ("Por producto", ('producto',)),
+            ("Por operario y producto", ('operario', 'producto')))
+
+
+class ModeloHistorial(QAbstractTableModel):
+    """
+    Modelo de solo lectura para el historial.
+
+    Las filas se piden al repositorio por páginas (canFetchMore/fetchMore) a medida
+    que el usuario se desplaza, ya ordenadas de la más reciente a la más antigua.
+    Cada fila se guarda como un único str con los campos separados por SEPARADOR,
+    en lugar de un objeto por celda.
+
+    Las filas nuevas (id mayor al último visto) se agregan arriba con `agregar_nuevos()`
+    sin volver a leer lo ya cargado: se guardan aparte, en orden inverso, para que
+    agregarlas cueste solo lo que se agrega.
+    """
+    ENCABEZADOS = ['Fecha/Hora', 'Operario', 'Cédula', 'Producto', 'Cantidad', 'Peso (kg)']
+
+    def __init__(self, repositorio, tamano_pagina=500, parent=None):
+        super().__init__(parent)
+        self.repositorio = repositorio
+        self.tamano_pagina = tamano_pagina
+        self._nuevas = []  # Filas agregadas después de cargar, la más reciente al final
+        self._filas = []   # Filas paginadas, la más reciente primero
+        self._ultima_clave = None  # (fecha_hora, id) de la última fila cargada
+        self._hay_mas = True
+        self._max_id = 0
+        self.generacion = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._nuevas) + len(self._filas)
+
+    def _fila(self, row):
+        nuevas = len(self._nuevas)
+        if row < nuevas:
+            return self._nuevas[nuevas - 1 - row]
+        return self._filas[row - nuevas]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ENCABEZADOS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self._fila(index.row()).split(SEPARADOR)[index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.ENCABEZADOS[section]
+        return section + 1
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._hay_mas
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        pagina = self.repositorio.consultar_pagina(self.tamano_pagina, self._ultima_clave)
+        if len(pagina) < self.tamano_pagina:
+            self._hay_mas = False
+        if not pagina:
+            return
+        inicio = self.rowCount()
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(pagina) - 1)
+        self._filas.extend(SEPARADOR.join(fila[1:]) for fila in pagina)
+        self.endInsertRows()
+        self._ultima_clave = (pagina[-1][1], pagina[-1][0])
+
+    def recargar(self):
+        """Vacía el modelo y carga la primera página."""
+        self.beginResetModel()
+        self._nuevas = []
+        self._filas = []
+        self._ultima_clave = None
+        self._hay_mas = True
+        self._max_id = self.repositorio.max_id()
+        self.generacion = self.repositorio.generacion()
+        self.endResetModel()
+        self.fetchMore()
+
+    def agregar_nuevos(self):
+        """Agrega arriba los registros importados desde la última carga. Devuelve cuántos agregó."""
+        if self.generacion != self.repositorio.generacion():
+            # El CSV fue truncado o reemplazado: lo cargado ya no es válido
+            self.recargar()
+            return self.rowCount()
+        nuevos = self.repositorio.consultar_nuevos(self._max_id)
+        if not nuevos:
+            return 0
+        self.beginInsertRows(QModelIndex(), 0, len(nuevos) - 1)
+        self._nuevas.extend(SEPARADOR.join(fila[1:]) for fila in reversed(nuevos))
+        self.endInsertRows()
+        self._max_id = max(fila[0] for fila in nuevos)
+        return len(nuevos)
+
 
 class HistorialWindow(QMainWindow):
     def __init__(self, parent=None):
@@ -14,6 +121,25 @@ class HistorialWindow(QMainWindow):
         
         # Archivo de registros
         self.csv_file = 'data/Datos_bascula.csv'
+        self.db_file = 'data/bascula.db'
+        self.operarios_file = 'data/operarios.csv'
+        self.productos_file = 'data/productos.csv'
+        self.config_impresora = 'printer_config.json'
+        self.repositorio = None
+        self.modelo = None
+        self.nombres_producto = {}  # código -> descripción, para reimprimir
+        self.worker_reimpresion = None
+        self.dialogo_progreso = None
+        self.servicio_reportes = None  # Se abre con el primer reporte y conserva las columnas cargadas
+
+        # Vigila el CSV para actualizar el historial cuando se agregan registros.
+        # El temporizador agrupa varias notificaciones seguidas en una sola actualización.
+        self.vigilante = QFileSystemWatcher(self)
+        self.vigilante.fileChanged.connect(self._archivo_modificado)
+        self.temporizador_actualizacion = QTimer(self)
+        self.temporizador_actualizacion.setSingleShot(True)
+        self.temporizador_actualizacion.setInterval(300)
+        self.temporizador_actualizacion.timeout.connect(self.actualizar_registros)
         
         # Inicializar interfaz
         self.init_ui()
@@ -29,20 +155,70 @@ class HistorialWindow(QMainWindow):
         titulo.setStyleSheet("font-size: 16px; font-weight: bold; margin: 10px;")
         layout.addWidget(titulo)
 
-        # Tabla de historial
-        self.tabla_historial = QTableWidget()
-        self.tabla_historial.setColumnCount(6)
-        self.tabla_historial.setHorizontalHeaderLabels(['Fecha/Hora', 'Operario', 'Cédula', 'Producto', 'Cantidad', 'Peso (kg)'])
+        # Tabla de historial (el modelo se asigna al cargar los registros)
+        self.tabla_historial = QTableView()
         self.tabla_historial.horizontalHeader().setStretchLastSection(True)
-        self.tabla_historial.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.tabla_historial.setSelectionBehavior(QTableWidget.SelectRows)
-        self.tabla_historial.setSelectionMode(QTableWidget.SingleSelection)
+        # Altura de fila fija: la vista no necesita medir cada fila
+        self.tabla_historial.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.tabla_historial.setEditTriggers(QTableView.NoEditTriggers)
+        self.tabla_historial.setSelectionBehavior(QTableView.SelectRows)
+        self.tabla_historial.setSelectionMode(QTableView.SingleSelection)
         layout.addWidget(self.tabla_historial)
 
+        # Filtros y reimpresión por lotes
+        filtros_layout = QHBoxLayout()
+        self.chk_fechas = QCheckBox("Desde")
+        self.fecha_desde = QDateEdit(QDate.currentDate())
+        self.fecha_hasta = QDateEdit(QDate.currentDate())
+        for fecha in (self.fecha_desde, self.fecha_hasta):
+            fecha.setCalendarPopup(True)
+            fecha.setDisplayFormat("yyyy-MM-dd")
+        self.cmb_operario = QComboBox()
+        self.cmb_producto = QComboBox()
+        self.spin_copias = QSpinBox()
+        self.spin_copias.setRange(1, 99)
+        self.spin_copias.setPrefix("x")
+        self.spin_copias.setToolTip("Copias de cada ticket")
+        self.lbl_coincidencias = QLabel()
+        self.btn_reimprimir_pdf = QPushButton("Reimprimir PDF...")
+        self.btn_reimprimir_pdf.clicked.connect(self.reimprimir_pdf)
+        self.btn_reimprimir_etiquetas = QPushButton("Reimprimir etiquetas")
+        self.btn_reimprimir_etiquetas.clicked.connect(self.reimprimir_etiquetas)
+
+        self.chk_fechas.toggled.connect(self.actualizar_coincidencias)
+        self.fecha_desde.dateChanged.connect(self.actualizar_coincidencias)
+        self.fecha_hasta.dateChanged.connect(self.actualizar_coincidencias)
+        self.cmb_operario.currentIndexChanged.connect(self.actualizar_coincidencias)
+        self.cmb_producto.currentIndexChanged.connect(self.actualizar_coincidencias)
+
+        filtros_layout.addWidget(self.chk_fechas)
+        filtros_layout.addWidget(self.fecha_desde)
+        filtros_layout.addWidget(QLabel("Hasta"))
+        filtros_layout.addWidget(self.fecha_hasta)
+        filtros_layout.addWidget(QLabel("Operario"))
+        filtros_layout.addWidget(self.cmb_operario, 1)
+        filtros_layout.addWidget(QLabel("Producto"))
+        filtros_layout.addWidget(self.cmb_producto, 1)
+        filtros_layout.addWidget(self.spin_copias)
+        filtros_layout.addWidget(self.lbl_coincidencias)
+        filtros_layout.addWidget(self.btn_reimprimir_pdf)
+        filtros_layout.addWidget(self.btn_reimprimir_etiquetas)
+        layout.addLayout(filtros_layout)
+
         # Botones
         btn_layout = QHBoxLayout()
+        self.cmb_reporte = QComboBox()
+        for texto, por in REPORTES:
+            self.cmb_reporte.addItem(texto, por)
+        self.btn_reporte = QPushButton("Exportar reporte...")
+        self.btn_reporte.setToolTip("Totales, promedio, mínimo, máximo y percentiles del peso "
+                                    "de los registros filtrados")
+        self.btn_reporte.clicked.connect(self.exportar_reporte)
+        btn_layout.addWidget(self.cmb_reporte)
+        btn_layout.addWidget(self.btn_reporte)
+        btn_layout.addStretch()
         self.btn_actualizar = QPushButton("Actualizar")
-        self.btn_actualizar.clicked.connect(self.cargar_registros)
+        self.btn_actualizar.clicked.connect(self.actualizar_registros)
         self.btn_cerrar = QPushButton("Cerrar")
         self.btn_cerrar.clicked.connect(self.close)
         
@@ -53,44 +229,213 @@ class HistorialWindow(QMainWindow):
         central.setLayout(layout)
         self.setCentralWidget(central)
 
+    @cronometrado('cargar_registros')
     def cargar_registros(self):
-        """Carga todos los registros del archivo CSV en la tabla."""
+        """Carga la primera página de registros desde la base indexada, del más reciente al más antiguo."""
         try:
             if not os.path.exists(self.csv_file):
                 QMessageBox.warning(self, "Error", "No existe el archivo de registros")
                 return
 
-            # Verificar si el archivo está vacío
-            if os.path.getsize(self.csv_file) == 0:
-                self.tabla_historial.setRowCount(0)
-                self.logger.info("El archivo de registros está vacío")
+            if self.repositorio is None:
+                self.repositorio = RepositorioRegistros(self.db_file)
+                self.modelo = ModeloHistorial(self.repositorio, parent=self)
+                self.tabla_historial.setModel(self.modelo)
+            # Importar solo lo que se agregó al CSV desde la última sincronización
+            self.repositorio.sincronizar_csv(self.csv_file)
+            self.modelo.recargar()
+            self._vigilar_archivo()
+            self.cargar_filtros()
+
+            if self.modelo.rowCount() == 0:
+                self.logger.info("No hay registros en el archivo")
                 return
 
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                registros = list(reader)
-                
-                # Verificar si hay datos además de los encabezados
-                if len(registros) <= 1:  # Solo encabezados o archivo vacío
-                    self.tabla_historial.setRowCount(0)
-                    self.logger.info("No hay registros en el archivo")
-                    return
-
-                # Configurar tabla
-                self.tabla_historial.setRowCount(len(registros) - 1)  # Excluir encabezados
-                
-                # Llenar tabla (excluyendo encabezados)
-                for row, registro in enumerate(registros[1:]):
-                    for col, valor in enumerate(registro):
-                        item = QTableWidgetItem(str(valor))  # Asegurar que el valor sea string
-                        self.tabla_historial.setItem(row, col, item)
-
-                # Ordenar por fecha (más reciente primero)
-                self.tabla_historial.sortItems(0, Qt.DescendingOrder)
-                
-                self.logger.info("Historial de registros cargado correctamente")
+            self.logger.info("Historial de registros cargado correctamente")
 
         except Exception as e:
             self.logger.error(f"Error al cargar registros: {str(e)}")
             QMessageBox.critical(self, "Error", f"Error al cargar registros: {str(e)}")
-            self.tabla_historial.setRowCount(0)  # Limpiar la tabla en caso de error 
\ No newline at end of file
+
+    def actualizar_registros(self):
+        """Importa solo las líneas agregadas al CSV y las muestra arriba de la tabla."""
+        if self.repositorio is None:
+            self.cargar_registros()
+            return
+        try:
+            if not os.path.exists(self.csv_file):
+                return
+            self.repositorio.sincronizar_csv(self.csv_file)
+            agregados = self.modelo.agregar_nuevos()
+            self._vigilar_archivo()
+            if agregados:
+                self.logger.info(f"Historial actualizado: {agregados} registros nuevos")
+        except Exception as e:
+            self.logger.error(f"Error al actualizar registros: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Error al actualizar registros: {str(e)}")
+
+    # --- REPORTES ---
+    def exportar_reporte(self):
+        """Exporta a CSV el reporte elegido en el combo sobre los registros filtrados."""
+        from core.core_main_windows.services.report_service import ServicioReportes
+        por = self.cmb_reporte.currentData()
+        nombre = f"reporte_{'_'.join(por)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        destino, _ = QFileDialog.getSaveFileName(self, "Guardar reporte",
+                                                 os.path.join(os.path.expanduser("~"), "Documents", nombre),
+                                                 "Archivos CSV (*.csv)")
+        if not destino:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            if self.servicio_reportes is None:
+                self.servicio_reportes = ServicioReportes(self.db_file)
+            reporte = self.servicio_reportes.reporte(por, **self.filtros())
+            reporte.escribir_csv(destino)
+            self.logger.info(f"Reporte {' y '.join(por)} exportado a {destino}: {len(reporte)} filas")
+        except Exception as e:
+            self.logger.error(f"Error al exportar el reporte: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Error al exportar el reporte: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "Reporte", f"Reporte con {len(reporte)} filas guardado en {destino}")
+
+    # --- REIMPRESIÓN ---
+    def cargar_filtros(self):
+        """Llena los combos de operario (por cédula) y producto con los archivos maestros."""
+        self.cmb_operario.blockSignals(True)
+        self.cmb_producto.blockSignals(True)
+        self.cmb_operario.clear()
+        self.cmb_producto.clear()
+        self.cmb_operario.addItem("Todos", None)
+        self.cmb_producto.addItem("Todos", None)
+        try:
+            for fila in CSVService.leer_csv(self.operarios_file):
+                if len(fila) == 2:
+                    self.cmb_operario.addItem(fila[0], fila[1])
+            self.nombres_producto = {fila[0]: fila[1] for fila in CSVService.leer_csv(self.productos_file)
+                                     if len(fila) == 2}
+            for codigo, descripcion in self.nombres_producto.items():
+                self.cmb_producto.addItem(f"{codigo} - {descripcion}", codigo)
+        except FileNotFoundError as e:
+            self.logger.warning(f"No se pudieron cargar los filtros del historial: {str(e)}")
+        self.cmb_operario.blockSignals(False)
+        self.cmb_producto.blockSignals(False)
+        self.actualizar_coincidencias()
+
+    def filtros(self):
+        """Filtros seleccionados con los nombres de RepositorioRegistros.consultar()."""
+        filtros = {'cedula': self.cmb_operario.currentData(), 'producto': self.cmb_producto.currentData()}
+        if self.chk_fechas.isChecked():
+            filtros['desde'] = self.fecha_desde.date().toString("yyyy-MM-dd") + " 00:00:00"
+            filtros['hasta'] = self.fecha_hasta.date().toString("yyyy-MM-dd") + " 23:59:59"
+        return filtros
+
+    def actualizar_coincidencias(self, *args):
+        if self.repositorio is None:
+            return
+        cantidad = self.repositorio.contar(**self.filtros())
+        self.lbl_coincidencias.setText(f"{cantidad} registros")
+        self.btn_reimprimir_pdf.setEnabled(cantidad > 0)
+        self.btn_reimprimir_etiquetas.setEnabled(cantidad > 0)
+        self.btn_reporte.setEnabled(cantidad > 0)
+
+    def _cargar_plantilla(self):
+        from utils.ticket_template import compilar_plantilla
+        with open(self.config_impresora, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config, compilar_plantilla(config)
+
+    def reimprimir_pdf(self):
+        """Genera un solo PDF de varias páginas con los registros filtrados."""
+        nombre = f"reimpresion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        destino, _ = QFileDialog.getSaveFileName(self, "Guardar reimpresión",
+                                                 os.path.join(os.path.expanduser("~"), "Documents", nombre),
+                                                 "Archivos PDF (*.pdf)")
+        if destino:
+            self._iniciar_reimpresion(destino=destino)
+
+    def reimprimir_etiquetas(self):
+        """Envía los registros filtrados a la impresora configurada como un solo trabajo TSPL."""
+        from utils.printer_transport import crear_transporte
+        try:
+            config, _ = self._cargar_plantilla()
+            transporte = crear_transporte(config)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo preparar la impresora:\n{str(e)}")
+            return
+        cantidad = self.repositorio.contar(**self.filtros()) * self.spin_copias.value()
+        respuesta = QMessageBox.question(self, "Reimprimir etiquetas",
+                                         f"Se enviarán {cantidad} etiquetas a {transporte}. ¿Continuar?")
+        if respuesta == QMessageBox.Yes:
+            self._iniciar_reimpresion(transporte=transporte)
+        else:
+            transporte.cerrar()
+
+    def _iniciar_reimpresion(self, destino=None, transporte=None):
+        from utils.batch_print import ReimpresionWorker
+        if self.worker_reimpresion is not None and self.worker_reimpresion.isRunning():
+            QMessageBox.warning(self, "Reimpresión", "Ya hay una reimpresión en curso")
+            return
+        try:
+            _, plantilla = self._cargar_plantilla()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Configuración de impresora inválida:\n{str(e)}")
+            return
+        self.worker_reimpresion = ReimpresionWorker(self.db_file, self.filtros(), plantilla, self.nombres_producto,
+                                                    destino=destino, transporte=transporte,
+                                                    copias=self.spin_copias.value())
+        self.dialogo_progreso = QProgressDialog("Reimprimiendo tickets...", "Cancelar", 0, 100, self)
+        self.dialogo_progreso.setWindowTitle("Reimpresión")
+        self.dialogo_progreso.setMinimumDuration(300)
+        self.dialogo_progreso.canceled.connect(self.worker_reimpresion.cancelar)
+        self.worker_reimpresion.progreso.connect(self._progreso_reimpresion)
+        self.worker_reimpresion.terminado.connect(self._reimpresion_terminada)
+        self.worker_reimpresion.error.connect(self._reimpresion_fallida)
+        self.btn_reimprimir_pdf.setEnabled(False)
+        self.btn_reimprimir_etiquetas.setEnabled(False)
+        self.worker_reimpresion.start()
+
+    def _progreso_reimpresion(self, hechos, total):
+        if self.dialogo_progreso is not None:
+            self.dialogo_progreso.setMaximum(total)
+            self.dialogo_progreso.setValue(hechos)
+
+    def _fin_reimpresion(self):
+        if self.dialogo_progreso is not None:
+            self.dialogo_progreso.close()
+            self.dialogo_progreso = None
+        self.actualizar_coincidencias()
+
+    def _reimpresion_terminada(self, cantidad, destino):
+        self._fin_reimpresion()
+        QMessageBox.information(self, "Reimpresión", f"{cantidad} tickets enviados a {destino}")
+
+    def _reimpresion_fallida(self, mensaje):
+        self._fin_reimpresion()
+        QMessageBox.warning(self, "Reimpresión", mensaje)
+
+    def _vigilar_archivo(self):
+        # Si el archivo se reemplazó, el vigilante lo deja de observar y hay que volver a agregarlo
+        if self.csv_file not in self.vigilante.files() and os.path.exists(self.csv_file):
+            self.vigilante.addPath(self.csv_file)
+
+    def _archivo_modificado(self, ruta):
+        self.temporizador_actualizacion.start()
+
+    def closeEvent(self, event):
+        # La ventana solo se oculta: sin dejar de vigilar el CSV, el siguiente guardado
+        # volvería a abrir la base desde una ventana que nadie ve
+        if self.vigilante.files():
+            self.vigilante.removePaths(self.vigilante.files())
+        self.temporizador_actualizacion.stop()
+        if self.worker_reimpresion is not None and self.worker_reimpresion.isRunning():
+            self.worker_reimpresion.cancelar()
+            self.worker_reimpresion.wait()
+        if self.repositorio is not None:
+            self.repositorio.cerrar()
+            self.repositorio = None
+        if self.servicio_reportes is not None:
+            self.servicio_reportes.cerrar()
+            self.servicio_reportes = None
+        super().closeEvent(event)
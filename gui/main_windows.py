@@ -1,18 +1,28 @@
-from email.mime import application
+import importlib
+import json
 import os
 import csv
 import sys
+import threading
+import time
 import serial
 import serial.tools.list_ports
 from datetime import datetime
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QLabel, QPushButton, QVBoxLayout,
                              QHBoxLayout, QComboBox, QLineEdit, QMessageBox, QSpacerItem,
-                             QSizePolicy, QDialog, QTableWidget, QTableWidgetItem)
+                             QSizePolicy, QDialog, QTableWidget, QTableWidgetItem, QCheckBox, QSpinBox)
 from PyQt5.QtCore import QTimer, QDateTime, Qt
 from PyQt5.QtGui import QFont
 from utils.logger_config import setup_logger
-from gui.historial_window import HistorialWindow
-from utils.print_manager import PrintManager
+from utils.metrics import metricas
+from core.core_main_windows.utils.serial_utils import LectorSerial
+from core.core_main_windows.services.weight_service import DetectorEstabilidad, DIALECTOS, PESO_MINIMO
+from core.core_main_windows.utils.file_utils import leer_ultima_linea, terminar_linea_incompleta
+from core.core_main_windows.models.record_model import RepositorioRegistros
+from core.core_main_windows.services.product_search_service import IndiceProductos
+from core.core_panel_admin.worker.csv_service import CSVService
+from core.core_panel_admin.logic_operarios import RegistroOperarios, CONFLICTO_NOMBRE, CONFLICTO_CEDULA
+from gui.completador_productos import CompletadorProductos
 
 
 class BasculaApp(QMainWindow):
@@ -22,7 +32,10 @@ class BasculaApp(QMainWindow):
         self.setWindowTitle("Báscula Industrial Koen Pack")
         self.setMinimumSize(1000, 800)
         self.serial = None
-        self.print_manager = PrintManager()
+        self.lector_serial = None  # Hilo que lee la báscula
+        self._cola_impresion = None  # Se crea en el primer uso (ver cola_impresion)
+        self._registro_impresoras = None  # Registro de impresoras; se inicia con la precarga
+        self._precarga_iniciada = False
         
         # Referencias para evitar ventanas duplicadas
         self.admin_login_dialog = None
@@ -38,18 +51,50 @@ class BasculaApp(QMainWindow):
         self.logger = setup_logger()
         self.logger.info("Iniciando aplicación de báscula industrial")
 
-        # Buffer simple para peso
+        # Último peso mostrado y latencia (llegada del byte -> etiqueta) de la última lectura
         self.buffer_peso = ""
+        self.latencia_peso_ms = 0.0
+
+        # Métricas de los caminos calientes (ver pestaña "Métricas" del panel de administración)
+        self.metricas = metricas()
+        self.metrica_leer_peso = self.metricas.histograma('leer_peso')
+        self.metrica_latencia_peso = self.metricas.histograma('latencia_peso')
+        self.metrica_guardar = self.metricas.histograma('guardar_registro')
+        self.registros_guardados = self.metricas.contador('registros_guardados')
+        self.lecturas_descartadas = self.metricas.indicador('lecturas_descartadas')
+
+        # Detección de peso estable: ventana de muestras, tolerancia (kg) y tiempo de asentamiento (s)
+        self.ventana_estabilidad = 10
+        self.tolerancia_estabilidad = 0.02
+        self.tiempo_asentamiento = 0.8
+        self.peso_estable = None  # LecturaPeso asentada que se usa al guardar
+
+        # Formato de las tramas del indicador ("dialecto" en bascula_config.json) y peso mínimo (kg)
+        # por debajo del cual la báscula se considera vacía ("peso_minimo")
+        self.config_bascula = 'bascula_config.json'
+        self.dialecto_bascula = self.leer_dialecto_bascula()
+        self.peso_minimo = self.leer_peso_minimo()
 
         #Temporizador de inactividad
         self.inactivity_timer = QTimer()
         self.inactivity_timer.setInterval(5 * 60 * 1000)  # 5 minutos
         self.inactivity_timer.timeout.connect(self.auto_disconnect)
 
+        # Al escribir en el combo de operarios el resumen se consulta una sola vez, al dejar de teclear
+        self.timer_resumen = QTimer()
+        self.timer_resumen.setSingleShot(True)
+        self.timer_resumen.setInterval(300)
+        self.timer_resumen.timeout.connect(self.actualizar_resumen)
+
         self.csv_file = 'data/Datos_bascula.csv' # Archivo principal para guardar registros
         self.operarios_file = 'data/operarios.csv' # Archivo de operarios
         self.productos_file = 'data/productos.csv'  # Archivo de productos
-        self.operarios_dict = {}  # Diccionario nombre->cédula
+        self.db_file = 'data/bascula.db'  # Base SQLite con los registros indexados
+        self.repositorio = None
+        self.carpeta_backup = None  # Última carpeta elegida para exportar registros
+        self.worker_exportacion = None
+        self.dialogo_exportacion = None
+        self.registro_operarios = RegistroOperarios()  # Índices nombre<->cédula (compartido con el panel admin)
         self.productos_dict = {}  # Diccionario nombre->código
 
         #Inicialización de componentes
@@ -57,10 +102,6 @@ class BasculaApp(QMainWindow):
         self.init_csv() # Prepara archivos CSV y Carga Listas
         self.update_ports()
 
-        #Temporizador de lectura de peso - reducido a 100ms
-        self.timer = QTimer()
-        self.timer.setInterval(100)  # 100ms = 0.1 segundos
-        self.timer.timeout.connect(self.leer_peso)
         self.is_connected = False
         
 
@@ -100,12 +141,18 @@ class BasculaApp(QMainWindow):
         self.lbl_ultimo.setFont(QFont("Arial", 12))
         layout.addWidget(self.lbl_ultimo)
 
+        # Totales del día y del mes (desde los resúmenes diarios de la base de registros)
+        self.lbl_resumen = QLabel("Hoy: -")
+        self.lbl_resumen.setFont(QFont("Arial", 12))
+        layout.addWidget(self.lbl_resumen)
+
         #  operario + cédula + producto
         self.cmb_operarios = QComboBox()
         self.cmb_operarios.setFont(QFont("Arial", 12))
         self.cmb_operarios.setEditable(True)
         self.cmb_operarios.setPlaceholderText("Selecciona o escribe nombre de un operario")
         self.cmb_operarios.currentTextChanged.connect(self.actualizar_cedula_operario)
+        self.cmb_operarios.currentTextChanged.connect(self.timer_resumen.start)
 
         self.txt_cedula = QLineEdit()
         self.txt_cedula.setFont(QFont("Arial", 12))
@@ -142,6 +189,17 @@ class BasculaApp(QMainWindow):
         self.btn_imprimir.clicked.connect(self.imprimir_ticket)
         self.btn_imprimir.setEnabled(False)  # Deshabilitado inicialmente
 
+        # Copias del ticket: todas viajan en un mismo trabajo de impresión
+        self.spin_copias = QSpinBox()
+        self.spin_copias.setFont(QFont("Arial", 12))
+        self.spin_copias.setRange(1, 99)
+        self.spin_copias.setPrefix("x")
+        self.spin_copias.setToolTip("Copias del ticket")
+
+        # Guarda el registro automáticamente cuando el peso se estabiliza
+        self.chk_captura_auto = QCheckBox("Captura automática")
+        self.chk_captura_auto.setFont(QFont("Arial", 12))
+
         self.btn_cerrar = QPushButton("Cerrar Programa")
         self.btn_cerrar.setFont(QFont("Arial", 12))
         self.btn_cerrar.clicked.connect(self.cerrar_programa)
@@ -196,6 +254,9 @@ class BasculaApp(QMainWindow):
         row4.addWidget(self.btn_guardar)
         row4.addItem(QSpacerItem(10, 20, QSizePolicy.Fixed, QSizePolicy.Minimum)) # pequeño espaciador horizontal entre los botones
         row4.addWidget(self.btn_imprimir)
+        row4.addWidget(self.spin_copias)
+        row4.addItem(QSpacerItem(10, 20, QSizePolicy.Fixed, QSizePolicy.Minimum))
+        row4.addWidget(self.chk_captura_auto)
         row4.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
         layout.addLayout(row4)
 
@@ -250,8 +311,8 @@ class BasculaApp(QMainWindow):
         port = self.port_combo.currentText()
         # Si ya está conectado y el puerto sigue abierto 
         if self.is_connected and self.serial and self.serial.is_open:
+            self.detener_lector()
             self.serial.close()
-            self.timer.stop()
             self.inactivity_timer.stop() 
             self.is_connected = False
             self.connect_btn.setText("Conectar")
@@ -265,7 +326,7 @@ class BasculaApp(QMainWindow):
             # Intento de abrir el puerto serial
             self.serial = serial.Serial(port, 9600, timeout=1)
             if self.serial.is_open:  # Verificamos si realmente se abrió 
-                self.timer.start()
+                self.iniciar_lector()
                 self.inactivity_timer.start()
                 self.is_connected = True
                 self.connect_btn.setText("Desconectar")
@@ -320,8 +381,8 @@ class BasculaApp(QMainWindow):
     # auto_disconnect(): desconecta por inactividad
     def auto_disconnect(self):
          if self.is_connected and self.serial and self.serial.is_open:
+            self.detener_lector()
             self.serial.close()
-            self.timer.stop()
             self.inactivity_timer.stop() 
             self.is_connected = False
             self.connect_btn.setText("Conectar")
@@ -333,46 +394,124 @@ class BasculaApp(QMainWindow):
 
 
 
-    def leer_peso(self):
+    def iniciar_lector(self):
+        """Arranca el hilo que lee la báscula sobre el puerto ya abierto."""
+        detector = DetectorEstabilidad(self.ventana_estabilidad, self.tolerancia_estabilidad, self.tiempo_asentamiento,
+                                       peso_minimo=self.peso_minimo)
+        self.lector_serial = LectorSerial(self.serial, self.dialecto_bascula, detector=detector)
+        self.lector_serial.nuevo_peso.connect(self.leer_peso)
+        self.lector_serial.peso_estable.connect(self.marcar_peso_estable)
+        self.lector_serial.peso_inestable.connect(self.marcar_peso_inestable)
+        self.lector_serial.error.connect(self.error_lectura)
+        self.lector_serial.start()
+
+    def leer_config_bascula(self):
+        """Contenido de bascula_config.json; diccionario vacío si falta o no se puede leer."""
         try:
-            if self.serial and self.serial.is_open:
-                try:
-                    if self.serial.in_waiting:
-                        # Leer datos y agregar al buffer
-                        datos = self.serial.readline().decode('utf-8').strip()
-                        if datos:
-                            # Extraer solo el valor numérico del peso
-                            # Eliminar ST, GS, + y cualquier otro carácter no numérico excepto el punto decimal
-                            peso_limpio = ''.join(c for c in datos if c.isdigit() or c == '.')
-                            if peso_limpio:  # Solo actualizar si hay un valor numérico
-                                self.buffer_peso = peso_limpio
-                                self.lbl_peso.setText(f"{self.buffer_peso} Kg")
-                            # Programar siguiente lectura inmediatamente
-                            QTimer.singleShot(0, self.leer_peso)
-                except serial.SerialException as e:
-                    self.logger.error(f"Error de comunicación serial: {str(e)}")
-                    self.desconectar_puerto()
-                    QMessageBox.warning(
-                        self,
-                        "Error de Comunicación",
-                        "Se perdió la conexión con la báscula. Por favor, reconecte el dispositivo y vuelva a conectar."
-                    )
-                except Exception as e:
-                    self.logger.error(f"Error inesperado al leer peso: {str(e)}")
-                    self.desconectar_puerto()
-        except Exception as e:
-            self.logger.error(f"Error general en leer_peso: {str(e)}")
-            self.desconectar_puerto()
+            with open(self.config_bascula, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Error al leer {self.config_bascula}: {str(e)}")
+            return {}
+        if not isinstance(config, dict):
+            self.logger.error(f"Formato inválido en {self.config_bascula}: se esperaba un objeto JSON")
+            return {}
+        return config
+
+    def leer_dialecto_bascula(self):
+        """Dialecto del indicador según bascula_config.json, p. ej. {"dialecto": "sics"}; 'generico' si falta."""
+        dialecto = self.leer_config_bascula().get('dialecto', 'generico')
+        if dialecto not in DIALECTOS:
+            self.logger.error(f"Dialecto de báscula desconocido en {self.config_bascula}: {dialecto}. Se usa 'generico'")
+            return 'generico'
+        return dialecto
+
+    def leer_peso_minimo(self):
+        """Peso mínimo (kg) para guardar o capturar según bascula_config.json, p. ej. {"peso_minimo": 0.05}."""
+        valor = self.leer_config_bascula().get('peso_minimo', PESO_MINIMO)
+        try:
+            peso_minimo = float(valor)
+        except (TypeError, ValueError):
+            peso_minimo = -1.0
+        if not peso_minimo >= 0.0:  # También descarta NaN
+            self.logger.error(f"Peso mínimo inválido en {self.config_bascula}: {valor}. Se usa {PESO_MINIMO}")
+            return PESO_MINIMO
+        return peso_minimo
+
+    def detener_lector(self):
+        """Detiene el hilo de lectura antes de cerrar el puerto."""
+        if self.lector_serial is not None:
+            self.lector_serial.detener()
+            if self.lector_serial.lecturas_descartadas:
+                self.logger.info(f"Lecturas de peso descartadas por contrapresión: {self.lector_serial.lecturas_descartadas}")
+            self.lector_serial = None
+        self.marcar_peso_inestable()
+
+    def leer_peso(self):
+        """Muestra la lectura más reciente entregada por el hilo de la báscula."""
+        with self.metrica_leer_peso.medir():
+            try:
+                if self.lector_serial is None:
+                    return
+                ultimo = self.lector_serial.tomar_ultimo()
+                if ultimo is None:
+                    return
+                lectura, t_llegada = ultimo
+                self.buffer_peso = lectura.texto
+                self.lbl_peso.setText(f"{self.buffer_peso} Kg")
+                latencia = time.perf_counter() - t_llegada
+                self.latencia_peso_ms = latencia * 1000
+                self.metrica_latencia_peso.observar(int(latencia * 1e9))
+                self.lecturas_descartadas.establecer(self.lector_serial.lecturas_descartadas)
+            except Exception as e:
+                self.logger.error(f"Error general en leer_peso: {str(e)}")
+                self.desconectar_puerto()
+
+    def marcar_peso_estable(self, lectura):
+        """Guarda el peso asentado y, si la captura automática está activa, registra la pesada."""
+        self.peso_estable = lectura
+        self.lbl_peso.setStyleSheet("color: green;")
+        # Una tara o lectura negativa estable se muestra, pero no se captura
+        if self.chk_captura_auto.isChecked() and self.campos_completos() and float(lectura.texto) > self.peso_minimo:
+            self.guardar_registro()
+
+    def marcar_peso_inestable(self):
+        self.peso_estable = None
+        self.lbl_peso.setStyleSheet("")
+
+    def campos_completos(self):
+        return all([
+            self.cmb_operarios.currentText().strip(),
+            self.txt_cedula.text().strip(),
+            self.cmb_productos.currentText().strip(),
+            self.txt_nombre_pro.text().strip(),
+            self.txt_cantidad.text().strip(),
+        ])
+
+    def error_lectura(self, mensaje):
+        """Se ejecuta cuando el hilo de lectura pierde la comunicación con la báscula."""
+        self.logger.error(f"Error de comunicación serial: {mensaje}")
+        self.desconectar_puerto()
+        QMessageBox.warning(
+            self,
+            "Error de Comunicación",
+            "Se perdió la conexión con la báscula. Por favor, reconecte el dispositivo y vuelva a conectar."
+        )
 
     def desconectar_puerto(self):
         """Método para manejar la desconexión segura del puerto"""
         try:
+            self.detener_lector()
             if self.serial and self.serial.is_open:
                 self.serial.close()
         except Exception as e:
             self.logger.error(f"Error al cerrar el puerto: {str(e)}")
         finally:
             self.serial = None
+            self.is_connected = False
+            self.inactivity_timer.stop()
             self.connect_btn.setText("Conectar")
             self.connect_btn.setEnabled(True)
             self.port_combo.setEnabled(True)
@@ -383,18 +522,45 @@ class BasculaApp(QMainWindow):
         # Verificar y crear el archivo CSV principal si no existe
         self.crear_archivo_si_no_existe(self.csv_file, ['FechaHora', 'Operario', 'Cédula', 'Producto', 'Cantidad', 'Peso'])
         
-        # Cargar operarios y actualizar la lista desplegable
+        # Cargar operarios y productos (cada archivo se lee una sola vez)
         self.cargar_operarios()
-        self.cmb_operarios.clear()  # Limpiar la lista desplegable antes de actualizar
-        self.actualizar_lista_desplegable(self.operarios_file, self.cmb_operarios)
-        
         self.cargar_productos()
-        self.cmb_productos.clear()  # Limpiar la lista desplegable antes de actualizar
-        self.actualizar_lista_desplegable(self.productos_file, self.cmb_productos)
 
         # Cargar último registro
         self.cargar_ultimo_registro()
 
+        # Sincronizar la base de registros (la primera vez migra todo el CSV)
+        try:
+            self.repositorio = RepositorioRegistros(self.db_file)
+            importadas = self.repositorio.sincronizar_csv(self.csv_file)
+            if importadas:
+                self.logger.info(f"Registros importados a la base de datos: {importadas}")
+            if self.repositorio.verificar_resumen(completo=True):
+                self.logger.warning("Resúmenes diarios desfasados: se reconstruyeron desde los registros")
+        except Exception as e:
+            self.repositorio = None
+            self.logger.error(f"Error al abrir la base de registros: {str(e)}")
+        self.actualizar_resumen()
+
+    def actualizar_resumen(self, *args):
+        """Muestra los totales de hoy, del mes y del operario seleccionado (consultas a los resúmenes diarios)."""
+        if self.repositorio is None:
+            return
+        try:
+            hoy = QDateTime.currentDateTime().toString("yyyy-MM-dd")
+            registros, peso, _, _, _ = self.repositorio.totales_dia(hoy)
+            texto = f"Hoy: {registros} registros - {peso:.2f} Kg"
+            registros_mes, peso_mes, _, _, _ = self.repositorio.totales_mes(hoy[:7])
+            texto += f" | Mes: {registros_mes} registros - {peso_mes:.2f} Kg"
+            cedula = self.txt_cedula.text().strip()
+            if cedula:
+                registros_operario, peso_operario, _, _, _ = self.repositorio.totales_dia(hoy, cedula=cedula)
+                texto += (f" | {self.cmb_operarios.currentText().strip()} hoy: "
+                          f"{registros_operario} registros - {peso_operario:.2f} Kg")
+            self.lbl_resumen.setText(texto)
+        except Exception as e:
+            self.logger.error(f"Error al consultar los resúmenes diarios: {str(e)}")
+
     def crear_archivo_si_no_existe(self, ruta, encabezados):
         # Asegurarse de que el directorio exista
         directorio = os.path.dirname(ruta)
@@ -406,45 +572,41 @@ class BasculaApp(QMainWindow):
                 writer = csv.writer(f)
                 writer.writerow(encabezados)
 
-    def actualizar_lista_desplegable(self, archivo, combo_box):
-        try:
-            with open(archivo, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if row:
-                        combo_box.addItem(row[0])
-        except FileNotFoundError:
-            with open(archivo, 'w', encoding='utf-8') as f:
-                pass
-        
-
-                
 # load_operarios(): carga operarios y sus cédulas
     def cargar_operarios(self):
         try:
-            with open(self.operarios_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if len(row) == 2:
-                        nombre, cedula = row
-                        self.operarios_dict[nombre] = cedula
-                        self.cmb_operarios.addItem(nombre)
+            omitidas = self.registro_operarios.cargar(CSVService.leer_csv(self.operarios_file))
+            for nombre, cedula in omitidas:
+                self.logger.warning(f"Operario omitido por conflicto de cédula: {nombre} - {cedula}")
+            self.actualizar_combo_operarios()
         except FileNotFoundError:
             with open(self.operarios_file, 'w', encoding='utf-8') as f:
                 pass
     
         
     
+    def actualizar_combo_operarios(self):
+        """Rehace el combo con el registro de operarios (también cuando el panel de administración lo cambia)."""
+        actual = self.cmb_operarios.currentText().strip()
+        self.cmb_operarios.blockSignals(True)
+        self.cmb_operarios.clear()
+        self.cmb_operarios.addItems(self.registro_operarios.nombres())
+        # Un operario quitado o renombrado no queda seleccionado con una cédula vacía
+        self.cmb_operarios.setCurrentText(actual if actual in self.registro_operarios else "")
+        self.cmb_operarios.blockSignals(False)
+        self.actualizar_cedula_operario(self.cmb_operarios.currentText())
+        self.actualizar_resumen()
+
     # agregar_operario(): agrega operario al archivo
     def agregar_operario(self, nombre, cedula):
         with open(self.operarios_file, 'a', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow([nombre, cedula])
-            self.operarios_dict[nombre] = cedula
+            self.registro_operarios.agregar(nombre, cedula)
             self.cmb_operarios.addItem(nombre)
 
     def actualizar_cedula_operario(self, text):
-        cedula = self.operarios_dict.get(text.strip(), '')
+        cedula = self.registro_operarios.cedula_de(text.strip()) or ''
         self.txt_cedula.setText(cedula)
 
     def actualizar_nombre_producto(self, text):
@@ -454,16 +616,18 @@ class BasculaApp(QMainWindow):
      # cargar_productos(): carga productos
     def cargar_productos(self):
         try:
-            with open(self.productos_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if len(row) == 2:
-                        nombre_pro, codigo = row
-                        self.productos_dict[nombre_pro] = codigo
-                        self.cmb_productos.addItem(nombre_pro)
+            for row in CSVService.leer_csv(self.productos_file):
+                if len(row) == 2:
+                    nombre_pro, codigo = row
+                    self.productos_dict[nombre_pro] = codigo
+            self.cmb_productos.clear()
+            self.cmb_productos.addItems(list(self.productos_dict))
         except FileNotFoundError:
             with open(self.productos_file, 'w', encoding='utf-8') as f:
                 pass
+        # Índice de búsqueda (prefijo y difusa) y ventana de sugerencias del combo
+        self.indice_productos = IndiceProductos(self.productos_dict.items())
+        self.completador_productos = CompletadorProductos(self.indice_productos, self.cmb_productos)
     
     def agregar_producto(self, nombre_pro, codigo):
         with open(self.productos_file, 'a', newline='', encoding='utf-8') as f:
@@ -471,11 +635,12 @@ class BasculaApp(QMainWindow):
             writer.writerow([nombre_pro, codigo])
             self.productos_dict[nombre_pro] = codigo
             self.cmb_productos.addItem(nombre_pro)
+            self.indice_productos.agregar(nombre_pro, codigo)
     
 
 
     def cargar_ultimo_registro(self):
-        """Carga el último registro del archivo CSV."""
+        """Carga el último registro leyendo solo el final del archivo CSV."""
         try:
             if not os.path.exists(self.csv_file):
                 self.logger.warning("No existe el archivo de registros")
@@ -485,23 +650,22 @@ class BasculaApp(QMainWindow):
                 self.logger.info("El archivo de registros está vacío")
                 return
 
-            with open(self.csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                registros = list(reader)
-                if len(registros) > 1:  # Si hay registros (excluyendo encabezados) 
-                    ultimo_registro = registros[-1]
-                    self.lbl_ultimo.setText(f"Último Registro: {ultimo_registro[0]} - {ultimo_registro[1]} - {ultimo_registro[3]} - {ultimo_registro[4]} - {ultimo_registro[5]} Kg")
-        except Exception as e:
-                    
-                    # Limpiar y actualizar tabla
-                    self.tabla_historial.setRowCount(0)
-                    self.tabla_historial.setRowCount(1)
-                    self.tabla_historial.setRowCount(3)
-                    self.tabla_historial.setRowCount(4)
-                    self.tabla_historial.setRowCount(5)
-                    for col, valor in enumerate(ultimo_registro):
-                        item = QTableWidgetItem(valor)
-                        self.tabla_historial.setItem(0, col, item)
+            linea, fragmento = leer_ultima_linea(self.csv_file)
+            if fragmento is not None:
+                registro = next(csv.reader([fragmento]), [])
+                if len(registro) == 6:
+                    # Registro completo al que solo le falta el salto de línea final
+                    self.logger.warning("El archivo de registros no termina en salto de línea")
+                    linea = fragmento
+                else:
+                    self.logger.warning(f"Última línea del archivo de registros incompleta, se ignora: {fragmento!r}")
+
+            if not linea:
+                return
+            ultimo_registro = next(csv.reader([linea]), [])
+            if len(ultimo_registro) < 6 or ultimo_registro[0] == 'FechaHora':  # Solo encabezados
+                return
+            self.lbl_ultimo.setText(f"Último Registro: {ultimo_registro[0]} - {ultimo_registro[1]} - {ultimo_registro[3]} - {ultimo_registro[4]} - {ultimo_registro[5]} Kg")
         except Exception as e:
             self.logger.error(f"Error al cargar último registro: {str(e)}")
 
@@ -517,41 +681,66 @@ class BasculaApp(QMainWindow):
         producto = self.cmb_productos.currentText().strip()
         nombre_pro = self.txt_nombre_pro.text().strip()
         cantidad = self.txt_cantidad.text().strip()
-        peso = self.lbl_peso.text().replace(" Kg", "")
 
-        if not operario or not cedula or not producto or peso == "0.00" or not cantidad or not nombre_pro:
+        # Se guarda el peso asentado, no el último valor mostrado en pantalla
+        if self.peso_estable is None:
+            self.logger.warning("Intento de guardar registro con peso inestable")
+            QMessageBox.warning(self, "Peso inestable", "Espere a que el peso se estabilice antes de guardar")
+            return
+        peso = self.peso_estable.texto
+
+        if not operario or not cedula or not producto or not cantidad or not nombre_pro:
             self.logger.warning("Intento de guardar registro con datos incompletos")
             QMessageBox.warning(self, "Datos incompletos", "Completa todos los campos antes de guardar")
             return
+
+        # Báscula vacía, tara o lectura negativa: no es una pesada
+        if float(peso) <= self.peso_minimo:
+            self.logger.warning(f"Intento de guardar registro con peso {peso} Kg (mínimo {self.peso_minimo} Kg)")
+            QMessageBox.warning(self, "Peso insuficiente",
+                                f"El peso debe ser mayor a {self.peso_minimo} Kg para guardar")
+            return
         
         if not cedula.isdigit():
             self.logger.warning(f"Intento de guardar registro con cédula inválida: {cedula}")
             QMessageBox.warning(self, "Cédula invalida", "La cédula deber contener solo números")
             return
         
-        if operario in self.operarios_dict and self.operarios_dict[operario]!= cedula:
+        conflicto = self.registro_operarios.conflicto(operario, cedula)
+        if conflicto == CONFLICTO_NOMBRE:
             self.logger.warning(f"Conflicto de cédula para operario {operario}")
             QMessageBox.warning(self, "Conflicto de cédula", 
                               "La cédula ingresada no coincide con la registrada para este operario")
             return
 
-        if cedula in self.operarios_dict and self.operarios_dict[cedula]!= operario:
+        if conflicto == CONFLICTO_CEDULA:
             self.logger.warning(f"Conflicto de operario para cédula {cedula}")
-            QMessageBox.warning(self, "Conflito", f"La cédula {cedula} ya está registrada con otro operario")
+            QMessageBox.warning(self, "Conflicto", f"La cédula {cedula} ya está registrada con otro operario")
             return
         
         
 
         fecha_hora = QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
 
+        # Se mide desde la escritura hasta tener el registro listo para imprimir, sin los diálogos de validación
+        inicio = time.perf_counter_ns()
         try:
+            if terminar_linea_incompleta(self.csv_file):
+                self.logger.warning("Se agregó el salto de línea faltante al final del archivo de registros")
             with open(self.csv_file, mode='a', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow([fecha_hora, operario, cedula, producto, cantidad, peso])
             
             self.logger.info(f"Registro guardado: {operario} - {producto} - {cantidad} - {peso} Kg")
+
+            if self.repositorio is not None:
+                try:
+                    self.repositorio.sincronizar_csv(self.csv_file)  # También suma el registro a su resumen diario
+                except Exception as e:
+                    self.logger.error(f"Error al actualizar la base de registros: {str(e)}")
+                self.actualizar_resumen()
             
-            if operario not in self.operarios_dict:
+            if operario not in self.registro_operarios:
                 self.agregar_operario(operario, cedula)
                 self.logger.info(f"Nuevo operario agregado: {operario}")
 
@@ -573,6 +762,9 @@ class BasculaApp(QMainWindow):
                 'fecha_hora': fecha_hora
             }
 
+            self.metrica_guardar.observar(time.perf_counter_ns() - inicio)
+            self.registros_guardados.incrementar()
+
             # Habilitar botón de impresión
             self.btn_imprimir.setEnabled(True)
             
@@ -612,8 +804,9 @@ class BasculaApp(QMainWindow):
 
         # Crear el panel solo si no existe ya una instancia
         if getattr(self, "admin_panel_window", None) is None:
-            # AdminPanel no espera parent en su __init__, crear sin argumentos
-            self.admin_panel_window = AdminPanel()
+            # AdminPanel no espera parent; recibe el registro de operarios compartido
+            self.admin_panel_window = AdminPanel(self.registro_operarios)
+            self.admin_panel_window.operarios_guardados.connect(self.actualizar_combo_operarios)
             # Al destruirse el panel, reseteamos la referencia
             self.admin_panel_window.destroyed.connect(self._reset_admin_panel)
 
@@ -631,9 +824,9 @@ class BasculaApp(QMainWindow):
 
     def cerrar_programa(self):
         try:
-            self.timer.stop()
+            self.detener_lector()
         except Exception as e:
-            self.logger.error(f"Error al detener timer: {str(e)}")
+            self.logger.error(f"Error al detener lector serial: {str(e)}")
         try:
             self.inactivity_timer.stop()
         except Exception as e:
@@ -644,12 +837,93 @@ class BasculaApp(QMainWindow):
                 self.logger.info("Puerto serial cerrado")
         except Exception as e:
             self.logger.error(f"Error al cerrar puerto serial: {str(e)}")
+        try:
+            if self._cola_impresion is not None:
+                self._cola_impresion.detener()
+        except Exception as e:
+            self.logger.error(f"Error al detener la cola de impresión: {str(e)}")
+        if self._registro_impresoras is not None:
+            self._registro_impresoras.detener()
+        try:
+            self.metricas.detener_volcado()
+        except Exception as e:
+            self.logger.error(f"Error al volcar las métricas: {str(e)}")
+        if self.worker_exportacion is not None and self.worker_exportacion.isRunning():
+            # Cancelar deja el punto de control anterior; la próxima exportación retoma desde allí
+            self.worker_exportacion.cancelar()
+            self.worker_exportacion.wait()
         self.logger.info("Aplicación cerrada")
         self.close()
 
+    # --- CARGA DIFERIDA ---
+    # Impresión (win32, reportlab), historial y panel de administración no se importan
+    # al arrancar: se importan en segundo plano después de mostrar la ventana y, si el
+    # usuario los pide antes, en el primer uso.
+    MODULOS_DIFERIDOS = (
+        'utils.print_manager',
+        'utils.print_queue',
+        'reportlab.pdfgen.canvas',
+        'gui.historial_window',
+        'gui.admin_login',
+    )
+
+    @property
+    def cola_impresion(self):
+        """Cola de impresión en segundo plano; se crea e inicia en el primer uso."""
+        if self._cola_impresion is None:
+            from utils.print_manager import PrintManager
+            from utils.print_queue import ColaImpresion, ImpresoraPrintManager
+            impresora = ImpresoraPrintManager(PrintManager(interactivo=False))
+            self._cola_impresion = ColaImpresion(impresora)
+            self._cola_impresion.estado_trabajo.connect(self.actualizar_estado_impresion)
+            self._cola_impresion.start()
+        return self._cola_impresion
+
+    def reanudar_cola_impresion(self):
+        """Si quedaron tickets sin imprimir de la sesión anterior, arranca la cola para enviarlos."""
+        from utils.print_queue import ColaImpresion
+        if self._cola_impresion is None and ColaImpresion.hay_pendientes():
+            try:
+                self.cola_impresion
+            except Exception as e:
+                self.logger.error(f"No se pudo reanudar la cola de impresión: {str(e)}")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._precarga_iniciada:
+            self._precarga_iniciada = True
+            # singleShot(0): la precarga empieza cuando ya se pintó la ventana
+            QTimer.singleShot(0, self.precargar_modulos)
+
+    def precargar_modulos(self):
+        try:
+            # El registro es un QObject: se crea en el hilo de la interfaz (antes que la
+            # cola de impresión, que lo consulta); la precarga solo inicia sus refrescos
+            from utils.printer_registry import registro_impresoras
+            self._registro_impresoras = registro_impresoras()
+        except Exception as e:
+            self.logger.warning(f"No se pudo crear el registro de impresoras: {str(e)}")
+        self.reanudar_cola_impresion()
+        threading.Thread(target=self._precargar, name="precarga", daemon=True).start()
+
+    def _precargar(self):
+        inicio = time.perf_counter()
+        for modulo in self.MODULOS_DIFERIDOS:
+            try:
+                importlib.import_module(modulo)
+            except Exception as e:
+                self.logger.warning(f"No se pudo precargar {modulo}: {str(e)}")
+        if self._registro_impresoras is not None:
+            # Enumera las impresoras ahora y luego cada 30 s, fuera del camino de impresión
+            self._registro_impresoras.iniciar(intervalo=30.0)
+        # Métricas acumuladas a logs/metricas_<estacion>.jsonl cada 5 minutos
+        self.metricas.iniciar_volcado(intervalo=300.0)
+        self.logger.info(f"Módulos diferidos precargados en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
     def abrir_historial(self):
         """Abre la ventana de historial de registros."""
         try:
+            from gui.historial_window import HistorialWindow
             self.historial_window = HistorialWindow()
             self.historial_window.show()
         except Exception as e:
@@ -657,62 +931,73 @@ class BasculaApp(QMainWindow):
             QMessageBox.critical(self, "Error", f"Error al abrir historial: {str(e)}")
 
     def imprimir_ticket(self):
-        """Imprime un ticket con los datos del último registro guardado."""
+        """Envía a la cola de impresión un ticket con los datos del último registro guardado."""
         if not hasattr(self, 'ultimo_registro'):
             QMessageBox.warning(self, "Error", "No hay registro para imprimir")
             return
 
         try:
-            resultado = self.print_manager.print_ticket(
-                self.ultimo_registro['fecha_hora'],
-                self.ultimo_registro['operario'],
-                self.ultimo_registro['cedula'],
-                self.ultimo_registro['producto'],
-                self.ultimo_registro['nombre_pro'],
-                self.ultimo_registro['cantidad'],
-                self.ultimo_registro['peso'],
-            )
-            if resultado:
-                if os.path.exists("configuracion_impresa.pdf"):
-                    #print("Ticket impreso correctamente")
-                    self.logger.info("Ticket impreso correctamente")
-                   # QMessageBox.information(None, "Éxito", "Ticket impreso correctamente")
-                return True
-            else:
-                raise Exception("No se pudo imprimir el ticket")
+            copias = self.spin_copias.value()
+            id_trabajo = self.cola_impresion.encolar(self.ultimo_registro, copias)
+            self.logger.info(f"Ticket enviado a la cola de impresión: {id_trabajo} ({copias} copias)")
+            return True
         except Exception as e:
             self.logger.error(f"Error al imprimir ticket: {str(e)}")
-            QMessageBox.critical(self, "Error al imprimir ticket", "Mensaje de error detallado")
+            QMessageBox.critical(self, "Error al imprimir ticket", f"No se pudo encolar el ticket:\n{str(e)}")
+
+    def actualizar_estado_impresion(self, id_trabajo, estado, detalle):
+        from utils.print_queue import EN_COLA, RENDERIZANDO, ENVIADO, REINTENTANDO, FALLIDO
+        mensajes = {
+            EN_COLA: "Ticket en cola de impresión",
+            RENDERIZANDO: "Imprimiendo ticket...",
+            ENVIADO: f"Ticket impreso correctamente: {detalle}" if detalle else "Ticket impreso correctamente",
+            REINTENTANDO: f"Error de impresión, se reintentará: {detalle}",
+            FALLIDO: f"No se pudo imprimir el ticket: {detalle}",
+        }
+        self.statusBar().showMessage(mensajes.get(estado, estado), 10000)
+        if estado == FALLIDO:
+            QMessageBox.critical(self, "Error al imprimir ticket", mensajes[FALLIDO])
 
 
     def exportar_backup(self):
-        """Exporta una copia de seguridad del archivo CSV de registros."""
+        """
+        Exporta los registros a una carpeta (por ejemplo una memoria USB): solo las filas
+        nuevas desde la última exportación a esa carpeta, o una copia completa, comprimidas
+        y con su manifiesto. Se restauran con `python -m utils.backup_export restaurar`.
+        """
         try:
-            from datetime import datetime
-            import shutil
-            
-            # Crear nombre del archivo de backup con fecha y hora
-            fecha_actual = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nombre_backup = f'backup_registros_{fecha_actual}.csv'
-            
-            # Permitir al usuario elegir dónde guardar el backup
-            from PyQt5.QtWidgets import QFileDialog
-            ruta_destino, _ = QFileDialog.getSaveFileName(
-                self,
-                "Guardar Backup",
-                nombre_backup,
-                "Archivos CSV (*.csv)"
-            )
-            
-            if ruta_destino:
-                # Copiar el archivo de registros al destino seleccionado
-                shutil.copy2(self.csv_file, ruta_destino)
-                self.logger.info(f"Backup creado exitosamente en: {ruta_destino}")
-                QMessageBox.information(
-                    self,
-                    "Backup Exitoso",
-                    f"Se ha creado una copia de seguridad en:\n{ruta_destino}"
-                )
+            from PyQt5.QtWidgets import QFileDialog, QInputDialog, QProgressDialog
+            from utils.backup_export import ExportacionWorker, COMPLETO, DIFERENCIAL
+
+            if self.worker_exportacion is not None and self.worker_exportacion.isRunning():
+                QMessageBox.warning(self, "Exportar Registros", "Ya hay una exportación en curso")
+                return
+            carpeta = QFileDialog.getExistingDirectory(self, "Carpeta de Backup", self.carpeta_backup or "")
+            if not carpeta:
+                return
+            modos = {
+                "Diferencial: solo registros nuevos (gzip)": (DIFERENCIAL, 'gz'),
+                "Diferencial: solo registros nuevos (xz, más pequeño y más lento)": (DIFERENCIAL, 'xz'),
+                "Completo: todos los registros (gzip)": (COMPLETO, 'gz'),
+                "Completo: todos los registros (xz, más pequeño y más lento)": (COMPLETO, 'xz'),
+            }
+            opcion, aceptado = QInputDialog.getItem(self, "Exportar Registros", "Tipo de exportación:",
+                                                    list(modos), 0, False)
+            if not aceptado:
+                return
+            self.carpeta_backup = carpeta
+            modo, compresion = modos[opcion]
+
+            self.worker_exportacion = ExportacionWorker(self.csv_file, carpeta, modo, compresion)
+            self.dialogo_exportacion = QProgressDialog("Exportando registros...", "Cancelar", 0, 100, self)
+            self.dialogo_exportacion.setWindowTitle("Exportar Registros")
+            self.dialogo_exportacion.setMinimumDuration(300)
+            self.dialogo_exportacion.canceled.connect(self.worker_exportacion.cancelar)
+            self.worker_exportacion.progreso.connect(self._progreso_exportacion)
+            self.worker_exportacion.terminado.connect(self._exportacion_terminada)
+            self.worker_exportacion.error.connect(self._exportacion_fallida)
+            self.btn_backup.setEnabled(False)
+            self.worker_exportacion.start()
         except Exception as e:
             self.logger.error(f"Error al crear backup: {str(e)}")
             QMessageBox.critical(
@@ -720,7 +1005,37 @@ class BasculaApp(QMainWindow):
                 "Error",
                 f"No se pudo crear el backup: {str(e)}"
             )
-    
+
+    def _progreso_exportacion(self, hechos, total):
+        if self.dialogo_exportacion is not None:
+            self.dialogo_exportacion.setMaximum(total)
+            self.dialogo_exportacion.setValue(hechos)
+
+    def _fin_exportacion(self):
+        if self.dialogo_exportacion is not None:
+            self.dialogo_exportacion.close()
+            self.dialogo_exportacion = None
+        self.btn_backup.setEnabled(True)
+
+    def _exportacion_terminada(self, manifiesto):
+        self._fin_exportacion()
+        if manifiesto is None:
+            QMessageBox.information(self, "Backup Exitoso",
+                                    "No hay registros nuevos desde la última exportación a esta carpeta")
+            return
+        self.logger.info(f"Backup creado exitosamente en: {manifiesto['archivo']}")
+        QMessageBox.information(
+            self,
+            "Backup Exitoso",
+            f"Exportación {manifiesto['tipo']}: {manifiesto['filas']} registros "
+            f"({manifiesto['filas_totales']} en total) en:\n"
+            f"{os.path.join(self.carpeta_backup, manifiesto['archivo'])}"
+        )
+
+    def _exportacion_fallida(self, mensaje):
+        self._fin_exportacion()
+        QMessageBox.critical(self, "Error", f"No se pudo crear el backup: {mensaje}")
+
     def limpiar_campos(self):
         try:
             # Limpiar los campos de texto
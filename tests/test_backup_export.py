@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from utils import backup_export
+from utils.backup_export import (ExportadorRegistros, ExportacionCancelada, BackupInvalido,
+                                 cadena_de_backups, verificar, restaurar, COMPLETO, DIFERENCIAL)
+
+ENCABEZADOS = 'FechaHora,Operario,Cédula,Producto,Cantidad,Peso\r\n'
+
+
+def filas_csv(inicio, cantidad):
+    return ''.join(f"2025-06-05 14:{i // 60 % 60:02d}:{i % 60:02d},María Peña,1020304050,CMG70021,{i % 20},{i / 7:.2f}\r\n"
+                   for i in range(inicio, inicio + cantidad))
+
+
+class ExportarRestaurarTest(unittest.TestCase):
+    """Ida y vuelta: exportación completa + diferenciales y restauración byte a byte."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.csv = os.path.join(self.carpeta, 'Datos_bascula.csv')
+        self.usb = os.path.join(self.carpeta, 'usb')
+        self.restaurado = os.path.join(self.carpeta, 'restaurado.csv')
+        self.exportador = ExportadorRegistros(self.csv, self.usb)
+        # Bloques pequeños para que cada exportación lea y descomprima en varias vueltas
+        bloque = mock.patch.object(backup_export, 'BLOQUE', 4096)
+        bloque.start()
+        self.addCleanup(bloque.stop)
+        self.escribir(ENCABEZADOS + filas_csv(0, 1000), 'w')
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def escribir(self, texto, modo='a'):
+        with open(self.csv, modo, encoding='utf-8', newline='') as f:
+            f.write(texto)
+
+    def contenido(self, ruta):
+        with open(ruta, 'rb') as f:
+            return f.read()
+
+    def test_cadena_completa_y_diferenciales(self):
+        primero = self.exportador.exportar(DIFERENCIAL, 'gz')  # Sin punto de control: completa
+        self.assertEqual((primero['tipo'], primero['filas']), (COMPLETO, 1000))
+        self.escribir(filas_csv(1000, 500))
+        segundo = self.exportador.exportar(DIFERENCIAL, 'xz')
+        # Fila a medio escribir al exportar: queda para la próxima
+        self.escribir(filas_csv(1500, 300) + '2025-06-05 15:00:00,María')
+        tercero = self.exportador.exportar(DIFERENCIAL, 'gz')
+        self.assertEqual([(m['tipo'], m['filas'], m['filas_totales']) for m in (segundo, tercero)],
+                         [(DIFERENCIAL, 500, 1500), (DIFERENCIAL, 300, 1800)])
+        self.assertEqual(tercero['anterior'], segundo['archivo'])
+        self.assertIsNone(self.exportador.exportar(DIFERENCIAL, 'gz'))
+
+        self.assertEqual([m['secuencia'] for m in cadena_de_backups(self.usb)], [1, 2, 3])
+        self.assertEqual(len(verificar(self.usb)), 3)
+        self.assertEqual(restaurar(self.usb, self.restaurado), 1800)
+        original = self.contenido(self.csv)
+        self.assertEqual(self.contenido(self.restaurado), original[:original.rindex(b'\n') + 1])
+
+        # Restaurar hasta un punto anterior de la cadena
+        restaurar(self.usb, self.restaurado, ultimo=segundo['archivo'])
+        self.assertEqual(self.contenido(self.restaurado), original[:segundo['hasta']])
+
+    def test_csv_reemplazado_empieza_cadena_nueva(self):
+        self.exportador.exportar(COMPLETO, 'gz')
+        self.escribir(ENCABEZADOS + filas_csv(5000, 200), 'w')  # Rotación: archivo nuevo y más corto
+        manifiesto = self.exportador.exportar(DIFERENCIAL, 'gz')
+        self.assertEqual((manifiesto['tipo'], manifiesto['filas'], manifiesto['anterior']), (COMPLETO, 200, None))
+        self.assertEqual(restaurar(self.usb, self.restaurado), 200)
+        self.assertEqual(self.contenido(self.restaurado), self.contenido(self.csv))
+
+    def test_exportacion_cancelada_no_avanza_el_punto_de_control(self):
+        self.exportador.exportar(COMPLETO, 'gz')
+        punto = self.exportador.punto_control()
+        self.escribir(filas_csv(1000, 2000))
+
+        def cancelar(hechos, total):
+            if hechos > total // 2:
+                raise ExportacionCancelada()
+
+        with self.assertRaises(ExportacionCancelada):
+            self.exportador.exportar(DIFERENCIAL, 'gz', avance=cancelar)
+        self.assertEqual(self.exportador.punto_control(), punto)
+        self.assertFalse([n for n in os.listdir(self.usb) if n.endswith('.parcial')])
+        self.assertEqual(self.exportador.exportar(DIFERENCIAL, 'gz')['filas'], 2000)
+        self.assertEqual(restaurar(self.usb, self.restaurado), 3000)
+        self.assertEqual(self.contenido(self.restaurado), self.contenido(self.csv))
+
+    def test_backup_dañado_no_toca_el_destino(self):
+        self.exportador.exportar(COMPLETO, 'gz')
+        self.escribir(filas_csv(1000, 100))
+        manifiesto = self.exportador.exportar(DIFERENCIAL, 'gz')
+        with open(self.restaurado, 'wb') as f:
+            f.write(b'anterior')
+        with open(os.path.join(self.usb, manifiesto['archivo']), 'r+b') as f:
+            f.seek(20)
+            f.write(b'\x00\x00\x00\x00')
+
+        with self.assertRaisesRegex(BackupInvalido, manifiesto['archivo']):
+            verificar(self.usb)
+        with self.assertRaises(BackupInvalido):
+            restaurar(self.usb, self.restaurado)
+        self.assertEqual(self.contenido(self.restaurado), b'anterior')
+        self.assertFalse(os.path.exists(self.restaurado + '.parcial'))
+
+    def test_cadena_incompleta(self):
+        primero = self.exportador.exportar(COMPLETO, 'gz')
+        self.escribir(filas_csv(1000, 100))
+        self.exportador.exportar(DIFERENCIAL, 'gz')
+        os.remove(os.path.join(self.usb, primero['archivo'] + '.json'))
+        with self.assertRaisesRegex(BackupInvalido, "Falta el manifiesto"):
+            cadena_de_backups(self.usb)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import base64
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+from core.core_main_windows.models.record_model import RepositorioRegistros
+from utils.batch_print import ReimpresionWorker, escribir_pdf_lote, lotes_de_registros
+from utils.printer_transport import TransporteArchivo
+from utils.ticket_template import compilar_plantilla, valores_ticket
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRODUCTOS = {'01': 'Cafetería', '02': 'Aseo general'}
+FILAS = [
+    ['2025-06-04 23:59:59', 'Ana', '1', '01', '3', '1.25'],
+    ['2025-06-05 08:00:00', 'José Núñez', '80706050', '01', '12', '25.40'],
+    ['2025-06-05 09:30:00', 'Ana', '1', '02', '1', '0.75'],
+    ['2025-06-05 10:00:00', 'José Núñez', '80706050', '02', '4', '3.10'],
+    ['2025-06-06 00:00:00', 'José Núñez', '80706050', '99', '2', '9.00'],
+]
+
+
+def lineas_pdf(datos):
+    """
+    Texto de cada página de un PDF simple (los que generan reportlab y EscritorPDF),
+    en el orden de /Kids: por página, una lista de (fuente, tamaño, x, y, texto).
+    """
+    objetos = dict(re.findall(rb'(?<![\d])(\d+) 0 obj\s*(.*?)\s*endobj', datos, re.S))
+    fuentes = {numero: fuente.decode() for numero, cuerpo in objetos.items()
+               for fuente in re.findall(rb'/BaseFont /([\w-]+)', cuerpo)}
+    recursos = {nombre.decode(): fuentes[numero]
+                for nombre, numero in re.findall(rb'/(F\d+) (\d+) 0 R', datos) if numero in fuentes}
+    (kids,) = re.findall(rb'/Kids \[([^\]]*)\]', datos)
+    paginas = []
+    for pagina in re.findall(rb'(\d+) 0 R', kids):
+        (contenido,) = re.findall(rb'/Contents (\d+) 0 R', objetos[pagina])
+        cabecera, flujo = re.match(rb'<<(.*?)>>\s*stream\r?\n(.*?)\r?\n?endstream', objetos[contenido], re.S).groups()
+        if b'ASCII85Decode' in cabecera:
+            flujo = base64.a85decode(b'<~' + flujo.strip().removeprefix(b'<~'), adobe=True)
+        lineas = []
+        for op in re.finditer(r'/(F\d+) ([\d.]+) Tf|([\d.-]+) ([\d.-]+) (?:Td|Tm)|\(((?:\\.|[^\\)])*)\) Tj',
+                              zlib.decompress(flujo).decode('cp1252')):
+            if op.group(1):
+                fuente, tamano = recursos[op.group(1)], float(op.group(2))
+            elif op.group(3):
+                x, y = float(op.group(3)), float(op.group(4))
+            else:
+                # Escapes de cadena de PDF: octales (reportlab) o de un carácter
+                texto = re.sub(r'\\([0-7]{1,3}|.)', lambda m: bytes([int(m.group(1), 8)]).decode('cp1252')
+                               if m.group(1).isdigit() else m.group(1), op.group(5))
+                lineas.append((fuente, tamano, x, y, texto))
+        paginas.append(lineas)
+    return paginas
+
+
+class PDFLoteTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+            self.plantilla = compilar_plantilla(json.load(f))
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def test_mismas_lineas_que_el_ticket_individual(self):
+        valores = [valores_ticket(*fila[:4], PRODUCTOS.get(fila[3], ''), *fila[4:]) for fila in FILAS]
+        valores[0]['nombre_producto'] = 'Café (molido) \\ "especial" ñandú'
+        destino = os.path.join(self.carpeta, 'lote.pdf')
+        self.assertEqual(escribir_pdf_lote(self.plantilla, [valores[:2], valores[2:]], destino, copias=2), 10)
+        with open(destino, 'rb') as f:
+            lote = lineas_pdf(f.read())
+        individual = lineas_pdf(self.plantilla.pdf(valores, copias=2))
+        self.assertEqual(len(lote), 10)
+        self.assertEqual(len(individual), 10)
+        for pagina_lote, pagina_individual in zip(lote, individual):
+            # Misma fuente, tamaño y texto; la posición difiere solo en los decimales escritos
+            self.assertEqual([(f, t, texto) for f, t, _, _, texto in pagina_lote],
+                             [(f, t, texto) for f, t, _, _, texto in pagina_individual])
+            for (_, _, x1, y1, _), (_, _, x2, y2, _) in zip(pagina_lote, pagina_individual):
+                self.assertAlmostEqual(x1, x2, delta=0.001)
+                self.assertAlmostEqual(y1, y2, delta=0.001)
+        self.assertEqual(lote[0][0][:2], ('Helvetica-Bold', 14.0))
+        self.assertEqual(lote[0][4][4], 'Nombre Producto: Café (molido) \\ "especial" ñandú')
+        self.assertEqual(lote[1], lote[0])  # Copia
+        self.assertEqual(lote[2][2][4], 'Operario: José Núñez')
+
+
+class LotesDeRegistrosTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.ruta_db = os.path.join(self.carpeta, 'bascula.db')
+        self.repositorio = RepositorioRegistros(self.ruta_db)
+        self.repositorio.insertar_lote(FILAS)
+
+    def tearDown(self):
+        self.repositorio.cerrar()
+        shutil.rmtree(self.carpeta)
+
+    def valores(self, **filtros):
+        lotes = list(lotes_de_registros(self.repositorio, filtros, PRODUCTOS, tamano_lote=2))
+        self.assertTrue(all(0 < len(lote) <= 2 for lote in lotes))
+        return [v for lote in lotes for v in lote]
+
+    def test_filtros_de_la_ventana_de_historial(self):
+        filtros = {'desde': '2025-06-05 00:00:00', 'hasta': '2025-06-05 23:59:59'}
+        self.assertEqual([v['fecha'] for v in self.valores(**filtros)],
+                         ['2025-06-05 08:00:00', '2025-06-05 09:30:00', '2025-06-05 10:00:00'])
+        self.assertEqual([v['peso'] for v in self.valores(cedula='80706050', producto='02', desde=None)], ['3.10'])
+        self.assertEqual(len(self.valores(cedula=None, producto=None)), len(FILAS))
+
+    def test_nombre_de_producto(self):
+        valores = self.valores()
+        self.assertEqual(valores[1], valores_ticket(*FILAS[1][:4], 'Cafetería', *FILAS[1][4:]))
+        self.assertEqual(valores[-1]['nombre_producto'], '')  # Producto que ya no está en el maestro
+
+
+class ReimpresionWorkerTest(unittest.TestCase):
+    """run() se llama directo: las señales llegan en el mismo hilo."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.ruta_db = os.path.join(self.carpeta, 'bascula.db')
+        repositorio = RepositorioRegistros(self.ruta_db)
+        repositorio.insertar_lote(FILAS)
+        repositorio.cerrar()
+        with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+            self.plantilla = compilar_plantilla(json.load(f))
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def ejecutar(self, worker):
+        eventos = []
+        worker.progreso.connect(lambda hechos, total: eventos.append(('progreso', hechos, total)))
+        worker.terminado.connect(lambda cantidad, destino: eventos.append(('terminado', cantidad, destino)))
+        worker.error.connect(lambda mensaje: eventos.append(('error', mensaje)))
+        worker.run()
+        return eventos
+
+    def test_pdf(self):
+        destino = os.path.join(self.carpeta, 'reimpresion.pdf')
+        worker = ReimpresionWorker(self.ruta_db, {'cedula': '80706050'}, self.plantilla, PRODUCTOS,
+                                   destino=destino, copias=3, tamano_lote=2)
+        self.assertEqual(self.ejecutar(worker), [('progreso', 2, 3), ('progreso', 3, 3), ('terminado', 9, destino)])
+        with open(destino, 'rb') as f:
+            self.assertEqual(len(lineas_pdf(f.read())), 9)
+
+    def test_tspl_cierra_el_transporte(self):
+        spool = os.path.join(self.carpeta, 'spool') + os.sep
+        transporte = TransporteArchivo(spool)
+        worker = ReimpresionWorker(self.ruta_db, {'producto': '01'}, self.plantilla, PRODUCTOS,
+                                   transporte=transporte, copias=2)
+        self.assertEqual(self.ejecutar(worker)[-1], ('terminado', 4, spool))
+        (archivo,) = os.listdir(spool)
+        with open(os.path.join(spool, archivo), 'rb') as f:
+            trabajo = f.read()
+        self.assertEqual(trabajo.count(b'SIZE '), 1)
+        self.assertEqual(re.findall(rb'PRINT 1,(\d+)', trabajo), [b'2', b'2'])
+        self.assertIn('Cafetería'.encode('cp850'), trabajo)
+        with mock.patch.object(transporte, 'cerrar') as cerrar:
+            worker.run()
+        cerrar.assert_called_once()
+
+    def test_sin_registros(self):
+        worker = ReimpresionWorker(self.ruta_db, {'producto': 'NO-EXISTE'}, self.plantilla, PRODUCTOS,
+                                   destino=os.path.join(self.carpeta, 'vacio.pdf'))
+        self.assertEqual(self.ejecutar(worker), [('error', "No hay registros que cumplan los filtros")])
+        self.assertEqual(os.listdir(self.carpeta), ['bascula.db'])
+
+    def test_cancelada(self):
+        destino = os.path.join(self.carpeta, 'cancelada.pdf')
+        worker = ReimpresionWorker(self.ruta_db, {}, self.plantilla, PRODUCTOS, destino=destino, tamano_lote=2)
+        worker.progreso.connect(lambda hechos, total: worker.cancelar())
+        self.assertEqual(self.ejecutar(worker), [('progreso', 2, 5), ('error', "Reimpresión cancelada")])
+        self.assertFalse(os.path.exists(destino))
+        self.assertFalse(os.path.exists(destino + '.tmp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
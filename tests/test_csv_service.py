@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from core.core_panel_admin.worker.csv_service import CSVService, SnapshotCSV
+
+
+class SnapshotCSVTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.carpeta, 'operarios.csv')
+        self.directorio = mock.patch.object(SnapshotCSV, 'DIRECTORIO', os.path.join(self.carpeta, 'cache'))
+        self.directorio.start()
+        with open(self.ruta, 'w', encoding='utf-8', newline='') as f:
+            f.write('﻿María Peña ,1020304050\r\nJosé Núñez,1133774215\r\n')
+
+    def tearDown(self):
+        self.directorio.stop()
+        shutil.rmtree(self.carpeta)
+
+    def test_filas_normalizadas_y_snapshot_vigente(self):
+        filas = CSVService.leer_csv(self.ruta)
+        self.assertEqual(filas, [['María Peña', '1020304050'], ['José Núñez', '1133774215']])
+        self.assertEqual(SnapshotCSV.cargar(self.ruta), filas)
+
+    def test_archivo_modificado_durante_la_lectura(self):
+        normalizar = SnapshotCSV.normalizar_filas
+
+        def normalizar_y_agregar(filas):
+            filas = normalizar(filas)
+            with open(self.ruta, 'a', encoding='utf-8') as f:
+                f.write('Ana Gómez,1000000001\r\n')  # Otro proceso guarda mientras se leía
+            return filas
+
+        with mock.patch.object(SnapshotCSV, 'normalizar_filas', staticmethod(normalizar_y_agregar)):
+            self.assertEqual(len(CSVService.leer_csv(self.ruta)), 2)
+        # El snapshot de la lectura vieja no se sirve como vigente
+        self.assertIsNone(SnapshotCSV.cargar(self.ruta))
+        self.assertEqual(len(CSVService.leer_csv(self.ruta)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
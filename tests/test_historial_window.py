@@ -0,0 +1,68 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtWidgets import QApplication, QFileDialog, QMessageBox
+from gui.historial_window import HistorialWindow
+
+ENCABEZADOS = 'FechaHora,Operario,Cédula,Producto,Cantidad,Peso\r\n'
+
+
+class ExportarReporteTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        with mock.patch.object(HistorialWindow, 'cargar_registros'):
+            self.ventana = HistorialWindow()
+        self.ventana.csv_file = os.path.join(self.carpeta, 'Datos_bascula.csv')
+        self.ventana.db_file = os.path.join(self.carpeta, 'bascula.db')
+        self.ventana.operarios_file = os.path.join(self.carpeta, 'operarios.csv')
+        self.ventana.productos_file = os.path.join(self.carpeta, 'productos.csv')
+        with open(self.ventana.csv_file, 'w', encoding='utf-8', newline='') as f:
+            f.write(ENCABEZADOS + '2025-06-05 02:10:00,Ana,1,PZ-01,1,2.50\r\n'
+                    '2025-06-05 09:00:00,Ana,1,PZ-01,1,3.50\r\n2025-06-06 09:00:00,Luis,2,PZ-01,1,4.00\r\n')
+        for ruta in (self.ventana.operarios_file, self.ventana.productos_file):
+            open(ruta, 'w').close()
+        self.ventana.cargar_registros()
+
+    def tearDown(self):
+        self.ventana.close()
+        shutil.rmtree(self.carpeta)
+
+    def exportar(self, texto_reporte):
+        destino = os.path.join(self.carpeta, 'reporte.csv')
+        self.ventana.cmb_reporte.setCurrentText(texto_reporte)
+        with mock.patch.object(QFileDialog, 'getSaveFileName', return_value=(destino, '')), \
+                mock.patch.object(QMessageBox, 'information') as informar:
+            self.ventana.exportar_reporte()
+        informar.assert_called_once()
+        with open(destino, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    def test_reporte_por_dia_de_calendario(self):
+        filas = self.exportar("Por día")
+        self.assertEqual([f[:3] for f in filas[1:]], [['2025-06-05', '2', '2.0'], ['2025-06-06', '1', '1.0']])
+
+    def test_reporte_respeta_los_filtros(self):
+        self.ventana.cmb_operario.addItem("Luis", '2')
+        self.ventana.cmb_operario.setCurrentIndex(self.ventana.cmb_operario.count() - 1)
+        filas = self.exportar("Por operario")
+        self.assertEqual([f[:2] for f in filas[1:]], [['Luis (2)', '1']])
+
+    def test_cerrar_libera_el_servicio(self):
+        self.exportar("Por día operativo y turno")
+        servicio = self.ventana.servicio_reportes
+        self.ventana.close()
+        self.assertIsNone(self.ventana.servicio_reportes)
+        with self.assertRaises(Exception):
+            servicio.repositorio.conexion.execute("SELECT 1")
+
+
+if __name__ == '__main__':
+    unittest.main()
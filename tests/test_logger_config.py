@@ -0,0 +1,189 @@
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from unittest import mock
+from utils import logger_config
+from utils.logger_config import ManejadorRotativo, ManejadorCola, setup_logger, detener_logging
+
+
+class Fecha(date):
+    """Reemplaza `date` del módulo para fijar el día en que arranca el manejador."""
+    hoy = date(2025, 6, 5)
+
+    @classmethod
+    def today(cls):
+        return cls.hoy
+
+
+def registro(mensaje, momento='2025-06-05 10:00:00', nivel=logging.INFO, args=None):
+    record = logging.LogRecord('bascula', nivel, __file__, 1, mensaje, args, None)
+    record.created = datetime.fromisoformat(momento).timestamp()
+    return record
+
+
+def leer(ruta):
+    abrir = gzip.open if ruta.endswith('.gz') else open
+    with abrir(ruta, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+class ManejadorRotativoTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        fecha = mock.patch.object(logger_config, 'date', Fecha)
+        fecha.start()
+        self.addCleanup(fecha.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def manejador(self, **opciones):
+        manejador = ManejadorRotativo(self.carpeta, 'bascula', **opciones)
+        manejador.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(manejador.close)
+        return manejador
+
+    def archivos(self):
+        return sorted(os.listdir(self.carpeta))
+
+    def test_rota_al_cambiar_el_dia(self):
+        manejador = self.manejador()
+        manejador.emit(registro("lunes 1"))
+        manejador.emit(registro("lunes 2", '2025-06-05 23:59:59'))
+        manejador.emit(registro("martes", '2025-06-06 00:00:01'))
+        manejador.flush()
+        self.assertEqual(self.archivos(), ['bascula_20250605.1.log.gz', 'bascula_20250606.log'])
+        self.assertEqual(leer(os.path.join(self.carpeta, 'bascula_20250605.1.log.gz')), "lunes 1\nlunes 2\n")
+        self.assertEqual(leer(os.path.join(self.carpeta, 'bascula_20250606.log')), "martes\n")
+        self.assertEqual(manejador.dia, date(2025, 6, 6))
+
+    def test_rota_por_tamano_en_partes_numeradas(self):
+        manejador = self.manejador(max_bytes=25)
+        for i in range(7):
+            manejador.emit(registro(f"registro numero {i}"))  # 18 bytes por línea
+        manejador.flush()
+        self.assertEqual(self.archivos(), ['bascula_20250605.1.log.gz', 'bascula_20250605.2.log.gz',
+                                           'bascula_20250605.3.log.gz', 'bascula_20250605.log'])
+        partes = [leer(os.path.join(self.carpeta, nombre)) for nombre in self.archivos()]
+        self.assertEqual(partes, ["registro numero 0\nregistro numero 1\n", "registro numero 2\nregistro numero 3\n",
+                                  "registro numero 4\nregistro numero 5\n", "registro numero 6\n"])
+
+    def test_sin_compresion(self):
+        manejador = self.manejador(max_bytes=10, comprimir=False)
+        manejador.emit(registro("primera parte"))
+        manejador.emit(registro("segunda"))
+        self.assertEqual(self.archivos(), ['bascula_20250605.1.log', 'bascula_20250605.log'])
+        self.assertEqual(leer(os.path.join(self.carpeta, 'bascula_20250605.1.log')), "primera parte\n")
+
+    def test_archiva_pendientes_y_purga_los_vencidos(self):
+        contenido = {
+            'bascula_20250504.log.gz': '',        # 32 días: se borra
+            'bascula_20250505.2.log.gz': '',      # 31 días: se borra
+            'bascula_20250506.1.log.gz': '',      # 30 días: se conserva
+            'bascula_20250604.log': 'ayer\n',     # Log de ayer que quedó abierto
+            'bascula_20250604.1.log': 'parte\n',  # Parte rotada sin comprimir (compresión interrumpida)
+            'otro_20250101.log': 'ajeno\n',       # No es de este prefijo
+        }
+        for nombre, texto in contenido.items():
+            abrir = gzip.open if nombre.endswith('.gz') else open
+            with abrir(os.path.join(self.carpeta, nombre), 'wt', encoding='utf-8') as f:
+                f.write(texto)
+        manejador = self.manejador(dias_retencion=30)
+        self.assertEqual(len(self.archivos()), len(contenido))  # Nada cambia hasta el primer registro
+        manejador.emit(registro("hoy"))
+        manejador.flush()
+        self.assertEqual(self.archivos(), ['bascula_20250506.1.log.gz', 'bascula_20250604.1.log.gz',
+                                           'bascula_20250604.2.log.gz', 'bascula_20250605.log',
+                                           'otro_20250101.log'])
+        self.assertEqual(leer(os.path.join(self.carpeta, 'bascula_20250604.1.log.gz')), "parte\n")
+        self.assertEqual(leer(os.path.join(self.carpeta, 'bascula_20250604.2.log.gz')), "ayer\n")
+
+    def test_purga_al_cambiar_el_dia(self):
+        manejador = self.manejador(dias_retencion=2)
+        manejador.emit(registro("dia 5"))
+        manejador.emit(registro("dia 6", '2025-06-06 08:00:00'))
+        manejador.emit(registro("dia 8", '2025-06-08 08:00:00'))
+        manejador.flush()
+        # Al llegar al día 8 se borran los anteriores al día 6
+        self.assertEqual(self.archivos(), ['bascula_20250606.1.log.gz', 'bascula_20250608.log'])
+
+    def test_archivo_vacio_no_deja_parte(self):
+        manejador = self.manejador()
+        open(os.path.join(self.carpeta, 'bascula_20250604.log'), 'w').close()
+        manejador.emit(registro("hoy"))
+        self.assertEqual(self.archivos(), ['bascula_20250605.log'])
+
+
+class ManejadorColaTest(unittest.TestCase):
+    def test_formatea_el_mensaje_sin_tocar_el_registro_original(self):
+        cola = []
+        manejador = ManejadorCola(mock.Mock(put_nowait=cola.append))
+        original = registro("peso %s Kg en %s", args=('12.50', 'COM3'))
+        manejador.emit(original)
+        (encolado,) = cola
+        self.assertEqual((encolado.msg, encolado.args), ("peso 12.50 Kg en COM3", None))
+        self.assertEqual((original.msg, original.args), ("peso %s Kg en %s", ('12.50', 'COM3')))
+        sin_args = registro("sin argumentos")
+        manejador.emit(sin_args)
+        self.assertIs(cola[-1], sin_args)
+
+
+class ConfiguracionTest(unittest.TestCase):
+    """setup_logger() con un logging_config.json propio; se restaura el logging global al terminar."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.config = os.path.join(self.carpeta, 'logging_config.json')
+        self.logs = os.path.join(self.carpeta, 'logs')
+        raiz, serial = logging.getLogger('bascula'), logging.getLogger('bascula.serial')
+        estado = (list(raiz.handlers), raiz.level, serial.level)
+
+        def restaurar():
+            raiz.handlers[:] = estado[0]
+            raiz.setLevel(estado[1])
+            serial.setLevel(estado[2])
+        self.addCleanup(restaurar)
+        for nombre, valor in (('ARCHIVO_CONFIG', self.config), ('CARPETA_LOGS', self.logs),
+                              ('_listener', None), ('_cola', None)):
+            parche = mock.patch.object(logger_config, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.addCleanup(detener_logging)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def test_niveles_por_logger(self):
+        with open(self.config, 'w', encoding='utf-8') as f:
+            json.dump({'nivel': 'WARNING', 'niveles': {'serial': 'DEBUG'}, 'consola': False}, f)
+        logger = setup_logger()
+        serial = setup_logger('serial')
+        self.assertEqual((logger.name, serial.name), ('bascula', 'bascula.serial'))
+        self.assertEqual((logger.level, serial.level), (logging.WARNING, logging.DEBUG))
+        self.assertEqual(logger_config._listener.handlers[0].max_bytes, 10 * 2 ** 20)
+        logger.info("no se escribe")
+        logger.warning("advertencia")
+        serial.debug("trama %s", 'ST,GS,+0012.34kg')
+        detener_logging()
+        (archivo,) = os.listdir(self.logs)
+        self.assertEqual(archivo, f"bascula_{date.today().strftime('%Y%m%d')}.log")
+        with open(os.path.join(self.logs, archivo), encoding='utf-8') as f:
+            lineas = [linea.split(' - ', 1)[1] for linea in f.read().splitlines()]
+        self.assertEqual(lineas, ["WARNING - advertencia", "DEBUG - trama ST,GS,+0012.34kg"])
+
+    def test_config_invalida_usa_la_de_por_defecto(self):
+        with open(self.config, 'w', encoding='utf-8') as f:
+            f.write('{"nivel": ')
+        with mock.patch('sys.stderr') as stderr:
+            logger = setup_logger()
+        self.assertIn("No se pudo leer", ''.join(c.args[0] for c in stderr.write.call_args_list))
+        self.assertEqual(logger.level, logging.INFO)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import random
+import shutil
+import tempfile
+import unicodedata
+import unittest
+from unittest import mock
+from core.core_panel_admin.logic_operarios import (RegistroOperarios, LogicOperarios,
+                                                   CONFLICTO_NOMBRE, CONFLICTO_CEDULA)
+from core.core_panel_admin.worker.csv_service import CSVService, SnapshotCSV
+
+CANTIDAD = 100_000
+
+
+def generar_operarios(cantidad, semilla=3):
+    azar = random.Random(semilla)
+    cedulas = azar.sample(range(10_000_000, 1_999_999_999), cantidad)
+    return [[f"Operario Peña {i}", str(c)] for i, c in enumerate(cedulas)]
+
+
+class RegistroOperariosTest(unittest.TestCase):
+    """Registro con 100k operarios: índices en ambos sentidos siempre consistentes."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.filas = generar_operarios(CANTIDAD)
+        cls.muestra = [tuple(fila) for fila in random.Random(5).sample(cls.filas, 1000)]
+
+    def setUp(self):
+        self.registro = RegistroOperarios(self.filas)
+
+    def test_carga_y_busquedas_en_ambos_sentidos(self):
+        self.assertEqual(len(self.registro), CANTIDAD)
+        self.assertEqual(self.registro.nombres(), [nombre for nombre, _ in self.filas])
+        for nombre, cedula in self.filas:
+            self.assertEqual(self.registro.cedula_de(nombre), cedula)
+            self.assertEqual(self.registro.nombre_de(cedula), nombre)
+        self.assertIsNone(self.registro.cedula_de("No existe"))
+        self.assertIsNone(self.registro.nombre_de("1"))
+
+    def test_conflictos(self):
+        for i, (nombre, cedula) in enumerate(self.muestra):
+            self.assertEqual(self.registro.conflicto(f"Nuevo {i}", cedula), CONFLICTO_CEDULA)
+            self.assertEqual(self.registro.conflicto(nombre, cedula + '0'), CONFLICTO_NOMBRE)
+            self.assertIsNone(self.registro.conflicto(nombre, cedula))
+        nombre, cedula = self.muestra[0]
+        with self.assertRaises(ValueError):
+            self.registro.agregar("Nuevo", cedula)
+        self.assertEqual(len(self.registro), CANTIDAD)
+
+    def test_quitar_y_agregar_mantienen_los_indices(self):
+        for nombre, cedula in self.muestra:
+            self.assertEqual(self.registro.quitar(nombre), cedula)
+            self.assertIsNone(self.registro.nombre_de(cedula))
+        self.assertEqual(len(self.registro), CANTIDAD - len(self.muestra))
+        # La cédula liberada se puede asignar a otro operario
+        nombre, cedula = self.muestra[0]
+        self.assertTrue(self.registro.agregar("Reemplazo", cedula))
+        self.registro.quitar("Reemplazo")
+        for nombre, cedula in self.muestra:
+            self.assertTrue(self.registro.agregar(nombre, cedula))
+        self.assertFalse(self.registro.agregar(*self.muestra[0]))
+        self.assertEqual(len(self.registro), len(self.registro._por_cedula))
+        self.assertEqual(sorted(self.registro.filas()), sorted(self.filas))
+
+    def test_cargar_omite_conflictos_o_los_rechaza_en_estricto(self):
+        nombre, cedula = self.filas[10]
+        filas = self.filas + [["Otro", cedula], [nombre, "1"], ["Sin cédula"]]
+        omitidas = self.registro.cargar(filas)
+        self.assertEqual(omitidas, [["Otro", cedula], [nombre, "1"]])
+        self.assertEqual(len(self.registro), CANTIDAD)
+        with self.assertRaises(ValueError):
+            RegistroOperarios().cargar(filas, estricto=True)
+
+
+class ValidarOperariosTest(unittest.TestCase):
+    """Validación del panel de administración sobre filas ya normalizadas."""
+
+    def setUp(self):
+        self.filas = generar_operarios(CANTIDAD)
+
+    def test_filas_validas(self):
+        self.assertEqual(len(LogicOperarios.validar_cedulas_unicas(self.filas)), CANTIDAD)
+
+    def test_duplicados_y_cedulas_no_numericas(self):
+        nombre, cedula = self.filas[-1]
+        for extra in (["Otro", cedula], [nombre, "1"], ["Otro", "12a4"]):
+            with self.assertRaises(ValueError):
+                LogicOperarios.validar_cedulas_unicas(self.filas + [extra])
+
+    def test_variantes_del_mismo_nombre_son_duplicados(self):
+        # "María " (espacio final) y "María" en NFD se ven iguales en la tabla
+        filas = self.filas + [["María Peña ", "1"], [unicodedata.normalize('NFD', "María Peña"), "2"]]
+        LogicOperarios.validar_cedulas_unicas(filas)  # Sin normalizar pasan como operarios distintos
+        with self.assertRaisesRegex(ValueError, "María Peña"):
+            LogicOperarios.validar_cedulas_unicas(SnapshotCSV.normalizar_filas(filas))
+
+    def test_guardar_y_releer(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta)
+        with mock.patch.object(SnapshotCSV, 'DIRECTORIO', os.path.join(carpeta, 'cache')):
+            ruta = os.path.join(carpeta, 'operarios.csv')
+            filas = SnapshotCSV.normalizar_filas(self.filas + [["José Núñez ", "  1133774215"]])
+            LogicOperarios.guardar_operarios(ruta, filas)
+            registro = RegistroOperarios(CSVService.leer_csv(ruta))
+        self.assertEqual(len(registro), CANTIDAD + 1)
+        self.assertEqual(registro.cedula_de("José Núñez"), "1133774215")
+        self.assertEqual(registro.filas(), filas)
+
+
+if __name__ == '__main__':
+    unittest.main()
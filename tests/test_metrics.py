@@ -0,0 +1,204 @@
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from utils import metrics
+from utils.metrics import LIMITES_LATENCIA_NS, Histograma, RegistroMetricas, cronometrado
+
+
+class HistogramaTest(unittest.TestCase):
+    def test_diez_limites_por_decada(self):
+        self.assertEqual(LIMITES_LATENCIA_NS[0], 1_000)
+        self.assertEqual(LIMITES_LATENCIA_NS[-1], 80 * 10 ** 9)
+        self.assertEqual(len(LIMITES_LATENCIA_NS), 80)
+        self.assertEqual(list(LIMITES_LATENCIA_NS), sorted(set(LIMITES_LATENCIA_NS)))
+        for decada in range(3, 11):
+            with self.subTest(decada=decada):
+                en_decada = [l for l in LIMITES_LATENCIA_NS if 10 ** decada <= l < 10 ** (decada + 1)]
+                self.assertEqual(len(en_decada), 10)
+        # Ninguna cubeta es más de un tercio más ancha que la anterior
+        self.assertLessEqual(max(b / a for a, b in zip(LIMITES_LATENCIA_NS, LIMITES_LATENCIA_NS[1:])), 4 / 3 + 1e-9)
+
+    def test_cubeta_de_cada_valor(self):
+        histograma = Histograma('x')
+        casos = [(0, 0), (999, 0), (1_000, 0), (1_001, 1), (1_200, 1), (1_201, 2),
+                 (10_000, 10), (80 * 10 ** 9, 79), (80 * 10 ** 9 + 1, 80)]
+        for valor, cubeta in casos:
+            histograma.observar(valor)
+        esperadas = [0] * 81
+        for _, cubeta in casos:
+            esperadas[cubeta] += 1
+        self.assertEqual(list(histograma.cubetas), esperadas)
+        self.assertEqual((histograma.total, histograma.maximo), (len(casos), 80 * 10 ** 9 + 1))
+
+    def test_percentiles_dentro_del_ancho_de_la_cubeta(self):
+        azar = random.Random(5)
+        muestras = [int(azar.lognormvariate(14.5, 0.8)) for _ in range(50_000)]
+        histograma = Histograma('x')
+        for muestra in muestras:
+            histograma.observar(muestra)
+        ordenadas = sorted(muestras)
+        for p in (1, 10, 50, 90, 95, 99, 99.9):
+            with self.subTest(p=p):
+                exacto = ordenadas[math.ceil(len(ordenadas) * p / 100) - 1]
+                estimado = histograma.percentil(p)
+                self.assertLess(abs(math.log(estimado / exacto)), math.log(4 / 3))
+        self.assertEqual(histograma.percentil(100), max(muestras))
+        # p0 es el límite inferior de la primera cubeta ocupada
+        self.assertLessEqual(histograma.percentil(0), min(muestras))
+        self.assertLess(min(muestras) / histograma.percentil(0), 4 / 3)
+
+    def test_percentil_interpolado_y_acotado_por_el_maximo(self):
+        histograma = Histograma('x')
+        self.assertEqual(histograma.percentil(50), 0)
+        for _ in range(4):
+            histograma.observar(1_100)  # Cubeta (1000, 1200]
+        self.assertEqual(histograma.percentil(50), 1_100)  # 1100 interpolado, pero no supera el máximo
+        self.assertEqual(histograma.percentil(25), 1_050)
+        desborde = Histograma('y')
+        desborde.observar(100 * 10 ** 9)
+        # La cubeta de desborde va del último límite (80 s) al máximo observado
+        self.assertEqual(desborde.percentil(50), 90 * 10 ** 9)
+        self.assertEqual(desborde.percentil(100), 100 * 10 ** 9)
+
+    def test_resumen_en_microsegundos(self):
+        histograma = Histograma('x')
+        for valor in (2_000, 4_000, 6_000):
+            histograma.observar(valor)
+        resumen = histograma.resumen(con_cubetas=True)
+        self.assertEqual({clave: resumen[clave] for clave in ('n', 'media_us', 'max_us')},
+                         {'n': 3, 'media_us': 4.0, 'max_us': 6.0})
+        self.assertEqual(resumen['cubetas'], {3: 1, 6: 1, 8: 1})
+        self.assertNotIn('cubetas', histograma.resumen())
+        self.assertEqual(Histograma('vacio').resumen(),
+                         {'n': 0, 'media_us': 0, 'max_us': 0.0, 'p50_us': 0.0, 'p95_us': 0.0, 'p99_us': 0.0})
+
+    def test_medir_y_cronometrado(self):
+        registro = RegistroMetricas(estacion='prueba')
+        histograma = registro.histograma('bloque')
+        with mock.patch.object(metrics.time, 'perf_counter_ns', side_effect=[1_000, 6_000]):
+            with histograma.medir():
+                pass
+        self.assertEqual((histograma.total, histograma.suma), (1, 5_000))
+
+        with mock.patch.object(metrics, '_registro', registro):
+            @cronometrado('funcion')
+            def funcion(falla):
+                if falla:
+                    raise ValueError("falla")
+                return 'ok'
+        self.assertEqual(funcion(False), 'ok')
+        with self.assertRaises(ValueError):
+            funcion(True)
+        self.assertEqual(registro.histograma('funcion').total, 2)  # También cuenta la llamada que falló
+
+    def test_hilos_concurrentes_no_pierden_observaciones(self):
+        histograma = Histograma('x')
+        registro = RegistroMetricas(estacion='prueba')
+        contador = registro.contador('c')
+        intervalo = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Fuerza cambios de hilo a mitad de cada actualización
+        try:
+            def observar(semilla):
+                for i in range(20_000):
+                    histograma.observar(1_000 + semilla + i)
+                    contador.incrementar()
+            hilos = [threading.Thread(target=observar, args=(i,)) for i in range(6)]
+            for hilo in hilos:
+                hilo.start()
+            while any(hilo.is_alive() for hilo in hilos):
+                cubetas, total, _, _ = histograma.copia()
+                self.assertEqual(sum(cubetas), total)  # La copia es coherente aunque se siga escribiendo
+            for hilo in hilos:
+                hilo.join()
+        finally:
+            sys.setswitchinterval(intervalo)
+        self.assertEqual(histograma.total, 120_000)
+        self.assertEqual(sum(histograma.cubetas), 120_000)
+        self.assertEqual(contador.valor, 120_000)
+
+
+class RegistroMetricasTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.carpeta, 'metricas', 'metricas_prueba.jsonl')
+        self.registro = RegistroMetricas(estacion='prueba')
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def lineas(self):
+        with open(self.ruta, encoding='utf-8') as f:
+            return [json.loads(linea) for linea in f]
+
+    def test_mismo_nombre_misma_metrica(self):
+        self.assertIs(self.registro.histograma('a'), self.registro.histograma('a'))
+        self.assertIs(self.registro.contador('a'), self.registro.contador('a'))
+        self.assertIsNot(self.registro.contador('a'), self.registro.indicador('a'))
+
+    def test_volcado_jsonl(self):
+        self.registro.histograma('guardar_registro').observar(2_000)
+        self.registro.histograma('guardar_registro').observar(2_000_000)
+        self.registro.contador('registros_guardados').incrementar(2)
+        self.registro.indicador('lecturas_descartadas').establecer(7)
+        self.assertTrue(self.registro.volcar(self.ruta))
+        self.assertFalse(self.registro.volcar(self.ruta))  # Sin cambios no escribe
+        self.registro.contador('registros_guardados').incrementar()
+        self.assertTrue(self.registro.volcar(self.ruta))
+
+        primera, segunda = self.lineas()
+        self.assertEqual(primera['estacion'], 'prueba')
+        self.assertEqual(primera['limites_us'], [limite / 1000 for limite in LIMITES_LATENCIA_NS])
+        self.assertNotIn('limites_us', segunda)
+        self.assertEqual(primera['contadores'], {'registros_guardados': 2})
+        self.assertEqual(segunda['contadores'], {'registros_guardados': 3})
+        self.assertEqual(segunda['indicadores'], {'lecturas_descartadas': 7})
+        histograma = segunda['histogramas']['guardar_registro']
+        self.assertEqual(histograma['n'], 2)
+        self.assertEqual(histograma['max_us'], 2000.0)
+        # Las cubetas permiten recalcular los percentiles al comparar estaciones
+        self.assertEqual(histograma['cubetas'], {'3': 1, '33': 1})
+        self.assertEqual(sum(histograma['cubetas'].values()), histograma['n'])
+
+    def test_volcados_simultaneos_no_mezclan_lineas(self):
+        histograma = self.registro.histograma('x')
+        barrera = threading.Barrier(4)
+
+        def volcar(i):
+            barrera.wait()
+            for j in range(25):
+                histograma.observar(1_000 * (i + 1) + j)
+                self.registro.volcar(self.ruta)
+        hilos = [threading.Thread(target=volcar, args=(i,)) for i in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        lineas = self.lineas()
+        self.assertEqual(sum('limites_us' in linea for linea in lineas), 1)
+        self.assertEqual([linea['histogramas']['x']['n'] for linea in lineas],
+                         sorted(linea['histogramas']['x']['n'] for linea in lineas))
+        self.assertEqual(lineas[-1]['histogramas']['x']['n'], 100)
+
+    def test_volcado_periodico(self):
+        self.registro.contador('c').incrementar()
+        self.registro.iniciar_volcado(intervalo=0.01, ruta=self.ruta)
+        self.registro.iniciar_volcado(intervalo=0.01, ruta=self.ruta)  # El segundo inicio no crea otro hilo
+        for _ in range(500):
+            if os.path.exists(self.ruta):
+                break
+            threading.Event().wait(0.01)
+        self.registro.contador('c').incrementar()
+        self.registro.detener_volcado(self.ruta)  # Último volcado al detener
+        self.assertIsNone(self.registro._hilo)
+        self.assertEqual(self.lineas()[-1]['contadores'], {'c': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
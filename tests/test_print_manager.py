@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+from utils.printer_transport import WIN32
+from utils.ticket_template import PlantillaTicket
+
+# print_manager importa pywin32 al cargarse; fuera de Windows se sustituyen los módulos.
+# Sus dependencias se importan antes para que patch.dict no las descarte al salir.
+_WIN32 = {nombre: types.ModuleType(nombre) for nombre in ('win32print', 'win32api', 'win32ui', 'win32con')}
+_WIN32['pywintypes'] = types.SimpleNamespace(error=type('error', (Exception,), {}))
+with mock.patch.dict(sys.modules, _WIN32):
+    from utils import print_manager
+PrintManager = print_manager.PrintManager
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRO = ('2025-06-05 14:54:17', 'María Peña', '1020304050', 'COK70001', 'Caja corrugada', '12', '25.40')
+
+
+class TransporteFalso:
+    tipo = WIN32
+
+    def __init__(self):
+        self.trabajos = []
+
+    def enviar(self, datos, nombre_trabajo="Ticket"):
+        self.trabajos.append(datos)
+
+    def cerrar(self):
+        pass
+
+
+class PruebaConConfig(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.carpeta, 'printer_config.json')
+        with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.escribir(self.config)
+        for parche in (mock.patch.object(PrintManager, 'CONFIG_PATH', self.ruta),
+                       mock.patch.dict(PrintManager._plantillas, clear=True)):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def escribir(self, config, mtime_ns=None):
+        with open(self.ruta, 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False)
+        if mtime_ns is not None:
+            os.utime(self.ruta, ns=(mtime_ns, mtime_ns))
+
+
+class CachePlantillasTest(PruebaConConfig):
+    def setUp(self):
+        super().setUp()
+        compilar = mock.patch.object(print_manager, 'compilar_plantilla', wraps=print_manager.compilar_plantilla)
+        self.compilar = compilar.start()
+        self.addCleanup(compilar.stop)
+        self.manager = PrintManager(interactivo=False)
+
+    def test_archivo_sin_cambios_no_se_recompila(self):
+        config, plantilla = self.manager.obtener_plantilla()
+        self.assertEqual(config['Titulo'], self.config['Titulo'])
+        self.assertIs(PrintManager(interactivo=False).obtener_plantilla()[1], plantilla)  # Compartida entre instancias
+        self.assertEqual(self.compilar.call_count, 1)
+
+    def test_cambio_de_fecha_de_modificacion(self):
+        mtime = os.stat(self.ruta).st_mtime_ns
+        _, anterior = self.manager.obtener_plantilla()
+        self.escribir(dict(self.config, Titulo='*** Otro titulo ***'.ljust(len(self.config['Titulo']))), mtime + 1)
+        self.assertEqual(os.path.getsize(self.ruta), PrintManager._plantillas[self.ruta][0][1])  # Mismo tamaño
+        config, plantilla = self.manager.obtener_plantilla()
+        self.assertEqual(self.compilar.call_count, 2)
+        self.assertIsNot(plantilla, anterior)
+        self.assertIn(b'*** Otro t', plantilla.cuerpo_tspl)
+
+    def test_cambio_de_tamano_con_la_misma_fecha(self):
+        mtime = os.stat(self.ruta).st_mtime_ns
+        self.manager.obtener_plantilla()
+        self.escribir(dict(self.config, Titulo='Báscula planta 2'), mtime)  # Edición dentro del mismo tick del reloj
+        self.assertEqual(os.stat(self.ruta).st_mtime_ns, mtime)
+        config, _ = self.manager.obtener_plantilla()
+        self.assertEqual(config['Titulo'], 'Báscula planta 2')
+        self.assertEqual(self.compilar.call_count, 2)
+
+    def test_config_invalida_no_reemplaza_la_guardada(self):
+        mtime = os.stat(self.ruta).st_mtime_ns
+        self.manager.obtener_plantilla()
+        self.escribir(dict(self.config, Alto_Hoja=-1), mtime + 1)
+        for _ in range(2):  # Cada intento vuelve a leer el archivo
+            with self.assertRaises(ValueError):
+                self.manager.obtener_plantilla()
+        self.assertEqual(PrintManager._plantillas[self.ruta][1]['Alto_Hoja'], self.config['Alto_Hoja'])
+        self.escribir(self.config, mtime + 2)
+        self.assertEqual(self.manager.obtener_plantilla()[0]['Alto_Hoja'], self.config['Alto_Hoja'])
+
+
+class PrintTicketTest(PruebaConConfig):
+    def imprimir(self, impresora, copias=1):
+        self.escribir(dict(self.config, printer=impresora))
+        manager = PrintManager(impresora, interactivo=False)
+        transporte = TransporteFalso()
+        with mock.patch.object(manager, 'validate_printer_connection', return_value=(True, "")), \
+                mock.patch.object(manager, 'obtener_transporte', return_value=transporte), \
+                mock.patch.object(PlantillaTicket, 'pdf', autospec=True,
+                                  side_effect=lambda plantilla, lista, copias=1: b'%PDF-falso') as pdf, \
+                mock.patch.object(manager, '_print_to_pdf', return_value=True) as guardar:
+            resultado = manager.print_ticket(*REGISTRO, copias=copias)
+        return resultado, transporte, pdf, guardar
+
+    def test_tsc_por_el_spooler_no_genera_pdf(self):
+        resultado, transporte, pdf, _ = self.imprimir('TSC TE200', copias=2)
+        self.assertTrue(resultado)
+        pdf.assert_not_called()
+        (trabajo,) = transporte.trabajos
+        self.assertIn(b'PRINT 1,2', trabajo)
+        self.assertIn('Operario: María Peña'.encode('cp850'), trabajo)
+
+    def test_microsoft_print_to_pdf_genera_el_pdf(self):
+        resultado, transporte, pdf, guardar = self.imprimir('Microsoft Print to PDF', copias=2)
+        self.assertTrue(resultado)
+        pdf.assert_called_once()
+        self.assertEqual(pdf.call_args.args[2], 2)
+        guardar.assert_called_once_with(b'%PDF-falso')
+        self.assertEqual(transporte.trabajos, [])
+
+    def test_impresora_no_compatible(self):
+        with mock.patch.object(PrintManager, 'is_tsc_printer', return_value=False):
+            resultado, _, pdf, _ = self.imprimir('HP LaserJet')
+        self.assertFalse(resultado)
+        pdf.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
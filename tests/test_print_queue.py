@@ -0,0 +1,261 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from PyQt5.QtCore import QCoreApplication, Qt
+from utils.print_queue import (ColaImpresion, ImpresoraPrintManager, ErrorImpresion, ErrorImpresionPermanente,
+                               EN_COLA, RENDERIZANDO, ENVIADO, FALLIDO, REINTENTANDO, leer_diario)
+
+DATOS = {'fecha_hora': '2025-06-05 14:54:17', 'operario': 'María Peña', 'cedula': '1020304050',
+         'producto': 'COK70001', 'nombre_pro': 'Caja corrugada', 'cantidad': '12', 'peso': '25.40'}
+
+
+class ImpresoraFalsa:
+    """Impresora de la cola que falla las primeras `fallas` veces con `error` y anota cada envío."""
+
+    def __init__(self, fallas=0, error=ErrorImpresion("Papel agotado")):
+        self.fallas = fallas
+        self.error = error
+        self.intentos = []   # Momento (monotónico) de cada intento de envío
+        self.enviados = []   # (datos, copias) de los envíos exitosos
+        self.cerrada = False
+
+    def renderizar(self, datos, copias=1):
+        return dict(datos), copias
+
+    def enviar(self, contenido):
+        self.intentos.append(time.monotonic())
+        if len(self.intentos) <= self.fallas:
+            raise self.error
+        self.enviados.append(contenido)
+
+    def cerrar(self):
+        self.cerrada = True
+
+
+class PrintManagerFalso:
+    """Imita el resultado de PrintManager.print_ticket: True, o False con ultimo_error/error_permanente."""
+
+    def __init__(self, resultados, ultimo_pdf=None):
+        self.resultados = list(resultados)
+        self.ultimo_error = None
+        self.error_permanente = False
+        self.ultimo_pdf = ultimo_pdf
+        self.llamadas = []
+
+    def obtener_plantilla(self):
+        return {}, None
+
+    def print_ticket(self, *datos, copias=1):
+        self.llamadas.append((datos, copias))
+        resultado, self.ultimo_error, self.error_permanente = self.resultados.pop(0)
+        return resultado
+
+    def cerrar(self):
+        pass
+
+
+class Estados:
+    """Anota las señales estado_trabajo en el hilo que las emite y permite esperar por ellas."""
+
+    def __init__(self, cola):
+        self.eventos = []
+        self._condicion = threading.Condition()
+        cola.estado_trabajo.connect(self.anotar, Qt.DirectConnection)
+
+    def anotar(self, id_trabajo, estado, detalle):
+        with self._condicion:
+            self.eventos.append((id_trabajo, estado, detalle))
+            self._condicion.notify_all()
+
+    def esperar(self, estado, cantidad=1, espera=10.0):
+        with self._condicion:
+            if not self._condicion.wait_for(lambda: self.cantidad(estado) >= cantidad, espera):
+                raise AssertionError(f"No llegó el estado {estado}: {self.eventos}")
+
+    def cantidad(self, estado):
+        return sum(1 for _, e, _ in self.eventos if e == estado)
+
+    def de(self, id_trabajo):
+        return [(estado, detalle) for id_, estado, detalle in self.eventos if id_ == id_trabajo]
+
+
+class ColaImpresionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.diario = os.path.join(self.carpeta, 'data', 'cola_impresion.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def cola(self, impresora, **opciones):
+        opciones.setdefault('espera_base', 0.01)
+        cola = ColaImpresion(impresora, self.diario, **opciones)
+        self.addCleanup(cola.detener)
+        return cola, Estados(cola)
+
+    def test_trabajo_enviado(self):
+        impresora = ImpresoraFalsa()
+        cola, estados = self.cola(impresora)
+        cola.start()
+        id_trabajo = cola.encolar(DATOS, copias=3)
+        estados.esperar(ENVIADO)
+        self.assertEqual(estados.de(id_trabajo), [(EN_COLA, ''), (RENDERIZANDO, ''), (ENVIADO, '')])
+        self.assertEqual(impresora.enviados, [(DATOS, 3)])
+        self.assertEqual(cola.pendientes(), 0)
+        self.assertEqual(leer_diario(self.diario), {})
+        cola.detener()
+        self.assertTrue(impresora.cerrada)
+
+    def test_copias_invalidas(self):
+        cola, _ = self.cola(ImpresoraFalsa())
+        with self.assertRaises(ValueError):
+            cola.encolar(DATOS, copias=0)
+        self.assertEqual(cola.pendientes(), 0)
+
+    def test_reintentos_con_espera_exponencial(self):
+        impresora = ImpresoraFalsa(fallas=4)
+        cola, estados = self.cola(impresora, espera_base=0.1, espera_maxima=0.3)
+        with self.assertLogs('bascula', 'WARNING') as registros:
+            cola.start()
+            id_trabajo = cola.encolar(DATOS)
+            estados.esperar(ENVIADO)
+        self.assertEqual([estado for estado, _ in estados.de(id_trabajo)],
+                         [EN_COLA] + [RENDERIZANDO, REINTENTANDO] * 4 + [RENDERIZANDO, ENVIADO])
+        self.assertIn("Papel agotado", estados.de(id_trabajo)[2][1])
+        # 0.1, 0.2 y luego 0.4 y 0.8 recortados por espera_maxima
+        self.assertEqual([linea.split("reintento en ")[1].split(" s")[0] for linea in registros.output],
+                         ['0.1', '0.2', '0.3', '0.3'])
+        esperas = [b - a for a, b in zip(impresora.intentos, impresora.intentos[1:])]
+        for espera, minima in zip(esperas, (0.1, 0.2, 0.3, 0.3)):
+            self.assertGreaterEqual(espera, minima - 0.005)
+        self.assertEqual(len(impresora.enviados), 1)
+
+    def test_agota_los_intentos(self):
+        impresora = ImpresoraFalsa(fallas=10)
+        cola, estados = self.cola(impresora, max_intentos=3)
+        cola.start()
+        id_trabajo = cola.encolar(DATOS)
+        estados.esperar(FALLIDO)
+        self.assertEqual(len(impresora.intentos), 3)
+        self.assertEqual(estados.de(id_trabajo)[-1], (FALLIDO, "Papel agotado"))
+        self.assertEqual(estados.cantidad(REINTENTANDO), 2)
+        self.assertEqual(leer_diario(self.diario), {})
+
+    def test_error_permanente_no_se_reintenta(self):
+        impresora = ImpresoraFalsa(fallas=1, error=ErrorImpresionPermanente("Impresora no compatible"))
+        cola, estados = self.cola(impresora)
+        cola.start()
+        id_trabajo = cola.encolar(DATOS)
+        otro = cola.encolar(DATOS)
+        estados.esperar(ENVIADO)
+        self.assertEqual(estados.de(id_trabajo)[-1], (FALLIDO, "Impresora no compatible"))
+        self.assertEqual(estados.de(otro)[-1], (ENVIADO, ''))  # El siguiente trabajo sigue su curso
+        self.assertEqual(estados.cantidad(REINTENTANDO), 0)
+        self.assertEqual(len(impresora.intentos), 2)
+
+    def test_pendientes_se_retoman_desde_el_diario(self):
+        cola, _ = self.cola(ImpresoraFalsa())
+        primero = cola.encolar(DATOS, copias=2)
+        segundo = cola.encolar(dict(DATOS, peso='30.10'))
+        self.assertEqual(cola.pendientes(), 2)
+        cola.detener()  # Se cierra sin haber impreso
+        self.assertTrue(ColaImpresion.hay_pendientes(self.diario))
+        # Caída a mitad de escritura: la última línea quedó cortada
+        with open(self.diario, 'a', encoding='utf-8') as f:
+            f.write('{"op": "-", "id": "')
+
+        impresora = ImpresoraFalsa()
+        reabierta, estados = self.cola(impresora)
+        self.assertEqual(reabierta.pendientes(), 2)
+        reabierta.start()
+        estados.esperar(ENVIADO, 2)
+        self.assertEqual([id_ for id_, estado, _ in estados.eventos if estado == ENVIADO], [primero, segundo])
+        self.assertEqual(impresora.enviados, [(DATOS, 2), (dict(DATOS, peso='30.10'), 1)])
+        self.assertFalse(ColaImpresion.hay_pendientes(self.diario))
+
+    def test_intentos_hechos_sobreviven_al_reinicio(self):
+        cola, estados = self.cola(ImpresoraFalsa(fallas=10), espera_base=60.0)
+        cola.start()
+        id_trabajo = cola.encolar(DATOS)
+        estados.esperar(REINTENTANDO)
+        cola.detener()  # Se cierra esperando el reintento
+        self.assertEqual(leer_diario(self.diario)[id_trabajo].intentos, 1)
+
+        impresora = ImpresoraFalsa(fallas=10)
+        reabierta, estados = self.cola(impresora, max_intentos=2)
+        reabierta.start()
+        estados.esperar(FALLIDO)
+        self.assertEqual(len(impresora.intentos), 1)  # Solo le quedaba un intento
+        self.assertEqual(estados.de(id_trabajo), [(RENDERIZANDO, ''), (FALLIDO, "Papel agotado")])
+
+    def test_diario_compactado_al_abrir(self):
+        cola, estados = self.cola(ImpresoraFalsa())
+        cola.start()
+        for _ in range(3):
+            cola.encolar(DATOS)
+        estados.esperar(ENVIADO, 3)
+        pendiente = cola.encolar(DATOS)
+        cola.detener()
+        with open(self.diario, encoding='utf-8') as f:
+            self.assertGreater(len(f.readlines()), 1)
+        self.cola(ImpresoraFalsa())
+        with open(self.diario, encoding='utf-8') as f:
+            lineas = [json.loads(linea) for linea in f]
+        self.assertEqual([(l['op'], l['trabajo']['id']) for l in lineas], [('+', pendiente)])
+
+
+class ImpresoraPrintManagerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.diario = os.path.join(self.carpeta, 'cola_impresion.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def procesar(self, print_manager, esperado):
+        cola = ColaImpresion(ImpresoraPrintManager(print_manager), self.diario, espera_base=0.01)
+        estados = Estados(cola)
+        cola.start()
+        try:
+            id_trabajo = cola.encolar(DATOS, copias=2)
+            estados.esperar(esperado)
+        finally:
+            cola.detener()
+        return estados.de(id_trabajo)
+
+    def test_impresora_no_compatible_no_se_reintenta(self):
+        print_manager = PrintManagerFalso([(False, "La impresora 'HP LaserJet' no es compatible", True)])
+        estados = self.procesar(print_manager, FALLIDO)
+        self.assertEqual(estados[-1], (FALLIDO, "La impresora 'HP LaserJet' no es compatible"))
+        self.assertEqual(len(print_manager.llamadas), 1)
+        self.assertEqual(leer_diario(self.diario), {})
+
+    def test_fallo_transitorio_se_reintenta(self):
+        print_manager = PrintManagerFalso([(False, "Papel agotado", False), (True, None, False)])
+        estados = self.procesar(print_manager, ENVIADO)
+        self.assertIn((REINTENTANDO, "Papel agotado (reintento en 0 s)"), estados)
+        self.assertEqual(estados[-1], (ENVIADO, ''))
+        datos, copias = print_manager.llamadas[-1]
+        self.assertEqual((datos, copias), (tuple(DATOS.values()), 2))
+
+    def test_pdf_guardado_sin_dialogo_informa_la_ruta(self):
+        ruta = os.path.join('C:\\Users\\bascula\\Documents', 'ticket_20250605_145417.pdf')
+        print_manager = PrintManagerFalso([(True, None, False)], ultimo_pdf=ruta)
+        estados = self.procesar(print_manager, ENVIADO)
+        self.assertEqual(estados[-1], (ENVIADO, f"PDF guardado en {ruta}"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import QCoreApplication
+from utils import printer_registry
+from utils.printer_registry import RegistroImpresoras, BackendFalso, InfoImpresora, registro_impresoras
+
+IMPRESORAS = (InfoImpresora('Oficina Laser', 'HP Universal', 'USB001'),
+              InfoImpresora('Etiquetas', 'TSC TTP-247', 'USB002'),
+              InfoImpresora('Bodega', 'Generic / Text Only', 'IP_10.0.0.7', False, "Estado de la impresora: Sin papel"))
+
+
+class Reloj:
+    """Reemplaza time.monotonic del módulo para controlar la antigüedad de los datos."""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class RegistroImpresorasTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = BackendFalso(IMPRESORAS, predeterminada='Oficina Laser')
+        self.registro = RegistroImpresoras(self.backend, vigencia=30.0)
+        self.reloj = Reloj()
+        monotonic = mock.patch.object(printer_registry.time, 'monotonic', self.reloj)
+        monotonic.start()
+        self.addCleanup(monotonic.stop)
+        self.emisiones = []
+        self.registro.actualizado.connect(lambda: self.emisiones.append(self.reloj.ahora))
+
+    def test_primera_consulta_enumera_y_luego_usa_la_memoria(self):
+        self.assertEqual(self.registro.nombres(), ['Oficina Laser', 'Etiquetas', 'Bodega'])
+        self.registro.impresoras()
+        self.registro.obtener('Etiquetas')
+        self.assertEqual(self.backend.enumeraciones, 1)
+        self.assertEqual(self.emisiones, [1000.0])
+
+    def test_datos_vencidos_se_vuelven_a_enumerar(self):
+        self.registro.nombres()
+        self.reloj.ahora += 29
+        self.registro.nombres()
+        self.assertEqual(self.backend.enumeraciones, 1)
+        self.reloj.ahora += 2
+        self.registro.nombres()
+        self.assertEqual(self.backend.enumeraciones, 2)
+        self.assertEqual(len(self.emisiones), 2)
+
+    def test_refrescar_con_antiguedad_minima(self):
+        self.registro.refrescar()
+        self.reloj.ahora += 1.5
+        self.registro.refrescar(antiguedad_minima=2.0)  # Datos recientes: no consulta el sistema
+        self.assertEqual(self.backend.enumeraciones, 1)
+        self.reloj.ahora += 1.0
+        self.registro.refrescar(antiguedad_minima=2.0)
+        self.assertEqual(self.backend.enumeraciones, 2)
+        self.registro.refrescar()  # Sin antigüedad mínima siempre enumera
+        self.assertEqual(self.backend.enumeraciones, 3)
+        self.assertEqual(self.emisiones, [1000.0, 1002.5, 1002.5])
+
+    def test_estado(self):
+        self.assertEqual(self.registro.estado('Oficina Laser'), (True, "La impresora está lista"))
+        self.assertEqual(self.registro.estado('Bodega'), (False, "Estado de la impresora: Sin papel"))
+        self.assertEqual(self.registro.estado('Otra'), (False, "La impresora 'Otra' no está instalada"))
+        # El cambio en el sistema se ve después del refresco
+        self.backend.cambiar_estado('Oficina Laser', False, "Estado de la impresora: Atasco de papel")
+        self.assertTrue(self.registro.estado('Oficina Laser')[0])
+        self.registro.refrescar()
+        self.assertEqual(self.registro.estado('Oficina Laser'), (False, "Estado de la impresora: Atasco de papel"))
+
+    def test_es_tsc_por_nombre_o_controlador(self):
+        self.assertTrue(self.registro.es_tsc('Etiquetas'))         # Por el controlador
+        self.assertTrue(self.registro.es_tsc('TSC TE200 Planta'))  # No instalada, por el nombre
+        self.assertFalse(self.registro.es_tsc('Oficina Laser'))
+        self.assertFalse(self.registro.es_tsc(None))
+
+    def test_predeterminada(self):
+        self.assertEqual(self.registro.predeterminada(), 'Oficina Laser')
+        sin_predeterminada = RegistroImpresoras(BackendFalso(IMPRESORAS))
+        self.assertEqual(sin_predeterminada.predeterminada(), 'Oficina Laser')  # La primera instalada
+        self.assertIsNone(RegistroImpresoras(BackendFalso()).predeterminada())
+
+    def test_error_del_sistema_conserva_los_datos(self):
+        self.registro.nombres()
+        with mock.patch.object(self.backend, 'enumerar', side_effect=OSError("spooler detenido")):
+            self.reloj.ahora += 60
+            self.assertEqual(len(self.registro.nombres()), 3)
+        self.assertEqual(len(self.emisiones), 1)
+        # El fallo cuenta como refresco: no se reintenta en cada consulta
+        self.reloj.ahora += 1
+        self.registro.nombres()
+        self.assertEqual(self.backend.enumeraciones, 1)
+
+    def test_hilo_de_fondo(self):
+        app = QCoreApplication.instance() or QCoreApplication([])
+        hilos = []
+        self.registro.actualizado.connect(lambda: hilos.append(threading.current_thread()))
+        self.registro.iniciar(intervalo=60.0)
+        try:
+            for _ in range(500):
+                if self.registro._momento is not None:
+                    break
+                time.sleep(0.01)
+            self.reloj.ahora += 600  # Con el hilo activo las lecturas no enumeran aunque los datos sean viejos
+            self.registro.nombres()
+            self.assertEqual(self.backend.enumeraciones, 1)
+        finally:
+            self.registro.detener()
+        # La señal emitida en el hilo de fondo llega por el bucle de eventos al hilo principal
+        self.assertEqual(hilos, [])
+        app.processEvents()
+        self.assertEqual(hilos, [threading.main_thread()])
+
+
+class RegistroCompartidoTest(unittest.TestCase):
+    def test_creado_desde_otro_hilo_queda_en_el_de_la_aplicacion(self):
+        app = QCoreApplication.instance() or QCoreApplication([])
+        creados = []
+        with mock.patch.object(printer_registry, '_registro', None), \
+                mock.patch.object(printer_registry, 'backend_del_sistema', BackendFalso):
+            hilo = threading.Thread(target=lambda: creados.append(registro_impresoras()))
+            hilo.start()
+            hilo.join()
+            self.assertIs(registro_impresoras(), creados[0])
+        self.assertIs(creados[0].thread(), app.thread())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import json
+import os
+import select
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+from utils.batch_print import ReimpresionCancelada, enviar_tspl_lote
+from utils.printer_transport import (ErrorTransporte, TransporteArchivo, TransporteCUPS, TransporteTCP,
+                                     TransporteWin32, crear_transporte)
+from utils.ticket_template import compilar_plantilla, valores_ticket
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def lotes(cantidad, tamano=10):
+    valores = [valores_ticket('2025-06-05 14:54:17', 'María Peña', '1020304050', f'COK{70000 + i}',
+                              'Caja corrugada', 12, '25.40') for i in range(cantidad)]
+    for inicio in range(0, cantidad, tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+def cancelar_en(limite):
+    def avance(hechos):
+        if hechos >= limite:
+            raise ReimpresionCancelada()
+    return avance
+
+
+class CancelacionTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+            self.plantilla = compilar_plantilla(json.load(f))
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def reimprimir(self, transporte, limite=30):
+        with self.assertRaises(ReimpresionCancelada):
+            enviar_tspl_lote(self.plantilla, lotes(200), transporte, avance=cancelar_en(limite))
+
+    def test_archivo_cancelado_no_deja_etiquetas(self):
+        ruta = os.path.join(self.carpeta, 'spool.prn')
+        transporte = TransporteArchivo(ruta)
+        transporte.enviar(b'TRABAJO ANTERIOR\n')
+        self.reimprimir(transporte)
+        transporte.cerrar()
+        with open(ruta, 'rb') as f:
+            self.assertEqual(f.read(), b'TRABAJO ANTERIOR\n')
+
+    def test_carpeta_cancelada_no_deja_archivos(self):
+        spool = os.path.join(self.carpeta, 'spool') + os.sep
+        self.reimprimir(TransporteArchivo(spool))
+        self.assertEqual(os.listdir(spool), [])
+
+    def test_archivo_completo(self):
+        ruta = os.path.join(self.carpeta, 'spool.prn')
+        transporte = TransporteArchivo(ruta)
+        etiquetas = enviar_tspl_lote(self.plantilla, lotes(25), transporte)
+        transporte.cerrar()
+        with open(ruta, 'rb') as f:
+            self.assertEqual(f.read().count(b'PRINT'), etiquetas)
+
+    @unittest.skipIf(os.name == 'nt', "usa un lp de prueba escrito en sh")
+    def test_cups_cancelado_no_entrega_el_trabajo(self):
+        # lp de prueba: como el real, entrega el trabajo solo al terminar de leer la entrada
+        entregado = os.path.join(self.carpeta, 'entregado.prn')
+        lp = os.path.join(self.carpeta, 'lp')
+        with open(lp, 'w') as f:
+            f.write(f'#!/bin/sh\ncat > "{entregado}.tmp" && mv "{entregado}.tmp" "{entregado}"\n')
+        os.chmod(lp, os.stat(lp).st_mode | stat.S_IEXEC)
+        with mock.patch.dict(os.environ, {'PATH': self.carpeta + os.pathsep + os.environ['PATH']}):
+            self.reimprimir(TransporteCUPS('TSC'))
+            self.assertFalse(os.path.exists(entregado))
+            enviar_tspl_lote(self.plantilla, lotes(5), TransporteCUPS('TSC'))
+        with open(entregado, 'rb') as f:
+            self.assertEqual(f.read().count(b'PRINT'), 5)
+
+    def test_win32_cancelado_aborta_el_trabajo(self):
+        llamadas = []
+        pywintypes = types.SimpleNamespace(error=type('error', (Exception,), {}))
+        win32print = types.SimpleNamespace(**{
+            nombre: (lambda nombre: lambda *args: llamadas.append(nombre))(nombre)
+            for nombre in ('StartDocPrinter', 'StartPagePrinter', 'WritePrinter', 'EndPagePrinter',
+                           'EndDocPrinter', 'AbortPrinter', 'ClosePrinter')
+        }, OpenPrinter=lambda nombre: 'handle')
+        with mock.patch.dict(sys.modules, {'win32print': win32print, 'pywintypes': pywintypes}):
+            self.reimprimir(TransporteWin32('TSC TE200'))
+        self.assertIn('AbortPrinter', llamadas)
+        self.assertNotIn('EndDocPrinter', llamadas)
+
+
+
+class ImpresoraTCP:
+    """Impresora de red de prueba en 127.0.0.1: anota lo recibido por cada conexión y puede cortarlas."""
+
+    def __init__(self):
+        self.servidor = socket.create_server(('127.0.0.1', 0))
+        self.puerto = self.servidor.getsockname()[1]
+        self.conexiones = []   # Sockets aceptados, en orden
+        self.recibido = []     # Bytes recibidos por cada conexión
+        self._condicion = threading.Condition()
+        threading.Thread(target=self._aceptar, daemon=True).start()
+
+    def _aceptar(self):
+        while True:
+            try:
+                conexion, _ = self.servidor.accept()
+            except OSError:
+                return
+            with self._condicion:
+                self.conexiones.append(conexion)
+                self.recibido.append(bytearray())
+                indice = len(self.recibido) - 1
+            threading.Thread(target=self._leer, args=(conexion, indice), daemon=True).start()
+
+    def _leer(self, conexion, indice):
+        while True:
+            try:
+                datos = conexion.recv(65536)
+            except OSError:
+                return
+            if not datos:
+                return
+            with self._condicion:
+                self.recibido[indice] += datos
+                self._condicion.notify_all()
+
+    def esperar(self, total, espera=5.0):
+        """Espera a que lleguen `total` bytes entre todas las conexiones."""
+        with self._condicion:
+            if not self._condicion.wait_for(lambda: sum(map(len, self.recibido)) >= total, espera):
+                raise AssertionError(f"Llegaron {sum(map(len, self.recibido))} de {total} bytes")
+            return [bytes(datos) for datos in self.recibido]
+
+    def cortar(self):
+        """Cierra las conexiones abiertas, como una impresora que se reinicia."""
+        with self._condicion:
+            for conexion in self.conexiones:
+                try:
+                    conexion.shutdown(socket.SHUT_RDWR)  # close() solo no despierta al recv del lector
+                except OSError:
+                    pass
+                conexion.close()
+
+    def cerrar(self):
+        self.cortar()
+        self.servidor.close()
+
+
+class TransporteTCPTest(unittest.TestCase):
+    def setUp(self):
+        self.impresora = ImpresoraTCP()
+        self.addCleanup(self.impresora.cerrar)
+        self.transporte = TransporteTCP('127.0.0.1', self.impresora.puerto, timeout=2.0)
+        self.addCleanup(self.transporte.cerrar)
+
+    def esperar_cierre_remoto(self):
+        # El FIN de la impresora llega al socket del transporte: queda legible
+        legible, _, _ = select.select([self.transporte._conexion], [], [], 5.0)
+        self.assertTrue(legible)
+
+    def test_conexion_reutilizada_entre_trabajos(self):
+        for i in range(3):
+            self.transporte.enviar(b'TRABAJO %d\n' % i)
+        self.assertEqual(self.impresora.esperar(30), [b'TRABAJO 0\nTRABAJO 1\nTRABAJO 2\n'])
+        self.assertTrue(self.transporte.estado(forzar=True)[0])
+        self.assertEqual(len(self.impresora.conexiones), 1)
+
+    def test_reconecta_si_la_impresora_cerro_la_conexion(self):
+        self.transporte.enviar(b'ANTES\n')
+        self.impresora.esperar(6)
+        self.impresora.cortar()
+        self.esperar_cierre_remoto()
+        # Sin la verificación, sendall sobre la conexión cerrada "funcionaría" y el trabajo se perdería
+        self.transporte.enviar(b'DESPUES\n')
+        self.assertEqual(self.impresora.esperar(14), [b'ANTES\n', b'DESPUES\n'])
+
+    def test_datos_de_la_impresora_no_cierran_la_conexion(self):
+        self.transporte.enviar(b'ANTES\n')
+        self.impresora.esperar(6)
+        self.impresora.conexiones[0].sendall(b'\x00')  # Respuesta de estado sin leer
+        legible, _, _ = select.select([self.transporte._conexion], [], [], 5.0)
+        self.assertTrue(legible)
+        self.transporte.enviar(b'DESPUES\n')
+        self.assertEqual(self.impresora.esperar(14), [b'ANTES\nDESPUES\n'])
+
+    def test_impresora_apagada(self):
+        self.impresora.cerrar()  # Nadie escucha en el puerto
+        listo, mensaje = self.transporte.estado(forzar=True)
+        self.assertFalse(listo)
+        self.assertIn(f"No se pudo conectar a 127.0.0.1:{self.impresora.puerto}", mensaje)
+        with self.assertRaises(ErrorTransporte):
+            self.transporte.enviar(b'TRABAJO\n')
+        self.assertIsNone(self.transporte._conexion)
+
+
+@unittest.skipIf(os.name == 'nt', "usa un lp de prueba escrito en sh")
+class TransporteCUPSTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.argumentos = os.path.join(self.carpeta, 'argumentos')
+        self.entrada = os.path.join(self.carpeta, 'entrada.prn')
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def lp(self, fin='exit 0'):
+        """lp de prueba que anota un argumento por línea y guarda la entrada estándar."""
+        lp = os.path.join(self.carpeta, 'lp')
+        with open(lp, 'w') as f:
+            f.write(f'#!/bin/sh\nprintf "%s\\n" "$@" > "{self.argumentos}"\ncat > "{self.entrada}"\n{fin}\n')
+        os.chmod(lp, os.stat(lp).st_mode | stat.S_IEXEC)
+        parche = mock.patch.dict(os.environ, {'PATH': self.carpeta + os.pathsep + os.environ['PATH']})
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def leer(self, ruta):
+        with open(ruta, 'rb') as f:
+            return f.read()
+
+    def test_argumentos_de_lp(self):
+        self.lp()
+        TransporteCUPS('TSC_Planta 2').enviar_partes([b'SIZE\n', b'PRINT 1,1\n'], nombre_trabajo='Ticket 0012')
+        self.assertEqual(self.leer(self.argumentos).decode().splitlines(),
+                         ['-d', 'TSC_Planta 2', '-o', 'raw', '-t', 'Ticket 0012'])
+        self.assertEqual(self.leer(self.entrada), b'SIZE\nPRINT 1,1\n')
+
+    def test_cola_tomada_de_la_configuracion(self):
+        self.lp()
+        crear_transporte({'printer': 'TSC TE200', 'transporte': {'tipo': 'cups'}}).enviar(b'PRINT 1,1\n')
+        self.assertEqual(self.leer(self.argumentos).decode().splitlines()[:2], ['-d', 'TSC TE200'])
+
+    def test_error_de_lp(self):
+        self.lp(fin='echo "lp: The printer or class does not exist." >&2; exit 1')
+        with self.assertRaises(ErrorTransporte) as error:
+            TransporteCUPS('NoExiste').enviar(b'PRINT 1,1\n')
+        self.assertEqual(str(error.exception), "lp: The printer or class does not exist.")
+
+    def test_sin_lp(self):
+        with mock.patch.dict(os.environ, {'PATH': self.carpeta}):
+            with self.assertRaises(ErrorTransporte) as error:
+                TransporteCUPS('TSC').enviar(b'PRINT 1,1\n')
+        self.assertIn("No se pudo ejecutar lp", str(error.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
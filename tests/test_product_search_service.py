@@ -0,0 +1,123 @@
+import os
+import unittest
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QComboBox
+from core.core_main_windows.services.product_search_service import IndiceProductos, normalizar, trigramas
+from gui.completador_productos import CompletadorProductos
+
+PRODUCTOS = [
+    ('COK70021', 'Caja corrugada doble'),
+    ('COK70022', 'Caja corrugada sencilla'),
+    ('CMG70021', 'Jabón Líquido Antibacterial'),
+    ('PZ-01', 'Pañuelos desechables'),
+    ('01', 'Aseo general'),
+    ('0101', 'Cafetería'),
+    ('LAM-9', 'Lámina de cartón'),
+]
+
+
+def codigos(resultados):
+    return [codigo for codigo, _ in resultados]
+
+
+class NormalizarTest(unittest.TestCase):
+    def test_tildes_mayusculas_y_espacios(self):
+        self.assertEqual(normalizar(' Jabón LÍQUIDO '), 'jabon liquido')
+        self.assertEqual(normalizar('PAÑUELOS'), 'panuelos')
+        self.assertEqual(normalizar('Café'), 'cafe')  # Tilde combinada (NFD)
+        self.assertEqual(normalizar('Straße'), 'strasse')
+
+    def test_trigramas_con_relleno(self):
+        self.assertEqual(trigramas('caja'), {'  c', ' ca', 'caj', 'aja', 'ja '})
+
+
+class IndiceProductosTest(unittest.TestCase):
+    def setUp(self):
+        self.indice = IndiceProductos(PRODUCTOS)
+
+    def test_codigo_exacto_primero(self):
+        self.assertEqual(codigos(self.indice.buscar('01'))[0], '01')
+        self.assertEqual(codigos(self.indice.buscar('01')), ['01', '0101'])
+        self.assertEqual(codigos(self.indice.buscar('PZ-01')), ['PZ-01'])
+
+    def test_prefijo_de_codigo_y_de_palabra(self):
+        self.assertEqual(codigos(self.indice.buscar('cok7002')), ['COK70021', 'COK70022'])
+        self.assertEqual(codigos(self.indice.buscar('corru')), ['COK70021', 'COK70022'])
+        self.assertEqual(codigos(self.indice.buscar('antibac')), ['CMG70021'])
+
+    def test_sin_tildes_ni_mayusculas(self):
+        for consulta in ('jabon', 'JABÓN', 'Jabón liq', 'LIQUIDO'):
+            with self.subTest(consulta=consulta):
+                self.assertEqual(codigos(self.indice.buscar(consulta)), ['CMG70021'])
+        self.assertEqual(codigos(self.indice.buscar('panuelos')), ['PZ-01'])
+        self.assertEqual(codigos(self.indice.buscar('lamina carton')), ['LAM-9'])
+
+    def test_varias_palabras_deben_aparecer_todas(self):
+        self.assertEqual(codigos(self.indice.buscar('caja sencilla')), ['COK70022'])
+        self.assertEqual(codigos(self.indice.buscar('sen caja')), ['COK70022'])
+        self.assertEqual(self.indice.buscar('caja jabon'), [])
+
+    def test_errores_de_tipeo_por_trigramas(self):
+        self.assertEqual(codigos(self.indice.buscar('corrugda')), ['COK70021', 'COK70022'])
+        self.assertEqual(codigos(self.indice.buscar('cafeteira')), ['0101'])
+        self.assertEqual(codigos(self.indice.buscar('antibacteral')), ['CMG70021'])
+        # Lo exacto va antes que lo corregido
+        self.indice.agregar('X1', 'Carton corrugda')
+        self.assertEqual(codigos(self.indice.buscar('corrugda'))[0], 'X1')
+
+    def test_sin_coincidencias(self):
+        self.assertEqual(self.indice.buscar('zzzz'), [])
+        self.assertEqual(self.indice.buscar('   '), [])
+        self.assertEqual(self.indice.buscar('999'), [])  # Los números no se corrigen
+
+    def test_limite(self):
+        indice = IndiceProductos((f'P{i:03d}', f'Producto {i}') for i in range(100))
+        self.assertEqual(len(indice.buscar('producto', limite=20)), 20)
+        self.assertEqual(len(indice.buscar('prodcto', limite=7)), 7)
+
+    def test_agregar_equivale_a_cargar(self):
+        incremental = IndiceProductos(PRODUCTOS[:3])
+        for codigo, descripcion in PRODUCTOS[3:]:
+            incremental.agregar(codigo, descripcion)
+        incremental.agregar(*PRODUCTOS[0])  # Repetido: se ignora
+        self.assertEqual(len(incremental), len(PRODUCTOS))
+        for consulta in ('01', 'caja', 'corrugda', 'jabon liq', 'lam'):
+            self.assertEqual(incremental.buscar(consulta), self.indice.buscar(consulta))
+
+
+class CompletadorProductosTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.combo = QComboBox()
+        self.combo.setEditable(True)
+        self.combo.addItems([codigo for codigo, _ in PRODUCTOS])
+        self.completador = CompletadorProductos(IndiceProductos(PRODUCTOS), self.combo, limite=5)
+
+    def test_reemplaza_el_completador_del_combo(self):
+        self.assertIsNone(self.combo.completer())
+        self.assertIs(self.completador.widget(), self.combo.lineEdit())
+
+    def test_sugerencias_muestran_descripcion_y_completan_con_el_codigo(self):
+        self.combo.lineEdit().textEdited.emit('jabon')
+        modelo = self.completador.modelo
+        self.assertEqual(modelo.rowCount(), 1)
+        indice = modelo.index(0)
+        self.assertEqual(indice.data(Qt.DisplayRole), 'CMG70021 - Jabón Líquido Antibacterial')
+        self.assertEqual(indice.data(Qt.EditRole), 'CMG70021')
+        self.completador.seleccionar(indice)
+        self.assertEqual(self.combo.currentText(), 'CMG70021')
+
+    def test_sin_resultados_vacia_el_modelo(self):
+        self.completador.buscar('corru')
+        self.assertEqual(self.completador.modelo.rowCount(), 2)
+        self.completador.buscar('zzzz')
+        self.assertEqual(self.completador.modelo.rowCount(), 0)
+        self.assertFalse(self.completador.popup().isVisible())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from core.core_main_windows.models.record_model import RepositorioRegistros, rango_mes
+from core.core_main_windows.utils.file_utils import terminar_linea_incompleta
+
+ENCABEZADOS = 'FechaHora,Operario,Cédula,Producto,Cantidad,Peso\r\n'
+
+
+class SincronizarCSVTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.csv = os.path.join(self.carpeta, 'Datos_bascula.csv')
+        self.repositorio = RepositorioRegistros(os.path.join(self.carpeta, 'bascula.db'))
+
+    def tearDown(self):
+        self.repositorio.cerrar()
+        shutil.rmtree(self.carpeta)
+
+    def escribir(self, texto, modo='a'):
+        with open(self.csv, modo, encoding='utf-8', newline='') as f:
+            f.write(texto)
+
+    def test_ultima_fila_sin_salto_final_se_importa(self):
+        self.escribir(ENCABEZADOS + '2025-06-05 14:54:17,Ana,1,CMG70021,10,7.25\r\n'
+                      '2025-06-05 14:54:38,Ana,1,CMG70021,10,7.30', 'w')
+        self.assertEqual(self.repositorio.sincronizar_csv(self.csv), 2)
+        self.assertEqual(self.repositorio.consultar(limite=1)[0][0], '2025-06-05 14:54:38')
+
+        # El siguiente guardado termina la línea y agrega la suya: no se duplica nada
+        terminar_linea_incompleta(self.csv)
+        self.escribir('2025-06-05 15:00:00,Ana,1,CMG70021,10,7.40\r\n')
+        self.assertEqual(self.repositorio.sincronizar_csv(self.csv), 1)
+        self.assertEqual(self.repositorio.max_id(), 3)
+
+    def test_escritura_en_curso_se_deja_para_despues(self):
+        self.escribir(ENCABEZADOS + '2025-06-05 14:54:17,Ana,1,CMG70021,10,7.25\r\n2025-06-05 14:5', 'w')
+        self.assertEqual(self.repositorio.sincronizar_csv(self.csv), 1)
+        self.escribir('4:38,Ana,1,CMG70021,10,7.30\r\n')
+        self.assertEqual(self.repositorio.sincronizar_csv(self.csv), 1)
+        self.assertEqual(self.repositorio.consultar(limite=1)[0][0], '2025-06-05 14:54:38')
+
+    def test_archivo_de_la_aplicacion_completo(self):
+        ruta = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'Datos_bascula.csv')
+        shutil.copy(ruta, self.csv)
+        with open(self.csv, encoding='utf-8') as f:
+            filas = sum(1 for linea in f if linea.strip()) - 1
+        self.assertEqual(self.repositorio.sincronizar_csv(self.csv), filas)
+
+
+class ResumenDiarioTest(unittest.TestCase):
+    """Los resúmenes acumulados al insertar coinciden con recalcular desde los registros."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.repositorio = RepositorioRegistros(os.path.join(self.carpeta, 'bascula.db'))
+        azar = random.Random(7)
+        self.filas = [
+            [f"2025-{mes:02d}-{dia:02d} {azar.randrange(24):02d}:{azar.randrange(60):02d}:00",
+             f"Operario {cedula}", str(cedula), producto, str(azar.randint(1, 20)), f"{azar.uniform(0.5, 30):.2f}"]
+            for mes, dia, cedula, producto in (
+                (azar.choice((5, 6)), azar.randint(1, 30), azar.randint(1, 4), azar.choice(('CMG70021', 'PZ-01')))
+                for _ in range(2000))
+        ]
+
+    def tearDown(self):
+        self.repositorio.cerrar()
+        shutil.rmtree(self.carpeta)
+
+    def insertar_por_lotes(self, filas):
+        for inicio in range(0, len(filas), 300):
+            self.repositorio.insertar_lote(filas[inicio:inicio + 300])
+
+    def esperado(self, desde, hasta, cedula=None):
+        pesos = [float(f[5]) for f in self.filas
+                 if desde <= f[0][:10] <= hasta and (cedula is None or f[2] == cedula)]
+        cantidad = sum(float(f[4]) for f in self.filas
+                       if desde <= f[0][:10] <= hasta and (cedula is None or f[2] == cedula))
+        return len(pesos), sum(pesos), cantidad, min(pesos), max(pesos)
+
+    def assertTotales(self, obtenidos, esperados):
+        self.assertEqual(obtenidos[0], esperados[0])
+        for obtenido, esperado in zip(obtenidos[1:], esperados[1:]):
+            self.assertAlmostEqual(obtenido, esperado, places=6)
+
+    def test_totales_por_dia_mes_y_operario(self):
+        self.insertar_por_lotes(self.filas)
+        dia = self.filas[0][0][:10]
+        self.assertTotales(self.repositorio.totales_dia(dia), self.esperado(dia, dia))
+        self.assertTotales(self.repositorio.totales_dia('2025-06-01', '2025-06-31'),
+                           self.esperado('2025-06-01', '2025-06-31'))
+        self.assertTotales(self.repositorio.totales_dia('2025-05-01', '2025-05-31', cedula='3'),
+                           self.esperado('2025-05-01', '2025-05-31', '3'))
+        self.assertEqual(self.repositorio.totales_dia('2024-01-01'), (0, 0.0, 0.0, None, None))
+
+        filas_mes = self.repositorio.resumen_mes('2025-05')
+        self.assertEqual(sum(fila[3] for fila in filas_mes), self.esperado('2025-05-01', '2025-05-31')[0])
+        self.assertEqual([fila[4] for fila in filas_mes], sorted((fila[4] for fila in filas_mes), reverse=True))
+        for cedula, operario, producto, registros, peso, _, _, _ in filas_mes:
+            self.assertEqual(operario, f"Operario {cedula}")
+            self.assertEqual(registros, sum(1 for f in self.filas if f[0][:7] == '2025-05'
+                                            and f[2] == cedula and f[3] == producto))
+
+    def test_acumulado_igual_a_reconstruido(self):
+        self.insertar_por_lotes(self.filas)
+        consulta = "SELECT * FROM resumen_diario ORDER BY dia, cedula, producto"
+        acumulado = self.repositorio.conexion.execute(consulta).fetchall()
+        self.assertFalse(self.repositorio.verificar_resumen(completo=True))
+        self.repositorio.reconstruir_resumen()
+        reconstruido = self.repositorio.conexion.execute(consulta).fetchall()
+        self.assertEqual(len(acumulado), len(reconstruido))
+        for fila_a, fila_r in zip(acumulado, reconstruido):
+            self.assertEqual(fila_a[:5], fila_r[:5])
+            for a, r in zip(fila_a[5:], fila_r[5:]):
+                self.assertAlmostEqual(a, r, places=6)
+
+    def test_operario_renombrado_toma_el_ultimo_nombre(self):
+        self.repositorio.insertar_lote([['2025-06-05 08:00:00', 'Ana', '1', 'PZ-01', '1', '2.00'],
+                                        ['2025-06-05 09:00:00', 'Ana María', '1', 'PZ-01', '1', '3.00']])
+        self.assertEqual(self.repositorio.resumen('2025-06-05'),
+                         [('1', 'Ana María', 'PZ-01', 2, 5.0, 2.0, 2.0, 3.0)])
+        self.repositorio.reconstruir_resumen()
+        self.assertEqual(self.repositorio.resumen('2025-06-05')[0][1], 'Ana María')
+
+    def test_resumen_de_varios_dias_toma_el_nombre_del_dia_mas_reciente(self):
+        # El nombre nuevo va antes en orden alfabético: MAX(operario) devolvería el viejo
+        self.repositorio.insertar_lote([['2025-06-03 08:00:00', 'Zoila', '1', 'PZ-01', '1', '2.00'],
+                                        ['2025-06-04 08:00:00', 'Zoila', '1', 'PZ-01', '1', '1.00'],
+                                        ['2025-06-05 09:00:00', 'Ana Zoila', '1', 'PZ-01', '2', '3.00'],
+                                        ['2025-06-04 10:00:00', 'Zoila', '1', 'CMG70021', '1', '4.00']])
+        for _ in range(2):
+            self.assertEqual(self.repositorio.resumen('2025-06-01', '2025-06-30'),
+                             [('1', 'Ana Zoila', 'PZ-01', 3, 6.0, 4.0, 1.0, 3.0),
+                              ('1', 'Zoila', 'CMG70021', 1, 4.0, 1.0, 4.0, 4.0)])
+            # Dentro del rango consultado, el día más reciente es otro
+            self.assertEqual(self.repositorio.resumen('2025-06-03', '2025-06-04', producto='PZ-01')[0][1], 'Zoila')
+            self.repositorio.reconstruir_resumen()
+
+    def test_totales_del_mes_incluyen_el_ultimo_dia(self):
+        self.assertEqual(rango_mes('2025-06'), ('2025-06-01', '2025-06-30'))
+        self.assertEqual(rango_mes('2024-02'), ('2024-02-01', '2024-02-29'))
+        self.assertEqual(rango_mes('2025-12'), ('2025-12-01', '2025-12-31'))
+        self.repositorio.insertar_lote([['2024-02-29 23:59:59', 'Ana', '1', 'PZ-01', '1', '2.00'],
+                                        ['2024-03-01 00:00:00', 'Ana', '1', 'PZ-01', '1', '3.00'],
+                                        ['2024-01-31 12:00:00', 'Ana', '1', 'PZ-01', '1', '5.00']])
+        self.assertEqual(self.repositorio.totales_mes('2024-02'), (1, 2.0, 1.0, 2.0, 2.0))
+        self.assertEqual(self.repositorio.totales_mes('2024-02', cedula='2'), (0, 0.0, 0.0, None, None))
+        self.assertEqual([f[3] for f in self.repositorio.resumen_mes('2024-01')], [1])
+
+    def test_filas_insertadas_por_fuera_se_detectan(self):
+        self.insertar_por_lotes(self.filas[:1000])
+        with self.repositorio.conexion:
+            self.repositorio.conexion.executemany(
+                "INSERT INTO registros (fecha_hora, operario, cedula, producto, cantidad, peso) "
+                "VALUES (?, ?, ?, ?, ?, ?)", self.filas[1000:1500])
+        # Insertar por el repositorio no oculta el desfase anterior
+        self.insertar_por_lotes(self.filas[1500:])
+        self.assertTrue(self.repositorio.verificar_resumen())
+        self.assertFalse(self.repositorio.verificar_resumen())
+        self.assertTotales(self.repositorio.totales_dia('2025-01-01', '2025-12-31'),
+                           self.esperado('2025-01-01', '2025-12-31'))
+
+    def test_resumen_incompleto_solo_lo_detecta_la_verificacion_completa(self):
+        self.insertar_por_lotes(self.filas)
+        with self.repositorio.conexion:
+            self.repositorio.conexion.execute(
+                "DELETE FROM resumen_diario WHERE dia = ?", (self.filas[0][0][:10],))
+        self.assertFalse(self.repositorio.verificar_resumen())
+        self.assertTrue(self.repositorio.verificar_resumen(completo=True))
+        dia = self.filas[0][0][:10]
+        self.assertTotales(self.repositorio.totales_dia(dia), self.esperado(dia, dia))
+
+    def test_sincronizar_csv_acumula_resumenes(self):
+        ruta = os.path.join(self.carpeta, 'Datos_bascula.csv')
+        with open(ruta, 'w', encoding='utf-8', newline='') as f:
+            f.write(ENCABEZADOS + ''.join(','.join(fila) + '\r\n' for fila in self.filas))
+        self.assertEqual(self.repositorio.sincronizar_csv(ruta, tamano_lote=700), len(self.filas))
+        self.assertFalse(self.repositorio.verificar_resumen(completo=True))
+        self.assertTotales(self.repositorio.totales_dia('2025-01-01', '2025-12-31'),
+                           self.esperado('2025-01-01', '2025-12-31'))
+
+
+if __name__ == '__main__':
+    unittest.main()
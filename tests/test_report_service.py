@@ -0,0 +1,202 @@
+import csv
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from collections import defaultdict
+from datetime import datetime, timedelta
+from unittest import mock
+import numpy as np
+from core.core_main_windows.models.record_model import RepositorioRegistros
+from core.core_main_windows.services.report_service import (ServicioReportes, TablaRegistros, _Diccionario,
+                                                            TURNOS)
+
+OPERARIOS = [('María Peña', '1020304050'), ('José Núñez', '80706050'), ('Ana Gómez', '43210987')]
+PRODUCTOS = ['CMG70021', 'PZ-01', 'COK70300']
+
+
+def generar_filas(cantidad, semilla=11):
+    azar = random.Random(semilla)
+    inicio = datetime(2025, 5, 28)
+    filas = []
+    for _ in range(cantidad):
+        fecha = inicio + timedelta(seconds=azar.randrange(10 * 86400))
+        operario, cedula = azar.choice(OPERARIOS)
+        filas.append([fecha.strftime('%Y-%m-%d %H:%M:%S'), operario, cedula, azar.choice(PRODUCTOS),
+                      str(azar.randint(1, 50)), f"{azar.uniform(0.5, 90):.2f}"])
+    return filas
+
+
+def percentil(ordenados, p):
+    posicion = (len(ordenados) - 1) * p / 100
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+def turno_de(fecha):
+    turno = TURNOS[-1][0]
+    for nombre, inicio in TURNOS:
+        if fecha.hour >= inicio:
+            turno = nombre
+    return turno
+
+
+def clave_de(fila, dimension):
+    """Etiqueta de la fila en una dimensión, calculada fila a fila en Python."""
+    fecha = datetime.fromisoformat(fila[0])
+    if dimension == 'dia':
+        return fila[0][:10]
+    if dimension == 'dia_operativo':
+        return (fecha - timedelta(hours=TURNOS[0][1])).date().isoformat()
+    if dimension == 'mes':
+        return fila[0][:7]
+    if dimension == 'turno':
+        return turno_de(fecha)
+    if dimension == 'operario':
+        return f"{fila[1]} ({fila[2]})"
+    return fila[3]
+
+
+def agrupar_python(filas, por):
+    grupos = defaultdict(list)
+    for fila in filas:
+        grupos[tuple(clave_de(fila, d) for d in por)].append(fila)
+    resultado = {}
+    for clave, del_grupo in grupos.items():
+        pesos = sorted(float(f[5]) for f in del_grupo)
+        resultado[clave] = (len(pesos), sum(float(f[4]) for f in del_grupo), sum(pesos), sum(pesos) / len(pesos),
+                            pesos[0], pesos[-1], percentil(pesos, 50), percentil(pesos, 90))
+    return resultado
+
+
+class DiccionarioTest(unittest.TestCase):
+    def test_codigos_estables_entre_lotes(self):
+        diccionario = _Diccionario()
+        self.assertEqual(diccionario.codificar(['b', 'a', 'b']).tolist(), [0, 1, 0])
+        self.assertEqual(diccionario.primeras, [0, 1])
+        self.assertEqual(diccionario.codificar(['a', 'c', 'c', 'b']).tolist(), [1, 2, 2, 0])
+        self.assertEqual(diccionario.primeras, [1])
+        self.assertEqual(diccionario.valores, ['b', 'a', 'c'])
+        self.assertEqual(diccionario.codificar(['a']).tolist(), [1])
+        self.assertEqual(diccionario.primeras, [])
+
+
+class TablaRegistrosTest(unittest.TestCase):
+    """Cada reporte coincide con un groupby en Python puro sobre las mismas filas del repositorio."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.carpeta = tempfile.mkdtemp()
+        cls.repositorio = RepositorioRegistros(os.path.join(cls.carpeta, 'bascula.db'))
+        cls.filas = generar_filas(3000)
+        cls.repositorio.insertar_lote(cls.filas)
+        cls.tabla = TablaRegistros.desde_repositorio(cls.repositorio, tamano_lote=700)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.repositorio.cerrar()
+        shutil.rmtree(cls.carpeta)
+
+    def assertReporte(self, reporte, esperado, dimensiones):
+        self.assertEqual(len(reporte), len(esperado))
+        for fila in reporte.filas(decimales=9):
+            clave, valores = tuple(fila[:dimensiones]), fila[dimensiones:]
+            self.assertIn(clave, esperado)
+            self.assertEqual(valores[0], esperado[clave][0])
+            np.testing.assert_allclose(valores[1:], esperado[clave][1:], rtol=1e-9, atol=1e-6)
+
+    def test_reportes_por_cada_dimension(self):
+        for por in (('dia',), ('dia_operativo',), ('mes',), ('turno',), ('operario',), ('producto',),
+                    ('dia_operativo', 'turno'), ('operario', 'producto')):
+            with self.subTest(por=por):
+                reporte = self.tabla.agrupar(por)
+                self.assertEqual(reporte.columnas, por + ('registros', 'cantidad_total', 'peso_total',
+                                                          'peso_promedio', 'peso_min', 'peso_max',
+                                                          'peso_p50', 'peso_p90'))
+                self.assertReporte(reporte, agrupar_python(self.filas, por), len(por))
+
+    def test_total_sin_dimensiones(self):
+        self.assertReporte(self.tabla.agrupar(()), agrupar_python(self.filas, ()), 0)
+
+    def test_dia_coincide_con_los_resumenes_diarios(self):
+        reporte = self.tabla.agrupar(('dia',))
+        for dia, registros, _, peso, _, peso_min, peso_max, _, _ in reporte.filas(decimales=9):
+            totales = self.repositorio.totales_dia(dia)
+            self.assertEqual(registros, totales[0])
+            self.assertAlmostEqual(peso, totales[1], places=6)
+            self.assertEqual((peso_min, peso_max), totales[3:])
+
+    def test_dia_operativo_difiere_en_la_madrugada(self):
+        tabla = TablaRegistros()
+        tabla.agregar([[('2025-06-05 02:00:00', 'Ana', '1', 'PZ-01', '1', '5.00')]])
+        self.assertEqual(tabla.agrupar(('dia',)).filas()[0][0], '2025-06-05')
+        self.assertEqual(tabla.agrupar(('dia_operativo', 'turno')).filas()[0][:2], ('2025-06-04', 'Noche'))
+
+    def test_filtros(self):
+        filtrada = self.tabla.filtrar(desde='2025-06-01 00:00:00', hasta='2025-06-03 23:59:59',
+                                      cedula=OPERARIOS[0][1])
+        filas = [f for f in self.filas if '2025-06-01' <= f[0][:10] <= '2025-06-03' and f[2] == OPERARIOS[0][1]]
+        self.assertReporte(filtrada.agrupar(('producto',)), agrupar_python(filas, ('producto',)), 1)
+        self.assertEqual(len(self.tabla.filtrar(producto='NO-EXISTE')), 0)
+
+    def test_percentiles_con_cantidad_par_e_impar(self):
+        tabla = TablaRegistros()
+        tabla.agregar([[('2025-06-05 08:00:00', 'Ana', '1', 'A', '1', peso) for peso in ('4', '1', '3', '2')] +
+                       [('2025-06-05 08:00:00', 'Ana', '1', 'B', '1', peso) for peso in ('9', '7', '8')]])
+        filas = tabla.agrupar(('producto',), percentiles=(0, 50, 100)).filas()
+        self.assertEqual([f[5:] for f in filas], [(1.0, 4.0, 1.0, 2.5, 4.0), (7.0, 9.0, 7.0, 8.0, 9.0)])
+
+    def test_filas_ilegibles_se_descartan(self):
+        tabla = TablaRegistros()
+        tabla.agregar([[('2025-06-05 08:00:00', 'Ana', '1', 'A', '2', '1,50'),
+                        ('no es fecha', 'Ana', '1', 'A', '1', '3.00'),
+                        ('2025-06-05 09:00:00', 'Ana', '1', 'A', 'x', 'abc'),
+                        ('2025-06-05 10:00:00', 'Luis', '2', 'A', 'x', '2.50')]])
+        self.assertEqual(tabla.descartadas, 2)
+        self.assertEqual(tabla.agrupar(()).filas()[0][:3], (2, 2.0, 4.0))
+        self.assertEqual(tabla.nombres_operario, ['Ana', 'Luis'])
+
+
+class ServicioReportesTest(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.ruta_db = os.path.join(self.carpeta, 'bascula.db')
+        self.repositorio = RepositorioRegistros(self.ruta_db)
+        self.servicio = ServicioReportes(self.ruta_db)
+
+    def tearDown(self):
+        self.servicio.cerrar()
+        self.repositorio.cerrar()
+        shutil.rmtree(self.carpeta)
+
+    def test_agrega_solo_los_registros_nuevos(self):
+        filas = generar_filas(1200)
+        self.repositorio.insertar_lote(filas[:800])
+        primera = self.servicio.tabla()
+        self.assertEqual(len(primera), 800)
+        self.repositorio.insertar_lote(filas[800:])
+        with mock.patch.object(TablaRegistros, 'desde_repositorio') as recargar:
+            tabla = self.servicio.tabla()
+        recargar.assert_not_called()
+        self.assertIs(tabla, primera)
+        self.assertEqual(len(tabla), 1200)
+        reporte = self.servicio.reporte(('operario',), cedula=OPERARIOS[1][1])
+        esperadas = [f for f in filas if f[2] == OPERARIOS[1][1]]
+        self.assertEqual(reporte.filas()[0][:2], (f"{OPERARIOS[1][0]} ({OPERARIOS[1][1]})", len(esperadas)))
+
+    def test_escribir_csv(self):
+        self.repositorio.insertar_lote(generar_filas(100))
+        destino = os.path.join(self.carpeta, 'reporte.csv')
+        reporte = self.servicio.reporte(('dia',))
+        reporte.escribir_csv(destino)
+        with open(destino, newline='', encoding='utf-8') as f:
+            filas = list(csv.reader(f))
+        self.assertEqual(tuple(filas[0]), reporte.columnas)
+        self.assertEqual(len(filas) - 1, len(reporte))
+        self.assertEqual(sum(int(f[1]) for f in filas[1:]), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import re
+import unittest
+from utils.ticket_template import compilar_plantilla, valores_ticket
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def valores(producto='COK70001', peso='25.40', operario='María Peña'):
+    return valores_ticket('2025-06-05 14:54:17', operario, '1020304050', producto, 'Caja corrugada', 12, peso)
+
+
+class TsplLoteTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+            cls.plantilla = compilar_plantilla(json.load(f))
+
+    def etiquetas(self, trabajo):
+        """(productos, copias) de cada PRINT del trabajo, en orden."""
+        return [(re.findall(rb'Codigo: ([^"]*)"', bloque), int(copias))
+                for bloque, copias in re.findall(rb'((?:(?!PRINT).)*?)PRINT 1,(\d+)\n', trabajo, re.S)]
+
+    def test_registros_iguales_consecutivos_van_en_un_solo_print(self):
+        a, b = valores('A-1'), valores('B-2')
+        trabajo = self.plantilla.tspl_lote([a, a, a, b, b, a], copias=2)
+        self.assertEqual(self.etiquetas(trabajo), [([b'A-1'], 6), ([b'B-2'], 4), ([b'A-1'], 2)])
+        self.assertEqual(trabajo.count(b'SIZE '), 1)    # Cabecera una sola vez por trabajo
+        self.assertEqual(trabajo.count(b'CLS\n'), 3)    # Una etiqueta borra el búfer de la anterior
+        self.assertTrue(trabajo.endswith(b'PRINT 1,2\n'))
+
+    def test_solo_se_juntan_registros_identicos(self):
+        # Mismo producto pero otro peso: etiquetas distintas
+        trabajo = self.plantilla.tspl_lote([valores(peso='1.00'), valores(peso='1.00'), valores(peso='1.01')])
+        self.assertEqual([copias for _, copias in self.etiquetas(trabajo)], [2, 1])
+
+    def test_lote_igual_a_tickets_individuales(self):
+        a = valores('A-1')
+        self.assertEqual(self.plantilla.tspl_lote([a, a, a]), self.plantilla.tspl(a, copias=3))
+
+    def test_continuacion_sin_cabecera(self):
+        trabajo = self.plantilla.tspl_lote([valores()], cabecera=False)
+        self.assertTrue(trabajo.startswith(b'CLS\n'))
+        self.assertNotIn(b'SIZE ', trabajo)
+        self.assertEqual(self.plantilla.tspl_lote([valores()]),
+                         self.plantilla.cabecera_tspl + trabajo[len(b'CLS\n'):])
+
+    def test_errores(self):
+        with self.assertRaises(ValueError):
+            self.plantilla.tspl_lote([valores()], copias=0)
+        with self.assertRaises(ValueError):
+            self.plantilla.tspl_lote([])
+
+
+class CodificacionTsplTest(unittest.TestCase):
+    """Los textos van en cp850, la página de códigos que la cabecera declara a la impresora."""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(RAIZ, 'printer_config.json'), encoding='utf-8') as f:
+            cls.config = json.load(f)
+        cls.plantilla = compilar_plantilla(cls.config)
+
+    def test_cabecera_declara_la_pagina_de_codigos(self):
+        self.assertIn(b'CODEPAGE 850\n', self.plantilla.cabecera_tspl)
+
+    def test_nombres_con_tildes_y_enes(self):
+        trabajo = self.plantilla.tspl(valores(operario='María Peña Ñúñez', producto='AÉ-ó'))
+        self.assertIn(b'Operario: Mar\xa1a Pe\xa4a \xa5\xa3\xa4ez"', trabajo)
+        self.assertIn(b'Codigo: A\x90-\xa2"', trabajo)
+        self.assertNotIn('María'.encode('utf-8'), trabajo)
+
+    def test_titulo_con_tildes(self):
+        plantilla = compilar_plantilla(dict(self.config, Titulo='Báscula Nº 2'))
+        self.assertIn(b'"B\xa0scula N\xa7 2"', plantilla.cuerpo_tspl)
+
+    def test_caracteres_fuera_de_cp850_se_reemplazan(self):
+        trabajo = self.plantilla.tspl(valores(operario='José €'))
+        self.assertIn(b'Operario: Jos\x82 ?"', trabajo)
+
+    def test_comillas_escapadas(self):
+        trabajo = self.plantilla.tspl(valores(operario='Tubo 2" Peña'))
+        self.assertIn(b'Operario: Tubo 2\\" Pe\xa4a"', trabajo)
+
+
+if __name__ == '__main__':
+    unittest.main()
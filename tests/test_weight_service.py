@@ -0,0 +1,174 @@
+import random
+import statistics
+import unittest
+from core.core_main_windows.services.weight_service import ParserTramas, DetectorEstabilidad, ESTABLE, INESTABLE
+from core.core_main_windows.utils.serial_utils import LectorSerial
+
+
+class ParserTramasTest(unittest.TestCase):
+    def test_generico(self):
+        lectura = ParserTramas().analizar(b'ST,GS,+0012.34kg')
+        self.assertEqual((lectura.valor, lectura.unidad, lectura.estable, lectura.neto, lectura.texto),
+                         (12.34, 'kg', True, False, '12.34'))
+        lectura = ParserTramas().analizar(b'US,NT,-  12.3 kg')
+        self.assertEqual((lectura.valor, lectura.estable, lectura.neto, lectura.decimales), (-12.3, False, True, 1))
+        self.assertIsNone(ParserTramas().analizar(b'OL,GS,+9999.99kg'))
+        self.assertEqual(ParserTramas().analizar(b'-0.00').texto, '0.00')
+
+    def test_sics(self):
+        parser = ParserTramas('sics')
+        self.assertEqual(parser.analizar(b'S S      12.34 kg').estable, True)
+        self.assertEqual(parser.analizar(b'S D      12.30 kg').estable, False)
+        self.assertIsNone(parser.analizar(b'S I'))
+
+    def test_dialecto_desconocido(self):
+        with self.assertRaises(ValueError):
+            ParserTramas('no_existe')
+
+    def test_tramas_partidas_y_juntas(self):
+        flujo = b'ST,GS,+0001.00kg\r\nST,GS,+0002.00kg\r\nUS,GS,+0003.5'
+        for tamano in (1, 3, 7, len(flujo)):
+            parser = ParserTramas()
+            valores = []
+            for i in range(0, len(flujo), tamano):
+                valores += [lectura.valor for lectura in parser.alimentar(flujo[i:i + tamano])]
+            self.assertEqual(valores, [1.0, 2.0], tamano)
+            self.assertEqual([lectura.valor for lectura in parser.alimentar(b'0kg\r\n')], [3.5])
+
+    def test_basura_sin_fin_de_trama(self):
+        parser = ParserTramas(capacidad=64)
+        self.assertEqual(parser.alimentar(b'x' * 200), [])
+        self.assertEqual(parser.descartados, 136)
+        self.assertEqual([lectura.valor for lectura in parser.alimentar(b'\nST,GS,+0007.25kg\n')], [7.25])
+
+
+class DetectorEstabilidadTest(unittest.TestCase):
+    def alimentar(self, detector, valores, t=0.0, paso=0.125, estable_indicador=True):
+        """Agrega las muestras cada `paso` segundos; devuelve [(t, evento)] de los eventos y el instante final."""
+        eventos = []
+        for valor in valores:
+            evento = detector.agregar(valor, t, estable_indicador)
+            if evento is not None:
+                eventos.append((t, evento))
+            t += paso
+        return eventos, t
+
+    def test_media_varianza_y_extremos_de_la_ventana(self):
+        azar = random.Random(3)
+        detector = DetectorEstabilidad(ventana=7, tolerancia=0.0)
+        valores = [azar.uniform(-5, 500) for _ in range(60)]
+        for i, valor in enumerate(valores):
+            detector.agregar(valor, i * 0.1)
+            ventana = valores[max(0, i - 6):i + 1]
+            self.assertAlmostEqual(detector.media, statistics.fmean(ventana), places=9)
+            self.assertAlmostEqual(detector.varianza, statistics.pvariance(ventana), places=6)
+            self.assertEqual((detector.minimo, detector.maximo), (min(ventana), max(ventana)))
+
+    def test_varianza_no_negativa_con_muestras_iguales(self):
+        detector = DetectorEstabilidad(ventana=4)
+        self.alimentar(detector, [12.34] * 3 + [0.1, 12.34] + [12.34] * 20)
+        self.assertGreaterEqual(detector.varianza, 0.0)
+        self.assertAlmostEqual(detector.varianza, 0.0, places=12)
+        self.assertAlmostEqual(detector.media, 12.34, places=9)
+
+    def test_ventana_minima(self):
+        with self.assertRaises(ValueError):
+            DetectorEstabilidad(ventana=1)
+
+    def test_estable_despues_del_tiempo_de_asentamiento(self):
+        detector = DetectorEstabilidad(ventana=5, tolerancia=0.025, tiempo_asentamiento=0.75)
+        # La ventana se llena en t=0.5; el asentamiento se cumple 0.75 s después
+        eventos, _ = self.alimentar(detector, [10.00, 10.01, 9.99, 10.00, 10.01] + [10.00] * 10)
+        self.assertEqual(eventos, [(1.25, ESTABLE)])
+        self.assertTrue(detector.estable)
+        self.assertAlmostEqual(detector.valor_estable, 10.0, places=9)
+
+    def test_ventana_incompleta_no_es_estable(self):
+        detector = DetectorEstabilidad(ventana=10, tiempo_asentamiento=0.0)
+        eventos, _ = self.alimentar(detector, [5.0] * 9)
+        self.assertEqual(eventos, [])
+        self.assertEqual(detector.agregar(5.0, 0.9), ESTABLE)
+
+    def test_transiciones_estable_inestable(self):
+        detector = DetectorEstabilidad(ventana=3, tolerancia=0.02, tiempo_asentamiento=0.25)
+        eventos, t = self.alimentar(detector, [8.0] * 6)
+        self.assertEqual(eventos, [(0.5, ESTABLE)])
+        # Se agrega producto: un solo evento INESTABLE y valor_estable se borra
+        eventos, t = self.alimentar(detector, [8.5, 9.0, 9.4], t)
+        self.assertEqual(eventos, [(0.75, INESTABLE)])
+        self.assertIsNone(detector.valor_estable)
+        # Se asienta en el nuevo peso
+        eventos, t = self.alimentar(detector, [9.5] * 6, t)
+        self.assertEqual(eventos, [(1.625, ESTABLE)])
+        self.assertAlmostEqual(detector.valor_estable, 9.5)
+        # Una variación dentro de la tolerancia no lo desestabiliza
+        eventos, t = self.alimentar(detector, [9.51, 9.5, 9.495], t)
+        self.assertEqual(eventos, [])
+
+    def test_oscilacion_reinicia_el_asentamiento(self):
+        detector = DetectorEstabilidad(ventana=3, tolerancia=0.02, tiempo_asentamiento=0.5)
+        # Cada salto fuera de la tolerancia antes de cumplir 0.5 s vuelve a empezar el conteo
+        eventos, t = self.alimentar(detector, [4.0, 4.0, 4.0, 4.0, 4.5, 4.0, 4.0, 4.0, 4.0])
+        self.assertEqual(eventos, [])
+        eventos, _ = self.alimentar(detector, [4.0] * 4, t)
+        self.assertEqual(eventos, [(1.375, ESTABLE)])
+
+    def test_indicador_inestable_de_la_bascula(self):
+        detector = DetectorEstabilidad(ventana=3, tiempo_asentamiento=0.25)
+        eventos, t = self.alimentar(detector, [3.0] * 6)
+        self.assertEqual(eventos, [(0.5, ESTABLE)])
+        # Trama 'US' en t=0.75: mismo valor, pero la báscula informa movimiento
+        self.assertEqual(detector.agregar(3.0, t, estable_indicador=False), INESTABLE)
+        eventos, _ = self.alimentar(detector, [3.0] * 3, t + 0.125)
+        self.assertEqual(eventos, [(1.125, ESTABLE)])
+
+    def test_bascula_vacia_no_es_estable(self):
+        detector = DetectorEstabilidad(ventana=3, tiempo_asentamiento=0.0, peso_minimo=0.05)
+        eventos, t = self.alimentar(detector, [0.0] * 5 + [0.04] * 5 + [-0.03] * 5)
+        self.assertEqual(eventos, [])
+        eventos, t = self.alimentar(detector, [0.06] * 3, t)
+        self.assertEqual(eventos, [(2.125, ESTABLE)])
+        # Al retirar el producto vuelve a inestable
+        eventos, _ = self.alimentar(detector, [0.0] * 3, t)
+        self.assertEqual(eventos, [(2.25, INESTABLE)])
+
+    def test_reiniciar(self):
+        detector = DetectorEstabilidad(ventana=3, tiempo_asentamiento=0.0)
+        self.alimentar(detector, [7.0] * 3)
+        self.assertTrue(detector.estable)
+        detector.reiniciar()
+        self.assertEqual((detector.estable, detector.valor_estable, detector.media, detector.varianza),
+                         (False, None, 0.0, 0.0))
+        self.assertEqual(detector.agregar(2.0, 0.0), None)
+
+
+class PuertoFalso:
+    """Puerto serial que entrega `trozos` uno por read() y luego detiene al lector."""
+
+    def __init__(self, trozos, lector=None):
+        self.trozos = list(trozos)
+        self.lector = lector
+        self.timeout = None
+        self.in_waiting = 0
+
+    def read(self, n):
+        if not self.trozos:
+            self.lector._activo = False
+            return b''
+        return self.trozos.pop(0)
+
+
+class LectorSerialTest(unittest.TestCase):
+    def test_trozos_del_puerto_pasan_por_el_parser(self):
+        puerto = PuertoFalso([b'S S      1.00 kg\r\nS S ', b'     2.50 kg\r', b'\nS D 3'])
+        lector = LectorSerial(puerto, 'sics')
+        puerto.lector = lector
+        lector.run()
+        lectura, _ = lector.tomar_ultimo()
+        self.assertEqual((lectura.valor, lectura.estable), (2.5, True))
+        # La segunda lectura reemplazó a la primera, que la interfaz no llegó a tomar
+        self.assertEqual(lector.lecturas_descartadas, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
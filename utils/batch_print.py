@@ -0,0 +1,223 @@
+"""
+Reimpresión por lotes de registros históricos: un PDF de varias páginas o un único
+trabajo TSPL, generados por tramos y con memoria constante.
+
+Los registros llegan del repositorio de a `tamano_lote` filas y cada lote se
+renderiza y se escribe antes de pedir el siguiente. El PDF se escribe en streaming
+con EscritorPDF (cada página va directo al archivo; solo se guardan los
+desplazamientos de los objetos) y el TSPL se entrega al transporte con
+enviar_partes(), así 10.000 etiquetas no se juntan nunca en memoria.
+
+Las páginas llevan las mismas líneas que el ticket individual: ambas salen de
+PlantillaTicket.textos_pdf(), con la misma fuente, tamaño y posición. Solo cambia
+quién escribe el archivo: reportlab arma todo el documento en memoria hasta save().
+"""
+import os
+import zlib
+from array import array
+from PyQt5.QtCore import QThread, pyqtSignal
+from utils.logger_config import setup_logger
+from utils.ticket_template import valores_ticket
+
+
+class ReimpresionCancelada(Exception):
+    """El usuario canceló la reimpresión antes de terminar."""
+
+
+def _texto_pdf(texto):
+    """Cadena literal de PDF en WinAnsiEncoding (la de las fuentes estándar)."""
+    codificado = texto.encode('cp1252', errors='replace')
+    return codificado.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class PaginaPDF:
+    """Página del ticket: las líneas de PlantillaTicket.textos_pdf() como operadores de texto de PDF."""
+
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+        self.ancho = plantilla.ancho_pdf
+        self.alto = plantilla.alto_pdf
+        self.fuentes = {}
+        for _, _, fuente, _, _, _, _ in plantilla.campos_pdf:
+            self.fuentes.setdefault(fuente, f"F{len(self.fuentes) + 1}")
+
+    def contenido(self, valores):
+        """Flujo de contenido de la página, comprimido con Flate."""
+        partes = [b"BT /%s %s Tf %.3f %.3f Td (%s) Tj ET\n"
+                  % (self.fuentes[fuente].encode(), str(tamano).encode(), x, y, _texto_pdf(texto))
+                  for x, y, fuente, tamano, texto in self.plantilla.textos_pdf(valores)]
+        return zlib.compress(b''.join(partes), 6)
+
+
+class EscritorPDF:
+    """
+    Escribe un PDF página por página sobre un archivo binario abierto. El catálogo y
+    las fuentes van al inicio, el árbol de páginas y la tabla xref al cerrar.
+    Las copias de una página comparten el mismo flujo de contenido.
+    """
+
+    def __init__(self, archivo, pagina):
+        self.archivo = archivo
+        self.posicion = 0
+        self.desplazamientos = array('Q', [0])  # Objeto 0: entrada libre de la xref
+        self.paginas = array('Q')
+        self._escribir(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._objeto(b"<< /Type /Catalog /Pages 2 0 R >>")
+        self.desplazamientos.append(0)  # Objeto 2 (páginas): se escribe al cerrar
+        fuentes = []
+        for fuente, nombre in pagina.fuentes.items():
+            numero = self._objeto(b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                                  % fuente.encode())
+            fuentes.append(b"/%s %d 0 R" % (nombre.encode(), numero))
+        self._caja = b"[0 0 %.4f %.4f]" % (pagina.ancho, pagina.alto)
+        self._recursos = b"<< /Font << " + b" ".join(fuentes) + b" >> >>"
+
+    def _escribir(self, datos):
+        self.archivo.write(datos)
+        self.posicion += len(datos)
+
+    def _objeto(self, cuerpo, numero=None):
+        if numero is None:
+            numero = len(self.desplazamientos)
+            self.desplazamientos.append(self.posicion)
+        else:
+            self.desplazamientos[numero] = self.posicion
+        self._escribir(b"%d 0 obj\n" % numero + cuerpo + b"\nendobj\n")
+        return numero
+
+    def agregar_pagina(self, contenido, copias=1):
+        flujo = self._objeto(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(contenido)
+                             + contenido + b"\nendstream")
+        pagina = b"<< /Type /Page /Parent 2 0 R /Resources %s /Contents %d 0 R >>" % (self._recursos, flujo)
+        for _ in range(copias):
+            self.paginas.append(self._objeto(pagina))
+
+    def cerrar(self):
+        """Escribe el árbol de páginas, la xref y el trailer. Devuelve la cantidad de páginas."""
+        self.desplazamientos[2] = self.posicion
+        self._escribir(b"2 0 obj\n<< /Type /Pages /MediaBox %s /Count %d /Kids [" % (self._caja, len(self.paginas)))
+        for inicio in range(0, len(self.paginas), 1000):
+            self._escribir(b"".join(b"%d 0 R " % n for n in self.paginas[inicio:inicio + 1000]))
+        self._escribir(b"] >>\nendobj\n")
+        inicio_xref = self.posicion
+        self._escribir(b"xref\n0 %d\n0000000000 65535 f \n" % len(self.desplazamientos))
+        for inicio in range(1, len(self.desplazamientos), 1000):
+            self._escribir(b"".join(b"%010d 00000 n \n" % d for d in self.desplazamientos[inicio:inicio + 1000]))
+        self._escribir(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                       % (len(self.desplazamientos), inicio_xref))
+        return len(self.paginas)
+
+
+def escribir_pdf_lote(plantilla, lotes, destino, copias=1, avance=None):
+    """
+    Escribe en `destino` un PDF con `copias` páginas por registro. `lotes` es un
+    iterable de listas de valores (valores_ticket). El archivo aparece completo o no
+    aparece. `avance(registros)` se llama tras cada lote y puede lanzar
+    ReimpresionCancelada. Devuelve la cantidad de páginas.
+    """
+    pagina = PaginaPDF(plantilla)
+    temporal = destino + '.tmp'
+    try:
+        with open(temporal, 'wb') as archivo:
+            escritor = EscritorPDF(archivo, pagina)
+            hechos = 0
+            for lote in lotes:
+                for valores in lote:
+                    escritor.agregar_pagina(pagina.contenido(valores), copias)
+                hechos += len(lote)
+                if avance:
+                    avance(hechos)
+            paginas = escritor.cerrar()
+        os.replace(temporal, destino)
+        return paginas
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def enviar_tspl_lote(plantilla, lotes, transporte, copias=1, avance=None):
+    """
+    Envía un único trabajo TSPL con `copias` etiquetas por registro, generado y
+    entregado al transporte por tramos. Devuelve la cantidad de etiquetas.
+    """
+    hechos = [0]
+
+    def partes():
+        for indice, lote in enumerate(lotes):
+            yield plantilla.tspl_lote(lote, copias, cabecera=(indice == 0))
+            hechos[0] += len(lote)
+            if avance:
+                avance(hechos[0])
+
+    transporte.enviar_partes(partes(), 'Reimpresión de tickets')
+    return hechos[0] * copias
+
+
+def lotes_de_registros(repositorio, filtros, nombres_producto, tamano_lote=500):
+    """Lotes de valores de ticket para los registros filtrados, con el nombre de cada producto."""
+    for filas in repositorio.iterar(tamano_lote=tamano_lote, **filtros):
+        yield [valores_ticket(fecha_hora, operario, cedula, producto, nombres_producto.get(producto, ''),
+                              cantidad, peso)
+               for fecha_hora, operario, cedula, producto, cantidad, peso in filas]
+
+
+class ReimpresionWorker(QThread):
+    """
+    Reimprime en segundo plano los registros que cumplen `filtros` (desde, hasta,
+    cedula, producto): a un PDF en `destino` o como un trabajo TSPL por `transporte`.
+    El repositorio se abre dentro del hilo (las conexiones SQLite no se comparten).
+    """
+    progreso = pyqtSignal(int, int)    # registros hechos, total
+    terminado = pyqtSignal(int, str)   # páginas o etiquetas, destino
+    error = pyqtSignal(str)
+
+    def __init__(self, ruta_db, filtros, plantilla, nombres_producto, destino=None, transporte=None,
+                 copias=1, tamano_lote=500):
+        super().__init__()
+        self.logger = setup_logger()
+        self.ruta_db = ruta_db
+        self.filtros = filtros
+        self.plantilla = plantilla
+        self.nombres_producto = nombres_producto
+        self.destino = destino
+        self.transporte = transporte
+        self.copias = copias
+        self.tamano_lote = tamano_lote
+        self._cancelado = False
+
+    def cancelar(self):
+        self._cancelado = True
+
+    def run(self):
+        from core.core_main_windows.models.record_model import RepositorioRegistros
+        repositorio = RepositorioRegistros(self.ruta_db)
+        try:
+            total = repositorio.contar(**self.filtros)
+            if not total:
+                self.error.emit("No hay registros que cumplan los filtros")
+                return
+
+            def avance(hechos):
+                self.progreso.emit(hechos, total)
+                if self._cancelado:
+                    raise ReimpresionCancelada()
+
+            lotes = lotes_de_registros(repositorio, self.filtros, self.nombres_producto, self.tamano_lote)
+            if self.destino:
+                cantidad = escribir_pdf_lote(self.plantilla, lotes, self.destino, self.copias, avance)
+                destino = self.destino
+            else:
+                cantidad = enviar_tspl_lote(self.plantilla, lotes, self.transporte, self.copias, avance)
+                destino = str(self.transporte)
+            self.logger.info(f"Reimpresión completada: {cantidad} tickets de {total} registros a {destino}")
+            self.terminado.emit(cantidad, destino)
+        except ReimpresionCancelada:
+            self.logger.info("Reimpresión cancelada por el usuario")
+            self.error.emit("Reimpresión cancelada")
+        except Exception as e:
+            self.logger.error(f"Error en la reimpresión: {str(e)}")
+            self.error.emit(str(e))
+        finally:
+            repositorio.cerrar()
+            if self.transporte is not None:
+                self.transporte.cerrar()
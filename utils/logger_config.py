@@ -1,45 +1,228 @@
+import atexit
+import copy
+import gzip
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import re
+import shutil
+import sys
+import threading
+from datetime import date, timedelta
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
 
-def setup_logger():
+CARPETA_LOGS = 'logs'
+ARCHIVO_CONFIG = 'logging_config.json'  # Opcional; ver CONFIG_POR_DEFECTO
+
+# Claves de logging_config.json. En "niveles" se indica el nivel de cada logger por su
+# nombre corto (el que recibe setup_logger), por ejemplo {"serial": "DEBUG"}.
+CONFIG_POR_DEFECTO = {
+    'nivel': 'INFO',
+    'niveles': {},
+    'consola': True,
+    'max_mb': 10,           # Tamaño máximo del archivo del día antes de rotarlo
+    'dias_retencion': 30,   # Los logs más antiguos se borran
+    'comprimir': True,      # Los archivos rotados se guardan como .log.gz
+}
+
+_cola = None
+_listener = None
+_candado = threading.Lock()
+
+
+class ManejadorRotativo(BaseRotatingHandler):
+    """
+    Archivo de log diario `<prefijo>_AAAAMMDD.log` que rota al cambiar el día o al
+    superar `max_bytes`. Cada archivo cerrado se renombra a `<prefijo>_AAAAMMDD.N.log`
+    (N en orden cronológico) y se comprime con gzip; los de más de `dias_retencion`
+    días se borran. Los logs de días anteriores que quedaron abiertos al cerrar el
+    programa se archivan con el primer registro.
+    """
+
+    def __init__(self, carpeta=CARPETA_LOGS, prefijo='bascula', max_bytes=10 * 2 ** 20,
+                 dias_retencion=30, comprimir=True):
+        os.makedirs(carpeta, exist_ok=True)
+        self.carpeta = carpeta
+        self.prefijo = prefijo
+        self.max_bytes = max_bytes
+        self.dias_retencion = dias_retencion
+        self.comprimir = comprimir
+        self.dia = date.today()
+        self._dia_registro = self.dia
+        self._archivar_pendientes = True
+        self._patron = re.compile(re.escape(prefijo) + r'_(\d{8})(\.\d+)?\.log(\.gz)?$')
+        super().__init__(self._ruta(self.dia), 'a', encoding='utf-8', delay=True)
+
+    def _ruta(self, dia):
+        return os.path.join(self.carpeta, f"{self.prefijo}_{dia.strftime('%Y%m%d')}.log")
+
+    def emit(self, record):
+        if self._archivar_pendientes:
+            self._archivar_pendientes = False
+            try:
+                self._archivar_anteriores()
+            except Exception:
+                self.handleError(record)
+        super().emit(record)
+
+    def shouldRollover(self, record):
+        self._dia_registro = date.fromtimestamp(record.created)
+        if self._dia_registro > self.dia:
+            return True
+        if self.max_bytes and self.stream is not None and self.stream.tell() >= self.max_bytes:
+            return True
+        return False
+
+    def doRollover(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self._archivar(self.baseFilename)
+        if self._dia_registro > self.dia:
+            self.dia = self._dia_registro
+            self.baseFilename = os.path.abspath(self._ruta(self.dia))
+            self._purgar()
+        # FileHandler.emit abre el archivo nuevo
+
+    def _archivar(self, ruta):
+        """Renombra un log cerrado a la siguiente parte numerada del día y lo comprime."""
+        if not os.path.exists(ruta):
+            return
+        if os.path.getsize(ruta) == 0:
+            os.remove(ruta)
+            return
+        base = ruta[:-len('.log')]
+        n = 1
+        while os.path.exists(f"{base}.{n}.log") or os.path.exists(f"{base}.{n}.log.gz"):
+            n += 1
+        parte = f"{base}.{n}.log"
+        os.replace(ruta, parte)
+        if self.comprimir:
+            self._comprimir(parte)
+
+    @staticmethod
+    def _comprimir(ruta):
+        temporal = ruta + '.gz.tmp'
+        with open(ruta, 'rb') as origen, gzip.open(temporal, 'wb', compresslevel=6) as destino:
+            shutil.copyfileobj(origen, destino, 1 << 20)
+        os.replace(temporal, ruta + '.gz')
+        os.remove(ruta)
+
+    def _archivar_anteriores(self):
+        activo = os.path.basename(self.baseFilename)
+        for nombre in os.listdir(self.carpeta):
+            coincidencia = self._patron.match(nombre)
+            if coincidencia is None or nombre == activo:
+                continue
+            ruta = os.path.join(self.carpeta, nombre)
+            if coincidencia.group(2) is None and coincidencia.group(3) is None:
+                self._archivar(ruta)  # Archivo diario de un día anterior
+            elif coincidencia.group(3) is None and self.comprimir:
+                self._comprimir(ruta)  # Parte rotada sin comprimir (interrupción durante la compresión)
+        self._purgar()
+
+    def _purgar(self):
+        if not self.dias_retencion:
+            return
+        limite = (self.dia - timedelta(days=self.dias_retencion)).strftime('%Y%m%d')
+        for nombre in os.listdir(self.carpeta):
+            coincidencia = self._patron.match(nombre)
+            if coincidencia is not None and coincidencia.group(1) < limite:
+                os.remove(os.path.join(self.carpeta, nombre))
+
+
+class ManejadorCola(QueueHandler):
     """
-    Configura el sistema de logging para la aplicación.
-    Crea un directorio de logs si no existe y configura un logger con un archivo de log diario.
+    Encola el registro sin formatearlo: fecha, nivel y escritura se resuelven en el
+    hilo del QueueListener. La cola es del mismo proceso, así que no hace falta
+    convertir el registro a texto como hace QueueHandler por defecto.
     """
-    # Crear directorio de logs si no existe
-    log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
 
-    # Configurar el formato del log
-    log_format = '%(asctime)s - %(levelname)s - %(message)s'
-    date_format = '%Y-%m-%d %H:%M:%S'
-    formatter = logging.Formatter(log_format, date_format)
+    def prepare(self, record):
+        if record.args:
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _leer_config():
+    config = dict(CONFIG_POR_DEFECTO)
+    if os.path.exists(ARCHIVO_CONFIG):
+        try:
+            with open(ARCHIVO_CONFIG, encoding='utf-8') as f:
+                config.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"No se pudo leer {ARCHIVO_CONFIG}, se usa la configuración por defecto: {e}", file=sys.stderr)
+    return config
+
+
+def _nombre_logger(nombre):
+    return 'bascula' if not nombre or nombre == 'bascula' else f'bascula.{nombre}'
+
+
+def _configurar():
+    global _cola, _listener
+    config = _leer_config()
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%Y-%m-%d %H:%M:%S')
+
+    manejadores = []
+    archivo = ManejadorRotativo(CARPETA_LOGS, 'bascula', int(config['max_mb'] * 2 ** 20),
+                                config['dias_retencion'], config['comprimir'])
+    archivo.setFormatter(formatter)
+    manejadores.append(archivo)
+    # En un ejecutable sin consola (PyInstaller --windowed) sys.stderr es None
+    if config['consola'] and sys.stderr is not None:
+        consola = logging.StreamHandler()
+        consola.setFormatter(formatter)
+        manejadores.append(consola)
+
+    _cola = queue.SimpleQueue()
+    _listener = QueueListener(_cola, *manejadores, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
 
-    # Obtener el logger principal
     logger = logging.getLogger('bascula')
-    
-    # Si el logger ya tiene handlers, no agregar más
-    if logger.handlers:
-        return logger
-
-    # Configurar nivel de log
-    logger.setLevel(logging.INFO)
-
-    # Crear handler para archivo
-    log_file = os.path.join(log_dir, f'bascula_{datetime.now().strftime("%Y%m%d")}.log')
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.INFO)
-
-    # Crear handler para consola
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
-
-    # Agregar handlers al logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-    return logger 
\ No newline at end of file
+    logger.setLevel(config['nivel'])
+    logger.addHandler(ManejadorCola(_cola))
+    for nombre, nivel in config['niveles'].items():
+        logging.getLogger(_nombre_logger(nombre)).setLevel(nivel)
+
+
+def setup_logger(nombre=None):
+    """
+    Devuelve el logger de la aplicación ('bascula') o, con `nombre`, el logger hijo
+    'bascula.<nombre>' (por ejemplo 'serial'), cuyo nivel se puede configurar aparte.
+
+    La primera llamada configura el logging: los registros se encolan y un hilo
+    (QueueListener) los escribe en logs/bascula_AAAAMMDD.log y en la consola, así
+    quien registra nunca espera al disco. El archivo rota por día y por tamaño, y los
+    archivos rotados se comprimen y se borran pasados los días de retención.
+    """
+    with _candado:
+        if _listener is None:
+            _configurar()
+    return logging.getLogger(_nombre_logger(nombre))
+
+
+def establecer_nivel(nombre, nivel):
+    """Cambia en caliente el nivel de un logger, p. ej. establecer_nivel('serial', 'DEBUG')."""
+    logging.getLogger(_nombre_logger(nombre)).setLevel(nivel)
+
+
+def detener_logging():
+    """Escribe los registros pendientes y detiene el hilo de logging."""
+    global _listener
+    with _candado:
+        if _listener is None:
+            return
+        _listener.stop()
+        for manejador in _listener.handlers:
+            manejador.close()
+        _listener = None
+        # Lo que se registre después se pierde en la cola; se quita el manejador
+        logger = logging.getLogger('bascula')
+        for manejador in list(logger.handlers):
+            if isinstance(manejador, ManejadorCola):
+                logger.removeHandler(manejador)
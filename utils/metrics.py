@@ -0,0 +1,291 @@
+"""
+Métricas de la estación: contadores, indicadores e histogramas de latencia con
+cubetas fijas, para medir en producción los caminos calientes (leer_peso,
+guardar_registro, cargar_registros, print_ticket).
+
+Registrar una observación no guarda la observación: suma 1 a una cubeta de un
+array de tamaño fijo, así que el costo y la memoria no crecen con el tiempo que la
+estación lleva encendida. Cada métrica tiene su candado: se registra desde la GUI,
+la cola de impresión y los workers mientras el hilo de volcado lee. Los percentiles se estiman interpolando dentro de la
+cubeta (error acotado por el ancho de la cubeta: diez límites por década).
+
+Las métricas se vuelcan cada `intervalo` segundos, como una línea JSON, a
+logs/metricas_<estacion>.jsonl, para comparar estaciones.
+
+Uso:
+    metrica = metricas().histograma('guardar_registro')
+    with metrica.medir():
+        ...
+
+    @cronometrado('print_ticket')
+    def print_ticket(...): ...
+
+Los slots de Qt conectados a señales con argumentos (clicked(bool)) deben usar
+`with ...medir()`: PyQt decide cuántos argumentos pasar mirando la firma del
+slot, y la del decorador acepta cualquiera.
+"""
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+# Límites superiores de las cubetas, en nanosegundos: 1 µs .. 80 s, diez por década
+# (cada cubeta es ~25 % más ancha que la anterior). Lo que supera el último límite
+# cae en una cubeta de desborde.
+LIMITES_LATENCIA_NS = tuple(int(m * 10 ** e) for e in range(3, 11) for m in (1, 1.2, 1.5, 2, 2.5, 3, 4, 5, 6, 8))
+CARPETA_METRICAS = 'logs'
+
+
+class Contador:
+    """Valor que solo aumenta (registros guardados, tickets impresos, errores)."""
+    __slots__ = ('nombre', 'valor', '_candado')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.valor = 0
+        self._candado = threading.Lock()
+
+    def incrementar(self, cantidad=1):
+        with self._candado:
+            self.valor += cantidad
+
+
+class Indicador:
+    """Último valor de una magnitud que sube y baja (trabajos en cola, lecturas descartadas)."""
+    __slots__ = ('nombre', 'valor')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.valor = 0
+
+    def establecer(self, valor):
+        self.valor = valor
+
+
+class _Cronometro:
+    __slots__ = ('histograma', 'inicio')
+
+    def __init__(self, histograma):
+        self.histograma = histograma
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *excepcion):
+        # Igual que Histograma.observar, sin la llamada extra
+        valor = time.perf_counter_ns() - self.inicio
+        histograma = self.histograma
+        indice = bisect_left(histograma.limites, valor)
+        with histograma._candado:
+            histograma.cubetas[indice] += 1
+            histograma.total += 1
+            histograma.suma += valor
+            if valor > histograma.maximo:
+                histograma.maximo = valor
+        return False
+
+
+class Histograma:
+    """
+    Distribución de duraciones en nanosegundos sobre cubetas fijas. Cada
+    observación toma el candado del histograma, y las lecturas trabajan sobre una
+    copia tomada con el mismo candado, así que el conteo, la suma y las cubetas de
+    un resumen siempre son coherentes entre sí.
+    """
+    __slots__ = ('nombre', 'limites', 'cubetas', 'total', 'suma', 'maximo', '_candado')
+
+    def __init__(self, nombre, limites=LIMITES_LATENCIA_NS):
+        self.nombre = nombre
+        self.limites = list(limites)
+        self.cubetas = array('Q', bytes(8 * (len(self.limites) + 1)))
+        self.total = 0
+        self.suma = 0
+        self.maximo = 0
+        self._candado = threading.Lock()
+
+    def observar(self, nanosegundos):
+        indice = bisect_left(self.limites, nanosegundos)
+        with self._candado:
+            self.cubetas[indice] += 1
+            self.total += 1
+            self.suma += nanosegundos
+            if nanosegundos > self.maximo:
+                self.maximo = nanosegundos
+
+    def medir(self):
+        """Context manager que observa la duración del bloque."""
+        return _Cronometro(self)
+
+    def copia(self):
+        """(cubetas, total, suma, maximo) en un mismo instante."""
+        with self._candado:
+            return array('Q', self.cubetas), self.total, self.suma, self.maximo
+
+    def percentil(self, p):
+        """Percentil `p` (0-100) en nanosegundos, interpolado dentro de su cubeta."""
+        cubetas, total, _, maximo = self.copia()
+        return self._percentil(cubetas, total, maximo, p)
+
+    def _percentil(self, cubetas, total, maximo, p):
+        if not total:
+            return 0
+        objetivo = total * p / 100
+        acumulado = 0
+        for i, cantidad in enumerate(cubetas):
+            if cantidad and acumulado + cantidad >= objetivo:
+                inferior = self.limites[i - 1] if i else 0
+                superior = self.limites[i] if i < len(self.limites) else maximo
+                estimado = inferior + (superior - inferior) * (objetivo - acumulado) / cantidad
+                return min(estimado, maximo)
+            acumulado += cantidad
+        return maximo
+
+    def resumen(self, con_cubetas=False):
+        """
+        Conteo, media, máximo y p50/p95/p99 en microsegundos; con `con_cubetas`,
+        también las cubetas no vacías ({índice: conteo}).
+        """
+        cubetas, total, suma, maximo = self.copia()
+        resumen = {
+            'n': total,
+            'media_us': round(suma / total / 1000, 1) if total else 0,
+            'max_us': round(maximo / 1000, 1),
+            'p50_us': round(self._percentil(cubetas, total, maximo, 50) / 1000, 1),
+            'p95_us': round(self._percentil(cubetas, total, maximo, 95) / 1000, 1),
+            'p99_us': round(self._percentil(cubetas, total, maximo, 99) / 1000, 1),
+        }
+        if con_cubetas:
+            resumen['cubetas'] = {i: c for i, c in enumerate(cubetas) if c}
+        return resumen
+
+
+class RegistroMetricas:
+    """Métricas por nombre; pedir dos veces el mismo nombre devuelve la misma métrica."""
+
+    def __init__(self, estacion=None):
+        self.estacion = estacion or socket.gethostname()
+        self.inicio = datetime.now().isoformat(timespec='seconds')
+        self.contadores = {}
+        self.indicadores = {}
+        self.histogramas = {}
+        self._candado = threading.Lock()
+        self._candado_volcado = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._ultimo_volcado = None
+
+    def _obtener(self, tabla, clase, nombre, *argumentos):
+        metrica = tabla.get(nombre)
+        if metrica is None:
+            with self._candado:
+                metrica = tabla.setdefault(nombre, clase(nombre, *argumentos))
+        return metrica
+
+    def contador(self, nombre):
+        return self._obtener(self.contadores, Contador, nombre)
+
+    def indicador(self, nombre):
+        return self._obtener(self.indicadores, Indicador, nombre)
+
+    def histograma(self, nombre, limites=LIMITES_LATENCIA_NS):
+        return self._obtener(self.histogramas, Histograma, nombre, limites)
+
+    def instantanea(self, con_cubetas=False):
+        """Estado actual de todas las métricas, listo para mostrar o volcar."""
+        with self._candado:
+            contadores, indicadores = list(self.contadores.items()), list(self.indicadores.items())
+            histogramas = list(self.histogramas.items())
+        return {
+            'contadores': {nombre: c.valor for nombre, c in sorted(contadores)},
+            'indicadores': {nombre: i.valor for nombre, i in sorted(indicadores)},
+            'histogramas': {nombre: h.resumen(con_cubetas) for nombre, h in sorted(histogramas)},
+        }
+
+    # --- VOLCADO ---
+    def ruta_volcado(self):
+        return os.path.join(CARPETA_METRICAS, f"metricas_{self.estacion}.jsonl")
+
+    def volcar(self, ruta=None):
+        """
+        Agrega una línea JSON con las métricas acumuladas desde el arranque y las
+        cubetas no vacías de cada histograma ({índice: conteo}); la primera línea del
+        archivo lleva además los límites de las cubetas. No escribe nada si no hubo
+        cambios desde el volcado anterior. Devuelve True si escribió. El hilo de
+        volcado y el botón del panel pueden llamarlo a la vez: las líneas se escriben
+        de a una.
+        """
+        with self._candado_volcado:
+            datos = self.instantanea(con_cubetas=True)
+            if datos == self._ultimo_volcado:
+                return False
+            self._ultimo_volcado = datos
+            ruta = ruta or self.ruta_volcado()
+            os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+            linea = {'estacion': self.estacion, 'fecha': datetime.now().isoformat(timespec='seconds'),
+                     'desde': self.inicio, **datos}
+            if not os.path.exists(ruta) or os.path.getsize(ruta) == 0:
+                linea['limites_us'] = [limite / 1000 for limite in LIMITES_LATENCIA_NS]
+            with open(ruta, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(linea, ensure_ascii=False, separators=(',', ':')) + '\n')
+            return True
+
+    def iniciar_volcado(self, intervalo=300.0, ruta=None):
+        """Vuelca en un hilo de fondo cada `intervalo` segundos."""
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._volcar_periodicamente, args=(intervalo, ruta),
+                                      name="volcado_metricas", daemon=True)
+        self._hilo.start()
+
+    def _volcar_periodicamente(self, intervalo, ruta):
+        from utils.logger_config import setup_logger
+        while not self._detener.wait(intervalo):
+            try:
+                self.volcar(ruta)
+            except Exception as e:
+                setup_logger().error(f"Error al volcar las métricas: {str(e)}")
+
+    def detener_volcado(self, ruta=None):
+        """Detiene el hilo de volcado y hace un último volcado."""
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join(timeout=5)
+            self._hilo = None
+        self.volcar(ruta)
+
+
+_registro = None
+_candado_registro = threading.Lock()
+
+
+def metricas():
+    """Registro de métricas compartido por toda la aplicación."""
+    global _registro
+    with _candado_registro:
+        if _registro is None:
+            _registro = RegistroMetricas()
+        return _registro
+
+
+def cronometrado(nombre):
+    """Decorador que observa la duración de cada llamada en el histograma `nombre`."""
+    def decorador(funcion):
+        histograma = metricas().histograma(nombre)
+        reloj = time.perf_counter_ns
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = reloj()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                histograma.observar(reloj() - inicio)
+        return envoltura
+    return decorador
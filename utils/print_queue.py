@@ -0,0 +1,312 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from PyQt5.QtCore import QThread, pyqtSignal
+from utils.logger_config import setup_logger
+from utils.ticket_template import compilar_plantilla, valores_ticket
+
+# Estados de un trabajo
+EN_COLA = 'en_cola'
+RENDERIZANDO = 'renderizando'
+ENVIADO = 'enviado'
+FALLIDO = 'fallido'
+REINTENTANDO = 'reintentando'
+
+# Orden de los datos de un registro al imprimir (mismo que PrintManager.print_ticket)
+CAMPOS_TICKET = ('fecha_hora', 'operario', 'cedula', 'producto', 'nombre_pro', 'cantidad', 'peso')
+
+
+class ErrorImpresion(Exception):
+    """La impresora no pudo procesar el trabajo; la cola lo reintentará."""
+
+
+class ErrorImpresionPermanente(ErrorImpresion):
+    """El trabajo no se puede imprimir con la configuración actual (impresora no compatible): no se reintenta."""
+
+
+class TrabajoImpresion:
+    """Un ticket pendiente: datos del registro, copias, intentos hechos y cuándo reintentar."""
+
+    def __init__(self, datos, id_trabajo=None, intentos=0, creado=None, copias=1):
+        self.id = id_trabajo or uuid.uuid4().hex[:12]
+        self.datos = {campo: str(datos.get(campo, '')) for campo in CAMPOS_TICKET}
+        self.intentos = intentos
+        self.creado = creado or time.time()
+        self.copias = copias
+
+    def a_dict(self):
+        return {'id': self.id, 'datos': self.datos, 'intentos': self.intentos, 'creado': self.creado,
+                'copias': self.copias}
+
+    @classmethod
+    def desde_dict(cls, d):
+        return cls(d['datos'], d['id'], d.get('intentos', 0), d.get('creado'), d.get('copias', 1))
+
+
+# --- IMPRESORAS ---
+# Una impresora de la cola tiene dos pasos: renderizar(datos, copias) -> contenido y
+# enviar(contenido). Las copias de un trabajo van juntas en un solo envío. enviar() puede
+# devolver un texto para el usuario (p. ej. dónde quedó guardado el PDF), que llega como
+# detalle del estado ENVIADO. cerrar() libera la conexión con la impresora al detener la cola.
+# Cualquier excepción en cualquiera de los dos pasos es un intento fallido;
+# ErrorImpresionPermanente además descarta el trabajo sin reintentarlo.
+
+class ImpresoraPrintManager:
+    """Adaptador de PrintManager (impresoras de Windows) para la cola."""
+
+    def __init__(self, print_manager):
+        self.print_manager = print_manager
+
+    def renderizar(self, datos, copias=1):
+        self.print_manager.obtener_plantilla()  # Valida la configuración antes de intentar imprimir
+        return datos, copias
+
+    def enviar(self, contenido):
+        datos, copias = contenido
+        self.print_manager.ultimo_error = None
+        if not self.print_manager.print_ticket(*(datos[c] for c in CAMPOS_TICKET), copias=copias):
+            mensaje = self.print_manager.ultimo_error or "No se pudo imprimir el ticket"
+            if self.print_manager.error_permanente:
+                raise ErrorImpresionPermanente(mensaje)
+            raise ErrorImpresion(mensaje)
+        if self.print_manager.ultimo_pdf:
+            # Sin diálogo, "Microsoft Print to PDF" guarda en Documentos: se informa dónde
+            return f"PDF guardado en {self.print_manager.ultimo_pdf}"
+        return None
+
+    def cerrar(self):
+        self.print_manager.cerrar()
+
+
+class ImpresoraTransporte:
+    """
+    Impresora de etiquetas TSPL sobre cualquier transporte de utils.printer_transport
+    (socket TCP 9100, CUPS, archivo o carpeta de spool). No necesita Windows.
+    """
+
+    def __init__(self, transporte, config):
+        self.transporte = transporte
+        self.plantilla = compilar_plantilla(config)
+
+    def renderizar(self, datos, copias=1):
+        return self.plantilla.tspl(valores_ticket(*(datos[c] for c in CAMPOS_TICKET)), copias)
+
+    def enviar(self, contenido):
+        self.transporte.enviar(contenido)
+
+    def cerrar(self):
+        self.transporte.cerrar()
+
+
+def leer_diario(ruta):
+    """
+    Reconstruye los trabajos pendientes desde el diario de la cola (JSON por línea):
+    '+' agrega un trabajo, 'i' actualiza sus intentos y '-' lo saca de la cola.
+    Una última línea cortada (caída a mitad de escritura) se ignora.
+    """
+    trabajos = {}
+    if not os.path.exists(ruta):
+        return trabajos
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                evento = json.loads(linea)
+                if evento['op'] == '+':
+                    trabajo = TrabajoImpresion.desde_dict(evento['trabajo'])
+                    trabajos[trabajo.id] = trabajo
+                elif evento['op'] == 'i' and evento['id'] in trabajos:
+                    trabajos[evento['id']].intentos = evento['intentos']
+                elif evento['op'] == '-':
+                    trabajos.pop(evento['id'], None)
+            except (ValueError, KeyError, TypeError):
+                continue
+    return trabajos
+
+
+class ColaImpresion(QThread):
+    """
+    Cola de impresión con un hilo propio: `encolar()` retorna de inmediato y el hilo
+    de la interfaz nunca espera a la impresora.
+
+    Cada trabajo emite `estado_trabajo(id, estado, detalle)` al pasar por EN_COLA,
+    RENDERIZANDO, ENVIADO, REINTENTANDO o FALLIDO. Un intento fallido se reintenta
+    con espera exponencial (espera_base * 2^(intento-1), hasta espera_maxima) y tras
+    `max_intentos` el trabajo queda FALLIDO.
+
+    Los cambios se agregan a un diario en `ruta_persistencia` (una línea por evento,
+    costo constante por trabajo), así los pendientes sobreviven a un cierre o caída y
+    se retoman al volver a crear la cola. El diario se compacta al abrirlo y cuando
+    crece demasiado. Un trabajo interrumpido a mitad de envío se vuelve a imprimir.
+    """
+    estado_trabajo = pyqtSignal(str, str, str)
+
+    def __init__(self, impresora, ruta_persistencia='data/cola_impresion.jsonl',
+                 max_intentos=5, espera_base=1.0, espera_maxima=60.0):
+        super().__init__()
+        self.logger = setup_logger()
+        self.impresora = impresora
+        self.ruta_persistencia = ruta_persistencia
+        self.max_intentos = max_intentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._condicion = threading.Condition()
+        self._pendientes = []          # heap: (momento de envío, secuencia, trabajo)
+        self._secuencia = itertools.count()
+        self._en_proceso = None        # Trabajo que está imprimiendo el hilo
+        self._activo = False
+        self._diario = None
+        self._lineas_diario = 0
+        self._cargar_pendientes()
+
+    # --- PERSISTENCIA ---
+    @staticmethod
+    def hay_pendientes(ruta='data/cola_impresion.jsonl'):
+        try:
+            return bool(leer_diario(ruta))
+        except OSError:
+            return False
+
+    def _cargar_pendientes(self):
+        try:
+            trabajos = list(leer_diario(self.ruta_persistencia).values())
+        except OSError as e:
+            self.logger.error(f"No se pudo leer la cola de impresión guardada: {str(e)}")
+            trabajos = []
+        ahora = time.monotonic()
+        for trabajo in trabajos:
+            heapq.heappush(self._pendientes, (ahora, next(self._secuencia), trabajo))
+        if trabajos:
+            self.logger.info(f"Trabajos de impresión pendientes recuperados: {len(trabajos)}")
+        self._compactar()
+
+    def _trabajos_pendientes(self):
+        trabajos = [t for _, _, t in sorted(self._pendientes)]
+        if self._en_proceso is not None:
+            trabajos.insert(0, self._en_proceso)
+        return trabajos
+
+    def _compactar(self):
+        """Reescribe el diario con solo los trabajos pendientes (con la condición tomada)."""
+        if self._diario is not None:
+            self._diario.close()
+            self._diario = None
+        trabajos = self._trabajos_pendientes()
+        try:
+            directorio = os.path.dirname(self.ruta_persistencia)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            temporal = self.ruta_persistencia + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                for trabajo in trabajos:
+                    f.write(json.dumps({'op': '+', 'trabajo': trabajo.a_dict()}, ensure_ascii=False) + '\n')
+            os.replace(temporal, self.ruta_persistencia)
+            self._diario = open(self.ruta_persistencia, 'a', encoding='utf-8')
+        except OSError as e:
+            self.logger.error(f"No se pudo guardar la cola de impresión: {str(e)}")
+        self._lineas_diario = len(trabajos)
+
+    def _anotar(self, evento):
+        """Agrega un evento al diario (con la condición tomada)."""
+        if self._diario is None:
+            return
+        try:
+            self._diario.write(json.dumps(evento, ensure_ascii=False) + '\n')
+            self._diario.flush()
+        except OSError as e:
+            self.logger.error(f"No se pudo guardar la cola de impresión: {str(e)}")
+        self._lineas_diario += 1
+        if self._lineas_diario > 1000 and self._lineas_diario > 4 * (len(self._pendientes) + 1):
+            self._compactar()
+
+    # --- API ---
+    def encolar(self, datos, copias=1):
+        """Agrega un trabajo con `copias` tickets del registro. Devuelve el id del trabajo."""
+        if copias < 1:
+            raise ValueError("El número de copias debe ser al menos 1")
+        trabajo = TrabajoImpresion(datos, copias=copias)
+        # Antes de despertar al hilo: EN_COLA siempre llega antes que RENDERIZANDO
+        self.estado_trabajo.emit(trabajo.id, EN_COLA, "")
+        with self._condicion:
+            heapq.heappush(self._pendientes, (time.monotonic(), next(self._secuencia), trabajo))
+            self._anotar({'op': '+', 'trabajo': trabajo.a_dict()})
+            self._condicion.notify()
+        return trabajo.id
+
+    def pendientes(self):
+        with self._condicion:
+            return len(self._pendientes) + (self._en_proceso is not None)
+
+    def start(self, *args):
+        self._activo = True  # Antes de arrancar, para que un detener() temprano no se pierda
+        super().start(*args)
+
+    def detener(self, espera_ms=5000):
+        """Detiene el hilo al terminar el trabajo en curso; los pendientes quedan guardados."""
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify()
+        self.wait(espera_ms)
+        with self._condicion:
+            if self._diario is not None:
+                self._diario.close()
+                self._diario = None
+        try:
+            self.impresora.cerrar()
+        except Exception as e:
+            self.logger.error(f"Error al cerrar la impresora: {str(e)}")
+
+    # --- HILO ---
+    def run(self):
+        while True:
+            with self._condicion:
+                while self._activo:
+                    if self._pendientes:
+                        espera = self._pendientes[0][0] - time.monotonic()
+                        if espera <= 0:
+                            break
+                        self._condicion.wait(espera)
+                    else:
+                        self._condicion.wait()
+                if not self._activo:
+                    return
+                _, _, trabajo = heapq.heappop(self._pendientes)
+                self._en_proceso = trabajo
+            self._procesar(trabajo)
+
+    def _procesar(self, trabajo):
+        trabajo.intentos += 1
+        try:
+            self.estado_trabajo.emit(trabajo.id, RENDERIZANDO, "")
+            contenido = self.impresora.renderizar(trabajo.datos, trabajo.copias)
+            detalle = self.impresora.enviar(contenido) or ""
+        except Exception as e:
+            self._fallo(trabajo, str(e), reintentar=not isinstance(e, ErrorImpresionPermanente))
+            return
+        with self._condicion:
+            self._en_proceso = None
+            self._anotar({'op': '-', 'id': trabajo.id})
+        self.logger.info(f"Trabajo de impresión {trabajo.id} enviado (intento {trabajo.intentos})"
+                         + (f": {detalle}" if detalle else ""))
+        self.estado_trabajo.emit(trabajo.id, ENVIADO, detalle)
+
+    def _fallo(self, trabajo, mensaje, reintentar=True):
+        if not reintentar or trabajo.intentos >= self.max_intentos:
+            with self._condicion:
+                self._en_proceso = None
+                self._anotar({'op': '-', 'id': trabajo.id})
+            motivo = f"tras {trabajo.intentos} intentos" if reintentar else "sin reintentar"
+            self.logger.error(f"Trabajo de impresión {trabajo.id} descartado {motivo}: {mensaje}")
+            self.estado_trabajo.emit(trabajo.id, FALLIDO, mensaje)
+            return
+        espera = min(self.espera_base * 2 ** (trabajo.intentos - 1), self.espera_maxima)
+        with self._condicion:
+            self._en_proceso = None
+            heapq.heappush(self._pendientes, (time.monotonic() + espera, next(self._secuencia), trabajo))
+            self._anotar({'op': 'i', 'id': trabajo.id, 'intentos': trabajo.intentos})
+        self.logger.warning(f"Trabajo de impresión {trabajo.id} falló (intento {trabajo.intentos}), "
+                            f"reintento en {espera:.1f} s: {mensaje}")
+        self.estado_trabajo.emit(trabajo.id, REINTENTANDO, f"{mensaje} (reintento en {espera:.0f} s)")
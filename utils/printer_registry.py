@@ -0,0 +1,260 @@
+"""
+Registro de impresoras instaladas: nombres, controlador, puerto y estado de cada una,
+enumerados una vez y guardados en memoria.
+
+El camino de impresión y el panel de administración consultan el registro en lugar
+del sistema operativo; la enumeración se repite cada `vigencia` segundos al leer, o en
+un hilo de fondo con iniciar(), o a pedido con refrescar(). Tras cada refresco se
+emite `actualizado`.
+
+El acceso al sistema está en un backend intercambiable:
+  - BackendWin32: win32print (EnumPrinters nivel 2 y GetDefaultPrinter).
+  - BackendCUPS: `lpstat -p` y `lpstat -d`.
+  - BackendFalso: impresoras en memoria, para probar en Linux sin impresoras reales.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import NamedTuple
+from PyQt5.QtCore import QObject, QCoreApplication, pyqtSignal
+from utils.logger_config import setup_logger
+from utils.printer_transport import describir_estado_win32
+
+# Modelos TSC reconocidos en el nombre o el controlador de la impresora
+MODELOS_TSC = ('TSC', 'TTP-247', 'TTP-345', 'TDP-247', 'TDP-345')
+
+# PRINTER_ATTRIBUTE_WORK_OFFLINE: la impresora está marcada como "Usar sin conexión"
+_ATRIBUTO_SIN_CONEXION = 0x00000400
+
+
+class InfoImpresora(NamedTuple):
+    nombre: str
+    controlador: str = ''
+    puerto: str = ''
+    lista: bool = True
+    mensaje: str = "La impresora está lista"
+    trabajos: int = 0
+
+    @property
+    def es_tsc(self):
+        texto = f"{self.nombre} {self.controlador}".upper()
+        return any(modelo in texto for modelo in MODELOS_TSC)
+
+
+# --- BACKENDS ---
+# Un backend tiene enumerar() -> [InfoImpresora] y predeterminada() -> nombre o None.
+
+class BackendWin32:
+    """Impresoras locales de Windows."""
+
+    def enumerar(self):
+        import win32print
+        impresoras = []
+        for datos in win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL, None, 2):
+            lista, mensaje = describir_estado_win32(datos.get('Status', 0))
+            if lista and datos.get('Attributes', 0) & _ATRIBUTO_SIN_CONEXION:
+                lista, mensaje = False, "Estado de la impresora: Fuera de línea"
+            impresoras.append(InfoImpresora(datos['pPrinterName'], datos.get('pDriverName') or '',
+                                            datos.get('pPortName') or '', lista, mensaje, datos.get('cJobs', 0)))
+        return impresoras
+
+    def predeterminada(self):
+        import win32print
+        try:
+            return win32print.GetDefaultPrinter()
+        except Exception:
+            return None
+
+
+class BackendCUPS:
+    """Colas de CUPS; la salida de lpstat se pide en inglés (LC_ALL=C) para interpretarla."""
+
+    def __init__(self, timeout=10.0):
+        self.timeout = timeout
+
+    def _lpstat(self, *argumentos):
+        resultado = subprocess.run(['lpstat', *argumentos], capture_output=True, timeout=self.timeout,
+                                   env={**os.environ, 'LC_ALL': 'C'})
+        return resultado.stdout.decode(errors='replace')
+
+    def enumerar(self):
+        impresoras = []
+        for linea in self._lpstat('-p').splitlines():
+            partes = linea.split()
+            if len(partes) < 3 or partes[0] != 'printer':
+                continue
+            if 'disabled' in linea:
+                impresoras.append(InfoImpresora(partes[1], lista=False,
+                                                mensaje=f"La cola '{partes[1]}' está deshabilitada"))
+            else:
+                impresoras.append(InfoImpresora(partes[1]))
+        return impresoras
+
+    def predeterminada(self):
+        salida = self._lpstat('-d')
+        if ':' in salida and 'no system default' not in salida:
+            return salida.split(':', 1)[1].strip() or None
+        return None
+
+
+class BackendFalso:
+    """
+    Impresoras en memoria. `demora` simula lo que tarda el sistema en enumerar y
+    `enumeraciones` cuenta las consultas hechas al "sistema".
+    """
+
+    def __init__(self, impresoras=(), predeterminada=None, demora=0.0):
+        self.impresoras = {info.nombre: info for info in impresoras}
+        self._predeterminada = predeterminada
+        self.demora = demora
+        self.enumeraciones = 0
+
+    def cambiar_estado(self, nombre, lista, mensaje):
+        self.impresoras[nombre] = self.impresoras[nombre]._replace(lista=lista, mensaje=mensaje)
+
+    def enumerar(self):
+        self.enumeraciones += 1
+        if self.demora:
+            time.sleep(self.demora)
+        return list(self.impresoras.values())
+
+    def predeterminada(self):
+        return self._predeterminada
+
+
+def backend_del_sistema():
+    if sys.platform == 'win32':
+        return BackendWin32()
+    if shutil.which('lpstat'):
+        return BackendCUPS()
+    return BackendFalso()
+
+
+class RegistroImpresoras(QObject):
+    """
+    Impresoras y su estado, guardados entre consultas. Las lecturas no tocan el sistema
+    salvo la primera vez o cuando los datos pasaron de `vigencia` segundos sin un hilo
+    de refresco activo. Se puede usar desde cualquier hilo.
+    """
+    actualizado = pyqtSignal()
+
+    def __init__(self, backend=None, vigencia=30.0):
+        super().__init__()
+        self.logger = setup_logger()
+        self.backend = backend or backend_del_sistema()
+        self.vigencia = vigencia
+        self._impresoras = {}      # nombre -> InfoImpresora, en el orden del sistema
+        self._predeterminada = None
+        self._momento = None       # time.monotonic() del último refresco
+        self._candado_refresco = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    # --- REFRESCO ---
+    def refrescar(self, antiguedad_minima=0.0):
+        """
+        Vuelve a enumerar las impresoras, salvo que los datos tengan menos de
+        `antiguedad_minima` segundos. Si ya hay un refresco en curso, espera ese.
+        """
+        momento = self._momento
+        if momento is not None and time.monotonic() - momento < antiguedad_minima:
+            return
+        with self._candado_refresco:
+            if self._momento != momento:
+                return  # Otro hilo refrescó mientras se esperaba el candado
+            inicio = time.perf_counter()
+            try:
+                impresoras = {info.nombre: info for info in self.backend.enumerar()}
+                predeterminada = self.backend.predeterminada()
+            except Exception as e:
+                # Se conservan los datos anteriores; se reintenta en el próximo refresco
+                self.logger.error(f"Error al enumerar las impresoras: {str(e)}")
+                self._momento = time.monotonic()
+                return
+            self._impresoras = impresoras
+            self._predeterminada = predeterminada
+            self._momento = time.monotonic()
+            self.logger.debug(f"Impresoras enumeradas: {len(impresoras)} en "
+                             f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+        self.actualizado.emit()
+
+    def _vigente(self):
+        if self._momento is None:
+            self.refrescar()
+        elif self._hilo is None and time.monotonic() - self._momento > self.vigencia:
+            self.refrescar()
+
+    def iniciar(self, intervalo=30.0):
+        """Refresca en un hilo de fondo ahora y cada `intervalo` segundos."""
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._refrescar_periodicamente, args=(intervalo,),
+                                      name="registro_impresoras", daemon=True)
+        self._hilo.start()
+
+    def _refrescar_periodicamente(self, intervalo):
+        self.refrescar()
+        while not self._detener.wait(intervalo):
+            self.refrescar()
+
+    def detener(self):
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join(timeout=5)
+            self._hilo = None
+
+    # --- CONSULTAS ---
+    def impresoras(self):
+        self._vigente()
+        return list(self._impresoras.values())
+
+    def nombres(self):
+        self._vigente()
+        return list(self._impresoras)
+
+    def obtener(self, nombre):
+        """InfoImpresora de `nombre`, o None si no está instalada."""
+        self._vigente()
+        return self._impresoras.get(nombre)
+
+    def predeterminada(self):
+        """Impresora predeterminada del sistema o, si no hay, la primera instalada."""
+        self._vigente()
+        if self._predeterminada:
+            return self._predeterminada
+        return next(iter(self._impresoras), None)
+
+    def estado(self, nombre):
+        """(True, mensaje) si la impresora puede recibir trabajos; (False, motivo) si no."""
+        info = self.obtener(nombre)
+        if info is None:
+            return (False, f"La impresora '{nombre}' no está instalada")
+        return (info.lista, info.mensaje)
+
+    def es_tsc(self, nombre):
+        info = self.obtener(nombre)
+        return (info or InfoImpresora(nombre or '')).es_tsc
+
+
+_registro = None
+_candado_registro = threading.Lock()
+
+
+def registro_impresoras():
+    """
+    Registro compartido por toda la aplicación, con el backend del sistema. Conviene
+    crearlo desde el hilo de la interfaz; si lo crea otro hilo, se pasa al de la
+    aplicación para que `actualizado` no quede atado a un hilo que puede terminar.
+    """
+    global _registro
+    with _candado_registro:
+        if _registro is None:
+            _registro = RegistroImpresoras()
+            aplicacion = QCoreApplication.instance()
+            if aplicacion is not None and _registro.thread() is not aplicacion.thread():
+                _registro.moveToThread(aplicacion.thread())
+        return _registro
@@ -0,0 +1,374 @@
+"""
+Transportes de impresión: cómo llegan a la impresora los bytes de un trabajo ya armado.
+
+  - TransporteWin32: cola de impresión de Windows (win32print), con el handle abierto
+    y reutilizado entre trabajos.
+  - TransporteTCP: socket en crudo a una impresora de etiquetas en red (puerto 9100),
+    con la conexión abierta y reutilizada entre trabajos.
+  - TransporteCUPS: cola raw de CUPS mediante `lp`.
+  - TransporteArchivo: archivo (se agrega al final) o carpeta de spool (un archivo por trabajo).
+
+Todos exponen enviar(datos, nombre_trabajo), enviar_partes(partes, nombre_trabajo) para
+un trabajo largo que se genera por tramos (sin juntarlo en memoria), estado() ->
+(lista, mensaje) y cerrar().
+El estado se guarda unos segundos (`vigencia_estado`) para que verificarlo antes de
+cada ticket no cueste una consulta a la impresora. Solo TransporteWin32 necesita
+pywin32, y lo importa al usarse.
+"""
+import itertools
+import os
+import select
+import shutil
+import socket
+import subprocess
+import time
+from utils.logger_config import setup_logger
+
+WIN32 = 'win32'
+TCP = 'tcp'
+CUPS = 'cups'
+ARCHIVO = 'archivo'
+
+# Bits de estado de win32print (PRINTER_STATUS_*) que impiden imprimir
+_ESTADOS_WIN32 = {
+    0x00000001: "Pausada",
+    0x00000002: "Error",
+    0x00000008: "Papel atascado",
+    0x00000010: "Papel agotado",
+    0x00000080: "Fuera de línea",
+    0x00100000: "Necesita atención del usuario",
+    0x00400000: "Puerta abierta",
+    0x01000000: "Apagada",
+}
+
+
+def describir_estado_win32(estado):
+    """(True, mensaje) o (False, motivo) a partir de los bits PRINTER_STATUS_* de win32print."""
+    problemas = [mensaje for bit, mensaje in _ESTADOS_WIN32.items() if estado & bit]
+    if problemas:
+        return (False, f"Estado de la impresora: {', '.join(problemas)}")
+    return (True, "La impresora está lista")
+
+
+class ErrorTransporte(Exception):
+    """No se pudo entregar el trabajo a la impresora."""
+
+
+class Transporte:
+    """Base de los transportes: guarda el último estado consultado durante `vigencia_estado` segundos."""
+
+    tipo = None
+
+    def __init__(self, vigencia_estado=5.0):
+        self.logger = setup_logger()
+        self.vigencia_estado = vigencia_estado
+        self._estado = None
+        self._momento_estado = 0.0
+
+    def enviar(self, datos, nombre_trabajo="Ticket"):
+        self.enviar_partes((datos,), nombre_trabajo)
+
+    def enviar_partes(self, partes, nombre_trabajo="Ticket"):
+        """Envía como un solo trabajo los bloques de bytes de `partes` a medida que se generan."""
+        raise NotImplementedError
+
+    def _consultar_estado(self):
+        raise NotImplementedError
+
+    def estado(self, forzar=False):
+        """(True, mensaje) si la impresora puede recibir trabajos; (False, motivo) si no."""
+        ahora = time.monotonic()
+        if forzar or self._estado is None or ahora - self._momento_estado > self.vigencia_estado:
+            try:
+                self._estado = self._consultar_estado()
+            except Exception as e:
+                self._estado = (False, str(e))
+            self._momento_estado = ahora
+        return self._estado
+
+    def _invalidar_estado(self):
+        self._estado = None
+
+    def cerrar(self):
+        pass
+
+
+class TransporteWin32(Transporte):
+    """Cola de impresión de Windows en modo RAW; el handle se abre una vez y se reutiliza."""
+
+    tipo = WIN32
+
+    def __init__(self, impresora, vigencia_estado=5.0):
+        super().__init__(vigencia_estado)
+        self.impresora = impresora
+        self._handle = None
+
+    def __str__(self):
+        return str(self.impresora)
+
+    def _abrir(self):
+        import win32print
+        if self._handle is None:
+            self._handle = win32print.OpenPrinter(self.impresora)
+        return self._handle
+
+    def enviar(self, datos, nombre_trabajo="Ticket"):
+        for intento in range(2):
+            try:
+                self._enviar_documento((datos,), nombre_trabajo)
+                return
+            except ErrorTransporte:
+                # Un handle viejo (impresora reinstalada, spooler reiniciado) se reabre una vez
+                if intento:
+                    raise
+
+    def enviar_partes(self, partes, nombre_trabajo="Ticket"):
+        self._enviar_documento(partes, nombre_trabajo)
+
+    def _enviar_documento(self, partes, nombre_trabajo):
+        import pywintypes
+        import win32print
+        handle = self._abrir()
+        try:
+            win32print.StartDocPrinter(handle, 1, (nombre_trabajo, None, 'RAW'))
+            try:
+                win32print.StartPagePrinter(handle)
+                for parte in partes:
+                    win32print.WritePrinter(handle, parte)
+                win32print.EndPagePrinter(handle)
+            except BaseException:
+                # Trabajo a medias (error o cancelación de quien genera las partes):
+                # AbortPrinter lo borra de la cola; EndDocPrinter imprimiría lo ya enviado
+                try:
+                    win32print.AbortPrinter(handle)
+                except pywintypes.error:
+                    pass
+                raise
+            win32print.EndDocPrinter(handle)
+        except pywintypes.error as e:
+            self.cerrar()
+            self._invalidar_estado()
+            raise ErrorTransporte(f"Error al enviar a '{self.impresora}': {e}") from e
+        except BaseException:
+            self.cerrar()
+            raise
+
+    def _consultar_estado(self):
+        import win32print
+        try:
+            estado = win32print.GetPrinter(self._abrir(), 2).get('Status', 0)
+        except Exception as e:
+            self.cerrar()
+            return (False, f"La impresora '{self.impresora}' no está disponible: {e}")
+        return describir_estado_win32(estado)
+
+    def cerrar(self):
+        if self._handle is not None:
+            import win32print
+            try:
+                win32print.ClosePrinter(self._handle)
+            except Exception:
+                pass
+            self._handle = None
+
+
+class TransporteTCP(Transporte):
+    """Socket TCP en crudo (JetDirect, puerto 9100) que se mantiene abierto entre trabajos."""
+
+    tipo = TCP
+
+    def __init__(self, host, puerto=9100, timeout=5.0, vigencia_estado=5.0):
+        super().__init__(vigencia_estado)
+        self.host = host
+        self.puerto = puerto
+        self.timeout = timeout
+        self._conexion = None
+
+    def __str__(self):
+        return f"{self.host}:{self.puerto}"
+
+    def _conexion_viva(self):
+        """Sin esperar: una conexión que la impresora cerró queda legible con 0 bytes."""
+        if self._conexion is None:
+            return False
+        try:
+            legible, _, _ = select.select([self._conexion], [], [], 0)
+            if legible and not self._conexion.recv(1, socket.MSG_PEEK):
+                self.cerrar()
+                return False
+            return True
+        except OSError:
+            self.cerrar()
+            return False
+
+    def _conectar(self):
+        if not self._conexion_viva():
+            self._conexion = socket.create_connection((self.host, self.puerto), timeout=self.timeout)
+            self._conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._conexion.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return self._conexion
+
+    def enviar_partes(self, partes, nombre_trabajo="Ticket"):
+        try:
+            conexion = self._conectar()
+            for parte in partes:
+                conexion.sendall(parte)
+        except OSError as e:
+            self.cerrar()
+            self._invalidar_estado()
+            raise ErrorTransporte(f"Error al enviar a {self.host}:{self.puerto}: {e}") from e
+        except Exception:
+            self.cerrar()  # Trabajo a medias: el siguiente empieza en una conexión limpia
+            raise
+
+    def _consultar_estado(self):
+        try:
+            self._conectar()
+            return (True, f"Conectada a {self.host}:{self.puerto}")
+        except OSError as e:
+            return (False, f"No se pudo conectar a {self.host}:{self.puerto}: {e}")
+
+    def cerrar(self):
+        if self._conexion is not None:
+            try:
+                self._conexion.close()
+            except OSError:
+                pass
+            self._conexion = None
+
+
+class TransporteCUPS(Transporte):
+    """Cola de CUPS en modo raw: el trabajo se entrega a `lp -o raw` por la entrada estándar."""
+
+    tipo = CUPS
+
+    def __init__(self, cola, timeout=30.0, vigencia_estado=5.0):
+        super().__init__(vigencia_estado)
+        self.cola = cola
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"CUPS {self.cola}"
+
+    def enviar_partes(self, partes, nombre_trabajo="Ticket"):
+        try:
+            proceso = subprocess.Popen(['lp', '-d', self.cola, '-o', 'raw', '-t', nombre_trabajo],
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            raise ErrorTransporte(f"No se pudo ejecutar lp: {e}") from e
+        try:
+            for parte in partes:
+                proceso.stdin.write(parte)
+            _, error = proceso.communicate(timeout=self.timeout)
+        except BaseException as e:
+            # lp solo entrega el trabajo al cerrar su entrada: matándolo antes no se imprime nada
+            proceso.kill()
+            proceso.communicate()
+            if isinstance(e, (OSError, subprocess.TimeoutExpired)):
+                raise ErrorTransporte(f"Error al enviar a lp: {e}") from e
+            raise
+        if proceso.returncode != 0:
+            self._invalidar_estado()
+            raise ErrorTransporte(error.decode(errors='replace').strip() or "lp falló")
+
+    def _consultar_estado(self):
+        if shutil.which('lpstat') is None:
+            return (False, "CUPS no está instalado")
+        resultado = subprocess.run(['lpstat', '-p', self.cola], capture_output=True, timeout=self.timeout)
+        salida = resultado.stdout.decode(errors='replace')
+        if resultado.returncode != 0:
+            return (False, resultado.stderr.decode(errors='replace').strip() or f"La cola '{self.cola}' no existe")
+        if 'disabled' in salida or 'deshabilitad' in salida:
+            return (False, f"La cola '{self.cola}' está deshabilitada")
+        return (True, "La cola de impresión está lista")
+
+
+class TransporteArchivo(Transporte):
+    """
+    Spool en disco. Si `ruta` es una carpeta (o termina en separador) cada trabajo se
+    escribe como un archivo nuevo, completo o ausente (se renombra al terminar); si
+    no, los trabajos se agregan al final de un archivo que queda abierto.
+    """
+
+    tipo = ARCHIVO
+
+    def __init__(self, ruta, vigencia_estado=5.0):
+        super().__init__(vigencia_estado)
+        self.ruta = ruta
+        self.es_carpeta = os.path.isdir(ruta) or ruta.endswith(('/', os.sep))
+        self._archivo = None
+        self._secuencia = itertools.count()
+
+    def __str__(self):
+        return self.ruta
+
+    def enviar_partes(self, partes, nombre_trabajo="Ticket"):
+        # Un trabajo interrumpido (error o cancelación) no deja nada en el spool
+        temporal = inicio = None
+        try:
+            if self.es_carpeta:
+                os.makedirs(self.ruta, exist_ok=True)
+                nombre = f"{time.time_ns()}_{os.getpid()}_{next(self._secuencia)}.prn"
+                temporal = os.path.join(self.ruta, nombre + '.tmp')
+                with open(temporal, 'wb') as f:
+                    for parte in partes:
+                        f.write(parte)
+                os.replace(temporal, os.path.join(self.ruta, nombre))
+                temporal = None
+            else:
+                if self._archivo is None:
+                    self._archivo = open(self.ruta, 'ab')
+                inicio = self._archivo.tell()
+                for parte in partes:
+                    self._archivo.write(parte)
+                self._archivo.flush()
+                inicio = None
+        except BaseException as e:
+            self._descartar_parcial(temporal, inicio)
+            if isinstance(e, OSError):
+                raise ErrorTransporte(f"No se pudo escribir en {self.ruta}: {e}") from e
+            raise
+
+    def _descartar_parcial(self, temporal, inicio):
+        try:
+            if temporal is not None and os.path.exists(temporal):
+                os.remove(temporal)
+            if inicio is not None and self._archivo is not None:
+                self._archivo.flush()
+                self._archivo.truncate(inicio)
+        except OSError as e:
+            self.logger.warning(f"No se pudo descartar el trabajo incompleto en {self.ruta}: {str(e)}")
+        self.cerrar()
+
+    def _consultar_estado(self):
+        carpeta = self.ruta if self.es_carpeta else (os.path.dirname(os.path.abspath(self.ruta)))
+        if os.path.isdir(carpeta) and os.access(carpeta, os.W_OK):
+            return (True, f"Spool en {self.ruta}")
+        return (False, f"No se puede escribir en {carpeta}")
+
+    def cerrar(self):
+        if self._archivo is not None:
+            try:
+                self._archivo.close()
+            except OSError:
+                pass
+            self._archivo = None
+
+
+def crear_transporte(config):
+    """
+    Transporte según la clave opcional "transporte" de printer_config.json, por ejemplo
+    {"tipo": "tcp", "host": "192.168.1.50", "puerto": 9100}, {"tipo": "cups", "cola": "TSC"}
+    o {"tipo": "archivo", "ruta": "spool/"}. Sin ella se usa la impresora de Windows "printer".
+    """
+    opciones = config.get("transporte") or {}
+    tipo = opciones.get("tipo", WIN32)
+    if tipo == WIN32:
+        return TransporteWin32(opciones.get("impresora") or config.get("printer"))
+    if tipo == TCP:
+        return TransporteTCP(opciones["host"], int(opciones.get("puerto", 9100)), float(opciones.get("timeout", 5.0)))
+    if tipo == CUPS:
+        return TransporteCUPS(opciones.get("cola") or config.get("printer"))
+    if tipo == ARCHIVO:
+        return TransporteArchivo(opciones["ruta"])
+    raise ValueError(f"Tipo de transporte desconocido: '{tipo}'")
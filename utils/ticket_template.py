@@ -0,0 +1,236 @@
+"""
+Plantilla compilada del ticket de báscula a partir de printer_config.json.
+
+La configuración se valida y se convierte una sola vez en una PlantillaTicket
+inmutable: para TSPL (impresoras TSC) un bloque de cabecera ya codificado en cp850
+y los tramos fijos de cada línea TEXT, y para PDF las coordenadas ya convertidas a
+puntos con su fuente. Imprimir un ticket queda en sustituir los valores del registro.
+No depende de win32: la usan PrintManager, la cola de impresión y los benchmarks.
+
+Un trabajo TSPL se arma en un único bloque de bytes: la configuración de la etiqueta
+va una vez y cada ticket distinto es CLS + textos + PRINT 1,<copias>, de modo que N
+copias o un lote de registros viajan en un solo trabajo y una sola escritura.
+"""
+import io
+from typing import NamedTuple
+
+CODIFICACION = 'cp850'
+MM_A_PUNTOS = 2.83465
+CAMPOS_OBLIGATORIOS = ["operario", "cantidad", "codigo_producto", "nombre_producto", "peso", "fecha"]
+
+# (campo, etiqueta en TSPL, etiqueta en PDF, sufijo del valor)
+_CAMPOS = (
+    ("fecha", "Fecha", "Fecha", ""),
+    ("operario", "Operario", "Operario", ""),
+    ("codigo_producto", "Codigo", "Código Producto", ""),
+    ("nombre_producto", "Producto", "Nombre Producto", ""),
+    ("cantidad", "Cantidad", "Cantidad", ""),
+    ("peso", "Peso", "Peso", " Kg"),
+)
+
+
+def validar_config(config):
+    """Lanza ValueError/TypeError si printer_config.json no tiene la estructura esperada."""
+    if not isinstance(config, dict):
+        raise ValueError("La configuración debe ser un diccionario")
+
+    # Validar claves principales
+    if "printer" not in config:
+        raise ValueError("El JSON no contiene una impresora configurada")
+    if not config["printer"]:
+        raise ValueError("El nombre de la impresora no puede estar vacío")
+
+    # Validar dimensiones
+    for dim in ["Alto_Hoja", "Ancho_Hoja"]:
+        if dim not in config:
+            raise ValueError(f"Falta la dimensión '{dim}' en el JSON")
+        if not isinstance(config[dim], (int, float)) or config[dim] <= 0:
+            raise ValueError(f"'{dim}' debe ser un número positivo")
+
+    for campo in CAMPOS_OBLIGATORIOS:
+        if campo not in config["campos"]:
+            raise ValueError(f"Falta el campo '{campo}' en la configuración.")
+        if not isinstance(config["campos"][campo], dict):
+            raise TypeError(f"'{campo}' debe ser un diccionario con claves 'x' e 'y'.")
+        if "x" not in config["campos"][campo] or "y" not in config["campos"][campo]:
+            raise ValueError(f"El campo '{campo}' debe tener claves 'x' e 'y'.")
+        if not isinstance(config["campos"][campo]["x"], (int, float)) or not isinstance(config["campos"][campo]["y"], (int, float)):
+            raise TypeError(f"Las posiciones de '{campo}' deben ser valores numéricos.")
+    return True
+
+
+def tsc_dots_to_pdf_points(dots, dpi=203):
+    """Convierte puntos TSC a puntos PDF."""
+    return float(dots) * (72.0 / dpi)
+
+
+def valores_ticket(fecha_hora, operario, cedula, producto, nombre_pro, cantidad, peso):
+    """Valores de un registro con las claves de campo de la plantilla."""
+    return {
+        "fecha": str(fecha_hora),
+        "operario": str(operario),
+        "codigo_producto": str(producto),
+        "nombre_producto": str(nombre_pro),
+        "cantidad": str(cantidad),
+        "peso": str(peso),
+    }
+
+
+_fuentes_registradas = False
+
+
+def _registrar_fuentes():
+    """Carga una sola vez por proceso las métricas de las fuentes del ticket en reportlab."""
+    global _fuentes_registradas
+    if not _fuentes_registradas:
+        from reportlab.pdfbase import pdfmetrics
+        for fuente in ("Helvetica", "Helvetica-Bold"):
+            pdfmetrics.getFont(fuente)
+        _fuentes_registradas = True
+
+
+def _escapar_tspl(texto):
+    return texto.replace('"', '\\"')
+
+
+class PlantillaTicket(NamedTuple):
+    ancho_pdf: float           # Tamaño de página del PDF en puntos
+    alto_pdf: float
+    cabecera_tspl: bytes       # CLS + SIZE/GAP/...: configuración de la etiqueta, una vez por trabajo
+    cuerpo_tspl: bytes         # Línea y título, fijos en cada etiqueta
+    tramos_tspl: tuple         # Bytes fijos entre los valores: len(claves_tspl) + 1 tramos
+    claves_tspl: tuple         # Campo que va en cada hueco
+    campos_pdf: tuple          # (x, y, fuente, tamaño, texto fijo o None, clave o None, sufijo)
+
+    def _etiqueta(self, partes, valores, copias):
+        tramos = self.tramos_tspl
+        partes.append(self.cuerpo_tspl)
+        partes.append(tramos[0])
+        for i, clave in enumerate(self.claves_tspl, 1):
+            partes.append(_escapar_tspl(valores[clave]).encode(CODIFICACION, errors='replace'))
+            partes.append(tramos[i])
+        partes.append(b"PRINT 1,%d\n" % copias)
+
+    def tspl(self, valores, copias=1):
+        """Trabajo TSPL completo (bytes) con `copias` etiquetas iguales de un registro."""
+        return self.tspl_lote([valores], copias)
+
+    def tspl_lote(self, lista_valores, copias=1, cabecera=True):
+        """
+        Trabajo TSPL (bytes) con varias etiquetas: `copias` de cada registro. Los
+        registros iguales consecutivos se juntan en un solo PRINT con más copias.
+        Con cabecera=False empieza con CLS, para continuar un trabajo enviado por tramos.
+        """
+        if copias < 1:
+            raise ValueError("El número de copias debe ser al menos 1")
+        partes = [self.cabecera_tspl if cabecera else b"CLS\n"]
+        anterior = None
+        repetidas = 0
+        for valores in lista_valores:
+            if valores == anterior:
+                repetidas += copias
+                continue
+            if anterior is not None:
+                self._etiqueta(partes, anterior, repetidas)
+                partes.append(b"CLS\n")
+            anterior = valores
+            repetidas = copias
+        if anterior is None:
+            raise ValueError("No hay registros para imprimir")
+        self._etiqueta(partes, anterior, repetidas)
+        return b''.join(partes)
+
+    def textos_pdf(self, valores):
+        """
+        Líneas del ticket en PDF: (x, y, fuente, tamaño, texto) con los valores del registro.
+        Las usan el ticket individual (reportlab) y la reimpresión por lotes (EscritorPDF).
+        """
+        return [(x, y, fuente, tamano, fijo if clave is None else f"{fijo}{valores[clave]}{sufijo}")
+                for x, y, fuente, tamano, fijo, clave, sufijo in self.campos_pdf]
+
+    def dibujar_pdf(self, lienzo, valores):
+        """Dibuja el ticket en un canvas de reportlab del tamaño (ancho_pdf, alto_pdf)."""
+        for x, y, fuente, tamano, texto in self.textos_pdf(valores):
+            lienzo.setFont(fuente, tamano)
+            lienzo.drawString(x, y, texto)
+
+    def pdf(self, lista_valores, copias=1):
+        """
+        PDF (bytes) con `copias` páginas de cada registro, armado en memoria: no pasa
+        por un archivo temporal y varios trabajos pueden generarse a la vez.
+        """
+        from reportlab.pdfgen import canvas
+        _registrar_fuentes()
+        salida = io.BytesIO()
+        lienzo = canvas.Canvas(salida, pagesize=(self.ancho_pdf, self.alto_pdf))
+        primera = True
+        for valores in lista_valores:
+            for _ in range(copias):
+                if not primera:
+                    lienzo.showPage()
+                self.dibujar_pdf(lienzo, valores)
+                primera = False
+        lienzo.save()
+        return salida.getvalue()
+
+
+def compilar_plantilla(config):
+    """Valida la configuración y construye la PlantillaTicket."""
+    validar_config(config)
+    campos = config["campos"]
+    size_general = config.get("SizeG_Fuentes", 10)
+
+    # --- TSPL ---
+    alto_mm = float(config.get("Alto_Hoja", 80))
+    ancho_mm = float(config.get("Ancho_Hoja", 100))
+    size_titulo = str(size_general / 8)
+    size_normal = str(size_general / 10)
+    cabecera = [
+        "CLS\n",
+        f"SIZE {ancho_mm:.1f} mm, {alto_mm:.1f} mm",
+        "GAP 3 mm, 0",
+        "DIRECTION 1",  # 1 corrige la orientación
+        "REFERENCE 0,0",
+        "OFFSET 0 mm",
+        "SET TEAR ON",
+        "CODEPAGE 850",
+        "DENSITY 8",
+        "SPEED 4",
+    ]
+    cuerpo = ["BAR 50,55,798,2"]
+    if "titulo" in campos:
+        t = campos["titulo"]
+        titulo = _escapar_tspl(config.get("Titulo", ""))
+        cuerpo.append(f'TEXT {t["x"]},{t["y"]},"4",0,{size_titulo},{size_titulo},"{titulo}"')
+    cabecera_tspl = ''.join(f"{linea}\n" for linea in cabecera).encode(CODIFICACION, errors='replace')
+    cuerpo_tspl = ''.join(f"{linea}\n" for linea in cuerpo).encode(CODIFICACION, errors='replace')
+
+    tramos = []
+    claves = []
+    pendiente = ''
+    for clave, etiqueta, _, sufijo in _CAMPOS:
+        if clave not in campos:
+            continue
+        c = campos[clave]
+        tramos.append(pendiente + f'TEXT {c["x"]},{c["y"]},"3",0,{size_normal},{size_normal},"{etiqueta}: ')
+        claves.append(clave)
+        pendiente = f'{sufijo}"\n'
+    tramos.append(pendiente)
+    tramos_tspl = tuple(t.encode(CODIFICACION, errors='replace') for t in tramos)
+
+    # --- PDF ---
+    alto_pdf = int(config["Alto_Hoja"]) * MM_A_PUNTOS
+    ancho_pdf = int(config["Ancho_Hoja"]) * MM_A_PUNTOS
+
+    def posicion(campo):
+        # Igual que el cálculo original: la Y se invierte restándola del alto de la hoja
+        return (tsc_dots_to_pdf_points(campos[campo]["x"]),
+                tsc_dots_to_pdf_points(alto_pdf - campos[campo]["y"]))
+
+    campos_pdf = []
+    if "titulo" in campos:
+        campos_pdf.append((*posicion("titulo"), "Helvetica-Bold", 14, config.get("Titulo") or "", None, ""))
+    for clave, _, etiqueta, sufijo in _CAMPOS:
+        campos_pdf.append((*posicion(clave), "Helvetica", size_general, f"{etiqueta}: ", clave, sufijo))
+
+    return PlantillaTicket(ancho_pdf, alto_pdf, cabecera_tspl, cuerpo_tspl, tramos_tspl, tuple(claves), tuple(campos_pdf))